@@ -1,12 +1,20 @@
 from django.contrib import admin
+from radiocms.models.fingerprint import AudioFingerprint
+from radiocms.models.frame_index import FrameIndex
 from radiocms.models.library import LibraryItem
+from radiocms.models.mpx import MpxScan
 from radiocms.models.playlist import Playlist
 from radiocms.models.playlistitem import PlaylistItem
+from radiocms.models.plays import StationPlayCount
+from radiocms.models.processing import ProcessingPreset
+from radiocms.models.schedule import StationLog
+from radiocms.models.upload import DirectUpload, UploadSession
 from radiocms.apps.airadio.models.settings import Station
 
 @admin.register(LibraryItem)
 class LibraryItemAdmin(admin.ModelAdmin):
-    list_display = ("title", "artist", "genre", "rotation", "allow_skip", "is_clean", "created_at")
+    list_display = ("title", "artist", "genre", "rotation", "duration", "loudness_lufs", "allow_skip", "is_clean",
+                    "created_at")
     search_fields = ("title", "artist", "genre")
     list_filter = ("rotation", "is_clean", "allow_skip")
     ordering = ("-created_at",)
@@ -24,3 +32,60 @@ class PlaylistItemAdmin(admin.ModelAdmin):
     search_fields = ("library_item__title", "playlist__name")
     list_filter = ("playlist__station",)
     ordering = ("playlist", "position")
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ("filename", "asset", "offset", "length", "completed_at", "created_by", "created_at")
+    search_fields = ("filename", "key")
+    list_filter = ("asset", "completed_at")
+    ordering = ("-created_at",)
+
+@admin.register(DirectUpload)
+class DirectUploadAdmin(admin.ModelAdmin):
+    list_display = ("key", "asset", "size", "existing", "created_by", "created_at")
+    search_fields = ("key",)
+    list_filter = ("asset", "existing")
+    ordering = ("-created_at",)
+
+@admin.register(FrameIndex)
+class FrameIndexAdmin(admin.ModelAdmin):
+    list_display = ("library_item", "format", "sample_rate", "frame_count", "created_at")
+    search_fields = ("library_item__title", "library_item__artist")
+    list_filter = ("format",)
+    exclude = ("offsets",)
+
+@admin.register(AudioFingerprint)
+class AudioFingerprintAdmin(admin.ModelAdmin):
+    list_display = ("library_item", "hash_count", "created_at")
+    search_fields = ("library_item__title", "library_item__artist")
+    exclude = ("signature", "peaks")
+
+@admin.register(StationPlayCount)
+class StationPlayCountAdmin(admin.ModelAdmin):
+    list_display = ("library_item", "station", "play_count", "last_played_at")
+    search_fields = ("library_item__title", "library_item__artist", "station__name")
+    list_filter = ("station",)
+    ordering = ("-play_count",)
+
+@admin.register(MpxScan)
+class MpxScanAdmin(admin.ModelAdmin):
+    list_display = ("library_item", "mpx_power_max_dbr", "seconds_over_limit", "compliant", "loudness_lufs",
+                    "scanned_at")
+    search_fields = ("library_item__title", "library_item__artist")
+    list_filter = ("compliant",)
+    ordering = ("-mpx_power_max_dbr",)
+
+@admin.register(StationLog)
+class StationLogAdmin(admin.ModelAdmin):
+    list_display = ("station", "date", "song_count", "relaxed_count", "generated_at")
+    list_filter = ("station",)
+    date_hierarchy = "date"
+    exclude = ("entries",)
+    ordering = ("-date", "station")
+
+@admin.register(ProcessingPreset)
+class ProcessingPresetAdmin(admin.ModelAdmin):
+    list_display = ("name", "sha256", "created_by", "updated_at")
+    search_fields = ("name", "description", "sha256")
+    readonly_fields = ("sha256",)
+    ordering = ("name",)
@@ -4,7 +4,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from ...utils.storage import upload_to_s3
+from ...utils.storage import upload_assets
 
 logger = logging.getLogger(__name__)
 
@@ -23,29 +23,26 @@ def upload_media(request):
         # Log file details
         logger.info(f"Audio file details: name={audio_file.name}, size={audio_file.size}, content_type={audio_file.content_type}")
 
-        # Upload audio to S3
-        audio_url = upload_to_s3(audio_file, 'audio')
-        if not audio_url:
+        cover_art = request.FILES.get('cover_art')
+        if cover_art:
+            logger.info(f"Cover art details: name={cover_art.name}, size={cover_art.size}")
+        lyrics_file = request.FILES.get('lyrics')
+        if lyrics_file:
+            logger.info(f"Lyrics file details: name={lyrics_file.name}, size={lyrics_file.size}")
+
+        # Upload all files to S3 in parallel
+        urls, _ = upload_assets({
+            'audio': (audio_file, 'audio', True),
+            'cover_art': (cover_art, 'covers', False),
+            'lyrics': (lyrics_file, 'lyrics', False),
+        })
+        if not urls:
             logger.error("Failed to upload audio file to S3")
             return Response({'error': 'Failed to upload audio file'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        # Handle cover art if present
-        cover_art_url = None
-        if 'cover_art' in request.FILES:
-            cover_art = request.FILES['cover_art']
-            logger.info(f"Cover art details: name={cover_art.name}, size={cover_art.size}")
-            cover_art_url = upload_to_s3(cover_art, 'covers')
-            if not cover_art_url:
-                logger.error("Failed to upload cover art to S3")
-
-        # Handle lyrics file if present
-        lyrics_url = None
-        if 'lyrics' in request.FILES:
-            lyrics_file = request.FILES['lyrics']
-            logger.info(f"Lyrics file details: name={lyrics_file.name}, size={lyrics_file.size}")
-            lyrics_url = upload_to_s3(lyrics_file, 'lyrics')
-            if not lyrics_url:
-                logger.error("Failed to upload lyrics file to S3")
+        audio_url = urls['audio']
+        cover_art_url = urls['cover_art'] or None
+        lyrics_url = urls['lyrics'] or None
 
         # Create response with URLs
         response_data = {
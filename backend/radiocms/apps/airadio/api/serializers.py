@@ -39,17 +39,26 @@ class PodcastSerializer(serializers.ModelSerializer):
 class libraryitemSerializer(serializers.ModelSerializer):
     class Meta:
         model = LibraryItem
-        fields = '__all__'
+        exclude = ['embedding', 'search_vector']
 
 class libraryitemlistSerializer(serializers.ModelSerializer):
     rotation = serializers.SerializerMethodField()
 
     class Meta:
         model = LibraryItem
-        fields = '__all__'
+        exclude = ['embedding', 'search_vector']
 
     def get_rotation(self, obj):
-        return PlaylistItem.objects.filter(library_item=obj).first().rotation
+        playlist_item = PlaylistItem.objects.filter(library_item=obj).first()
+        return playlist_item.rotation if playlist_item else obj.rotation
+
+class StationSongSerializer(libraryitemlistSerializer):
+    """
+    A song of a station's playlists, from PlaylistItemViewSet.songs_by_station's
+    annotated queryset: the rotation and id of the station's own playlist item
+    """
+    rotation = serializers.CharField(source='station_rotation', read_only=True)
+    playlist_item_id = serializers.UUIDField(read_only=True)
 
 class PlaylistItemSerializer(serializers.ModelSerializer):
     class Meta:
@@ -6,14 +6,20 @@ from rest_framework.views import APIView
 from radiocms.models.library import LibraryItem
 from radiocms.models.playlist import Playlist
 from radiocms.models.playlistitem import PlaylistItem
+from radiocms.utils.playlists import (PlaylistOperationError, add_items, append_position, apply_operations,
+                                      lock_playlist, move_item, position_after)
 
 from ..models import  Wall, Station, Format, Podcast, Category
 from .serializers import ( WallSerializer, StationSerializer, FormatSerializer, PodcastSerializer, \
-                          PlaylistSerializer, PlaylistItemSerializer, libraryitemSerializer, libraryitemlistSerializer,
+                          PlaylistSerializer, PlaylistItemSerializer, libraryitemSerializer, StationSongSerializer,
                           CategorySerializer)
 from rest_framework.response import Response
 
 from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Subquery
 from django.shortcuts import get_object_or_404
 from rest_framework import status
 
@@ -84,6 +90,16 @@ class PlaylistViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(playlists, many=True)
         return Response(serializer.data)
 
+# Largest number of songs one bulk_add request may add
+MAX_BULK_ADD = 1000
+
+
+class StationSongPagination(PageNumberPagination):
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+
+
 class PlaylistItemViewSet(viewsets.ModelViewSet):
     queryset = PlaylistItem.objects.all()
     serializer_class = PlaylistItemSerializer
@@ -118,25 +134,80 @@ class PlaylistItemViewSet(viewsets.ModelViewSet):
         else:
             return Response({"error": "Either playlist or station_id is required"}, status=400)
 
-        # Check if the song is already in the playlist
-        if PlaylistItem.objects.filter(playlist=playlist, library_item=library_item).exists():
-            return Response({"message": "Song already exists in this playlist"}, status=200)
-
-        # Add the song to the playlist
-        playlist_item = PlaylistItem.objects.create(
-            playlist=playlist,
-            library_item=library_item,
-            added_by=request.user,
-            position=PlaylistItem.objects.filter(playlist=playlist).count() + 1  # Auto-increment position
-        )
+        with transaction.atomic():
+            # Serializes adds to the same playlist, so they cannot take the same position
+            lock_playlist(playlist.pk)
+
+            # Check if the song is already in the playlist
+            if PlaylistItem.objects.filter(playlist=playlist, library_item=library_item).exists():
+                return Response({"message": "Song already exists in this playlist"}, status=200)
+
+            # Append, or place right after the "after" playlist item (null: at the top)
+            if "after" in request.data:
+                try:
+                    position = position_after(playlist.pk, request.data.get("after"))
+                except (PlaylistItem.DoesNotExist, ValidationError):
+                    return Response({"error": "after is not in this playlist"}, status=400)
+            else:
+                position = append_position(playlist.pk)
+
+            # Add the song to the playlist
+            playlist_item = PlaylistItem.objects.create(
+                playlist=playlist,
+                library_item=library_item,
+                added_by=request.user,
+                position=position
+            )
 
         return Response(PlaylistItemSerializer(playlist_item).data, status=201)
 
+    @action(detail=False, methods=['post'])
+    def bulk_add(self, request):
+        """
+        Adds many songs to a playlist in one transaction, appended in request
+        order. Songs already in the playlist are skipped.
+        Usage: POST /api/playlist-items/bulk_add/
+        {"library_items": [<id>, ...], "playlist": <id> | "station_id": <id>, "rotation": "medium"}
+        Without a playlist, the station's 'Default Station Playlist' is used.
+        """
+        library_item_ids = request.data.get("library_items")
+        playlist_id = request.data.get("playlist")
+        station_id = request.data.get("station_id")
+        rotation = request.data.get("rotation") or "medium"
+
+        if not isinstance(library_item_ids, list) or not library_item_ids:
+            return Response({"error": "library_items must be a non-empty list"}, status=400)
+        if len(library_item_ids) > MAX_BULK_ADD:
+            return Response({"error": f"At most {MAX_BULK_ADD} library_items per request"}, status=400)
+        if not isinstance(rotation, str) or rotation not in dict(PlaylistItem.ROTATION_CHOICES):
+            return Response({"error": "rotation must be high, medium or low"}, status=400)
+
+        if playlist_id:
+            playlist = get_object_or_404(Playlist, id=playlist_id)
+        elif station_id:
+            station = get_object_or_404(Station, id=station_id)
+            playlist, created = Playlist.objects.get_or_create(
+                station=station,
+                name="Default Station Playlist",
+                defaults={"description": f"Auto-generated for {station.name}"}
+            )
+        else:
+            return Response({"error": "Either playlist or station_id is required"}, status=400)
+
+        results = add_items(playlist.pk, library_item_ids, request.user, rotation)
+        added = sum(result["status"] == "added" for result in results)
+        return Response({"playlist": str(playlist.pk), "added": added, "results": results},
+                        status=201 if added else 200)
+
     @action(detail=False, methods=['get'])
     def songs_by_station(self, request):
         """
         Fetch all unique songs for a given station including the playlist item id.
-        Usage: /api/playlist-items/songs_by_station/?station_id=<station_id>
+        Usage: /api/playlist-items/songs_by_station/?station_id=<station_id>[&page=<n>&page_size=<n>]
+        Each song appears once, with the rotation and id of the station's playlist
+        item for it (its first, by position). The query count does not depend on
+        how many songs the station has. With page or page_size the results are
+        paginated.
         """
         station_id = request.query_params.get("station_id")
         if not station_id:
@@ -145,46 +216,73 @@ class PlaylistItemViewSet(viewsets.ModelViewSet):
         # Get the station
         station = get_object_or_404(Station, id=station_id)
 
-        # Get all playlists belonging to this station
-        playlists = Playlist.objects.filter(station=station)
-
-        # Get all playlist items linked to these playlists, with the related library_item pre-fetched
-        playlist_items = PlaylistItem.objects.filter(playlist__in=playlists).select_related("library_item")
-
-        # Build a list of unique songs, including the playlist item id
-        unique_songs = []
-        seen_library_item_ids = set()
-        for item in playlist_items:
-            # Only add the song if it hasn't been added already
-            if item.library_item.id not in seen_library_item_ids:
-                seen_library_item_ids.add(item.library_item.id)
-                # Serialize the library item data
-                song_data = libraryitemlistSerializer(item.library_item).data
-                # Include the playlist item id so it can be used for deletion
-                song_data["playlist_item_id"] = item.id
-                unique_songs.append(song_data)
-
-        return Response(unique_songs)
+        # The station's first playlist item for each song
+        station_items = PlaylistItem.objects.filter(
+            playlist__station=station, library_item=OuterRef("pk")
+        ).order_by("position", "id")
+        songs = (LibraryItem.objects
+                 .filter(Exists(station_items))
+                 .annotate(playlist_item_id=Subquery(station_items.values("id")[:1]),
+                           station_rotation=Subquery(station_items.values("rotation")[:1]),
+                           station_position=Subquery(station_items.values("position")[:1]))
+                 .defer("embedding", "search_vector")
+                 .prefetch_related("formats", "categories")
+                 .order_by("station_position", "id"))
+
+        if "page" in request.query_params or "page_size" in request.query_params:
+            paginator = StationSongPagination()
+            page = paginator.paginate_queryset(songs, request, view=self)
+            return paginator.get_paginated_response(StationSongSerializer(page, many=True).data)
+        return Response(StationSongSerializer(songs, many=True).data)
 
     def destroy(self, request, *args, **kwargs):
         """
-        Deletes a PlaylistItem and then updates the positions of the remaining items
-        in the same playlist.
+        Deletes a PlaylistItem. Positions are sparse, so the remaining items
+        keep theirs and their order.
         """
         instance = self.get_object()
-        playlist = instance.playlist
-        # Delete the playlist item
         self.perform_destroy(instance)
-
-        # Reorder the remaining items in the playlist
-        remaining_items = PlaylistItem.objects.filter(playlist=playlist).order_by('position')
-        for index, item in enumerate(remaining_items, start=1):
-            if item.position != index:
-                item.position = index
-                item.save()
-
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(detail=True, methods=['post'])
+    def move(self, request, pk=None):
+        """
+        Moves a PlaylistItem right after another item of its playlist.
+        Usage: POST /api/playlist-items/<id>/move/ {"after": <playlist item id> | null}
+        (null moves it to the top)
+        """
+        playlist_item = self.get_object()
+        if "after" not in request.data:
+            return Response({"error": "after is required"}, status=400)
+        try:
+            move_item(playlist_item, request.data["after"])
+        except (PlaylistItem.DoesNotExist, ValidationError):
+            return Response({"error": "after is not in this playlist"}, status=400)
+        return Response(PlaylistItemSerializer(playlist_item).data)
+
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """
+        Applies many insert/move/remove operations to one playlist in a
+        single transaction; if any fails, none are applied.
+        Usage: POST /api/playlist-items/batch/
+        {"playlist": <id>, "operations": [
+            {"op": "insert", "library_item": <id>, "after": <playlist item id> | null, "rotation": "high"},
+            {"op": "move", "item": <playlist item id>, "after": <playlist item id> | null},
+            {"op": "remove", "item": <playlist item id>}]}
+        """
+        playlist_id = request.data.get("playlist")
+        operations = request.data.get("operations")
+        if not playlist_id or not isinstance(operations, list):
+            return Response({"error": "playlist and a list of operations are required"}, status=400)
+        playlist = get_object_or_404(Playlist, id=playlist_id)
+
+        try:
+            results = apply_operations(playlist.pk, operations, request.user)
+        except PlaylistOperationError as e:
+            return Response({"error": str(e), "index": e.index}, status=400)
+        return Response({"playlist": str(playlist.pk), "results": results})
+
 
 class UpdatePlaylistItemRotation(APIView):
 
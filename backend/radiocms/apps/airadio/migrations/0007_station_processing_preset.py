@@ -0,0 +1,20 @@
+# Generated by Django 5.1.6 on 2026-10-18 18:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airadio', '0006_delete_library'),
+        ('radiocms', '0016_processingpreset'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='station',
+            name='processing_preset',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stations', to='radiocms.processingpreset', verbose_name='Processing preset'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airadio', '0007_station_processing_preset'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stationid',
+            name='source_media_url',
+            field=models.URLField(blank=True),
+        ),
+    ]
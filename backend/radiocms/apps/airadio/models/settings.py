@@ -8,6 +8,8 @@ class Station(models.Model):
     stream_url = models.URLField(_("Stream URL"), blank=True)
     is_retail = models.BooleanField(_("Is Retail"), default=False)
     is_streaming = models.BooleanField(_("Is Streaming"), default=False)
+    processing_preset = models.ForeignKey("radiocms.ProcessingPreset", verbose_name=_("Processing preset"),
+                                          on_delete=models.SET_NULL, null=True, blank=True, related_name="stations")
     retail = models.CharField(_("Retail"), max_length=255)
     location = models.CharField(_("Location"), max_length=255)
     created_at = models.DateTimeField(auto_now_add=True)
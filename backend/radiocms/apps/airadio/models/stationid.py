@@ -11,6 +11,7 @@ class StationID(models.Model):
     title = models.CharField(max_length=255)
     station = models.ForeignKey("Station", on_delete=models.CASCADE, related_name="station_ids")
     media_url = models.URLField(max_length=200)  # Audio file URL
+    source_media_url = models.URLField(max_length=200, blank=True)  # Unprocessed upload, when media_url is a render
     played_at = models.DateTimeField(auto_now=True)
 
     class Meta:
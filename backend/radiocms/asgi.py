@@ -13,4 +13,19 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'radiocms.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+
+from radiocms.utils.backends import get_storage_backend  # noqa: E402
+from radiocms.views.mic import mic_websocket  # noqa: E402
+
+# Verify media storage once at startup; the upload path re-checks on a TTL
+get_storage_backend().check()
+
+
+async def application(scope, receive, send):
+    # Django does not speak WebSocket; the live mic stream is handled here
+    if scope['type'] == 'websocket' and scope['path'] == settings.MIC_WEBSOCKET_PATH:
+        return await mic_websocket(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -1,20 +1,124 @@
 from django.conf import settings
 import boto3
-from botocore.exceptions import ClientError
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
 import json
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
+_client = None
+_client_lock = threading.Lock()
+
+_bucket_lock = threading.Lock()
+_bucket_verified_at = None
+
+
 def get_s3_client():
     """
-    Get configured S3 client with proper credentials
+    Get the process-wide S3 client.
+
+    boto3 clients are thread-safe, so a single client (and its urllib3
+    connection pool) is shared by every view and worker thread instead of
+    being rebuilt, with a fresh TLS handshake, for each upload.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = boto3.client('s3',
+                    aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+                    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                    region_name=settings.AWS_S3_REGION_NAME,
+                    endpoint_url=settings.AWS_S3_ENDPOINT_URL or None,
+                    config=Config(
+                        max_pool_connections=settings.AWS_S3_MAX_POOL_CONNECTIONS,
+                        connect_timeout=settings.AWS_S3_CONNECT_TIMEOUT,
+                        read_timeout=settings.AWS_S3_READ_TIMEOUT,
+                        retries={
+                            'max_attempts': settings.AWS_S3_MAX_ATTEMPTS,
+                            'mode': 'standard',
+                        },
+                    )
+                )
+    return _client
+
+
+def get_transfer_config():
     """
-    return boto3.client('s3',
-        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-        region_name=settings.AWS_S3_REGION_NAME
+    Multipart settings for streaming uploads. Peak memory per upload is at
+    most about 2 * AWS_S3_MULTIPART_CHUNKSIZE * AWS_S3_MAX_CONCURRENCY
+    (chunks read ahead and chunks being sent), independent of the file size.
+    """
+    config = TransferConfig(
+        multipart_threshold=settings.AWS_S3_MULTIPART_THRESHOLD,
+        multipart_chunksize=settings.AWS_S3_MULTIPART_CHUNKSIZE,
+        max_concurrency=settings.AWS_S3_MAX_CONCURRENCY,
+        use_threads=settings.AWS_S3_MAX_CONCURRENCY > 1,
     )
+    # File objects (not paths) are read ahead into memory, by default up to
+    # 10 chunks; keep that to the chunks being sent
+    config.max_in_memory_upload_chunks = max(1, settings.AWS_S3_MAX_CONCURRENCY)
+    return config
+
+
+def reset_s3_client():
+    """
+    Drop the shared client and the cached bucket check, e.g. after the S3
+    settings have changed.
+    """
+    global _client, _bucket_verified_at
+    with _client_lock:
+        _client = None
+    with _bucket_lock:
+        _bucket_verified_at = None
+
+
+def verify_bucket(force=False):
+    """
+    Check that the media bucket is reachable with the configured credentials.
+
+    A successful check is cached for AWS_S3_BUCKET_CHECK_TTL seconds so the
+    upload path does not pay for a HEAD request on every file. Failures are
+    not cached, so the next call re-checks straight away.
+    """
+    global _bucket_verified_at
+    bucket_name = settings.AWS_STORAGE_BUCKET_NAME
+    if not bucket_name:
+        logger.error("AWS_STORAGE_BUCKET_NAME is not configured")
+        return False
+
+    with _bucket_lock:
+        if (
+            not force
+            and _bucket_verified_at is not None
+            and time.monotonic() - _bucket_verified_at < settings.AWS_S3_BUCKET_CHECK_TTL
+        ):
+            return True
+
+        try:
+            get_s3_client().head_bucket(Bucket=bucket_name)
+        except ClientError as e:
+            error_code = e.response.get('Error', {}).get('Code', '')
+            if error_code == '403':
+                logger.error("Permission denied accessing bucket")
+            elif error_code == '404':
+                logger.error("Bucket not found")
+            else:
+                logger.error(f"Failed to connect to S3 bucket: {str(e)}")
+            _bucket_verified_at = None
+            return False
+        except BotoCoreError as e:
+            logger.error(f"Failed to connect to S3 bucket: {str(e)}")
+            _bucket_verified_at = None
+            return False
+
+        _bucket_verified_at = time.monotonic()
+        logger.info(f"Verified S3 bucket {bucket_name}")
+        return True
 
 def configure_s3_bucket():
     """
@@ -93,6 +197,7 @@ def configure_s3_bucket():
         )
         logger.info("CORS configuration set successfully")
 
+        verify_bucket(force=True)
         return True
     except Exception as e:
         logger.error(f"Error configuring S3 bucket: {str(e)}")
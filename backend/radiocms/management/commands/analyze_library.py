@@ -0,0 +1,40 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from radiocms.models.library import LibraryItem
+from radiocms.utils.analysis import analyze_items
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure duration, integrated loudness, loudness range and true peak of '
+        'library items that have not been analyzed yet'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Re-analyze items that already have results')
+        parser.add_argument('--batch-size', type=int, default=200, help='Items submitted to the pool at a time')
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many items')
+
+    def handle(self, *args, **options):
+        queryset = LibraryItem.objects.all() if options['all'] else LibraryItem.objects.filter(analyzed_at__isnull=True)
+        ids = list(queryset.order_by('created_at').values_list('id', flat=True)[:options['limit']])
+        self.stdout.write(
+            f'Analyzing {len(ids)} items on {settings.AUDIO_ANALYSIS_WORKERS} worker processes...'
+        )
+
+        started = time.perf_counter()
+        analyzed = failed = 0
+        for index in range(0, len(ids), options['batch_size']):
+            batch = LibraryItem.objects.filter(id__in=ids[index:index + options['batch_size']])
+            batch_analyzed, batch_failed = analyze_items(list(batch.only('id', 'audio_file')))
+            analyzed += batch_analyzed
+            failed += batch_failed
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'{analyzed + failed}/{len(ids)} items, {failed} failed ({(analyzed + failed) / elapsed:.1f} tracks/s)'
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'Analyzed {analyzed} items, {failed} failed'))
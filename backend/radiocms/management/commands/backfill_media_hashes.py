@@ -0,0 +1,122 @@
+import hashlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from radiocms.models.library import LibraryItem
+from radiocms.utils.backends import get_storage_backend
+from radiocms.utils.storage import (
+    HASH_CHUNK_SIZE, content_addressed_key, delete_media, get_public_url,
+    is_content_addressed_url, key_from_url, object_exists,
+)
+
+MEDIA_FIELDS = ('audio_file', 'cover_art', 'lyrics_file')
+
+
+class Command(BaseCommand):
+    help = (
+        'Hash existing library media, move it to content-addressed keys and '
+        'report the bytes saved by de-duplication'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=16, help='Parallel downloads/copies')
+        parser.add_argument('--dry-run', action='store_true', help='Only hash and report, change nothing')
+        parser.add_argument('--delete-originals', action='store_true',
+                            help='Delete the old uuid-named objects once rows point at the new keys')
+
+    def handle(self, *args, **options):
+        rows = list(LibraryItem.objects.values_list('id', *MEDIA_FIELDS))
+        keys = {
+            key_from_url(url)
+            for row in rows
+            for url in row[1:]
+            if url and not is_content_addressed_url(url) and key_from_url(url)
+        }
+        self.stdout.write(f'Hashing {len(keys)} objects referenced by {len(rows)} library items...')
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            hashed = list(executor.map(self._hash_object, sorted(keys)))
+
+            by_new_key = defaultdict(list)
+            new_keys = {}
+            total_bytes = 0
+            for key, new_key, size in hashed:
+                if new_key is None:
+                    continue
+                by_new_key[new_key].append((key, size))
+                new_keys[key] = new_key
+                total_bytes += size
+
+            existing = dict(zip(by_new_key, executor.map(object_exists, by_new_key)))
+            # Bytes that stay stored once duplicates share one object
+            unique_bytes = sum(
+                sources[0][1] for new_key, sources in by_new_key.items() if not existing[new_key]
+            )
+            duplicates = sum(len(sources) - 1 for sources in by_new_key.values())
+            duplicates += sum(len(sources) for new_key, sources in by_new_key.items() if existing[new_key])
+
+            self.stdout.write(
+                f'{len(new_keys)} objects hashed ({total_bytes / 1024 ** 2:.1f} MB), '
+                f'{len(by_new_key)} unique, {duplicates} duplicates'
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'Bytes saved by de-duplication: {total_bytes - unique_bytes} '
+                f'({(total_bytes - unique_bytes) / 1024 ** 2:.1f} MB)'
+            ))
+
+            if options['dry_run']:
+                return
+
+            to_copy = [
+                (sources[0][0], new_key) for new_key, sources in by_new_key.items() if not existing[new_key]
+            ]
+            list(executor.map(lambda args: self._copy_object(*args), to_copy))
+
+            self._repoint_rows(rows, new_keys)
+
+            if options['delete_originals']:
+                deleted = sum(executor.map(delete_media, [get_public_url(key) for key in new_keys]))
+                self.stdout.write(f'Deleted {deleted} original objects')
+
+    def _hash_object(self, key):
+        try:
+            body = get_storage_backend().get(key)
+        except Exception as e:
+            self.stderr.write(f'Skipping {key}: {str(e)}')
+            return key, None, 0
+
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            for chunk in iter(lambda: body.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+                size += len(chunk)
+        finally:
+            body.close()
+
+        folder, _, name = key.partition('/')
+        ext = name.rsplit('.', 1)[-1].lower() if '.' in name else 'bin'
+        return key, content_addressed_key(folder, digest.hexdigest(), ext), size
+
+    def _copy_object(self, key, new_key):
+        # Server-side copy on S3, a hard link on local storage
+        get_storage_backend().copy(key, new_key)
+
+    def _repoint_rows(self, rows, new_keys):
+        items = []
+        for row in rows:
+            item = LibraryItem(id=row[0])
+            changed = False
+            for field, url in zip(MEDIA_FIELDS, row[1:]):
+                new_key = new_keys.get(key_from_url(url))
+                setattr(item, field, get_public_url(new_key) if new_key else url)
+                changed = changed or bool(new_key)
+            if changed:
+                items.append(item)
+
+        with transaction.atomic():
+            LibraryItem.objects.bulk_update(items, MEDIA_FIELDS, batch_size=500)
+        self.stdout.write(f'Updated {len(items)} library items to content-addressed URLs')
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from radiocms.utils.audio.decode import SAMPLE_RATE
+from radiocms.utils.audio.loudness import analyze_file
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure audio analysis throughput in tracks per second per core on '
+        'synthetic stereo WAV files, at several worker process counts'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tracks', type=int, default=32, help='Tracks per run')
+        parser.add_argument('--seconds', type=float, default=180, help='Length of each track')
+        parser.add_argument('--workers', default='1,2,4', help='Comma-separated worker counts')
+
+    def handle(self, *args, **options):
+        memory_bytes = settings.AUDIO_ANALYSIS_MEMORY_MB * 1024 * 1024
+        with tempfile.TemporaryDirectory() as directory:
+            paths = [self._write_track(directory, index, options['seconds']) for index in range(4)]
+            sources = [paths[index % len(paths)] for index in range(options['tracks'])]
+
+            for workers in [int(count) for count in options['workers'].split(',')]:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    # Warm the workers up so imports are not timed
+                    list(pool.map(analyze_file, paths[:workers], [memory_bytes] * workers))
+                    started = time.perf_counter()
+                    results = list(pool.map(analyze_file, sources, [memory_bytes] * len(sources)))
+                    elapsed = time.perf_counter() - started
+
+                rate = len(sources) / elapsed
+                self.stdout.write(
+                    f'{workers:>3} workers: {rate:6.2f} tracks/s, {rate / workers:6.2f} tracks/s/core, '
+                    f'{len(sources) * options["seconds"] / elapsed:7.0f}x realtime '
+                    f'(last: {results[-1]["loudness_lufs"]:.1f} LUFS, {results[-1]["true_peak_dbtp"]:.1f} dBTP)'
+                )
+
+    def _write_track(self, directory, index, seconds):
+        rng = np.random.default_rng(index)
+        t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+        # Tone plus noise, with a slow swell so the loudness range is not zero
+        envelope = 0.3 + 0.2 * np.sin(2 * np.pi * t / 30)
+        left = envelope * (0.5 * np.sin(2 * np.pi * (220 + 110 * index) * t) + 0.1 * rng.standard_normal(len(t)))
+        right = np.roll(left, 240)
+        samples = (np.clip(np.stack([left, right], axis=1), -1, 1) * 32767).astype('<i2')
+
+        path = os.path.join(directory, f'track-{index}.wav')
+        with wave.open(path, 'wb') as f:
+            f.setnchannels(2)
+            f.setsampwidth(2)
+            f.setframerate(SAMPLE_RATE)
+            f.writeframes(samples.tobytes())
+        return path
@@ -0,0 +1,197 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from scipy.signal import butter, sosfilt
+
+from radiocms.models.fingerprint import AudioFingerprint
+from radiocms.utils.analysis import find_near_duplicates
+from radiocms.utils.audio.fingerprint import (
+    FINGERPRINT_SAMPLE_RATE, HOP_SIZE, MinHashLSHIndex, PeakExtractor, alignment, landmark_hashes, minhash_signature,
+    similarity,
+)
+
+SAMPLE_RATE = FINGERPRINT_SAMPLE_RATE
+MAJOR_SCALE = np.array([0, 2, 4, 5, 7, 9, 11])
+# What estimated MinHash similarity alone used to call a duplicate
+MINHASH_THRESHOLD = 0.35
+
+
+@lru_cache(maxsize=256)
+def _note(midi, seconds, decay, harmonics):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    frequency = 440.0 * 2 ** ((midi - 69) / 12)
+    tone = sum(np.sin(2 * np.pi * frequency * k * t) / k for k in range(1, harmonics + 1))
+    return tone * np.exp(-t / decay) * np.minimum(1, t / 0.01)
+
+
+def _add(out, start, samples):
+    start = int(start * SAMPLE_RATE)
+    end = min(len(out), start + len(samples))
+    if end > start:
+        out[start:end] += samples[:end - start]
+
+
+def synthetic_tune(rng, key, seconds):
+    """
+    Mono float32 song in the major key ``key`` (semitones above C): a
+    four-chord progression, a bass line, off-beat hi-hats and a random
+    melody from the scale, at a random tempo. Tunes in one key use the same
+    few pitches, as real songs in one key do.
+    """
+    out = np.zeros(int(seconds * SAMPLE_RATE))
+    beat = 60 / rng.uniform(80, 140)
+    progression = rng.choice([0, 1, 3, 4, 5], 4)
+    bar = 0
+    while bar * 4 * beat < seconds:
+        start = bar * 4 * beat
+        degree = progression[bar % 4]
+        for step in (0, 2, 4):
+            note = degree + step
+            _add(out, start, 0.15 * _note(48 + key + MAJOR_SCALE[note % 7] + 12 * (note // 7), 4 * beat, 2 * beat, 5))
+        for count in range(4):
+            _add(out, start + count * beat, 0.3 * _note(36 + key + MAJOR_SCALE[degree % 7], beat, beat / 2, 3))
+            hat = rng.standard_normal(int(0.05 * SAMPLE_RATE)) * np.exp(-np.arange(int(0.05 * SAMPLE_RATE)) / 220)
+            _add(out, start + (count + 0.5) * beat, 0.1 * hat)
+        position = 0.0
+        while position < 4:
+            length = rng.choice([0.5, 1, 1, 2])
+            note = rng.integers(0, 8)
+            _add(out, start + position * beat,
+                 0.2 * _note(72 + key + MAJOR_SCALE[note % 7] + 12 * (note // 7), length * beat, length * beat, 4))
+            position += length
+        bar += 1
+    return (0.8 * out / np.abs(out).max()).astype(np.float32)
+
+
+def degraded_copy(rng, audio):
+    """
+    ``audio`` as a lossy re-encode might leave it: up to 3 s trimmed from
+    the start plus a shift that is not a whole number of hops, a 4-8 kHz low
+    pass, a level change and noise 20-30 dB down
+    """
+    audio = audio[rng.integers(0, 3 * SAMPLE_RATE) + rng.integers(1, HOP_SIZE):]
+    audio = sosfilt(butter(4, rng.uniform(4000, 8000), 'low', fs=SAMPLE_RATE, output='sos'), audio)
+    audio = audio * rng.uniform(0.5, 1.2)
+    audio = audio + rng.standard_normal(len(audio)) * np.std(audio) * 10 ** (-rng.uniform(20, 30) / 20)
+    return audio.astype(np.float32)
+
+
+def fingerprint_tune(seed, key, seconds, degraded=False):
+    """
+    ``(signature, peaks)`` of synthetic tune ``seed``, or of a degraded copy
+    of it
+    """
+    audio = synthetic_tune(np.random.default_rng(seed), key, seconds)
+    if degraded:
+        audio = degraded_copy(np.random.default_rng([seed, 1]), audio)
+    extractor = PeakExtractor()
+    for start in range(0, len(audio), SAMPLE_RATE * 10):
+        extractor.update(audio[start:start + SAMPLE_RATE * 10])
+    peaks = extractor.peaks()
+    return minhash_signature(landmark_hashes(*peaks)), peaks
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure near-duplicate lookup latency, recall and false matches on an '
+        'in-memory LSH index of synthetic songs, most of them sharing a key with '
+        'hundreds of others, queried with degraded copies of indexed songs'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tracks', type=int, default=1000, help='Songs in the index')
+        parser.add_argument('--seconds', type=float, default=30, help='Length of each song')
+        parser.add_argument('--keys', type=int, default=3, help='Keys the songs are spread over')
+        parser.add_argument('--queries', type=int, default=200, help='Degraded copies to look up')
+        parser.add_argument('--workers', type=int, default=None, help='Processes synthesizing songs')
+        parser.add_argument('--db', action='store_true',
+                            help='Also time lookups against the fingerprints saved in the database')
+
+    def handle(self, *args, **options):
+        threshold = settings.FINGERPRINT_DUPLICATE_THRESHOLD
+        count = options['tracks']
+        keys = [seed % options['keys'] for seed in range(count)]
+        seconds = [options['seconds']] * count
+
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            tracks = list(pool.map(fingerprint_tune, range(count), keys, seconds, chunksize=8))
+            originals = np.random.default_rng(0).choice(count, min(options['queries'], count), replace=False)
+            queries = list(pool.map(
+                fingerprint_tune, originals, [keys[seed] for seed in originals], seconds, [True] * len(originals),
+            ))
+        index = MinHashLSHIndex()
+        for key, (signature, peaks) in enumerate(tracks):
+            index.add(key, signature, peaks)
+        self.stdout.write(
+            f'Fingerprinted and indexed {count} songs in {options["keys"]} keys and {len(queries)} degraded copies '
+            f'in {time.perf_counter() - started:.1f} s'
+        )
+
+        timings = []
+        found = false_matches = 0
+        candidates = []
+        duplicate_scores = []
+        unrelated_scores = []
+        unrelated_minhash = 0
+        for original, (signature, peaks) in zip(originals, queries):
+            started = time.perf_counter()
+            matches = index.query(signature, peaks, threshold)
+            timings.append(time.perf_counter() - started)
+            found += any(key == original for key, _ in matches)
+            false_matches += sum(key != original for key, _ in matches)
+
+            # Score every candidate again, outside the timing, to show the margins
+            keys_found = index.candidates(signature)
+            candidates.append(len(keys_found))
+            duplicate_scores.append(alignment(peaks, tracks[original][1]))
+            for key in keys_found - {original}:
+                unrelated_scores.append(alignment(peaks, tracks[key][1]))
+                unrelated_minhash += similarity(signature, tracks[key][0]) >= MINHASH_THRESHOLD
+        self._report('LSH index', timings, found, len(queries))
+        self.stdout.write(
+            f'  {np.mean(candidates):.1f} candidates per lookup, {false_matches} false matches at the '
+            f'{threshold:.2f} threshold; {unrelated_minhash} unrelated candidates reach a MinHash similarity '
+            f'of {MINHASH_THRESHOLD:.2f}'
+        )
+        self.stdout.write(
+            f'  alignment of degraded copies: min {min(duplicate_scores):.3f}, median '
+            f'{np.median(duplicate_scores):.3f}; of unrelated candidates: max '
+            f'{max(unrelated_scores, default=0):.3f}, p99 {np.percentile(unrelated_scores or [0], 99):.3f}'
+        )
+
+        timings = []
+        found = 0
+        for original, (signature, peaks) in list(zip(originals, queries))[:10]:
+            started = time.perf_counter()
+            matches = [key for key, (_, other) in enumerate(tracks) if alignment(peaks, other) >= threshold]
+            timings.append(time.perf_counter() - started)
+            found += original in matches
+        self._report('Brute force', timings, found, len(timings))
+
+        if options['db']:
+            saved = list(AudioFingerprint.objects.values_list('library_item_id', 'signature', 'peaks')
+                         [:options['queries']])
+            timings = []
+            for pk, signature, peaks in saved:
+                started = time.perf_counter()
+                find_near_duplicates(bytes(signature), bytes(peaks), exclude=[pk])
+                timings.append(time.perf_counter() - started)
+            if timings:
+                self._report(f'Database ({AudioFingerprint.objects.count()} fingerprints)', timings, None, len(timings))
+            else:
+                self.stdout.write('Database: no fingerprints saved')
+
+    def _report(self, name, timings, found, total):
+        timings = np.array(timings) * 1000
+        line = (
+            f'{name}: p50 {np.percentile(timings, 50):.3f} ms, p99 {np.percentile(timings, 99):.3f} ms '
+            f'over {total} lookups'
+        )
+        if found is not None:
+            line += f', recall {found / total:.1%}'
+        self.stdout.write(line)
@@ -0,0 +1,68 @@
+import os
+import random
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from radiocms.utils.audio.frames import build_frame_index, pack_offsets, parse_adts_header, parse_mpeg_header
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure frame index build speed on large synthetic VBR MP3 and ADTS AAC '
+        'files (valid frame headers, silent payloads)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size-mb', type=int, default=200, help='Size of each synthetic file')
+        parser.add_argument('--runs', type=int, default=3, help='Timed runs per file')
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            for fmt, write in (('mp3', self._write_mp3), ('aac', self._write_adts)):
+                path = os.path.join(directory, f'benchmark.{fmt}')
+                write(path, options['size_mb'] * 1024 * 1024)
+                size = os.path.getsize(path)
+
+                timings = []
+                for _ in range(options['runs']):
+                    started = time.perf_counter()
+                    with open(path, 'rb') as stream:
+                        index = build_frame_index(stream)
+                    timings.append(time.perf_counter() - started)
+
+                best = min(timings)
+                self.stdout.write(
+                    f'{fmt}: {size / 1024 ** 2:.0f} MB, {index.frame_count} frames '
+                    f'({index.frame_count * index.samples_per_frame / index.sample_rate / 3600:.1f} h) in {best:.2f} s: '
+                    f'{size / best / 1024 ** 2:.0f} MB/s, {index.frame_count / best / 1000:.0f}k frames/s, '
+                    f'index {len(pack_offsets(index.offsets)) / 1024:.0f} KB'
+                )
+
+    def _write_frames(self, path, size, make_frame):
+        rng = random.Random(0)
+        written = 0
+        with open(path, 'wb') as f:
+            while written < size:
+                frame = make_frame(rng)
+                f.write(frame)
+                written += len(frame)
+
+    def _write_mp3(self, path, size):
+        # MPEG-1 Layer III, 44.1 kHz joint stereo, bitrate varying per frame
+        def make_frame(rng):
+            header = bytes([0xFF, 0xFB, (rng.randint(1, 14) << 4) | (rng.randint(0, 1) << 1), 0x44])
+            return header + bytes(parse_mpeg_header(header)[0] - 4)
+        self._write_frames(path, size, make_frame)
+
+    def _write_adts(self, path, size):
+        # AAC-LC, 44.1 kHz stereo, one raw data block per frame
+        def make_frame(rng):
+            length = rng.randint(200, 800)
+            header = bytes([
+                0xFF, 0xF1, (1 << 6) | (4 << 2), (2 << 6) | ((length >> 11) & 0x03),
+                (length >> 3) & 0xFF, ((length & 0x07) << 5) | 0x1F, 0xFC,
+            ])
+            return header + bytes(parse_adts_header(header)[0] - 7)
+        self._write_frames(path, size, make_frame)
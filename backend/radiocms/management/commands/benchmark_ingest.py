@@ -0,0 +1,56 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from radiocms.utils.ingest import (
+    STATUS_FAILED, STATUS_SUCCEEDED, IngestWorkerPool, LocalIngestQueue, RedisIngestQueue,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure ingest jobs per second at several worker counts. Jobs sleep for '
+        '--io-ms to stand in for S3 transfer time, so the numbers show queue and '
+        'pool throughput rather than bucket bandwidth.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=200, help='Jobs per run')
+        parser.add_argument('--workers', default='1,2,4,8,16', help='Comma-separated worker counts')
+        parser.add_argument('--io-ms', type=float, default=50, help='Simulated I/O time per job')
+        parser.add_argument('--redis', action='store_true', help='Use the Redis queue at REDIS_URL')
+
+    def handle(self, *args, **options):
+        io_seconds = options['io_ms'] / 1000
+
+        def handler(job):
+            time.sleep(io_seconds)
+
+        for workers in [int(count) for count in options['workers'].split(',')]:
+            if options['redis']:
+                ingest_queue = RedisIngestQueue(settings.REDIS_URL, prefix=f'radiocms:bench:{uuid.uuid4()}')
+            else:
+                ingest_queue = LocalIngestQueue()
+
+            job_ids = [str(uuid.uuid4()) for _ in range(options['jobs'])]
+            started = time.perf_counter()
+            for job_id in job_ids:
+                ingest_queue.enqueue({'id': job_id, 'fields': {}, 'files': {}, 'user_id': None, 'attempts': 0})
+
+            pool = IngestWorkerPool(ingest_queue, workers, handler=handler).start()
+            pending = set(job_ids)
+            while pending:
+                pending = {
+                    job_id for job_id in pending
+                    if ingest_queue.get_status(job_id)['status'] not in (STATUS_SUCCEEDED, STATUS_FAILED)
+                }
+                time.sleep(0.005)
+            elapsed = time.perf_counter() - started
+            pool.stop(wait=False)
+
+            self.stdout.write(
+                f"{workers:>3} workers: {options['jobs'] / elapsed:8.1f} jobs/s "
+                f"({elapsed:.2f} s for {options['jobs']} jobs)"
+            )
@@ -0,0 +1,106 @@
+import io
+import random
+import time
+import uuid
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from radiocms.models.library import LibraryItem
+from radiocms.utils.search import search_library
+
+GENRES = ['Pop', 'Rock', 'Dance', 'Hip Hop', 'R&B', 'Country', 'Jazz', 'Latin', 'Electronic', 'Soul']
+SYLLABLES = ['ka', 'lo', 'mi', 'ra', 'ven', 'tor', 'sa', 'el', 'din', 'qu', 'ar', 'no', 'bel', 'fi', 'ston',
+             'ma', 'ly', 'ze', 'ori', 'pan', 'he', 'ut', 'gra', 'shi', 'von']
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure library search latency (p50/p95) for full-text, typo and prefix '
+        'queries at several library sizes. Synthetic rows go in a temporary table '
+        'that shadows the library table for this session only; PostgreSQL only.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10000,100000,1000000', help='Comma-separated row counts')
+        parser.add_argument('--queries', type=int, default=200, help='Queries per mode and size')
+        parser.add_argument('--limit', type=int, default=20, help='Page size')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('The search indexes only exist on PostgreSQL')
+        rng = random.Random(0)
+        vocabulary = sorted({
+            ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(40000)
+        })
+
+        for size in [int(value) for value in options['sizes'].split(',')]:
+            rows = self._load(rng, vocabulary, size)
+            for mode, make_query in (
+                ('full text', lambda title, artist: title),
+                ('typo', lambda title, artist: self._typo(rng, f'{title} {artist}')),
+                ('prefix', lambda title, artist: title[:max(3, len(title) - 3)]),
+            ):
+                timings = []
+                for title, artist in rng.sample(rows, options['queries']):
+                    started = time.perf_counter()
+                    search_library(make_query(title, artist), prefix=mode == 'prefix', limit=options['limit'])
+                    timings.append(time.perf_counter() - started)
+                timings = np.array(timings) * 1000
+                self.stdout.write(
+                    f'{size} rows, {mode}: p50 {np.percentile(timings, 50):.2f} ms, '
+                    f'p95 {np.percentile(timings, 95):.2f} ms'
+                )
+            with connection.cursor() as cursor:
+                cursor.execute('DROP TABLE pg_temp.radiocms_libraryitem')
+
+    def _typo(self, rng, text):
+        position = rng.randrange(len(text))
+        return text[:position] + text[position + 1:]
+
+    def _load(self, rng, vocabulary, size):
+        """
+        Fill a temporary copy of the library table with ``size`` synthetic
+        rows and index it like the real one. Returns a sample of
+        ``(title, artist)`` pairs to query for.
+        """
+        table = LibraryItem._meta.db_table
+        # Zipf-distributed word choice, as in real catalogues
+        weights = 1 / np.arange(1, len(vocabulary) + 1)
+        words = np.random.default_rng(size).choice(len(vocabulary), size * 5, p=weights / weights.sum())
+        plays = np.random.default_rng(size + 1).zipf(1.5, size)
+
+        sample = []
+        started = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.execute(f'CREATE TEMPORARY TABLE {table} (LIKE public.{table} INCLUDING DEFAULTS)')
+            for field in LibraryItem._meta.concrete_fields:
+                if not field.primary_key:
+                    cursor.execute(f'ALTER TABLE pg_temp.{table} ALTER COLUMN {field.column} DROP NOT NULL')
+
+            for start in range(0, size, 100000):
+                buffer = io.StringIO()
+                for row in range(start, min(start + 100000, size)):
+                    title_words = words[row * 5:row * 5 + 1 + row % 3]
+                    artist_words = words[row * 5 + 3:row * 5 + 4 + row % 2]
+                    title = ' '.join(vocabulary[word] for word in title_words).title()
+                    artist = ' '.join(vocabulary[word] for word in artist_words).title()
+                    buffer.write(f'{uuid.UUID(int=rng.getrandbits(128))}\t{title}\t{artist}\t'
+                                 f'{GENRES[row % len(GENRES)]}\t{min(plays[row], 2 ** 31 - 1)}\n')
+                    if len(sample) < 10000 and rng.random() < 10000 / size:
+                        sample.append((title, artist))
+                buffer.seek(0)
+                cursor.copy_expert(f'COPY pg_temp.{table} (id, title, artist, genre, play_count) FROM STDIN', buffer)
+
+            cursor.execute(f"""
+                UPDATE pg_temp.{table} SET search_vector =
+                    setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+                    setweight(to_tsvector('simple', coalesce(artist, '')), 'B') ||
+                    setweight(to_tsvector('simple', coalesce(genre, '')), 'C')
+            """)
+            cursor.execute(f'CREATE INDEX ON pg_temp.{table} USING gin (search_vector)')
+            cursor.execute(f"CREATE INDEX ON pg_temp.{table} USING gin ((title || ' ' || artist) gin_trgm_ops)")
+            cursor.execute(f'ANALYZE pg_temp.{table}')
+        self.stdout.write(f'Loaded and indexed {size} rows in {time.perf_counter() - started:.1f} s')
+        return sample
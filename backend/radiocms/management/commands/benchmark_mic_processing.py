@@ -0,0 +1,79 @@
+import time
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from radiocms.utils.audio.decode import SAMPLE_RATE
+from radiocms.utils.processing import sts
+from radiocms.utils.processing.dsp import (BLOCK_FRAMES, CHANNELS, LIMITER_CEILING_DB, compile_chain,
+                                           process_blocks, to_db)
+
+# Every stage the engine renders, for --all-stages
+STAGES = ('Noise Gate', 'Equalizer', 'Singleband Compressor 2', 'Final Limiter')
+
+
+def synthetic_speech(seconds, channels=CHANNELS):
+    """
+    Harmonic bursts at syllable rate with pauses and a noise floor, so the
+    gate, compressor and limiter all have work to do
+    """
+    rng = np.random.default_rng(0)
+    frames = int(seconds * SAMPLE_RATE)
+    t = np.arange(frames) / SAMPLE_RATE
+    pitch = 140 + 30 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+    voice = sum(np.sin(harmonic * phase) / harmonic for harmonic in range(1, 12))
+    syllables = np.clip(np.sin(2 * np.pi * 4 * t), 0, None)
+    # Roughly a third of each 2 s phrase is a pause
+    phrases = (rng.random(int(seconds / 2) + 1) > 0.3).repeat(2 * SAMPLE_RATE)[:frames]
+    mono = 0.4 * voice * syllables * phrases + 0.003 * rng.standard_normal(frames)
+    return np.stack([mono] * channels, axis=1).astype(np.float32)
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure offline mic-chain rendering speed (x realtime on one core) '
+        'on synthetic speech-like audio, excluding decoding and encoding'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--preset', default=settings.MIC_PROCESSING_PRESET, help='Path to an .sts preset')
+        parser.add_argument('--seconds', type=float, default=300, help='Length of the test audio')
+        parser.add_argument('--all-stages', action='store_true',
+                            help='Render every supported stage, including ones the preset disables')
+        parser.add_argument('--target', type=float, default=50, help='Required x realtime')
+
+    def handle(self, *args, **options):
+        preset = sts.load(Path(options['preset']).read_bytes())
+        audio = synthetic_speech(options['seconds'])
+        force = STAGES if options['all_stages'] else ()
+
+        # Once to warm up caches and imports
+        list(process_blocks(compile_chain(preset, force=force), [audio[:SAMPLE_RATE]]))
+
+        chain = compile_chain(preset, force=force)
+        self.stdout.write(f"Stages: {', '.join(type(stage).__name__ for stage in chain.stages)}")
+        if chain.skipped:
+            self.stdout.write(f"Enabled but not rendered: {', '.join(chain.skipped)}")
+
+        started = time.perf_counter()
+        blocks = (audio[index:index + BLOCK_FRAMES] for index in range(0, len(audio), BLOCK_FRAMES))
+        output = np.concatenate(list(process_blocks(chain, blocks)))
+        elapsed = time.perf_counter() - started
+
+        speed = options['seconds'] / elapsed
+        self.stdout.write(
+            f'{options["seconds"]:.0f} s of audio in {elapsed:.2f} s: {speed:.0f}x realtime, '
+            f'{elapsed / options["seconds"] * 1000:.2f} ms per second of audio'
+        )
+        self.stdout.write(
+            f'Input peak {float(to_db(np.abs(audio).max())):.1f} dBFS, output peak '
+            f'{float(to_db(np.abs(output).max())):.1f} dBFS (limiter ceiling {LIMITER_CEILING_DB} dBFS), '
+            f'{len(output)} of {len(audio)} samples'
+        )
+        if speed >= options['target']:
+            self.stdout.write(self.style.SUCCESS(f'Faster than {options["target"]:.0f}x realtime'))
+        else:
+            self.stdout.write(self.style.ERROR(f'Slower than {options["target"]:.0f}x realtime'))
@@ -0,0 +1,89 @@
+import threading
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Sum
+
+from radiocms.apps.airadio.models.settings import Station
+from radiocms.models.library import LibraryItem
+from radiocms.utils.plays import LocalPlayBuffer, PlayCounter
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test the write-behind play counters: threads record plays as fast as '
+        'they can while the buffer is flushed on an interval. Reports events per '
+        'second absorbed against database writes issued. Runs in a transaction '
+        'that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=200000, help='Play events in total')
+        parser.add_argument('--threads', type=int, default=8, help='Recording threads')
+        parser.add_argument('--items', type=int, default=2000, help='Synthetic library items')
+        parser.add_argument('--stations', type=int, default=5, help='Synthetic stations')
+        parser.add_argument('--flush-interval', type=float, default=1.0, help='Seconds between flushes')
+
+    def handle(self, *args, **options):
+        writes = []
+
+        def count_writes(execute, sql, params, many, context):
+            if sql.lstrip().upper().startswith(('INSERT', 'UPDATE')):
+                writes.append(sql)
+            return execute(sql, params, many, context)
+
+        with transaction.atomic():
+            items = LibraryItem.objects.bulk_create([
+                LibraryItem(title=f'Benchmark {index}', artist='Benchmark', audio_file=f'https://example.com/{index}.mp3')
+                for index in range(options['items'])
+            ])
+            stations = Station.objects.bulk_create([
+                Station(name=f'Benchmark {index}', retail='', location='')
+                for index in range(options['stations'])
+            ])
+            item_ids = [item.pk for item in items]
+            station_ids = [station.pk for station in stations]
+
+            counter = PlayCounter(LocalPlayBuffer(), autoflush=False)
+            per_thread = options['events'] // options['threads']
+            total = per_thread * options['threads']
+
+            def produce(seed):
+                rng = np.random.default_rng(seed)
+                # A few hits get most of the plays
+                picks = np.minimum(rng.zipf(1.3, per_thread), len(item_ids)) - 1
+                station_picks = rng.integers(0, len(station_ids), per_thread)
+                for pick, station in zip(picks, station_picks):
+                    counter.record([(item_ids[pick], station_ids[station])])
+
+            threads = [threading.Thread(target=produce, args=(seed,)) for seed in range(options['threads'])]
+            flushes = 0
+            with connection.execute_wrapper(count_writes):
+                started = time.perf_counter()
+                for thread in threads:
+                    thread.start()
+                while any(thread.is_alive() for thread in threads):
+                    time.sleep(options['flush_interval'])
+                    counter.flush()
+                    flushes += 1
+                recorded = time.perf_counter() - started
+                counter.flush()
+                flushes += 1
+                elapsed = time.perf_counter() - started
+
+            stored = LibraryItem.objects.filter(pk__in=item_ids).aggregate(total=Sum('play_count'))['total']
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f'{total} events from {options["threads"]} threads in {recorded:.2f} s: '
+            f'{total / recorded:,.0f} events/s absorbed'
+        )
+        self.stdout.write(
+            f'{flushes} flushes in {elapsed:.2f} s issued {len(writes)} INSERT/UPDATE statements '
+            f'({total / max(len(writes), 1):,.0f} events per statement; a per-event UPDATE of item and '
+            f'station counts would issue {2 * total})'
+        )
+        status = self.style.SUCCESS if stored == total else self.style.ERROR
+        self.stdout.write(status(f'{stored} plays stored for {total} recorded'))
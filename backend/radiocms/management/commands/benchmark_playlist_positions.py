@@ -0,0 +1,119 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from radiocms.apps.airadio.models.settings import Station
+from radiocms.models.library import LibraryItem
+from radiocms.models.playlist import Playlist
+from radiocms.models.playlistitem import PlaylistItem
+from radiocms.utils.playlists import (POSITION_STEP, append_position, apply_operations, lock_playlist, move_item,
+                                      position_after)
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Count queries and time per playlist operation (append, insert, move, '
+        'delete near the top, batch) with the previous dense renumbering and '
+        'with sparse positions. Runs in a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=2000, help='Songs in the playlist')
+        parser.add_argument('--batch', type=int, default=200, help='Operations in the batch request')
+
+    def handle(self, *args, **options):
+        if options['items'] < 3 * options['batch']:
+            raise CommandError('--items must be at least three times --batch')
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _measure(self, label, operation):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            operation()
+            elapsed = time.perf_counter() - started
+        writes = sum(query['sql'].lstrip().upper().startswith(('INSERT', 'UPDATE', 'DELETE'))
+                     for query in queries.captured_queries)
+        self.stdout.write(f'  {label}: {len(queries)} queries ({writes} writes), {elapsed * 1000:.1f} ms')
+
+    def _run(self, options):
+        count = options['items']
+        user = User.objects.create(username='playlist-benchmark')
+        station = Station.objects.create(name='Benchmark', retail='', location='')
+        songs = LibraryItem.objects.bulk_create([
+            LibraryItem(title=f'Benchmark {index}', artist='Benchmark', audio_file=f'https://example.com/{index}.mp3')
+            for index in range(count + options['batch'] + 2)
+        ])
+        spare = iter(songs[count:])
+
+        def playlist_with(step):
+            playlist = Playlist.objects.create(name=f'Benchmark {step}', station=station)
+            PlaylistItem.objects.bulk_create([
+                PlaylistItem(playlist=playlist, library_item=song, added_by=user, position=index * step)
+                for index, song in enumerate(songs[:count], start=1)
+            ], batch_size=1000)
+            return playlist, list(PlaylistItem.objects.filter(playlist=playlist).order_by('position'))
+
+        self.stdout.write(f'Before: dense positions, {count} songs')
+        playlist, items = playlist_with(1)
+
+        def dense_append():
+            song = next(spare)
+            PlaylistItem.objects.filter(playlist=playlist, library_item=song).exists()
+            PlaylistItem.objects.create(playlist=playlist, library_item=song, added_by=user,
+                                        position=PlaylistItem.objects.filter(playlist=playlist).count() + 1)
+
+        def dense_delete():
+            items[1].delete()
+            for index, item in enumerate(PlaylistItem.objects.filter(playlist=playlist).order_by('position'), start=1):
+                if item.position != index:
+                    item.position = index
+                    item.save()
+
+        self._measure('append', dense_append)
+        self._measure('delete the 2nd song', dense_delete)
+
+        self.stdout.write(f'After: sparse positions ({POSITION_STEP:g} apart), {count} songs')
+        playlist, items = playlist_with(POSITION_STEP)
+
+        def sparse_append(after=...):
+            song = next(spare)
+            with transaction.atomic():
+                lock_playlist(playlist.pk)
+                PlaylistItem.objects.filter(playlist=playlist, library_item=song).exists()
+                position = append_position(playlist.pk) if after is ... else position_after(playlist.pk, after)
+                PlaylistItem.objects.create(playlist=playlist, library_item=song, added_by=user, position=position)
+
+        self._measure('append', sparse_append)
+        self._measure('insert after the 1st song', lambda: sparse_append(items[0].pk))
+        self._measure('move the last song to the top', lambda: move_item(items[-1], None))
+        self._measure('delete the 2nd song', lambda: items[1].delete())
+        operations = []
+        for index in range(options['batch']):
+            if index % 3 == 0:
+                operations.append({'op': 'insert', 'library_item': str(next(spare).pk), 'after': str(items[2].pk)})
+            elif index % 3 == 1:
+                operations.append({'op': 'move', 'item': str(items[-index].pk), 'after': None})
+            else:
+                operations.append({'op': 'remove', 'item': str(items[index + 10].pk)})
+        self._measure(f'batch of {len(operations)} operations',
+                      lambda: apply_operations(playlist.pk, operations, user))
+
+        positions = list(PlaylistItem.objects.filter(playlist=playlist).values_list('position', flat=True))
+        if positions == sorted(positions) and len(set(positions)) == len(positions):
+            self.stdout.write(self.style.SUCCESS('Order is consistent, positions are unique'))
+        else:
+            self.stdout.write(self.style.ERROR('Positions collide'))
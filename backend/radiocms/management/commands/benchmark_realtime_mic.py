@@ -0,0 +1,116 @@
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from radiocms.management.commands.benchmark_mic_processing import synthetic_speech
+from radiocms.utils.audio.decode import SAMPLE_RATE
+from radiocms.utils.processing import dsp, realtime, sts
+from radiocms.utils.processing.realtime import BLOCK_FRAMES, RING_FRAMES, RealtimeMicProcessor
+
+S16_SCALE = 32768.0
+
+
+def _percentiles(values):
+    values = np.asarray(values) * 1000
+    return values.mean(), np.percentile(values, 50), np.percentile(values, 99), values.max()
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure live mic processing latency and jitter: time per block against '
+        'the block duration, time per WebSocket message as the mic view handles '
+        'it, and memory allocated in the steady state'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--preset', default=settings.MIC_PROCESSING_PRESET, help='Path to an .sts preset')
+        parser.add_argument('--seconds', type=float, default=60, help='Length of the test audio')
+        parser.add_argument('--channels', type=int, default=1, choices=(1, 2))
+        parser.add_argument('--block-frames', type=int, default=BLOCK_FRAMES)
+        parser.add_argument('--message-ms', type=float, default=20, help='Audio per client message')
+        parser.add_argument('--budget', type=float, default=0.25,
+                            help='Required p99 block time as a fraction of the block duration')
+
+    def handle(self, *args, **options):
+        preset = sts.load(Path(options['preset']).read_bytes())
+        channels = options['channels']
+        block_frames = options['block_frames']
+        audio = synthetic_speech(options['seconds'], channels)
+        block_ms = block_frames / SAMPLE_RATE * 1000
+
+        processor = RealtimeMicProcessor(preset, channels, block_frames)
+        self.stdout.write(f"Stages: {', '.join(type(stage).__name__ for stage in processor.stages)}")
+        if processor.skipped:
+            self.stdout.write(f"Enabled but not rendered: {', '.join(processor.skipped)}")
+        self.stdout.write(
+            f'{block_frames}-frame blocks ({block_ms:.2f} ms), '
+            f'{processor.latency / SAMPLE_RATE * 1000:.2f} ms algorithmic latency'
+        )
+
+        # Block processing alone
+        block = np.empty((block_frames, channels), dtype=np.float32)
+        count = len(audio) // block_frames
+        for index in range(min(count, 200)):
+            np.copyto(block, audio[index * block_frames:(index + 1) * block_frames])
+            processor.process_block(block)
+        timings = np.empty(count)
+        for index in range(count):
+            np.copyto(block, audio[index * block_frames:(index + 1) * block_frames])
+            started = time.perf_counter()
+            processor.process_block(block)
+            timings[index] = time.perf_counter() - started
+
+        # Again under tracemalloc, which would skew the timings above
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        for index in range(count):
+            np.copyto(block, audio[index * block_frames:(index + 1) * block_frames])
+            processor.process_block(block)
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        # Only what the processor allocated and kept, not this loop's bookkeeping
+        scope = [tracemalloc.Filter(True, realtime.__file__), tracemalloc.Filter(True, dsp.__file__)]
+        retained = sum(stat.size_diff for stat in
+                       after.filter_traces(scope).compare_to(before.filter_traces(scope), 'filename'))
+        mean, median, p99, worst = _percentiles(timings)
+        self.stdout.write(
+            f'Block: mean {mean:.3f} ms, p50 {median:.3f} ms, p99 {p99:.3f} ms, max {worst:.3f} ms '
+            f'({p99 / block_ms:.1%} of the block duration at p99), jitter (p99 - p50) {p99 - median:.3f} ms'
+        )
+        self.stdout.write(
+            f'Steady state: {retained} bytes retained by the processor over {count} blocks'
+        )
+
+        # Whole messages: 16-bit PCM in, push, pull and convert back, as the mic view does
+        message_frames = int(options['message_ms'] * SAMPLE_RATE / 1000)
+        pcm_in = (audio * (S16_SCALE - 1)).astype('<i2')
+        processor = RealtimeMicProcessor(preset, channels, block_frames)
+        processed = np.empty((RING_FRAMES, channels), dtype=np.float32)
+        pcm = np.empty((RING_FRAMES, channels), dtype='<i2')
+        messages = [pcm_in[index:index + message_frames].tobytes()
+                    for index in range(0, len(pcm_in) - message_frames + 1, message_frames)]
+        timings = np.empty(len(messages))
+        for index, data in enumerate(messages):
+            started = time.perf_counter()
+            processor.push(np.frombuffer(data, dtype='<i2').reshape(-1, channels), 1 / S16_SCALE)
+            pulled = processor.pull_into(processed)
+            np.multiply(processed[:pulled], S16_SCALE - 1, out=pcm[:pulled], casting='unsafe')
+            timings[index] = time.perf_counter() - started
+        mean, median, message_p99, worst = _percentiles(timings)
+        self.stdout.write(
+            f'Message ({options["message_ms"]:.0f} ms): mean {mean:.3f} ms, p50 {median:.3f} ms, '
+            f'p99 {message_p99:.3f} ms, max {worst:.3f} ms, jitter (p99 - p50) {message_p99 - median:.3f} ms'
+        )
+
+        if p99 <= block_ms * options['budget']:
+            self.stdout.write(self.style.SUCCESS(
+                f'p99 block time within {options["budget"]:.0%} of the block duration'
+            ))
+        else:
+            self.stdout.write(self.style.ERROR(
+                f'p99 block time over {options["budget"]:.0%} of the block duration'
+            ))
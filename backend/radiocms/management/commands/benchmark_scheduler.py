@@ -0,0 +1,87 @@
+import random
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from radiocms.utils.analysis import get_analysis_pool
+from radiocms.utils.scheduling.engine import ROTATIONS, Jingle, Song, generate_days
+from radiocms.utils.station_logs import schedule_rules
+
+
+def synthetic_catalogue(seed, songs, artists):
+    rng = random.Random(seed)
+    catalogue = [
+        Song(f'{seed}-{index}', f'Title {index % int(songs * 0.9)}', f'Artist {rng.randrange(artists)}',
+             rng.uniform(150, 330), rng.choices(ROTATIONS, (1, 3, 6))[0], rng.random() < 0.6)
+        for index in range(songs)
+    ]
+    jingles = [Jingle(f'{seed}-id-{index}', f'Station ID {index}', 8.0) for index in range(6)]
+    return catalogue, jingles
+
+
+def separation_violations(entries, seconds):
+    last = {}
+    violations = 0
+    for entry in entries:
+        if entry['type'] != 'song':
+            continue
+        if entry['artist'] in last and entry['start'] - last[entry['artist']] < seconds:
+            violations += 1
+        last[entry['artist']] = entry['start']
+    return violations
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure station log generation on synthetic catalogues: one station day '
+        'inline, then a week for many stations across the process pool. Nothing '
+        'is written to the database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stations', type=int, default=300)
+        parser.add_argument('--songs', type=int, default=2000, help='Songs per station')
+        parser.add_argument('--artists', type=int, default=400, help='Distinct artists per station')
+        parser.add_argument('--days', type=int, default=7)
+        parser.add_argument('--clean-hours', default='6-22', help='Clean-only hours, empty for none')
+
+    def handle(self, *args, **options):
+        hours = options['clean_hours']
+        rules = schedule_rules(clean_hours=tuple(int(hour) for hour in hours.split('-')) if hours else None)
+        catalogues = [synthetic_catalogue(seed, options['songs'], options['artists'])
+                      for seed in range(options['stations'])]
+
+        songs, jingles = catalogues[0]
+        timings = []
+        for run in range(20):
+            started = time.perf_counter()
+            (entries,) = generate_days(songs, jingles, rules, 1, seed=run)
+            timings.append(time.perf_counter() - started)
+        timings = np.array(timings) * 1000
+        played = [entry for entry in entries if entry['type'] == 'song']
+        self.stdout.write(
+            f'One day, {options["songs"]} songs: mean {timings.mean():.1f} ms, max {timings.max():.1f} ms; '
+            f'{len(played)} songs, {len(entries) - len(played)} station IDs, '
+            f'{sum(entry["relaxed"] for entry in played)} relaxed, '
+            f'{separation_violations(entries, rules.artist_separation)} artist separation violations'
+        )
+
+        pool = get_analysis_pool()
+        workers = settings.AUDIO_ANALYSIS_WORKERS
+        # Start the workers before timing
+        for future in [pool.submit(generate_days, [], [], rules, 1) for _ in range(workers)]:
+            future.result()
+        started = time.perf_counter()
+        futures = [pool.submit(generate_days, songs, jingles, rules, options['days'], seed)
+                   for seed, (songs, jingles) in enumerate(catalogues)]
+        logs = [future.result() for future in futures]
+        elapsed = time.perf_counter() - started
+        station_days = sum(len(days) for days in logs)
+        relaxed = sum(entry.get('relaxed', False) for days in logs for entries in days for entry in entries)
+        self.stdout.write(
+            f'{options["stations"]} stations x {options["days"]} days on {workers} processes: '
+            f'{elapsed:.2f} s, {station_days / elapsed:.0f} station days/s, {relaxed} relaxed songs'
+        )
+        self.stdout.write(self.style.SUCCESS(f'Generated {station_days} station days'))
@@ -0,0 +1,108 @@
+import io
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from radiocms.utils.audio.embedding import EMBEDDING_DIMENSIONS
+from radiocms.utils.similarity import cosine_distances, top_k
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure similar-track search latency and recall@k on synthetic clustered '
+        'embeddings: exact NumPy brute force (the ground truth and the non-PostgreSQL '
+        'fallback) and, with --db, a pgvector HNSW index in a temporary table'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10000,100000,1000000', help='Comma-separated vector counts')
+        parser.add_argument('--queries', type=int, default=100, help='Queries per size')
+        parser.add_argument('--k', type=int, default=10, help='Neighbours per query')
+        parser.add_argument('--ef-search', default='40,100,200', help='Comma-separated hnsw.ef_search values')
+        parser.add_argument('--db', action='store_true', help='Also benchmark the pgvector HNSW index')
+
+    def handle(self, *args, **options):
+        if options['db'] and connection.vendor != 'postgresql':
+            raise CommandError('--db needs a PostgreSQL database with the vector extension')
+        k = options['k']
+
+        for size in [int(value) for value in options['sizes'].split(',')]:
+            rng = np.random.default_rng(size)
+            vectors = self._vectors(rng, size)
+            # Queries are perturbed library vectors, so they have real neighbours
+            queries = vectors[rng.choice(size, options['queries'], replace=False)]
+            queries = self._normalize(queries + rng.normal(0, 0.05, queries.shape).astype(np.float32))
+
+            timings = []
+            exact = []
+            for query in queries:
+                started = time.perf_counter()
+                exact.append(set(top_k(cosine_distances(vectors, query), k).tolist()))
+                timings.append(time.perf_counter() - started)
+            self._report(f'{size} vectors, brute force', timings)
+
+            if options['db']:
+                self._benchmark_hnsw(vectors, queries, exact, k, options['ef_search'])
+
+    def _normalize(self, vectors):
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    def _vectors(self, rng, size):
+        # Tracks cluster by style, so draw them around a set of centres
+        centres = rng.normal(size=(max(size // 1000, 10), EMBEDDING_DIMENSIONS)).astype(np.float32)
+        vectors = np.empty((size, EMBEDDING_DIMENSIONS), dtype=np.float32)
+        for start in range(0, size, 100000):
+            count = min(100000, size - start)
+            chunk = centres[rng.integers(0, len(centres), count)]
+            chunk += rng.normal(0, 0.5, chunk.shape).astype(np.float32)
+            vectors[start:start + count] = self._normalize(chunk)
+        return vectors
+
+    def _benchmark_hnsw(self, vectors, queries, exact, k, ef_values):
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TABLE IF EXISTS benchmark_embeddings')
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE benchmark_embeddings (id integer PRIMARY KEY, embedding vector({EMBEDDING_DIMENSIONS}))'
+            )
+            started = time.perf_counter()
+            for start in range(0, len(vectors), 100000):
+                rows = io.StringIO()
+                for index, vector in enumerate(vectors[start:start + 100000], start):
+                    rows.write(f"{index}\t[{','.join(map(str, vector.tolist()))}]\n")
+                rows.seek(0)
+                cursor.copy_expert('COPY benchmark_embeddings (id, embedding) FROM STDIN', rows)
+            self.stdout.write(f'  loaded in {time.perf_counter() - started:.1f} s')
+
+            started = time.perf_counter()
+            cursor.execute("SET maintenance_work_mem = '1GB'")
+            cursor.execute(
+                'CREATE INDEX ON benchmark_embeddings USING hnsw (embedding vector_cosine_ops) '
+                'WITH (m = 16, ef_construction = 64)'
+            )
+            self.stdout.write(f'  HNSW index built in {time.perf_counter() - started:.1f} s')
+
+            for ef_search in [int(value) for value in ef_values.split(',')]:
+                cursor.execute('SET hnsw.ef_search = %s', [max(ef_search, k)])
+                timings = []
+                found = 0
+                for query, expected in zip(queries, exact):
+                    literal = f"[{','.join(map(str, query.tolist()))}]"
+                    started = time.perf_counter()
+                    cursor.execute(
+                        'SELECT id FROM benchmark_embeddings ORDER BY embedding <=> %s::vector LIMIT %s',
+                        [literal, k],
+                    )
+                    ids = {row[0] for row in cursor.fetchall()}
+                    timings.append(time.perf_counter() - started)
+                    found += len(ids & expected)
+                self._report(f'  HNSW ef_search={ef_search}', timings, found / (k * len(queries)))
+            cursor.execute('DROP TABLE benchmark_embeddings')
+
+    def _report(self, name, timings, recall=None):
+        timings = np.array(timings) * 1000
+        line = f'{name}: p50 {np.percentile(timings, 50):.2f} ms, p99 {np.percentile(timings, 99):.2f} ms'
+        if recall is not None:
+            line += f', recall@k {recall:.1%}'
+        self.stdout.write(line)
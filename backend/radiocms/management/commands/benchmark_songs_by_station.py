@@ -0,0 +1,95 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from radiocms.apps.airadio.api.views import PlaylistItemViewSet
+from radiocms.apps.airadio.models import Category, Format, Station
+from radiocms.models.library import LibraryItem
+from radiocms.models.playlist import Playlist
+from radiocms.models.playlistitem import PlaylistItem
+from radiocms.utils.playlists import POSITION_STEP
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Check that songs_by_station runs a constant number of queries: '
+        'stations with small and large catalogues (songs on two playlists, '
+        'with formats and categories) must cost the same. Fails otherwise. '
+        'Runs in a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--songs', type=int, default=3000, help='Songs on the large station')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                counts = self._run(options)
+                raise Rollback
+        except Rollback:
+            pass
+        full, paginated = counts.values()
+        if len(set(full)) != 1 or len(set(paginated)) != 1:
+            raise CommandError(f'Query count grows with the catalogue: {full} unpaginated, {paginated} paginated')
+        self.stdout.write(self.style.SUCCESS(
+            f'Constant: {full[0]} queries per request, {paginated[0]} paginated'
+        ))
+
+    def _station(self, user, songs, formats, categories):
+        station = Station.objects.create(name=f'Benchmark {songs}', retail='', location='')
+        items = LibraryItem.objects.bulk_create([
+            LibraryItem(title=f'Benchmark {index}', artist='Benchmark', audio_file=f'https://example.com/{index}.mp3')
+            for index in range(songs)
+        ], batch_size=1000)
+        LibraryItem.formats.through.objects.bulk_create([
+            LibraryItem.formats.through(libraryitem_id=item.pk, format_id=format.pk)
+            for item in items for format in formats
+        ], batch_size=1000)
+        LibraryItem.categories.through.objects.bulk_create([
+            LibraryItem.categories.through(libraryitem_id=item.pk, category_id=category.pk)
+            for item in items for category in categories
+        ], batch_size=1000)
+        # Every song on the first playlist, half of them on the second too
+        for number, share in enumerate((items, items[::2])):
+            playlist = Playlist.objects.create(name=f'Benchmark {number}', station=station)
+            PlaylistItem.objects.bulk_create([
+                PlaylistItem(playlist=playlist, library_item=item, added_by=user, position=index * POSITION_STEP,
+                             rotation=('high', 'medium', 'low')[index % 3])
+                for index, item in enumerate(share, start=1)
+            ], batch_size=1000)
+        return station
+
+    def _run(self, options):
+        user = User.objects.create(username='songs-by-station-benchmark')
+        formats = Format.objects.bulk_create([Format(name=f'Benchmark {index}') for index in range(2)])
+        categories = Category.objects.bulk_create([Category(name=f'Benchmark {index}') for index in range(2)])
+        view = PlaylistItemViewSet.as_view({'get': 'songs_by_station'})
+        factory = APIRequestFactory()
+
+        counts = {'': [], '&page=2&page_size=5': []}
+        for songs in (10, options['songs']):
+            station = self._station(user, songs, formats, categories)
+            for query in counts:
+                request = factory.get(f'/api/playlist-items/songs_by_station/?station_id={station.pk}{query}')
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    response = view(request)
+                    response.render()
+                    elapsed = time.perf_counter() - started
+                results = response.data['results'] if query else response.data
+                self.stdout.write(
+                    f'{songs} songs{" (page 2)" if query else ""}: {len(results)} returned, '
+                    f'{len(queries)} queries, {elapsed * 1000:.1f} ms'
+                )
+                counts[query].append(len(queries))
+        return counts
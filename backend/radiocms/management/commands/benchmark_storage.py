@@ -0,0 +1,197 @@
+import os
+import statistics
+import time
+import tracemalloc
+from contextlib import nullcontext
+
+import boto3
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile, TemporaryUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+
+from radiocms.config import storage as storage_config
+from radiocms.utils.backends import reset_storage_backend
+from radiocms.utils.storage import upload_assets, upload_file
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark S3 uploads against a local stand-in. Uses moto when it is '
+        'installed, otherwise the bucket at AWS_S3_ENDPOINT_URL (e.g. MinIO).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--uploads', type=int, default=50, help='Uploads per mode')
+        parser.add_argument('--size', type=int, default=256 * 1024, help='Payload size in bytes')
+        parser.add_argument('--moto', action='store_true', help='Force the in-process moto stand-in')
+        parser.add_argument('--delay-ms', type=float, default=0,
+                            help='Latency injected into every S3 request, to emulate a remote bucket')
+        parser.add_argument('--large-mb', type=int, default=0,
+                            help='Also stream a synthetic file of this many MB and report peak memory')
+        parser.add_argument('--max-peak-mb', type=float, default=None,
+                            help='Fail if the large upload allocates more than this many MB at peak')
+
+    def handle(self, *args, **options):
+        mock = nullcontext()
+        if options['moto'] or not settings.AWS_S3_ENDPOINT_URL:
+            try:
+                from moto import mock_aws
+            except ImportError:
+                raise CommandError('Install moto or set AWS_S3_ENDPOINT_URL to a local S3 stand-in')
+            mock = mock_aws()
+            settings.AWS_ACCESS_KEY_ID = settings.AWS_ACCESS_KEY_ID or 'testing'
+            settings.AWS_SECRET_ACCESS_KEY = settings.AWS_SECRET_ACCESS_KEY or 'testing'
+            settings.AWS_STORAGE_BUCKET_NAME = settings.AWS_STORAGE_BUCKET_NAME or 'radiocms-benchmark'
+
+        # This benchmark measures the S3 client, whatever backend is configured
+        settings.MEDIA_STORAGE_BACKEND = 'radiocms.utils.backends.s3.S3StorageBackend'
+        reset_storage_backend()
+
+        with mock:
+            storage_config.reset_s3_client()
+            self._ensure_bucket()
+            payload = os.urandom(options['size'])
+            if options['delay_ms']:
+                self._inject_delay(options['delay_ms'] / 1000)
+
+            for label, upload in (('per-request client', self._legacy_upload), ('shared client', upload_file)):
+                latencies, requests = self._run(upload, payload, options['uploads'])
+                self.stdout.write(
+                    f"{label:>20}: {requests / options['uploads']:.2f} requests/upload, "
+                    f"mean {statistics.mean(latencies) * 1000:.1f} ms, "
+                    f"p95 {self._p95(latencies) * 1000:.1f} ms"
+                )
+
+            sequential, parallel = self._run_assets(payload, max(1, options['uploads'] // 5))
+            self.stdout.write(
+                f"{'3 assets sequential':>20}: mean {statistics.mean(sequential) * 1000:.1f} ms, "
+                f"p95 {self._p95(sequential) * 1000:.1f} ms"
+            )
+            self.stdout.write(
+                f"{'3 assets parallel':>20}: mean {statistics.mean(parallel) * 1000:.1f} ms, "
+                f"p95 {self._p95(parallel) * 1000:.1f} ms"
+            )
+
+            if options['large_mb']:
+                self._run_large(options['large_mb'], options['max_peak_mb'])
+
+    def _ensure_bucket(self):
+        s3 = storage_config.get_s3_client()
+        bucket = settings.AWS_STORAGE_BUCKET_NAME
+        existing = [b['Name'] for b in s3.list_buckets().get('Buckets', [])]
+        if bucket not in existing:
+            if settings.AWS_S3_REGION_NAME == 'us-east-1':
+                s3.create_bucket(Bucket=bucket)
+            else:
+                s3.create_bucket(
+                    Bucket=bucket,
+                    CreateBucketConfiguration={'LocationConstraint': settings.AWS_S3_REGION_NAME}
+                )
+
+    def _run(self, upload, payload, count):
+        counter = {'requests': 0}
+
+        def count_request(**kwargs):
+            counter['requests'] += 1
+
+        # Count every HTTP request made by any client created during the run
+        session_events = boto3._get_default_session().events
+        session_events.register('request-created.s3', count_request)
+        storage_config.reset_s3_client()
+
+        latencies = []
+        try:
+            for i in range(count):
+                file = SimpleUploadedFile(f'benchmark-{i}.wav', payload, content_type='audio/wav')
+                started = time.perf_counter()
+                if not upload(file, 'benchmark'):
+                    raise CommandError('Upload failed, see the log for details')
+                latencies.append(time.perf_counter() - started)
+        finally:
+            session_events.unregister('request-created.s3', count_request)
+        return latencies, counter['requests']
+
+    def _inject_delay(self, delay):
+        def sleep(**kwargs):
+            time.sleep(delay)
+
+        # Registered on the shared session so every client created later sees it
+        boto3._get_default_session().events.register('request-created.s3', sleep)
+        storage_config.reset_s3_client()
+
+    def _run_assets(self, payload, count):
+        def make_assets(i):
+            return {
+                'audio': (SimpleUploadedFile(f'song-{i}.wav', payload, content_type='audio/wav'), 'audio', True),
+                'cover_art': (SimpleUploadedFile(f'cover-{i}.jpg', payload[:64 * 1024], content_type='image/jpeg'), 'images', False),
+                'lyrics': (SimpleUploadedFile(f'lyrics-{i}.txt', payload[:4 * 1024], content_type='text/plain'), 'lyrics', False),
+            }
+
+        sequential, parallel = [], []
+        for i in range(count):
+            assets = make_assets(i)
+            started = time.perf_counter()
+            for file, folder, required in assets.values():
+                upload_file(file, folder)
+            sequential.append(time.perf_counter() - started)
+
+            assets = make_assets(i)
+            started = time.perf_counter()
+            urls, _ = upload_assets(assets)
+            if not urls:
+                raise CommandError('Upload failed, see the log for details')
+            parallel.append(time.perf_counter() - started)
+        return sequential, parallel
+
+    def _run_large(self, size_mb, max_peak_mb):
+        chunk = os.urandom(1024 * 1024)
+        file = TemporaryUploadedFile('benchmark-large.wav', 'audio/wav', size_mb * len(chunk), None)
+        try:
+            for _ in range(size_mb):
+                file.write(chunk)
+            file.flush()
+            file.seek(0)
+            del chunk
+
+            tracemalloc.start()
+            started = time.perf_counter()
+            url = upload_file(file, 'benchmark')
+            elapsed = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        finally:
+            file.close()
+
+        if not url:
+            raise CommandError('Large upload failed, see the log for details')
+        peak_mb = peak / (1024 * 1024)
+        self.stdout.write(
+            f"{'streamed ' + str(size_mb) + ' MB':>20}: {elapsed:.2f} s, "
+            f"{size_mb / elapsed:.1f} MB/s, peak allocations {peak_mb:.1f} MB"
+        )
+        if max_peak_mb is not None and peak_mb > max_peak_mb:
+            raise CommandError(f'Peak memory {peak_mb:.1f} MB exceeded the {max_peak_mb} MB bound')
+
+    def _legacy_upload(self, file, folder):
+        """
+        The pre-pooling upload path: a new client per file, two bucket checks
+        before the upload and a HEAD on the new object afterwards.
+        """
+        s3 = boto3.client('s3',
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            region_name=settings.AWS_S3_REGION_NAME,
+            endpoint_url=settings.AWS_S3_ENDPOINT_URL or None,
+        )
+        bucket = settings.AWS_STORAGE_BUCKET_NAME
+        key = f"{folder}/{file.name}"
+        s3.head_bucket(Bucket=bucket)
+        s3.list_objects_v2(Bucket=bucket, MaxKeys=1)
+        s3.upload_fileobj(file, bucket, key)
+        s3.head_object(Bucket=bucket, Key=key)
+        return key
+
+    @staticmethod
+    def _p95(values):
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
@@ -0,0 +1,57 @@
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from radiocms.utils.processing import sts
+
+
+class Command(BaseCommand):
+    help = (
+        'Time parsing a Stereo Tool .sts preset cold and from the cache, '
+        'serializing it back, and diffing and merging edited copies'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default=str(Path(settings.BASE_DIR).parent / 'audioprocessing' /
+                                                  'micProcessing.sts'))
+        parser.add_argument('--runs', type=int, default=50)
+
+    def _time(self, label, runs, func):
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            result = func()
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        self.stdout.write(f'{label:<18} median {timings[len(timings) // 2] * 1000:8.3f} ms   '
+                          f'best {timings[0] * 1000:8.3f} ms')
+        return result
+
+    def handle(self, *args, **options):
+        with open(options['path'], 'rb') as f:
+            data = f.read()
+        text = data.decode('utf-8', errors='replace')
+        runs = options['runs']
+
+        preset = self._time('parse', runs, lambda: sts.parse(text))
+        self.stdout.write(f'  {len(preset)} sections, {preset.key_count} keys, {len(data)} bytes')
+
+        def cold_load():
+            sts.clear_cache()
+            return sts.load(data)
+
+        self._time('load (cold)', runs, cold_load)
+        self._time('load (cached)', runs, lambda: sts.load(data))
+        serialized = self._time('to_text', runs, preset.to_text)
+        self.stdout.write(f'  round trip {"exact" if serialized == text else "differs"}')
+
+        # Two edits of the same preset, one key in every section changed on each side
+        sections = list(preset)
+        ours = preset.replace({section.name: {section.keys[0]: 1} for section in sections if len(section)})
+        theirs = preset.replace({section.name: {section.keys[-1]: 2} for section in sections if len(section)})
+        changes = self._time('diff', runs, lambda: preset.diff(ours))
+        self.stdout.write(f'  {len(changes)} changes')
+        merged, conflicts = self._time('merge', runs, lambda: sts.merge(preset, ours, theirs))
+        self.stdout.write(f'  {len(preset.diff(merged))} merged changes, {len(conflicts)} conflicts')
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from radiocms.models.library import LibraryItem
+from radiocms.utils.analysis import build_item_frame_indexes, is_frame_indexable
+
+
+class Command(BaseCommand):
+    help = 'Build MP3/AAC frame indexes for library items that do not have one yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Rebuild existing indexes too')
+        parser.add_argument('--batch-size', type=int, default=500, help='Items submitted to the pool at a time')
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many items')
+
+    def handle(self, *args, **options):
+        queryset = LibraryItem.objects.all()
+        if not options['all']:
+            queryset = queryset.filter(frame_index__isnull=True)
+        rows = queryset.order_by('created_at').values_list('id', 'audio_file')
+        ids = [pk for pk, url in rows if is_frame_indexable(url)][:options['limit']]
+        self.stdout.write(f'Indexing frames of {len(ids)} MP3/AAC items...')
+
+        started = time.perf_counter()
+        indexed = failed = 0
+        for index in range(0, len(ids), options['batch_size']):
+            batch = LibraryItem.objects.filter(id__in=ids[index:index + options['batch_size']])
+            batch_indexed, batch_failed = build_item_frame_indexes(list(batch.only('id', 'audio_file')))
+            indexed += batch_indexed
+            failed += batch_failed
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'{indexed + failed}/{len(ids)} items, {failed} failed ({(indexed + failed) / elapsed:.1f} items/s)')
+
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} items, {failed} failed'))
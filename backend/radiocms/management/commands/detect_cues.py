@@ -0,0 +1,44 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from radiocms.models.library import LibraryItem
+from radiocms.utils.analysis import detect_item_cues
+
+
+class Command(BaseCommand):
+    help = (
+        'Detect intro, vocal and outro cue points for library items whose markers '
+        'are still zero. Safe to interrupt and re-run: processed items are skipped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Also revisit items that were already processed (markers set by hand are kept)')
+        parser.add_argument('--batch-size', type=int, default=200, help='Items submitted to the pool at a time')
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many items')
+
+    def handle(self, *args, **options):
+        queryset = LibraryItem.objects.filter(Q(intro_point=0) | Q(vocal_point=0) | Q(aux_point=0))
+        if not options['all']:
+            queryset = queryset.filter(cues_analyzed_at__isnull=True)
+        ids = list(queryset.order_by('created_at').values_list('id', flat=True)[:options['limit']])
+        self.stdout.write(
+            f'Detecting cues for {len(ids)} items on {settings.AUDIO_ANALYSIS_WORKERS} worker processes...'
+        )
+
+        started = time.perf_counter()
+        detected = failed = 0
+        for index in range(0, len(ids), options['batch_size']):
+            batch = LibraryItem.objects.filter(id__in=ids[index:index + options['batch_size']])
+            batch_detected, batch_failed = detect_item_cues(list(batch.only('id', 'audio_file')))
+            detected += batch_detected
+            failed += batch_failed
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'{detected + failed}/{len(ids)} items, {failed} failed ({(detected + failed) / elapsed:.1f} tracks/s)'
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'Detected cues for {detected} items, {failed} failed'))
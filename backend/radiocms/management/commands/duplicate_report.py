@@ -0,0 +1,91 @@
+import json
+from collections import defaultdict
+from itertools import combinations
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from radiocms.models.fingerprint import AudioFingerprint, FingerprintBucket
+from radiocms.models.library import LibraryItem
+from radiocms.utils.audio.fingerprint import MIN_FINGERPRINT_HASHES, alignment, unpack_peaks
+
+
+class Command(BaseCommand):
+    help = (
+        'Report groups of library items that sound alike. Only items sharing an '
+        'LSH bucket are aligned, so the report does not grow quadratically '
+        'with the library.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threshold', type=float, default=None,
+                            help='Minimum alignment (default FINGERPRINT_DUPLICATE_THRESHOLD)')
+        parser.add_argument('--json', action='store_true', help='Print the groups as JSON')
+
+    def handle(self, *args, **options):
+        threshold = options['threshold']
+        if threshold is None:
+            threshold = settings.FINGERPRINT_DUPLICATE_THRESHOLD
+
+        shared = FingerprintBucket.objects.values('key').annotate(size=Count('id')).filter(size__gt=1).values('key')
+        buckets = defaultdict(list)
+        for key, pk in FingerprintBucket.objects.filter(key__in=shared).values_list('key', 'fingerprint_id').iterator():
+            buckets[key].append(pk)
+        candidates = {pair for members in buckets.values() for pair in combinations(sorted(members), 2)}
+
+        ids = {pk for pair in candidates for pk in pair}
+        peaks = {
+            pk: unpack_peaks(bytes(data))
+            for pk, data in AudioFingerprint.objects.filter(pk__in=ids, hash_count__gte=MIN_FINGERPRINT_HASHES)
+            .values_list('library_item_id', 'peaks')
+        }
+
+        # Union-find over the confirmed pairs
+        parent = {}
+
+        def find(pk):
+            parent.setdefault(pk, pk)
+            while parent[pk] != pk:
+                parent[pk] = parent[parent[pk]]
+                pk = parent[pk]
+            return pk
+
+        scores = {}
+        for first, second in candidates:
+            if first not in peaks or second not in peaks:
+                continue
+            score = alignment(peaks[first], peaks[second])
+            if score >= threshold:
+                scores[(first, second)] = score
+                parent[find(first)] = find(second)
+
+        groups = defaultdict(list)
+        for pk in parent:
+            groups[find(pk)].append(pk)
+        best = defaultdict(float)
+        for (first, _), score in scores.items():
+            best[find(first)] = max(best[find(first)], score)
+        items = LibraryItem.objects.in_bulk(list(parent))
+
+        report = []
+        for root, members in groups.items():
+            report.append({
+                'similarity': round(best[root], 3),
+                'items': [
+                    {'id': str(pk), 'title': items[pk].title, 'artist': items[pk].artist}
+                    for pk in members if pk in items
+                ],
+            })
+        report.sort(key=lambda group: -group['similarity'])
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        for group in report:
+            self.stdout.write(f"{len(group['items'])} items, alignment up to {group['similarity']:.2f}:")
+            for item in group['items']:
+                self.stdout.write(f"  {item['id']}  {item['artist']} - {item['title']}")
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(candidates)} candidate pairs aligned, {len(report)} duplicate groups'
+        ))
@@ -0,0 +1,38 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from radiocms.models.library import LibraryItem
+from radiocms.utils.analysis import embed_items
+
+
+class Command(BaseCommand):
+    help = 'Compute similarity-search embeddings (MFCC/chroma statistics) for library items without one'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Recompute existing embeddings too')
+        parser.add_argument('--batch-size', type=int, default=200, help='Items submitted to the pool at a time')
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many items')
+
+    def handle(self, *args, **options):
+        queryset = LibraryItem.objects.all()
+        if not options['all']:
+            queryset = queryset.filter(embedding__isnull=True)
+        ids = list(queryset.order_by('created_at').values_list('id', flat=True)[:options['limit']])
+        self.stdout.write(
+            f'Embedding {len(ids)} items on {settings.AUDIO_ANALYSIS_WORKERS} worker processes...'
+        )
+
+        started = time.perf_counter()
+        embedded = failed = 0
+        for index in range(0, len(ids), options['batch_size']):
+            batch = LibraryItem.objects.filter(id__in=ids[index:index + options['batch_size']])
+            batch_embedded, batch_failed = embed_items(list(batch.only('id', 'audio_file')))
+            embedded += batch_embedded
+            failed += batch_failed
+            elapsed = time.perf_counter() - started
+            processed = min(index + options['batch_size'], len(ids))
+            self.stdout.write(f'{processed}/{len(ids)} items, {failed} failed ({processed / elapsed:.1f} items/s)')
+
+        self.stdout.write(self.style.SUCCESS(f'Embedded {embedded} items, {failed} failed'))
@@ -0,0 +1,40 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from radiocms.models.library import LibraryItem
+from radiocms.utils.analysis import fingerprint_items
+
+
+class Command(BaseCommand):
+    help = 'Compute acoustic fingerprints for library items that do not have one yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Recompute existing fingerprints too')
+        parser.add_argument('--batch-size', type=int, default=200, help='Items submitted to the pool at a time')
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many items')
+
+    def handle(self, *args, **options):
+        queryset = LibraryItem.objects.all()
+        if not options['all']:
+            queryset = queryset.filter(fingerprint__isnull=True)
+        ids = list(queryset.order_by('created_at').values_list('id', flat=True)[:options['limit']])
+        self.stdout.write(
+            f'Fingerprinting {len(ids)} items on {settings.AUDIO_ANALYSIS_WORKERS} worker processes...'
+        )
+
+        started = time.perf_counter()
+        fingerprinted = failed = 0
+        for index in range(0, len(ids), options['batch_size']):
+            batch = LibraryItem.objects.filter(id__in=ids[index:index + options['batch_size']])
+            batch_fingerprinted, batch_failed = fingerprint_items(list(batch.only('id', 'audio_file')))
+            fingerprinted += batch_fingerprinted
+            failed += batch_failed
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'{fingerprinted + failed}/{len(ids)} items, {failed} failed '
+                f'({(fingerprinted + failed) / elapsed:.1f} items/s)'
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'Fingerprinted {fingerprinted} items, {failed} failed'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from radiocms.models.library import LibraryItem
+from radiocms.utils.plays import decay_popularity, get_play_counter
+
+
+class Command(BaseCommand):
+    help = 'Write buffered play counts to the database now and bring decayed popularity up to date'
+
+    def handle(self, *args, **options):
+        written = get_play_counter().flush()
+        decayed = decay_popularity(LibraryItem.objects.filter(popularity_weekly__gt=0), timezone.now())
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} plays, decayed popularity of {decayed} items'))
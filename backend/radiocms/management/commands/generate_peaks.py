@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from radiocms.models.library import LibraryItem
+from radiocms.utils.analysis import generate_item_peaks
+
+
+class Command(BaseCommand):
+    help = 'Generate waveform peak files for library items that do not have one yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Regenerate peaks for every item')
+        parser.add_argument('--batch-size', type=int, default=200, help='Items submitted to the pool at a time')
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many items')
+
+    def handle(self, *args, **options):
+        queryset = LibraryItem.objects.all() if options['all'] else LibraryItem.objects.filter(peaks_file='')
+        ids = list(queryset.order_by('created_at').values_list('id', flat=True)[:options['limit']])
+        self.stdout.write(
+            f'Generating peaks for {len(ids)} items on {settings.AUDIO_ANALYSIS_WORKERS} worker processes...'
+        )
+
+        started = time.perf_counter()
+        generated = failed = 0
+        for index in range(0, len(ids), options['batch_size']):
+            batch = LibraryItem.objects.filter(id__in=ids[index:index + options['batch_size']])
+            batch_generated, batch_failed = generate_item_peaks(list(batch.only('id', 'audio_file')))
+            generated += batch_generated
+            failed += batch_failed
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'{generated + failed}/{len(ids)} items, {failed} failed ({(generated + failed) / elapsed:.1f} tracks/s)'
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'Generated peaks for {generated} items, {failed} failed'))
@@ -0,0 +1,43 @@
+import time
+from datetime import date as Date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from radiocms.apps.airadio.models.settings import Station
+from radiocms.utils.station_logs import generate_logs
+
+
+class Command(BaseCommand):
+    help = 'Generate daily play logs for stations from their playlists'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', type=Date.fromisoformat, default=None,
+                            help='First day, YYYY-MM-DD (default tomorrow)')
+        parser.add_argument('--days', type=int, default=7)
+        parser.add_argument('--station', type=int, action='append', help='Station id (repeatable; default all)')
+        parser.add_argument('--batch-size', type=int, default=100, help='Stations submitted to the pool at a time')
+
+    def handle(self, *args, **options):
+        start = options['date'] or timezone.localdate() + timedelta(days=1)
+        station_ids = options['station'] or list(Station.objects.order_by('id').values_list('id', flat=True))
+        self.stdout.write(
+            f'Generating {options["days"]} days from {start} for {len(station_ids)} stations on '
+            f'{settings.AUDIO_ANALYSIS_WORKERS} worker processes...'
+        )
+
+        started = time.perf_counter()
+        generated = failed = 0
+        for index in range(0, len(station_ids), options['batch_size']):
+            batch = station_ids[index:index + options['batch_size']]
+            batch_generated, batch_failed = generate_logs(batch, start, options['days'])
+            generated += batch_generated
+            failed += batch_failed
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'{index + len(batch)}/{len(station_ids)} stations, {generated} logs, {failed} failed '
+                f'({generated / elapsed:.1f} station days/s)'
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'Generated {generated} station days, {failed} failed'))
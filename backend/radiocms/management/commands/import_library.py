@@ -0,0 +1,61 @@
+import os
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from radiocms.utils.mass_import import ManifestError, import_manifest
+
+
+class Command(BaseCommand):
+    help = (
+        'Mass import library items from a CSV or JSON Lines manifest, skipping '
+        'rows whose title/artist already exists'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('manifest', help='Path to a .csv or .jsonl manifest')
+        parser.add_argument('--format', choices=('csv', 'jsonl'), help='Manifest format (default: from extension)')
+        parser.add_argument('--media-root', help='Directory media paths are relative to (default: the manifest\'s)')
+        parser.add_argument('--batch-size', type=int, default=settings.MASS_IMPORT_BATCH_SIZE,
+                            help='Rows per dedupe query and bulk insert')
+        parser.add_argument('--workers', type=int, default=settings.MEDIA_UPLOAD_WORKERS,
+                            help='Parallel media uploads')
+        parser.add_argument('--user', help='Username recorded as created_by')
+        parser.add_argument('--dry-run', action='store_true', help='Only parse and dedupe, change nothing')
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            user = get_user_model().objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f"Unknown user: {options['user']}")
+
+        try:
+            report = import_manifest(
+                options['manifest'],
+                options['format'],
+                user=user,
+                batch_size=options['batch_size'],
+                workers=options['workers'],
+                media_root=options['media_root'] or os.path.dirname(os.path.abspath(options['manifest'])),
+                dry_run=options['dry_run'],
+                progress=self._progress,
+            )
+        except (OSError, ManifestError) as e:
+            raise CommandError(str(e))
+
+        for error in report.errors:
+            self.stderr.write(f"Row {error['row']}: {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f'{"Would create" if options["dry_run"] else "Created"} {report.created} items '
+            f'from {report.processed} rows ({report.existing} already in the library, '
+            f'{report.duplicates} repeated in the manifest, {report.failed} failed) '
+            f'at {report.rate:.0f} rows/s'
+        ))
+
+    def _progress(self, report):
+        self.stdout.write(
+            f'{report.processed} rows: {report.created} created, {report.existing} existing, '
+            f'{report.duplicates} duplicates, {report.failed} failed ({report.rate:.0f} rows/s)'
+        )
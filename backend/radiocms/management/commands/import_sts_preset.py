@@ -0,0 +1,44 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from radiocms.apps.airadio.models.settings import Station
+from radiocms.models.processing import ProcessingPreset
+from radiocms.utils.processing import sts
+
+
+class Command(BaseCommand):
+    help = 'Store a Stereo Tool .sts preset and optionally assign it to stations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to the .sts file')
+        parser.add_argument('--name', help='Preset name (default: the file name)')
+        parser.add_argument('--description', default='')
+        parser.add_argument('--station', type=int, action='append', default=[],
+                            help='Station id to assign the preset to (repeatable)')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        try:
+            content = path.read_bytes().decode('utf-8', errors='replace')
+            parsed = sts.parse(content)
+        except OSError as e:
+            raise CommandError(f'Cannot read {path}: {str(e)}')
+        except sts.StsError as e:
+            raise CommandError(f'{path} is not a valid .sts preset: {str(e)}')
+
+        preset, created = ProcessingPreset.objects.get_or_create(
+            sha256=sts.file_digest(content.encode()),
+            defaults={'name': options['name'] or path.stem, 'description': options['description'],
+                      'content': content},
+        )
+        action = 'Stored' if created else 'Already stored as'
+        self.stdout.write(f'{action} "{preset.name}" ({len(parsed)} sections, {parsed.key_count} keys)')
+
+        for station_id in options['station']:
+            updated = Station.objects.filter(pk=station_id).update(processing_preset=preset)
+            if not updated:
+                self.stderr.write(f'No station {station_id}')
+            else:
+                self.stdout.write(f'Assigned to station {station_id}')
+        self.stdout.write(self.style.SUCCESS(str(preset.id)))
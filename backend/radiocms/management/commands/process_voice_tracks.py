@@ -0,0 +1,78 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from radiocms.apps.airadio.models.stationid import StationID
+from radiocms.models.library import LibraryItem
+from radiocms.models.processing import ProcessingPreset
+from radiocms.utils.ingest import enqueue_analysis
+from radiocms.utils.voice import default_preset_data, process_station_ids, process_voice_items
+
+
+class Command(BaseCommand):
+    help = (
+        'Render voice tracks (library items in a category) and StationID '
+        'jingles through the mic processing chain of a Stereo Tool preset'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--category', type=int, action='append', default=[],
+                            help='Process library items in this category id (repeatable)')
+        parser.add_argument('--items', nargs='*', default=[], help='Library item ids to process')
+        parser.add_argument('--station-ids', type=int, metavar='STATION',
+                            help="Process this station's StationID jingles")
+        parser.add_argument('--preset', help='ProcessingPreset id (default: MIC_PROCESSING_PRESET)')
+        parser.add_argument('--unprocessed', action='store_true',
+                            help='Skip objects that have already been processed')
+        parser.add_argument('--batch-size', type=int, default=50, help='Objects submitted to the pool at a time')
+
+    def handle(self, *args, **options):
+        if options['preset']:
+            preset = ProcessingPreset.objects.filter(pk=options['preset']).first()
+            if preset is None:
+                raise CommandError(f"No preset {options['preset']}")
+            preset_data = preset.content.encode()
+        else:
+            preset_data = default_preset_data()
+
+        items = LibraryItem.objects.none()
+        if options['category'] or options['items']:
+            items = LibraryItem.objects.filter(Q(categories__in=options['category']) | Q(pk__in=options['items']))
+            if options['unprocessed']:
+                items = items.filter(source_audio_file='')
+        station_ids = StationID.objects.none()
+        if options['station_ids']:
+            station_ids = StationID.objects.filter(station_id=options['station_ids'])
+            if options['unprocessed']:
+                station_ids = station_ids.filter(source_media_url='')
+
+        item_ids = list(items.distinct().values_list('id', flat=True))
+        jingle_ids = list(station_ids.values_list('id', flat=True))
+        self.stdout.write(
+            f'Processing {len(item_ids)} voice tracks and {len(jingle_ids)} StationIDs on '
+            f'{settings.AUDIO_ANALYSIS_WORKERS} worker processes...'
+        )
+
+        started = time.perf_counter()
+        processed = failed = 0
+        batch_size = options['batch_size']
+        for index in range(0, len(item_ids), batch_size):
+            batch = list(LibraryItem.objects.filter(id__in=item_ids[index:index + batch_size])
+                         .only('id', 'audio_file', 'source_audio_file'))
+            batch_processed, batch_failed = process_voice_items(batch, preset_data)
+            processed += batch_processed
+            failed += batch_failed
+        if item_ids:
+            # Loudness, peaks and cues describe the old audio
+            enqueue_analysis(item_ids)
+        for index in range(0, len(jingle_ids), batch_size):
+            batch = list(StationID.objects.filter(id__in=jingle_ids[index:index + batch_size]))
+            batch_processed, batch_failed = process_station_ids(batch, preset_data)
+            processed += batch_processed
+            failed += batch_failed
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {processed} files, {failed} failed in {time.perf_counter() - started:.1f} s'
+        ))
@@ -0,0 +1,31 @@
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from radiocms.utils.ingest import IngestWorkerPool, get_ingest_queue
+
+
+class Command(BaseCommand):
+    help = 'Run the library ingest worker pool against the shared (Redis) queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.INGEST_WORKERS, help='Worker threads')
+
+    def handle(self, *args, **options):
+        if settings.INGEST_QUEUE_BACKEND != 'redis':
+            self.stdout.write(self.style.WARNING(
+                'INGEST_QUEUE_BACKEND is not redis: web processes run their own in-process workers'
+            ))
+
+        pool = IngestWorkerPool(get_ingest_queue(), options['workers']).start()
+        self.stdout.write(self.style.SUCCESS(f"Started {options['workers']} ingest workers"))
+
+        stopped = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: stopped.set())
+        stopped.wait()
+
+        self.stdout.write('Stopping ingest workers...')
+        pool.stop()
@@ -0,0 +1,43 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from radiocms.models.library import LibraryItem
+from radiocms.utils.analysis import analyze_items
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure BS.412 MPX power and loudness statistics of library items that have not been '
+        'scanned yet. Their loudness analysis is refreshed in the same decode.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Rescan every item')
+        parser.add_argument('--batch-size', type=int, default=200, help='Items submitted to the pool at a time')
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many items')
+
+    def handle(self, *args, **options):
+        queryset = LibraryItem.objects.all()
+        if not options['all']:
+            queryset = queryset.filter(mpx_scan__isnull=True)
+        ids = list(queryset.order_by('created_at').values_list('id', flat=True)[:options['limit']])
+        self.stdout.write(
+            f'Scanning {len(ids)} items against {settings.BS412_LIMIT_DBR} dBr on '
+            f'{settings.AUDIO_ANALYSIS_WORKERS} worker processes...'
+        )
+
+        started = time.perf_counter()
+        scanned = failed = 0
+        for index in range(0, len(ids), options['batch_size']):
+            batch = LibraryItem.objects.filter(id__in=ids[index:index + options['batch_size']])
+            batch_scanned, batch_failed = analyze_items(list(batch.only('id', 'audio_file')))
+            scanned += batch_scanned
+            failed += batch_failed
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'{scanned + failed}/{len(ids)} items, {failed} failed ({(scanned + failed) / elapsed:.1f} tracks/s)'
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'Scanned {scanned} items, {failed} failed'))
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:05
+
+import hashlib
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+
+def _normalize(value):
+    value = unicodedata.normalize('NFKC', value or '').casefold()
+    return re.sub(r'\s+', ' ', value).strip()
+
+
+def fill_dedupe_keys(apps, schema_editor):
+    LibraryItem = apps.get_model('radiocms', 'LibraryItem')
+    batch = []
+    for item in LibraryItem.objects.only('id', 'title', 'artist').iterator(chunk_size=2000):
+        item.dedupe_key = hashlib.sha1(
+            f"{_normalize(item.title)}\x1f{_normalize(item.artist)}".encode()
+        ).hexdigest()
+        batch.append(item)
+        if len(batch) >= 2000:
+            LibraryItem.objects.bulk_update(batch, ['dedupe_key'])
+            batch = []
+    if batch:
+        LibraryItem.objects.bulk_update(batch, ['dedupe_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radiocms', '0006_uploadsession'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='libraryitem',
+            name='dedupe_key',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=40),
+        ),
+        migrations.RunPython(fill_dedupe_keys, migrations.RunPython.noop),
+    ]
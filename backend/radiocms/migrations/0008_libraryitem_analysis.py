@@ -0,0 +1,38 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radiocms', '0007_libraryitem_dedupe_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='libraryitem',
+            name='duration',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='libraryitem',
+            name='loudness_lufs',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='libraryitem',
+            name='loudness_range',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='libraryitem',
+            name='true_peak_dbtp',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='libraryitem',
+            name='analyzed_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 14:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radiocms', '0008_libraryitem_analysis'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='libraryitem',
+            name='cues_analyzed_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
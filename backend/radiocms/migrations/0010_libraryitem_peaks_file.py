@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 14:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radiocms', '0009_libraryitem_cues_analyzed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='libraryitem',
+            name='peaks_file',
+            field=models.URLField(blank=True, max_length=500),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.6 on 2026-10-18 15:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radiocms', '0010_libraryitem_peaks_file'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FrameIndex',
+            fields=[
+                ('library_item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='frame_index', serialize=False, to='radiocms.libraryitem')),
+                ('format', models.CharField(choices=[('mp3', 'MP3'), ('aac', 'AAC (ADTS)')], max_length=8)),
+                ('sample_rate', models.PositiveIntegerField()),
+                ('samples_per_frame', models.PositiveIntegerField()),
+                ('frame_count', models.PositiveIntegerField()),
+                ('data_end', models.BigIntegerField()),
+                ('offsets', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'library_frame_indexes',
+            },
+        ),
+    ]
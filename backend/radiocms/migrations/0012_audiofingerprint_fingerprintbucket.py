@@ -0,0 +1,37 @@
+# Generated by Django 5.1.6 on 2026-10-18 16:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radiocms', '0011_frameindex'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AudioFingerprint',
+            fields=[
+                ('library_item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='fingerprint', serialize=False, to='radiocms.libraryitem')),
+                ('signature', models.BinaryField()),
+                ('hash_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'library_fingerprints',
+            },
+        ),
+        migrations.CreateModel(
+            name='FingerprintBucket',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('key', models.BigIntegerField(db_index=True)),
+                ('fingerprint', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='buckets', to='radiocms.audiofingerprint')),
+            ],
+            options={
+                'db_table': 'library_fingerprint_buckets',
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.6 on 2026-10-18 16:40
+
+import pgvector.django
+from django.db import migrations
+
+
+def enable_vector_extension(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS vector')
+
+
+def create_embedding_index(apps, schema_editor):
+    # HNSW over cosine distance; other databases fall back to a brute-force
+    # scan in radiocms.utils.similarity
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS radiocms_libraryitem_embedding_hnsw ON radiocms_libraryitem '
+            'USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)'
+        )
+
+
+def drop_embedding_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS radiocms_libraryitem_embedding_hnsw')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radiocms', '0012_audiofingerprint_fingerprintbucket'),
+    ]
+
+    operations = [
+        migrations.RunPython(enable_vector_extension, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='libraryitem',
+            name='embedding',
+            field=pgvector.django.VectorField(blank=True, dimensions=64, editable=False, null=True),
+        ),
+        migrations.RunPython(create_embedding_index, drop_embedding_index),
+    ]
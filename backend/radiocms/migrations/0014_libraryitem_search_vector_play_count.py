@@ -0,0 +1,75 @@
+# Generated by Django 5.1.6 on 2026-10-18 17:20
+
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+SEARCH_VECTOR_FUNCTION = """
+CREATE OR REPLACE FUNCTION radiocms_libraryitem_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(NEW.artist, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(NEW.genre, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def enable_trigram_extension(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+
+def create_search_index(apps, schema_editor):
+    # Other databases fall back to icontains scans in radiocms.utils.search
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(SEARCH_VECTOR_FUNCTION)
+    schema_editor.execute(
+        'CREATE TRIGGER radiocms_libraryitem_search_vector_update '
+        'BEFORE INSERT OR UPDATE OF title, artist, genre ON radiocms_libraryitem '
+        'FOR EACH ROW EXECUTE FUNCTION radiocms_libraryitem_search_vector()'
+    )
+    # Fire the trigger for existing rows
+    schema_editor.execute('UPDATE radiocms_libraryitem SET title = title')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS radiocms_libraryitem_search_vector_gin '
+        'ON radiocms_libraryitem USING gin (search_vector)'
+    )
+    # Must match the expression radiocms.utils.search compares against
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS radiocms_libraryitem_search_trgm '
+        "ON radiocms_libraryitem USING gin ((title || ' ' || artist) gin_trgm_ops)"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS radiocms_libraryitem_search_trgm')
+    schema_editor.execute('DROP INDEX IF EXISTS radiocms_libraryitem_search_vector_gin')
+    schema_editor.execute('DROP TRIGGER IF EXISTS radiocms_libraryitem_search_vector_update ON radiocms_libraryitem')
+    schema_editor.execute('DROP FUNCTION IF EXISTS radiocms_libraryitem_search_vector()')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radiocms', '0013_libraryitem_embedding'),
+    ]
+
+    operations = [
+        migrations.RunPython(enable_trigram_extension, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='libraryitem',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='libraryitem',
+            name='play_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.1.6 on 2026-10-18 18:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airadio', '0006_delete_library'),
+        ('radiocms', '0014_libraryitem_search_vector_play_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='libraryitem',
+            name='last_played_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='libraryitem',
+            name='popularity_hourly',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='libraryitem',
+            name='popularity_daily',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='libraryitem',
+            name='popularity_weekly',
+            field=models.FloatField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='libraryitem',
+            name='popularity_updated_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='StationPlayCount',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('play_count', models.PositiveIntegerField(default=0)),
+                ('last_played_at', models.DateTimeField(blank=True, null=True)),
+                ('library_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='station_play_counts', to='radiocms.libraryitem')),
+                ('station', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='play_counts', to='airadio.station')),
+            ],
+            options={
+                'db_table': 'station_play_counts',
+                'constraints': [models.UniqueConstraint(fields=('library_item', 'station'), name='unique_station_play_count')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radiocms', '0016_processingpreset'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='libraryitem',
+            name='source_audio_file',
+            field=models.URLField(blank=True, max_length=500),
+        ),
+    ]
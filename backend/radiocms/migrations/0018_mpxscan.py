@@ -0,0 +1,33 @@
+# Generated by Django 5.1.6 on 2026-10-18 20:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radiocms', '0017_libraryitem_source_audio_file'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MpxScan',
+            fields=[
+                ('library_item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='mpx_scan', serialize=False, to='radiocms.libraryitem')),
+                ('mpx_power_max_dbr', models.FloatField(blank=True, db_index=True, null=True)),
+                ('mpx_power_mean_dbr', models.FloatField(blank=True, null=True)),
+                ('seconds_over_limit', models.FloatField(default=0)),
+                ('limit_dbr', models.FloatField(default=0)),
+                ('preemphasis_us', models.PositiveSmallIntegerField(default=50)),
+                ('compliant', models.BooleanField(db_index=True, default=True)),
+                ('loudness_lufs', models.FloatField(blank=True, null=True)),
+                ('momentary_max_lufs', models.FloatField(blank=True, null=True)),
+                ('short_term_max_lufs', models.FloatField(blank=True, null=True)),
+                ('scanned_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'library_mpx_scans',
+            },
+        ),
+    ]
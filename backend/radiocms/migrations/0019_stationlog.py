@@ -0,0 +1,32 @@
+# Generated by Django 5.1.6 on 2026-10-18 21:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airadio', '0008_stationid_source_media_url'),
+        ('radiocms', '0018_mpxscan'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StationLog',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('entries', models.JSONField(default=list)),
+                ('song_count', models.PositiveIntegerField(default=0)),
+                ('relaxed_count', models.PositiveIntegerField(default=0)),
+                ('generated_at', models.DateTimeField(auto_now=True)),
+                ('station', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='logs', to='airadio.station')),
+            ],
+            options={
+                'db_table': 'station_logs',
+                'ordering': ['station', 'date'],
+                'constraints': [models.UniqueConstraint(fields=('station', 'date'), name='unique_station_log')],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.6 on 2026-10-18 21:40
+
+from django.db import migrations, models
+from django.db.models import F
+
+# radiocms.utils.playlists.POSITION_STEP at the time of this migration
+POSITION_STEP = 1024.0
+
+
+def spread_positions(apps, schema_editor):
+    PlaylistItem = apps.get_model('radiocms', 'PlaylistItem')
+    PlaylistItem.objects.update(position=F('position') * POSITION_STEP)
+
+
+def gather_positions(apps, schema_editor):
+    PlaylistItem = apps.get_model('radiocms', 'PlaylistItem')
+    for playlist_id in PlaylistItem.objects.values_list('playlist_id', flat=True).distinct():
+        items = list(PlaylistItem.objects.filter(playlist_id=playlist_id).order_by('position', 'id'))
+        for index, item in enumerate(items, start=1):
+            item.position = index
+        PlaylistItem.objects.bulk_update(items, ['position'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radiocms', '0019_stationlog'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='playlistitem',
+            name='position',
+            field=models.FloatField(default=0),
+        ),
+        migrations.RunPython(spread_positions, gather_positions),
+        migrations.AddIndex(
+            model_name='playlistitem',
+            index=models.Index(fields=['playlist', 'position'], name='playlist_items_position_idx'),
+        ),
+    ]
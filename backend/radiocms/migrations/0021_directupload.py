@@ -0,0 +1,36 @@
+# Generated by Django 5.1.6 on 2026-10-18 23:05
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radiocms', '0020_playlistitem_sparse_position'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DirectUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('asset', models.CharField(choices=[('audio', 'Audio'), ('cover_art', 'Cover Art'), ('lyrics', 'Lyrics')], default='audio', max_length=20)),
+                ('key', models.CharField(max_length=500)),
+                ('size', models.BigIntegerField()),
+                ('sha256', models.CharField(blank=True, max_length=64)),
+                ('s3_upload_id', models.CharField(blank=True, max_length=255)),
+                ('existing', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='direct_uploads', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'direct_uploads',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['created_by', 'key'], name='direct_uploads_user_key_idx')],
+            },
+        ),
+    ]
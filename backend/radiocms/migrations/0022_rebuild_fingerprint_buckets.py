@@ -0,0 +1,57 @@
+# Generated by Django 5.1.6 on 2026-10-18 23:40
+
+import hashlib
+
+import numpy as np
+from django.db import migrations
+
+# LSH banding of radiocms.utils.audio.fingerprint before and after this
+# migration, as (bands, rows), and its MIN_FINGERPRINT_HASHES
+OLD_BANDING = (32, 4)
+NEW_BANDING = (64, 2)
+MIN_FINGERPRINT_HASHES = 100
+
+
+def band_keys(signature, bands, rows):
+    keys = []
+    for band in range(bands):
+        values = signature[band * rows:(band + 1) * rows].astype('<u4').tobytes()
+        digest = hashlib.blake2b(bytes([band]) + values, digest_size=8).digest()
+        keys.append(int.from_bytes(digest, 'little', signed=True))
+    return keys
+
+
+def rebuild_buckets(apps, banding):
+    AudioFingerprint = apps.get_model('radiocms', 'AudioFingerprint')
+    FingerprintBucket = apps.get_model('radiocms', 'FingerprintBucket')
+    FingerprintBucket.objects.all().delete()
+    fingerprints = (AudioFingerprint.objects
+                    .filter(hash_count__gte=MIN_FINGERPRINT_HASHES)
+                    .values_list('library_item_id', 'signature'))
+    buckets = []
+    for pk, signature in fingerprints.iterator(chunk_size=1000):
+        signature = np.frombuffer(bytes(signature), dtype='<u4')
+        buckets.extend(FingerprintBucket(fingerprint_id=pk, key=key) for key in band_keys(signature, *banding))
+        if len(buckets) >= 10000:
+            FingerprintBucket.objects.bulk_create(buckets, batch_size=2000)
+            buckets = []
+    FingerprintBucket.objects.bulk_create(buckets, batch_size=2000)
+
+
+def to_new_banding(apps, schema_editor):
+    rebuild_buckets(apps, NEW_BANDING)
+
+
+def to_old_banding(apps, schema_editor):
+    rebuild_buckets(apps, OLD_BANDING)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radiocms', '0021_directupload'),
+    ]
+
+    operations = [
+        migrations.RunPython(to_new_banding, to_old_banding),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.6 on 2026-10-18 23:55
+
+from django.db import migrations, models
+
+
+def delete_fingerprints(apps, schema_editor):
+    # Earlier fingerprints were hashed from other peaks and kept none to
+    # align, so they cannot be compared; fingerprint_library recomputes them
+    AudioFingerprint = apps.get_model('radiocms', 'AudioFingerprint')
+    AudioFingerprint.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('radiocms', '0022_rebuild_fingerprint_buckets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audiofingerprint',
+            name='peaks',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.RunPython(delete_fingerprints, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+from django.db import models
+
+from radiocms.models.library import LibraryItem
+
+
+class AudioFingerprint(models.Model):
+    """
+    MinHash signature of a library item's landmark hashes
+    (radiocms.utils.audio.fingerprint). Near-duplicates are found through
+    its FingerprintBuckets, one per LSH band, and confirmed by aligning the
+    spectral peaks of both items in time.
+    """
+
+    library_item = models.OneToOneField(LibraryItem, on_delete=models.CASCADE, primary_key=True,
+                                        related_name="fingerprint")
+    signature = models.BinaryField()  # Little-endian uint32 per MinHash permutation
+    hash_count = models.PositiveIntegerField(default=0)  # Distinct landmark hashes behind the signature
+    peaks = models.BinaryField(default=b'')  # Little-endian uint32 per spectral peak, see pack_peaks
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        app_label = 'radiocms'
+        db_table = 'library_fingerprints'
+
+    def __str__(self):
+        return f"Fingerprint of {self.library_item_id}"
+
+
+class FingerprintBucket(models.Model):
+    """
+    One LSH band key of a fingerprint. Items sharing any key are candidate
+    duplicates, so a lookup is an index scan on ``key`` instead of a
+    comparison with every fingerprint.
+    """
+
+    id = models.BigAutoField(primary_key=True)  # LSH_BANDS rows per track add up
+    fingerprint = models.ForeignKey(AudioFingerprint, on_delete=models.CASCADE, related_name="buckets")
+    key = models.BigIntegerField(db_index=True)
+
+    class Meta:
+        app_label = 'radiocms'
+        db_table = 'library_fingerprint_buckets'
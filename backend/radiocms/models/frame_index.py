@@ -0,0 +1,63 @@
+from django.db import models
+import math
+
+from radiocms.models.library import LibraryItem
+from radiocms.utils.audio.frames import mp3_preroll_start, unpack_offsets
+
+
+class FrameIndex(models.Model):
+    """
+    Byte offset of every frame of a library item's MP3 or ADTS AAC audio
+    (radiocms.utils.audio.frames), for exact byte-range seeking. Frames have
+    a fixed duration, so a time maps to a frame number and then, through
+    ``offsets``, to a byte position.
+    """
+
+    FORMAT_CHOICES = [
+        ('mp3', 'MP3'),
+        ('aac', 'AAC (ADTS)'),
+    ]
+
+    library_item = models.OneToOneField(LibraryItem, on_delete=models.CASCADE, primary_key=True,
+                                        related_name="frame_index")
+    format = models.CharField(max_length=8, choices=FORMAT_CHOICES)
+    sample_rate = models.PositiveIntegerField()
+    samples_per_frame = models.PositiveIntegerField()
+    frame_count = models.PositiveIntegerField()
+    data_end = models.BigIntegerField()  # Byte just past the last frame
+    offsets = models.BinaryField()  # Little-endian uint32 per frame
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        app_label = 'radiocms'
+        db_table = 'library_frame_indexes'
+
+    @property
+    def frame_duration(self):
+        return self.samples_per_frame / self.sample_rate
+
+    @property
+    def duration(self):
+        return self.frame_count * self.frame_duration
+
+    def byte_range(self, start, end=None):
+        """
+        ``(first_byte, last_byte, start_time, end_time)`` covering the time
+        window ``start``-``end`` in seconds (to the end if ``end`` is None).
+        The range starts on a frame boundary, early enough for MP3 that the
+        decoder has the MDCT overlap and bit reservoir (mp3_preroll_start);
+        start_time is where it actually begins.
+        """
+        offsets = unpack_offsets(self.offsets)
+        first = min(max(0, math.floor(start / self.frame_duration)), self.frame_count - 1)
+        if self.format == 'mp3':
+            first = mp3_preroll_start(offsets, first)
+        last = self.frame_count if end is None else min(self.frame_count, math.ceil(end / self.frame_duration))
+        last = max(last, first + 1)
+
+        last_byte = (offsets[last] if last < self.frame_count else self.data_end) - 1
+        return offsets[first], last_byte, first * self.frame_duration, last * self.frame_duration
+
+    def __str__(self):
+        return f"{self.format} frame index for {self.library_item_id}"
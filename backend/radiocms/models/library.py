@@ -1,9 +1,42 @@
 from django.db import models
+import hashlib
+import math
+import re
+import unicodedata
 import uuid
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
+from django.utils import timezone
+from pgvector.django import VectorField
+
+from radiocms.utils.audio.embedding import EMBEDDING_DIMENSIONS
 
 User = get_user_model()
 
+
+def normalize_text(value):
+    """
+    Case- and whitespace-insensitive form of a title or artist
+    """
+    value = unicodedata.normalize('NFKC', value or '').casefold()
+    return re.sub(r'\s+', ' ', value).strip()
+
+
+def library_dedupe_key(title, artist):
+    """
+    Digest of the normalized (title, artist) pair, used to skip items that
+    are already in the library
+    """
+    return hashlib.sha1(f"{normalize_text(title)}\x1f{normalize_text(artist)}".encode()).hexdigest()
+
+
+# Half-life in seconds of each decayed popularity score
+POPULARITY_HALF_LIVES = {
+    'hourly': 60 * 60,
+    'daily': 24 * 60 * 60,
+    'weekly': 7 * 24 * 60 * 60,
+}
+
 class LibraryItem(models.Model):
     class Meta:
         app_label = 'radiocms'
@@ -24,6 +57,11 @@ class LibraryItem(models.Model):
     audio_file = models.URLField(max_length=500)
     cover_art = models.URLField(max_length=500, blank=True)
     lyrics_file = models.URLField(max_length=500, blank=True)
+    # Waveform peaks sidecar (radiocms.utils.audio.peaks)
+    peaks_file = models.URLField(max_length=500, blank=True)
+    # The upload as it was, when audio_file is its render through the mic
+    # processing chain (radiocms.utils.voice)
+    source_audio_file = models.URLField(max_length=500, blank=True)
     
     # Markers
     intro_point = models.FloatField(default=0)
@@ -33,6 +71,34 @@ class LibraryItem(models.Model):
     # Flags
     allow_skip = models.BooleanField(default=False)
     is_clean = models.BooleanField(default=False)
+
+    # Audio analysis (radiocms.utils.analysis); null until analyzed
+    duration = models.FloatField(null=True, blank=True)
+    loudness_lufs = models.FloatField(null=True, blank=True)
+    loudness_range = models.FloatField(null=True, blank=True)
+    true_peak_dbtp = models.FloatField(null=True, blank=True)
+    analyzed_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    # Set once detect_item_cues has looked at the audio
+    cues_analyzed_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    # MFCC/chroma statistics (radiocms.utils.audio.embedding) for similarity
+    # search; HNSW-indexed on PostgreSQL (migration 0013)
+    embedding = VectorField(dimensions=EMBEDDING_DIMENSIONS, null=True, blank=True, editable=False)
+
+    # Weighted title/artist/genre tsvector for radiocms.utils.search, kept
+    # up to date by a trigger on PostgreSQL (migration 0014)
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Plays so far, written behind by radiocms.utils.plays
+    play_count = models.PositiveIntegerField(default=0, editable=False)
+    last_played_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # Exponentially decayed play counts as of popularity_updated_at; see
+    # popularity() for the value now
+    popularity_hourly = models.FloatField(default=0, editable=False)
+    popularity_daily = models.FloatField(default=0, editable=False)
+    popularity_weekly = models.FloatField(default=0, editable=False, db_index=True)
+    popularity_updated_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    # library_dedupe_key(title, artist), kept in sync by save()
+    dedupe_key = models.CharField(max_length=40, db_index=True, editable=False, default='')
     
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
@@ -45,5 +111,24 @@ class LibraryItem(models.Model):
     class Meta:
         ordering = ['-created_at']
 
+    def save(self, *args, **kwargs):
+        self.dedupe_key = library_dedupe_key(self.title, self.artist)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and ({'title', 'artist'} & set(update_fields)):
+            kwargs['update_fields'] = {*update_fields, 'dedupe_key'}
+        super().save(*args, **kwargs)
+
+    def popularity(self, window='daily', now=None):
+        """
+        Decayed play count for ``window`` ('hourly', 'daily' or 'weekly') at
+        ``now``. Stored scores are brought up to date on every flush and
+        periodically, so they lag by at most POPULARITY_DECAY_INTERVAL.
+        """
+        score = getattr(self, f'popularity_{window}')
+        if not score or self.popularity_updated_at is None:
+            return 0.0
+        age = ((now or timezone.now()) - self.popularity_updated_at).total_seconds()
+        return score * math.exp(-math.log(2) * max(age, 0) / POPULARITY_HALF_LIVES[window])
+
     def __str__(self):
         return f"{self.title} - {self.artist}"
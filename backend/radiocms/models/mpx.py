@@ -0,0 +1,35 @@
+from django.db import models
+
+from radiocms.models.library import LibraryItem
+
+
+class MpxScan(models.Model):
+    """
+    ITU-R BS.412 multiplex power and loudness statistics of a library item
+    (radiocms.utils.audio.mpx), for finding the tracks that will push an
+    FM station's MPX power limiter hardest
+    """
+
+    library_item = models.OneToOneField(LibraryItem, on_delete=models.CASCADE, primary_key=True,
+                                        related_name="mpx_scan")
+    # Loudest 60 s sliding window and whole-track average, in dBr
+    mpx_power_max_dbr = models.FloatField(null=True, blank=True, db_index=True)
+    mpx_power_mean_dbr = models.FloatField(null=True, blank=True)
+    # Window positions above limit_dbr, in seconds of audio
+    seconds_over_limit = models.FloatField(default=0)
+    limit_dbr = models.FloatField(default=0)
+    preemphasis_us = models.PositiveSmallIntegerField(default=50)
+    compliant = models.BooleanField(default=True, db_index=True)
+
+    loudness_lufs = models.FloatField(null=True, blank=True)
+    momentary_max_lufs = models.FloatField(null=True, blank=True)
+    short_term_max_lufs = models.FloatField(null=True, blank=True)
+
+    scanned_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        app_label = 'radiocms'
+        db_table = 'library_mpx_scans'
+
+    def __str__(self):
+        return f"MPX scan of {self.library_item_id}"
@@ -21,7 +21,9 @@ class PlaylistItem(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     playlist = models.ForeignKey(Playlist, on_delete=models.CASCADE, related_name="items")
     library_item = models.ForeignKey(LibraryItem, on_delete=models.CASCADE, related_name="playlists")
-    position = models.PositiveIntegerField(default=0)  # Song order in the playlist
+    # Song order in the playlist: sparse, so a move or insert writes one row
+    # (radiocms.utils.playlists)
+    position = models.FloatField(default=0)
     rotation = models.CharField(max_length=10, choices=ROTATION_CHOICES, default='medium')
     added_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name="added_songs")
 
@@ -33,6 +35,9 @@ class PlaylistItem(models.Model):
         db_table = "playlist_items"
         unique_together = ('playlist', 'library_item')  # Avoid duplicate songs in a playlist
         ordering = ['position']
+        indexes = [
+            models.Index(fields=['playlist', 'position'], name='playlist_items_position_idx'),
+        ]
 
     def __str__(self):
         return f"{self.library_item.title} in {self.playlist.name}"
\ No newline at end of file
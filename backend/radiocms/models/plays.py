@@ -0,0 +1,27 @@
+from django.db import models
+
+from radiocms.apps.airadio.models.settings import Station
+from radiocms.models.library import LibraryItem
+
+
+class StationPlayCount(models.Model):
+    """
+    Plays of a library item on one station, written behind by
+    radiocms.utils.plays
+    """
+
+    id = models.BigAutoField(primary_key=True)  # A row per item played on each station
+    library_item = models.ForeignKey(LibraryItem, on_delete=models.CASCADE, related_name="station_play_counts")
+    station = models.ForeignKey(Station, on_delete=models.CASCADE, related_name="play_counts")
+    play_count = models.PositiveIntegerField(default=0)
+    last_played_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        app_label = 'radiocms'
+        db_table = 'station_play_counts'
+        constraints = [
+            models.UniqueConstraint(fields=['library_item', 'station'], name='unique_station_play_count'),
+        ]
+
+    def __str__(self):
+        return f"{self.library_item_id} on {self.station_id}: {self.play_count}"
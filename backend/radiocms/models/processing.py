@@ -0,0 +1,44 @@
+from django.db import models
+import uuid
+from django.contrib.auth import get_user_model
+
+from radiocms.utils.processing import sts
+
+User = get_user_model()
+
+
+class ProcessingPreset(models.Model):
+    """
+    A Stereo Tool (.sts) processing preset, stored verbatim and assigned to
+    stations through Station.processing_preset. ``preset`` is the parsed
+    form, shared through the parse cache by content hash.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=255)
+    description = models.TextField(blank=True)
+    content = models.TextField()
+    sha256 = models.CharField(max_length=64, unique=True, editable=False)  # Of the UTF-8 content
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+
+    class Meta:
+        app_label = 'radiocms'
+        db_table = 'processing_presets'
+        ordering = ['name']
+
+    def save(self, *args, **kwargs):
+        self.sha256 = sts.file_digest(self.content.encode())
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'content' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'sha256'}
+        super().save(*args, **kwargs)
+
+    @property
+    def preset(self):
+        return sts.load(self.content.encode(), self.sha256 or None)
+
+    def __str__(self):
+        return self.name
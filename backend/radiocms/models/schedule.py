@@ -0,0 +1,30 @@
+from django.db import models
+
+from radiocms.apps.airadio.models.settings import Station
+
+
+class StationLog(models.Model):
+    """
+    A station's generated play log for one day (radiocms.utils.station_logs)
+    """
+
+    id = models.BigAutoField(primary_key=True)  # A row per station per day
+    station = models.ForeignKey(Station, on_delete=models.CASCADE, related_name="logs")
+    date = models.DateField()
+    # radiocms.utils.scheduling.engine entries, in play order
+    entries = models.JSONField(default=list)
+    song_count = models.PositiveIntegerField(default=0)
+    # Songs played inside their artist or title separation window
+    relaxed_count = models.PositiveIntegerField(default=0)
+    generated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        app_label = 'radiocms'
+        db_table = 'station_logs'
+        ordering = ['station', 'date']
+        constraints = [
+            models.UniqueConstraint(fields=['station', 'date'], name='unique_station_log'),
+        ]
+
+    def __str__(self):
+        return f"{self.station_id} log for {self.date}"
@@ -0,0 +1,84 @@
+from django.db import models
+import uuid
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+class UploadSession(models.Model):
+    """
+    A resumable (tus-style) upload. Received bytes are staged on disk and
+    forwarded to S3 as multipart parts; ``offset`` only advances once the
+    bytes are durably staged.
+    """
+
+    ASSET_CHOICES = [
+        ('audio', 'Audio'),
+        ('cover_art', 'Cover Art'),
+        ('lyrics', 'Lyrics'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    asset = models.CharField(max_length=20, choices=ASSET_CHOICES, default='audio')
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=255, blank=True)
+    sha256 = models.CharField(max_length=64, blank=True)
+
+    # Upload progress
+    length = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+    forwarded = models.BigIntegerField(default=0)  # Bytes already sent to S3 as parts
+
+    # S3 multipart upload
+    key = models.CharField(max_length=500)
+    s3_upload_id = models.CharField(max_length=255)
+    parts = models.JSONField(default=list, blank=True)
+
+    completed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name="upload_sessions")
+
+    class Meta:
+        app_label = "radiocms"
+        db_table = "upload_sessions"
+        ordering = ['-created_at']
+
+    @property
+    def is_complete(self):
+        return self.completed_at is not None
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.length})"
+
+
+class DirectUpload(models.Model):
+    """
+    A key issued by presign_upload for a presigned direct upload.
+    finalize_library_item only accepts keys issued to the requesting user,
+    and each key only once.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    asset = models.CharField(max_length=20, choices=UploadSession.ASSET_CHOICES, default='audio')
+    key = models.CharField(max_length=500)
+    size = models.BigIntegerField()
+    sha256 = models.CharField(max_length=64, blank=True)
+    # Multipart upload id; blank for a single presigned PUT
+    s3_upload_id = models.CharField(max_length=255, blank=True)
+    # The content was already stored, nothing is uploaded, and the object
+    # belongs to other items as well
+    existing = models.BooleanField(default=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name="direct_uploads")
+
+    class Meta:
+        app_label = "radiocms"
+        db_table = "direct_uploads"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_by', 'key'], name='direct_uploads_user_key_idx'),
+        ]
+
+    def __str__(self):
+        return self.key
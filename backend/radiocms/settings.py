@@ -68,6 +68,30 @@ AWS_STORAGE_BUCKET_NAME = os.getenv('AWS_STORAGE_BUCKET_NAME')
 AWS_S3_REGION_NAME = os.getenv('AWS_S3_REGION_NAME', 'us-east-1')
 AWS_DEFAULT_ACL = 'public-read'
 AWS_QUERYSTRING_AUTH = False
+# Optional S3-compatible endpoint (e.g. MinIO) for local development
+AWS_S3_ENDPOINT_URL = os.getenv('AWS_S3_ENDPOINT_URL')
+
+# Shared S3 client tuning
+AWS_S3_MAX_POOL_CONNECTIONS = int(os.getenv('AWS_S3_MAX_POOL_CONNECTIONS', '50'))
+AWS_S3_CONNECT_TIMEOUT = float(os.getenv('AWS_S3_CONNECT_TIMEOUT', '5'))
+AWS_S3_READ_TIMEOUT = float(os.getenv('AWS_S3_READ_TIMEOUT', '60'))
+AWS_S3_MAX_ATTEMPTS = int(os.getenv('AWS_S3_MAX_ATTEMPTS', '3'))
+# Seconds a successful bucket check stays valid before it is re-checked
+AWS_S3_BUCKET_CHECK_TTL = int(os.getenv('AWS_S3_BUCKET_CHECK_TTL', '300'))
+
+# Streaming multipart uploads (sizes in bytes; S3 requires parts >= 5 MB)
+AWS_S3_MULTIPART_THRESHOLD = int(os.getenv('AWS_S3_MULTIPART_THRESHOLD', str(8 * 1024 * 1024)))
+AWS_S3_MULTIPART_CHUNKSIZE = int(os.getenv('AWS_S3_MULTIPART_CHUNKSIZE', str(8 * 1024 * 1024)))
+AWS_S3_MAX_CONCURRENCY = int(os.getenv('AWS_S3_MAX_CONCURRENCY', '4'))
+
+# Lifetime in seconds of presigned direct-upload URLs
+AWS_S3_PRESIGNED_EXPIRY = int(os.getenv('AWS_S3_PRESIGNED_EXPIRY', '3600'))
+
+# Store media under SHA-256 derived keys and skip uploads of known content
+MEDIA_CONTENT_ADDRESSED = os.getenv('MEDIA_CONTENT_ADDRESSED', 'True') == 'True'
+
+# Threads shared by all requests for uploading a request's media in parallel
+MEDIA_UPLOAD_WORKERS = int(os.getenv('MEDIA_UPLOAD_WORKERS', '8'))
 
 # Add these settings
 STATIC_URL = '/static/'
@@ -83,6 +107,21 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Where uploaded media is stored: S3StorageBackend, or LocalStorageBackend
+# (MEDIA_ROOT, served by this app) for single-box and offline setups
+MEDIA_STORAGE_BACKEND = os.getenv('MEDIA_STORAGE_BACKEND', 'radiocms.utils.backends.s3.S3StorageBackend')
+
+# Scheme and host prefixed to MEDIA_URL in the URLs of locally stored media
+LOCAL_MEDIA_BASE_URL = os.getenv('LOCAL_MEDIA_BASE_URL', 'http://localhost:8000')
+
+# Hand local media responses to the front proxy (e.g. X-Accel-Redirect for
+# nginx, X-Sendfile for Apache) instead of streaming them from the worker
+MEDIA_SENDFILE_HEADER = os.getenv('MEDIA_SENDFILE_HEADER', '')
+MEDIA_SENDFILE_PREFIX = os.getenv('MEDIA_SENDFILE_PREFIX', '/protected-media/')
+
+# Local staging area for resumable uploads
+UPLOAD_STAGING_ROOT = os.getenv('UPLOAD_STAGING_ROOT', os.path.join(BASE_DIR, 'upload_staging'))
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -248,6 +287,72 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Background library ingest
+REDIS_URL = os.getenv('REDIS_URL')
+# 'redis' shares the queue with run_ingest_workers; 'local' runs jobs in-process
+INGEST_QUEUE_BACKEND = os.getenv('INGEST_QUEUE_BACKEND', 'redis' if REDIS_URL else 'local')
+LIBRARY_INGEST_ASYNC = os.getenv('LIBRARY_INGEST_ASYNC', 'True') == 'True'
+INGEST_WORKERS = int(os.getenv('INGEST_WORKERS', '4'))
+INGEST_MAX_ATTEMPTS = int(os.getenv('INGEST_MAX_ATTEMPTS', '5'))
+# Base delay in seconds, doubled after every failed attempt
+INGEST_RETRY_BACKOFF = float(os.getenv('INGEST_RETRY_BACKOFF', '2'))
+INGEST_STATUS_TTL = int(os.getenv('INGEST_STATUS_TTL', str(24 * 60 * 60)))
+
+# Mass import: rows per dedupe query / bulk insert, and the server directory
+# manifest media paths are resolved against (unset: manifests must use URLs)
+MASS_IMPORT_BATCH_SIZE = int(os.getenv('MASS_IMPORT_BATCH_SIZE', '1000'))
+MASS_IMPORT_MEDIA_ROOT = os.getenv('MASS_IMPORT_MEDIA_ROOT', '')
+
+# Audio analysis: worker processes, the decode working set each may use,
+# tracks per worker before the pool starts fresh workers, and whether newly
+# ingested items are analyzed straight away
+AUDIO_ANALYSIS_WORKERS = int(os.getenv('AUDIO_ANALYSIS_WORKERS', str(os.cpu_count() or 2)))
+AUDIO_ANALYSIS_MEMORY_MB = int(os.getenv('AUDIO_ANALYSIS_MEMORY_MB', '64'))
+AUDIO_ANALYSIS_TASKS_PER_CHILD = int(os.getenv('AUDIO_ANALYSIS_TASKS_PER_CHILD', '50'))
+AUDIO_ANALYSIS_ON_INGEST = os.getenv('AUDIO_ANALYSIS_ON_INGEST', 'True') == 'True'
+# Precision of waveform peak files: 8 (int8) or 16 (int16) bits per value
+WAVEFORM_PEAK_BITS = int(os.getenv('WAVEFORM_PEAK_BITS', '8'))
+# Share of fingerprint landmarks (0-1) that must line up in time for two items
+# to count as duplicates. benchmark_fingerprint_lookup puts degraded copies
+# at 0.6 or more and unrelated songs in the same key at about 0.05 at most.
+FINGERPRINT_DUPLICATE_THRESHOLD = float(os.getenv('FINGERPRINT_DUPLICATE_THRESHOLD', '0.2'))
+# HNSW candidate list size for similar-track searches (recall vs latency);
+# raised to the requested top-k when that is larger
+SIMILARITY_EF_SEARCH = int(os.getenv('SIMILARITY_EF_SEARCH', '100'))
+SIMILARITY_MAX_RESULTS = int(os.getenv('SIMILARITY_MAX_RESULTS', '100'))
+# Library search: how strongly popularity lifts relevance (score is
+# relevance * (1 + weight * ln(1 + popularity))), which LibraryItem field
+# is used for it, and the largest page size
+SEARCH_POPULARITY_WEIGHT = float(os.getenv('SEARCH_POPULARITY_WEIGHT', '0.1'))
+SEARCH_POPULARITY_FIELD = os.getenv('SEARCH_POPULARITY_FIELD', 'popularity_weekly')
+SEARCH_MAX_RESULTS = int(os.getenv('SEARCH_MAX_RESULTS', '100'))
+# Play counters: 'redis' shares the buffer between processes; deltas are
+# flushed every PLAY_FLUSH_INTERVAL seconds and idle items' popularity is
+# decayed every POPULARITY_DECAY_INTERVAL seconds
+PLAY_COUNTER_BACKEND = os.getenv('PLAY_COUNTER_BACKEND', 'redis' if REDIS_URL else 'local')
+PLAY_FLUSH_INTERVAL = float(os.getenv('PLAY_FLUSH_INTERVAL', '5'))
+POPULARITY_DECAY_INTERVAL = int(os.getenv('POPULARITY_DECAY_INTERVAL', '300'))
+# Stereo Tool preset voice tracks and StationID jingles are processed with
+# when none is given (radiocms.utils.voice)
+MIC_PROCESSING_PRESET = os.getenv('MIC_PROCESSING_PRESET', str(BASE_DIR.parent / 'audioprocessing' / 'micProcessing.sts'))
+# Path of the live mic processing WebSocket (radiocms.views.mic)
+MIC_WEBSOCKET_PATH = os.getenv('MIC_WEBSOCKET_PATH', '/ws/mic/')
+# ITU-R BS.412 scans: FM pre-emphasis (50 us in Europe, 75 us in the
+# Americas) and the MPX power limit in dBr tracks are judged against
+BS412_PREEMPHASIS_US = int(os.getenv('BS412_PREEMPHASIS_US', '50'))
+BS412_LIMIT_DBR = float(os.getenv('BS412_LIMIT_DBR', '0'))
+# Station log generation (radiocms.utils.station_logs): relative weight of
+# each rotation, separation windows and StationID spacing in minutes, the
+# clean-only hours ("6-22", empty for none), and the length assumed for
+# songs and jingles that have not been analyzed
+SCHEDULE_ROTATION_WEIGHTS = os.getenv('SCHEDULE_ROTATION_WEIGHTS', 'high:6,medium:3,low:1')
+SCHEDULE_ARTIST_SEPARATION_MINUTES = float(os.getenv('SCHEDULE_ARTIST_SEPARATION_MINUTES', '60'))
+SCHEDULE_TITLE_SEPARATION_MINUTES = float(os.getenv('SCHEDULE_TITLE_SEPARATION_MINUTES', '180'))
+SCHEDULE_STATION_ID_INTERVAL_MINUTES = float(os.getenv('SCHEDULE_STATION_ID_INTERVAL_MINUTES', '15'))
+SCHEDULE_CLEAN_HOURS = os.getenv('SCHEDULE_CLEAN_HOURS', '')
+SCHEDULE_DEFAULT_SONG_SECONDS = float(os.getenv('SCHEDULE_DEFAULT_SONG_SECONDS', '210'))
+SCHEDULE_STATION_ID_SECONDS = float(os.getenv('SCHEDULE_STATION_ID_SECONDS', '8'))
+
 # FastAPI settings
 FASTAPI_SETTINGS = {
     'MOUNT_PATH': '/api/v3',
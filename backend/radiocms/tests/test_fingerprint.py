@@ -0,0 +1,62 @@
+import unittest
+
+import numpy as np
+from django.conf import settings
+
+from radiocms.management.commands.benchmark_fingerprint_lookup import (
+    SAMPLE_RATE, degraded_copy, fingerprint_tune, synthetic_tune,
+)
+from radiocms.utils.audio.fingerprint import (
+    MinHashLSHIndex, PeakExtractor, alignment, pack_peaks, unpack_peaks,
+)
+
+
+def peaks_of(audio, block_frames):
+    extractor = PeakExtractor()
+    for start in range(0, len(audio), block_frames):
+        extractor.update(audio[start:start + block_frames])
+    return extractor.peaks()
+
+
+class FingerprintTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Six songs in C major and a degraded copy of each
+        cls.songs = [fingerprint_tune(seed, 0, 20) for seed in range(6)]
+        cls.copies = [fingerprint_tune(seed, 0, 20, degraded=True) for seed in range(6)]
+
+    def test_peaks_do_not_depend_on_block_size(self):
+        audio = synthetic_tune(np.random.default_rng(0), 0, 10)
+        whole = peaks_of(audio, len(audio))
+        for block_frames in (700, 4096, SAMPLE_RATE * 3):
+            with self.subTest(block_frames=block_frames):
+                for expected, actual in zip(whole, peaks_of(audio, block_frames)):
+                    np.testing.assert_array_equal(actual, expected)
+
+    def test_peaks_round_trip(self):
+        frames, bins = self.songs[0][1]
+        packed_frames, packed_bins = unpack_peaks(pack_peaks(frames, bins))
+        np.testing.assert_array_equal(packed_frames, frames)
+        np.testing.assert_array_equal(packed_bins, bins)
+
+    def test_degraded_copies_align(self):
+        for (_, peaks), (_, copy) in zip(self.songs, self.copies):
+            self.assertGreater(alignment(peaks, copy), settings.FINGERPRINT_DUPLICATE_THRESHOLD)
+
+    def test_songs_in_the_same_key_do_not_align(self):
+        for index, (_, peaks) in enumerate(self.songs):
+            for _, other in self.songs[index + 1:]:
+                self.assertLess(alignment(peaks, other), settings.FINGERPRINT_DUPLICATE_THRESHOLD / 4)
+
+    def test_excerpt_aligns_with_its_song(self):
+        audio = synthetic_tune(np.random.default_rng(0), 0, 20)
+        excerpt = degraded_copy(np.random.default_rng(1), audio[5 * SAMPLE_RATE:15 * SAMPLE_RATE])
+        self.assertGreater(alignment(self.songs[0][1], peaks_of(excerpt, SAMPLE_RATE)), 0.5)
+
+    def test_index_finds_only_the_original(self):
+        index = MinHashLSHIndex()
+        for key, (signature, peaks) in enumerate(self.songs):
+            index.add(key, signature, peaks)
+        for key, (signature, peaks) in enumerate(self.copies):
+            matches = index.query(signature, peaks, settings.FINGERPRINT_DUPLICATE_THRESHOLD)
+            self.assertEqual([match[0] for match in matches], [key])
@@ -0,0 +1,46 @@
+import unittest
+
+import numpy as np
+
+from radiocms.utils.audio.loudness import HOP_FRAMES, LoudnessMeter, TruePeakMeter, _analysis_result
+from radiocms.utils.audio.mpx import MpxPowerMeter, _scan_result
+
+
+def tone(frames, channels, level=0.25):
+    samples = level * np.sin(2 * np.pi * 1000 * np.arange(frames) / 48000)
+    return np.repeat(samples[:, None], channels, axis=1).astype(np.float32)
+
+
+class LoudnessMeterTests(unittest.TestCase):
+    def test_blocks_shorter_than_a_hop_are_carried_over(self):
+        for channels in (1, 2):
+            with self.subTest(channels=channels):
+                audio = tone(HOP_FRAMES * 20, channels)
+                whole = LoudnessMeter(channels)
+                whole.update(audio)
+                pieces = LoudnessMeter(channels)
+                for start in range(0, len(audio), 2000):
+                    pieces.update(audio[start:start + 2000])
+                np.testing.assert_allclose(pieces.hops, whole.hops)
+                self.assertAlmostEqual(pieces.integrated(), whole.integrated())
+
+    def test_clip_shorter_than_a_hop(self):
+        for channels in (1, 2):
+            with self.subTest(channels=channels):
+                clip = tone(2000, channels)
+                loudness = LoudnessMeter(channels)
+                true_peak = TruePeakMeter(channels)
+                mpx = MpxPowerMeter(channels)
+                loudness.update(clip)
+                true_peak.update(clip)
+                mpx.update(clip)
+                true_peak.finish()
+
+                analysis = _analysis_result(loudness, true_peak, len(clip))
+                self.assertEqual(len(loudness.hops), 0)
+                self.assertIsNone(analysis['loudness_lufs'])
+                self.assertIsNone(analysis['loudness_range'])
+                self.assertIsNotNone(analysis['true_peak_dbtp'])
+                scan = _scan_result(mpx, loudness, len(clip), 0.0)
+                self.assertIsNone(scan['mpx_power_max_dbr'])
+                self.assertEqual(scan['seconds_over_limit'], 0.0)
@@ -0,0 +1,82 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory
+
+from radiocms.apps.airadio.api.views import PlaylistItemViewSet
+from radiocms.apps.airadio.models import Category, Format, Station
+from radiocms.models.library import LibraryItem
+from radiocms.models.playlist import Playlist
+from radiocms.models.playlistitem import PlaylistItem
+from radiocms.utils.playlists import POSITION_STEP
+
+User = get_user_model()
+
+
+class SongsByStationTests(TestCase):
+    """
+    songs_by_station costs the same number of queries however many songs a
+    station has: the station, the annotated songs and one prefetch each for
+    formats and categories, plus a count when paginated
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='songs-by-station')
+        cls.formats = Format.objects.bulk_create([Format(name=f'Format {index}') for index in range(2)])
+        cls.categories = Category.objects.bulk_create([Category(name=f'Category {index}') for index in range(2)])
+
+    def setUp(self):
+        self.view = PlaylistItemViewSet.as_view({'get': 'songs_by_station'})
+        self.factory = APIRequestFactory()
+
+    def _station(self, songs):
+        station = Station.objects.create(name=f'Station {songs}', retail='', location='')
+        items = LibraryItem.objects.bulk_create([
+            LibraryItem(title=f'Song {index}', artist='Artist', audio_file=f'https://example.com/{index}.mp3')
+            for index in range(songs)
+        ])
+        for item in items:
+            item.formats.set(self.formats)
+            item.categories.set(self.categories)
+        # Every song on the first playlist, half of them on the second too
+        for number, share in enumerate((items, items[::2])):
+            playlist = Playlist.objects.create(name=f'Playlist {number}', station=station)
+            PlaylistItem.objects.bulk_create([
+                PlaylistItem(playlist=playlist, library_item=item, added_by=self.user, position=index * POSITION_STEP,
+                             rotation=('high', 'medium', 'low')[index % 3])
+                for index, item in enumerate(share, start=1)
+            ])
+        return station
+
+    def _get(self, station, query=''):
+        request = self.factory.get(f'/api/playlist-items/songs_by_station/?station_id={station.pk}{query}')
+        response = self.view(request)
+        response.render()
+        return response
+
+    def test_query_count_does_not_grow_with_the_catalogue(self):
+        for songs in (3, 60):
+            station = self._station(songs)
+            with self.subTest(songs=songs):
+                with self.assertNumQueries(4):
+                    response = self._get(station)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data), songs)
+
+    def test_paginated_query_count_does_not_grow_with_the_catalogue(self):
+        for songs in (12, 60):
+            station = self._station(songs)
+            with self.subTest(songs=songs):
+                with self.assertNumQueries(5):
+                    response = self._get(station, '&page=2&page_size=5')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data['count'], songs)
+                self.assertEqual(len(response.data['results']), 5)
+
+    def test_songs_carry_the_first_playlist_item(self):
+        station = self._station(4)
+        first = PlaylistItem.objects.filter(playlist__station=station).order_by('position', 'id').first()
+        song = self._get(station).data[0]
+        self.assertEqual(song['id'], str(first.library_item_id))
+        self.assertEqual(song['playlist_item_id'], str(first.pk))
+        self.assertEqual(song['rotation'], first.rotation)
@@ -0,0 +1,114 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from django.core.files import File
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.test import SimpleTestCase, override_settings
+
+from radiocms.config.storage import get_s3_client, reset_s3_client
+from radiocms.utils.backends import reset_storage_backend
+from radiocms.utils.storage import key_from_url, store_file
+
+MB = 1024 * 1024
+FILE_SIZE = 128 * MB
+# Chunks read ahead plus chunks being sent, each at most AWS_S3_MAX_CONCURRENCY
+# of AWS_S3_MULTIPART_CHUNKSIZE: half the file here, whatever its size
+MAX_PEAK = 2 * 4 * 8 * MB
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@override_settings(
+    MEDIA_STORAGE_BACKEND='radiocms.utils.backends.s3.S3StorageBackend',
+    AWS_ACCESS_KEY_ID='testing',
+    AWS_SECRET_ACCESS_KEY='testing',
+    AWS_STORAGE_BUCKET_NAME='radiocms-test-media',
+    AWS_S3_REGION_NAME='us-east-1',
+    AWS_S3_MULTIPART_THRESHOLD=8 * MB,
+    AWS_S3_MULTIPART_CHUNKSIZE=8 * MB,
+    AWS_S3_MAX_CONCURRENCY=4,
+)
+class StreamingUploadTests(SimpleTestCase):
+    """
+    Large uploads stream to S3 in multipart chunks: peak Python allocations
+    stay bounded by the chunk size and concurrency, not the file size. The
+    S3 stand-in is a moto server in its own process, so what it stores is
+    not counted.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        port = _free_port()
+        cls.server = subprocess.Popen(
+            [sys.executable, '-m', 'moto.server', '-H', '127.0.0.1', '-p', str(port)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline or cls.server.poll() is not None:
+                    cls.server.kill()
+                    raise
+                time.sleep(0.1)
+        cls.endpoint_url = f'http://127.0.0.1:{port}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.terminate()
+        cls.server.wait()
+        super().tearDownClass()
+
+    def setUp(self):
+        settings_override = override_settings(AWS_S3_ENDPOINT_URL=self.endpoint_url)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        reset_s3_client()
+        reset_storage_backend()
+        self.addCleanup(reset_storage_backend)
+        self.addCleanup(reset_s3_client)
+        get_s3_client().create_bucket(Bucket='radiocms-test-media')
+
+    def _large_file(self):
+        file = TemporaryUploadedFile('large.wav', 'audio/wav', FILE_SIZE, None)
+        self.addCleanup(file.close)
+        chunk = os.urandom(MB)
+        for _ in range(FILE_SIZE // MB):
+            file.write(chunk)
+        file.flush()
+        file.seek(0)
+        return file
+
+    def _store(self, file):
+        tracemalloc.start()
+        try:
+            url, created = store_file(file, 'audio')
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertTrue(url)
+        self.assertTrue(created)
+        head = get_s3_client().head_object(Bucket='radiocms-test-media', Key=key_from_url(url))
+        self.assertEqual(head['ContentLength'], FILE_SIZE)
+        return peak
+
+    def test_temporary_upload_streams_from_disk(self):
+        peak = self._store(self._large_file())
+        self.assertLess(peak, MAX_PEAK, f'peak allocations {peak / MB:.1f} MB for a {FILE_SIZE // MB} MB file')
+
+    def test_file_object_streams_in_chunks(self):
+        large = self._large_file()
+        with open(large.temporary_file_path(), 'rb') as handle:
+            peak = self._store(File(handle, name='large.wav'))
+        self.assertLess(peak, MAX_PEAK, f'peak allocations {peak / MB:.1f} MB for a {FILE_SIZE // MB} MB file')
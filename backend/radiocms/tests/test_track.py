@@ -0,0 +1,64 @@
+import os
+import shutil
+import tempfile
+import unittest
+import wave
+
+import numpy as np
+
+from radiocms.utils.audio.cues import detect_cues
+from radiocms.utils.audio.decode import DecodeError
+from radiocms.utils.audio.embedding import embed_source
+from radiocms.utils.audio.fingerprint import fingerprint_source
+from radiocms.utils.audio.mpx import analyze_and_scan_file
+from radiocms.utils.audio.peaks import generate_peaks
+from radiocms.utils.audio.track import analyze_track
+
+
+def write_track(path, seconds=20, sample_rate=44100):
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    # A second of silence, then a tone over noise that swells and fades out
+    envelope = np.clip(t - 1, 0, 1) * np.clip((seconds - t) / 4, 0, 1)
+    left = envelope * (0.4 * np.sin(2 * np.pi * 440 * t) + 0.1 * rng.standard_normal(len(t)))
+    samples = (np.clip(np.stack([left, np.roll(left, 100)], axis=1), -1, 1) * 32767).astype('<i2')
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(2)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(samples.tobytes())
+
+
+@unittest.skipUnless(shutil.which('ffmpeg') and shutil.which('ffprobe'), 'needs ffmpeg and ffprobe')
+class AnalyzeTrackTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'track.wav')
+        write_track(self.path)
+
+    def test_matches_the_standalone_stages(self):
+        results, errors = analyze_track(self.path, index_frames=False)
+        self.assertEqual(errors, {})
+        self.assertNotIn('frames', results)
+        self.assertEqual(results['analysis'], analyze_and_scan_file(self.path))
+        self.assertEqual(results['cues'], detect_cues(self.path))
+        self.assertEqual(results['peaks'], generate_peaks(self.path))
+        self.assertEqual(results['fingerprint'], fingerprint_source(self.path))
+        np.testing.assert_allclose(results['embedding'], embed_source(self.path))
+
+    def test_wav_is_not_frame_indexed(self):
+        results, errors = analyze_track(self.path)
+        self.assertIsNone(results['frames'])
+        self.assertNotIn('frames', errors)
+
+    def test_undecodable_audio_fails_every_decoded_stage(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not audio' * 1000)
+        results, errors = analyze_track(self.path, index_frames=False)
+        self.assertEqual(results, {})
+        self.assertEqual(set(errors), {'analysis', 'cues', 'peaks', 'fingerprint', 'embedding'})
+
+    def test_unreachable_url_fails_the_task(self):
+        with self.assertRaises(DecodeError):
+            analyze_track('http://127.0.0.1:9/track.mp3')
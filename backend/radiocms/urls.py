@@ -17,11 +17,22 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
-from django.conf.urls.static import static
 from rest_framework_simplejwt.views import TokenRefreshView
 from authentication.views import CustomTokenObtainPairView
 from .apps.airadio.api.views import UpdatePlaylistItemRotation
-from .views.library import create_library_item, test_auth
+from .views.compliance import bs412_report
+from .views.library import (create_library_item, finalize_library_item, import_library, ingest_job_status,
+                             request_upload_urls, test_auth)
+from .views.media import serve_media
+from .views.plays import record_plays
+from .views.presets import (merge_processing_presets, processing_preset_detail, processing_preset_diff,
+                            processing_presets, station_processing_preset)
+from .views.schedule import station_log
+from .views.search import search_library_items
+from .views.seek import library_item_byte_range
+from .views.similarity import similar_library_items
+from .views.uploads import create_resumable_upload, resumable_upload
+from .views.waveform import library_item_peaks
 from .views.user import UserViewSet
 from rest_framework.routers import DefaultRouter
 
@@ -37,9 +48,29 @@ urlpatterns = [
     path('api/v3/auth/token/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/v3/auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/library/items/', create_library_item, name='create_library_item'),
+    path('api/library/uploads/', request_upload_urls, name='request_upload_urls'),
+    path('api/library/items/finalize/', finalize_library_item, name='finalize_library_item'),
+    path('api/library/items/<uuid:pk>/peaks/', library_item_peaks, name='library_item_peaks'),
+    path('api/library/items/<uuid:pk>/byte-range/', library_item_byte_range, name='library_item_byte_range'),
+    path('api/library/items/<uuid:pk>/similar/', similar_library_items, name='similar_library_items'),
+    path('api/library/import/', import_library, name='import_library'),
+    path('api/library/search/', search_library_items, name='search_library_items'),
+    path('api/plays/', record_plays, name='record_plays'),
+    path('api/compliance/bs412/', bs412_report, name='bs412_report'),
+    path('api/presets/', processing_presets, name='processing_presets'),
+    path('api/presets/merge/', merge_processing_presets, name='merge_processing_presets'),
+    path('api/presets/<uuid:pk>/', processing_preset_detail, name='processing_preset_detail'),
+    path('api/presets/<uuid:pk>/diff/<uuid:other>/', processing_preset_diff, name='processing_preset_diff'),
+    path('api/stations/<int:station_id>/processing-preset/', station_processing_preset,
+         name='station_processing_preset'),
+    path('api/stations/<int:station_id>/log/', station_log, name='station_log'),
+    path('api/library/jobs/<uuid:job_id>/', ingest_job_status, name='ingest_job_status'),
+    path('api/library/resumable/', create_resumable_upload, name='create_resumable_upload'),
+    path('api/library/resumable/<uuid:pk>/', resumable_upload, name='resumable_upload'),
     path('api/library/test-auth/', test_auth, name='test_auth'),
     path('api/', include(router.urls)),
     path('api/playlist-item/<uuid:pk>/update-rotation/', UpdatePlaylistItemRotation.as_view(),
          name="update_playlist_item_rotation"),
+    path(f"{settings.MEDIA_URL.lstrip('/')}<path:key>", serve_media, name='serve_media'),
 
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+]
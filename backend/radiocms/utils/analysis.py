@@ -0,0 +1,481 @@
+import io
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from radiocms.models.fingerprint import AudioFingerprint, FingerprintBucket
+from radiocms.models.frame_index import FrameIndex
+from radiocms.models.library import LibraryItem
+from radiocms.models.mpx import MpxScan
+
+from .audio.cues import detect_cues
+from .audio.embedding import embed_source
+from .audio.fingerprint import (
+    MIN_FINGERPRINT_HASHES, alignment, fingerprint_source, lsh_keys, unpack_peaks, unpack_signature,
+)
+from .audio.frames import UnsupportedFormat, index_source
+from .audio.mpx import analyze_and_scan_file
+from .audio.peaks import generate_peaks
+from .audio.track import TRACK_STAGES, analyze_track
+from .backends import get_storage_backend
+from .backends.local import LocalStorageBackend
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_FIELDS = ['duration', 'loudness_lufs', 'loudness_range', 'true_peak_dbtp', 'analyzed_at']
+CUE_FIELDS = ['intro_point', 'vocal_point', 'aux_point']
+MPX_SCAN_FIELDS = ['mpx_power_max_dbr', 'mpx_power_mean_dbr', 'seconds_over_limit', 'limit_dbr', 'preemphasis_us',
+                   'compliant', 'loudness_lufs', 'momentary_max_lufs', 'short_term_max_lufs', 'scanned_at']
+# Audio files worth scanning for MPEG/ADTS frames
+FRAME_INDEX_EXTENSIONS = ('mp3', 'mp2', 'mpga', 'aac', 'adts')
+
+# How each stage of analyze_track is named in the log
+STAGE_NAMES = {
+    'analysis': 'Audio analysis',
+    'frames': 'Frame indexing',
+    'cues': 'Cue detection',
+    'peaks': 'Waveform peaks',
+    'fingerprint': 'Fingerprinting',
+    'embedding': 'Embedding',
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def media_source(url):
+    """
+    What ffmpeg should read for a media URL: the file itself for local
+    storage, otherwise the URL
+    """
+    backend = get_storage_backend()
+    key = backend.key_from_url(url)
+    if key and isinstance(backend, LocalStorageBackend):
+        return backend.path(key)
+    return url
+
+
+class AnalysisPool:
+    """
+    Process pool that hands new submissions to a fresh ProcessPoolExecutor
+    once the current one has been given ``tasks_per_worker`` tasks per
+    worker. The old executor is shut down without waiting: it finishes what
+    it was given, then its workers exit and return their memory to the OS.
+    ProcessPoolExecutor's own max_tasks_per_child is not used, as it hangs
+    once more tasks are queued than a worker may run.
+    """
+
+    def __init__(self, max_workers, tasks_per_worker, mp_context=None):
+        self.max_workers = max_workers
+        self.tasks_per_executor = max_workers * tasks_per_worker
+        self._mp_context = mp_context
+        self._lock = threading.Lock()
+        self._executor = None
+        self._submitted = 0
+
+    def submit(self, fn, *args, **kwargs):
+        with self._lock:
+            if self._executor is None or self._submitted >= self.tasks_per_executor:
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self._mp_context)
+                self._submitted = 0
+            self._submitted += 1
+            return self._executor.submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+
+def get_analysis_pool():
+    """
+    Shared process pool for audio analysis. Workers are spawned rather than
+    forked, as the web and ingest processes run threads, and are replaced
+    after about AUDIO_ANALYSIS_TASKS_PER_CHILD tracks each.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = AnalysisPool(
+                    settings.AUDIO_ANALYSIS_WORKERS,
+                    settings.AUDIO_ANALYSIS_TASKS_PER_CHILD,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+    return _pool
+
+
+def _collect(futures, stage):
+    """
+    ``([(item, result), ...], failed)`` of finished ``{future: item}``
+    tasks, logging the failures
+    """
+    results = []
+    failed = 0
+    for future in as_completed(futures):
+        item = futures[future]
+        try:
+            results.append((item, future.result()))
+        except Exception as e:
+            _log_failure(stage, item, e)
+            failed += 1
+    return results, failed
+
+
+def _log_failure(stage, item, error):
+    logger.error(f"{stage} failed for {item.pk} ({item.audio_file}): {str(error)}")
+
+
+def analyze_items(items, pool=None):
+    """
+    Analyze the audio of ``items`` across the process pool and save the
+    results: loudness on the items, and BS.412 MPX power with loudness
+    statistics as their MpxScan, judged against BS412_LIMIT_DBR. Each track
+    is decoded once for both. Returns ``(analyzed, failed)`` counts; failed
+    items are logged and left unanalyzed.
+    """
+    pool = pool or get_analysis_pool()
+    memory_bytes = settings.AUDIO_ANALYSIS_MEMORY_MB * 1024 * 1024
+    limit = settings.BS412_LIMIT_DBR
+    futures = {
+        pool.submit(analyze_and_scan_file, media_source(item.audio_file), memory_bytes,
+                    settings.BS412_PREEMPHASIS_US, limit): item
+        for item in items
+    }
+
+    results, failed = _collect(futures, 'Audio analysis')
+    return save_analyses(results), failed
+
+
+def save_analyses(results):
+    """
+    Save ``[(item, (analysis, scan)), ...]`` from analyze_and_scan_file:
+    loudness on the items and their MpxScan. Returns how many were saved.
+    """
+    limit = settings.BS412_LIMIT_DBR
+    analyzed = []
+    scans = []
+    for item, (result, scan) in results:
+        for field, value in result.items():
+            setattr(item, field, value)
+        item.analyzed_at = timezone.now()
+        analyzed.append(item)
+        scans.append(MpxScan(
+            library_item_id=item.pk,
+            limit_dbr=limit,
+            preemphasis_us=settings.BS412_PREEMPHASIS_US,
+            compliant=scan['seconds_over_limit'] == 0,
+            scanned_at=item.analyzed_at,
+            **scan,
+        ))
+
+    with transaction.atomic():
+        LibraryItem.objects.bulk_update(analyzed, ANALYSIS_FIELDS, batch_size=500)
+        MpxScan.objects.bulk_create(
+            scans,
+            update_conflicts=True,
+            unique_fields=['library_item'],
+            update_fields=MPX_SCAN_FIELDS,
+            batch_size=500,
+        )
+    return len(analyzed)
+
+
+def detect_item_cues(items, pool=None):
+    """
+    Detect cue points for ``items`` across the process pool. Only markers
+    that are still zero are filled in, checked in the UPDATE itself so
+    markers edited meanwhile are never overwritten. Returns
+    ``(detected, failed)`` counts.
+    """
+    pool = pool or get_analysis_pool()
+    memory_bytes = settings.AUDIO_ANALYSIS_MEMORY_MB * 1024 * 1024
+    futures = {
+        pool.submit(detect_cues, media_source(item.audio_file), memory_bytes): item
+        for item in items
+    }
+
+    results, failed = _collect(futures, 'Cue detection')
+    return save_cues(results), failed
+
+
+def save_cues(results):
+    """
+    Fill in the still-zero markers of ``[(item, cues), ...]`` from
+    detect_cues. Returns how many items were updated.
+    """
+    for item, cues in results:
+        updates = {
+            field: Case(When(**{field: 0}, then=Value(cues[field])), default=F(field))
+            for field in CUE_FIELDS
+            if cues.get(field)
+        }
+        LibraryItem.objects.filter(pk=item.pk).update(cues_analyzed_at=timezone.now(), **updates)
+    return len(results)
+
+
+def peaks_key(item):
+    """
+    Key of an item's peaks sidecar: next to its audio object, or under
+    waveforms/ when the audio is not in media storage
+    """
+    audio_key = get_storage_backend().key_from_url(item.audio_file)
+    return f"{audio_key}.peaks" if audio_key else f"waveforms/{item.pk}.peaks"
+
+
+def generate_item_peaks(items, pool=None):
+    """
+    Build waveform peak files for ``items`` across the process pool, store
+    them next to the audio and record their URLs. Returns
+    ``(generated, failed)`` counts.
+    """
+    pool = pool or get_analysis_pool()
+    futures = {
+        pool.submit(generate_peaks, media_source(item.audio_file), settings.WAVEFORM_PEAK_BITS): item
+        for item in items
+    }
+    results, failed = _collect(futures, 'Waveform peaks')
+    generated, not_stored = save_peaks(results)
+    return generated, failed + not_stored
+
+
+def save_peaks(results):
+    """
+    Store ``[(item, peaks file), ...]`` from generate_peaks next to the
+    audio and record their URLs. Returns ``(stored, failed)`` counts.
+    """
+    backend = get_storage_backend()
+    generated = []
+    failed = 0
+    for item, data in results:
+        try:
+            key = peaks_key(item)
+            backend.put(key, io.BytesIO(data), 'application/octet-stream')
+        except Exception as e:
+            _log_failure('Waveform peaks', item, e)
+            failed += 1
+            continue
+        item.peaks_file = backend.url(key)
+        generated.append(item)
+
+    LibraryItem.objects.bulk_update(generated, ['peaks_file'], batch_size=500)
+    return len(generated), failed
+
+
+def is_frame_indexable(url):
+    return url.rsplit('.', 1)[-1].lower() in FRAME_INDEX_EXTENSIONS
+
+
+def build_item_frame_indexes(items, pool=None):
+    """
+    Scan the MP3/AAC audio of ``items`` for frame offsets across the process
+    pool and save a FrameIndex for each. Items in other formats are skipped.
+    Returns ``(indexed, failed)`` counts.
+    """
+    pool = pool or get_analysis_pool()
+    futures = {
+        pool.submit(index_source, media_source(item.audio_file)): item
+        for item in items
+        if is_frame_indexable(item.audio_file)
+    }
+
+    results = []
+    failed = 0
+    for future in as_completed(futures):
+        item = futures[future]
+        try:
+            results.append((item, future.result()))
+        except UnsupportedFormat as e:
+            logger.info(f"Not indexing frames of {item.pk}: {str(e)}")
+        except Exception as e:
+            _log_failure('Frame indexing', item, e)
+            failed += 1
+    return save_frame_indexes(results), failed
+
+
+def save_frame_indexes(results):
+    """
+    Save ``[(item, index), ...]`` from index_source as FrameIndex rows.
+    Returns how many were saved.
+    """
+    indexes = [FrameIndex(library_item_id=item.pk, **index._asdict()) for item, index in results]
+    FrameIndex.objects.bulk_create(
+        indexes,
+        update_conflicts=True,
+        unique_fields=['library_item'],
+        update_fields=['format', 'sample_rate', 'samples_per_frame', 'frame_count', 'data_end', 'offsets'],
+    )
+    return len(indexes)
+
+
+def embed_items(items, pool=None):
+    """
+    Compute similarity-search embeddings for ``items`` across the process
+    pool and save them. Silent items are left without one. Returns
+    ``(embedded, failed)`` counts.
+    """
+    pool = pool or get_analysis_pool()
+    futures = {
+        pool.submit(embed_source, media_source(item.audio_file)): item
+        for item in items
+    }
+
+    results, failed = _collect(futures, 'Embedding')
+    return save_embeddings(results), failed
+
+
+def save_embeddings(results):
+    """
+    Save ``[(item, embedding), ...]`` from embed_source, skipping silent
+    items. Returns how many were saved.
+    """
+    embedded = []
+    for item, embedding in results:
+        if embedding is not None:
+            item.embedding = embedding
+            embedded.append(item)
+
+    LibraryItem.objects.bulk_update(embedded, ['embedding'], batch_size=500)
+    return len(embedded)
+
+
+def fingerprint_items(items, pool=None):
+    """
+    Fingerprint the audio of ``items`` across the process pool and save each
+    signature with its LSH bucket keys. Items with fewer than
+    MIN_FINGERPRINT_HASHES landmarks get no bucket keys, so they are never
+    matched. Returns ``(fingerprinted, failed)`` counts.
+    """
+    pool = pool or get_analysis_pool()
+    futures = {
+        pool.submit(fingerprint_source, media_source(item.audio_file)): item
+        for item in items
+    }
+
+    results, failed = _collect(futures, 'Fingerprinting')
+    return save_fingerprints(results), failed
+
+
+def save_fingerprints(results):
+    """
+    Save ``[(item, (signature, hash_count, peaks)), ...]`` from
+    fingerprint_source with their LSH bucket keys. Returns how many were
+    saved.
+    """
+    fingerprints = [
+        AudioFingerprint(library_item_id=item.pk, signature=signature, hash_count=hash_count, peaks=peaks)
+        for item, (signature, hash_count, peaks) in results
+    ]
+    with transaction.atomic():
+        AudioFingerprint.objects.bulk_create(
+            fingerprints,
+            update_conflicts=True,
+            unique_fields=['library_item'],
+            update_fields=['signature', 'hash_count', 'peaks'],
+        )
+        ids = [fingerprint.pk for fingerprint in fingerprints]
+        FingerprintBucket.objects.filter(fingerprint_id__in=ids).delete()
+        FingerprintBucket.objects.bulk_create(
+            [
+                FingerprintBucket(fingerprint_id=fingerprint.pk, key=key)
+                for fingerprint in fingerprints
+                if fingerprint.hash_count >= MIN_FINGERPRINT_HASHES
+                for key in lsh_keys(unpack_signature(fingerprint.signature))
+            ],
+            batch_size=2000,
+        )
+    return len(fingerprints)
+
+
+def analyze_new_items(items, pool=None):
+    """
+    Run every analysis of newly ingested ``items`` with one analyze_track
+    task per track, so each is read once rather than once per stage, and
+    save the results. Returns ``{stage: (done, failed)}`` for each of
+    TRACK_STAGES; items whose audio could not be read count as failed in
+    every stage.
+    """
+    pool = pool or get_analysis_pool()
+    memory_bytes = settings.AUDIO_ANALYSIS_MEMORY_MB * 1024 * 1024
+    futures = {
+        pool.submit(analyze_track, media_source(item.audio_file), memory_bytes, settings.BS412_PREEMPHASIS_US,
+                    settings.BS412_LIMIT_DBR, settings.WAVEFORM_PEAK_BITS, is_frame_indexable(item.audio_file)): item
+        for item in items
+    }
+
+    results = {stage: [] for stage in TRACK_STAGES}
+    failed = dict.fromkeys(TRACK_STAGES, 0)
+    for future in as_completed(futures):
+        item = futures[future]
+        try:
+            track_results, errors = future.result()
+        except Exception as e:
+            _log_failure('Track analysis', item, e)
+            for stage in TRACK_STAGES:
+                if stage != 'frames' or is_frame_indexable(item.audio_file):
+                    failed[stage] += 1
+            continue
+        for stage, error in errors.items():
+            _log_failure(STAGE_NAMES[stage], item, error)
+            failed[stage] += 1
+        for stage, result in track_results.items():
+            if stage == 'frames' and result is None:
+                logger.info(f"Not indexing frames of {item.pk}: not an MPEG or ADTS stream")
+                continue
+            results[stage].append((item, result))
+
+    peaks_stored, peaks_failed = save_peaks(results['peaks'])
+    return {
+        'analysis': (save_analyses(results['analysis']), failed['analysis']),
+        'frames': (save_frame_indexes(results['frames']), failed['frames']),
+        'cues': (save_cues(results['cues']), failed['cues']),
+        'peaks': (peaks_stored, failed['peaks'] + peaks_failed),
+        'fingerprint': (save_fingerprints(results['fingerprint']), failed['fingerprint']),
+        'embedding': (save_embeddings(results['embedding']), failed['embedding']),
+    }
+
+
+def find_near_duplicates(signature, peaks, threshold=None, exclude=()):
+    """
+    ``[(library_item_id, alignment), ...]`` of fingerprinted items whose
+    landmarks line up with ``peaks`` (packed bytes) at least ``threshold``,
+    best aligned first. Only items sharing an LSH bucket with ``signature``
+    are compared, and only those with at least MIN_FINGERPRINT_HASHES
+    landmarks.
+    """
+    threshold = settings.FINGERPRINT_DUPLICATE_THRESHOLD if threshold is None else threshold
+    peaks = unpack_peaks(peaks)
+    candidates = (
+        AudioFingerprint.objects
+        .filter(buckets__key__in=lsh_keys(unpack_signature(signature)), hash_count__gte=MIN_FINGERPRINT_HASHES)
+        .exclude(library_item_id__in=exclude)
+        .distinct()
+        .values_list('library_item_id', 'peaks')
+    )
+    matches = [(pk, alignment(peaks, unpack_peaks(bytes(other)))) for pk, other in candidates]
+    return sorted((match for match in matches if match[1] >= threshold), key=lambda match: -match[1])
+
+
+def check_duplicates(items):
+    """
+    ``[{'item_id', 'duplicate_of', 'similarity'}, ...]`` for ``items`` that
+    sound like another library item, judged on their saved fingerprints.
+    ``similarity`` is the alignment of the two.
+    """
+    ids = [item.pk for item in items]
+    duplicates = []
+    fingerprints = AudioFingerprint.objects.filter(library_item_id__in=ids, hash_count__gte=MIN_FINGERPRINT_HASHES)
+    for pk, signature, peaks in fingerprints.values_list('library_item_id', 'signature', 'peaks'):
+        for other, score in find_near_duplicates(bytes(signature), bytes(peaks), exclude=[pk]):
+            logger.warning(f"Library item {pk} looks like a duplicate of {other} (alignment {score:.2f})")
+            duplicates.append({'item_id': str(pk), 'duplicate_of': str(other), 'similarity': round(score, 3)})
+    return duplicates
@@ -0,0 +1,133 @@
+"""
+Cue-point detection from streamed audio: start after leading silence,
+first sustained vocal, and the start of the outro (fade or trailing
+silence). Frames are cut and analysed with vectorized NumPy over each
+decoded block; only a few numbers per frame are kept for the whole file.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .decode import decode_blocks
+
+# Mono at a reduced rate is plenty for these heuristics
+CUE_SAMPLE_RATE = 22050
+FRAME_SIZE = 2048
+HOP_SIZE = 512
+FRAME_SECONDS = HOP_SIZE / CUE_SAMPLE_RATE
+
+SILENCE_DB = -48.0
+# The vocal formant band, vs. the whole spectrum
+VOCAL_BAND = (300.0, 3400.0)
+MIN_VOCAL_SECONDS = 0.75
+# An outro counts as a fade when the level falls this far below the body of
+# the track over at least MIN_FADE_SECONDS
+FADE_DB = 6.0
+MIN_FADE_SECONDS = 1.0
+ENVELOPE_SECONDS = 1.0
+
+_WINDOW = np.hanning(FRAME_SIZE).astype(np.float32)
+_FREQUENCIES = np.fft.rfftfreq(FRAME_SIZE, 1 / CUE_SAMPLE_RATE)
+_VOCAL_BINS = (_FREQUENCIES >= VOCAL_BAND[0]) & (_FREQUENCIES <= VOCAL_BAND[1])
+
+
+class FrameFeatures:
+    """
+    Per-frame level (dBFS), vocal band energy ratio and spectral flatness,
+    accumulated over streamed blocks
+    """
+
+    def __init__(self):
+        self._carry = np.zeros(0, dtype=np.float32)
+        self._levels = []
+        self._vocal_ratios = []
+        self._flatness = []
+
+    def update(self, block):
+        samples = np.concatenate([self._carry, block]) if len(self._carry) else block
+        if len(samples) < FRAME_SIZE:
+            self._carry = samples.copy()
+            return
+        frames = sliding_window_view(samples, FRAME_SIZE)[::HOP_SIZE]
+        consumed = len(frames) * HOP_SIZE
+        self._carry = samples[consumed:].copy()
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+            self._levels.append(20 * np.log10(np.maximum(rms, 1e-10)))
+
+            power = np.square(np.abs(np.fft.rfft(frames * _WINDOW, axis=1))) + 1e-12
+            total = power.sum(axis=1)
+            self._vocal_ratios.append(power[:, _VOCAL_BINS].sum(axis=1) / total)
+            # Geometric over arithmetic mean: near 1 for noise, low for tones
+            self._flatness.append(np.exp(np.mean(np.log(power), axis=1)) / (total / power.shape[1]))
+
+    def arrays(self):
+        def join(parts):
+            return np.concatenate(parts) if parts else np.empty(0)
+        return join(self._levels), join(self._vocal_ratios), join(self._flatness)
+
+
+def _moving_average(values, width):
+    width = max(1, min(width, len(values)))
+    cumulative = np.concatenate([[0.0], np.cumsum(values)])
+    smoothed = (cumulative[width:] - cumulative[:-width]) / width
+    # Pad back to the input length, centred
+    return np.pad(smoothed, (width // 2, len(values) - len(smoothed) - width // 2), mode='edge')
+
+
+def find_cues(levels, vocal_ratios, flatness):
+    """
+    ``intro_point``, ``vocal_point`` and ``aux_point`` in seconds from the
+    frame features; None where nothing was found
+    """
+    audible = np.flatnonzero(levels > SILENCE_DB)
+    if not len(audible):
+        return {'intro_point': None, 'vocal_point': None, 'aux_point': None}
+    start, end = audible[0], audible[-1] + 1
+
+    # Vocals: sustained frames where the formant band dominates a harmonic
+    # (non-flat) spectrum, judged against the track's own distribution
+    score = _moving_average(vocal_ratios * (1 - np.clip(flatness, 0, 1)), int(0.5 / FRAME_SECONDS))
+    body = score[start:end]
+    threshold = max(np.percentile(body, 60), 0.35)
+    run = int(MIN_VOCAL_SECONDS / FRAME_SECONDS)
+    vocal = (score > threshold) & (levels > SILENCE_DB)
+    sustained = np.convolve(vocal[start:end], np.ones(run), mode='valid') >= run
+    vocal_frame = start + int(np.argmax(sustained)) if sustained.any() else None
+
+    # Outro: walk back from the end of the audio to the last frame still
+    # near the body level
+    envelope = _moving_average(levels, int(ENVELOPE_SECONDS / FRAME_SECONDS))
+    reference = np.median(envelope[start:end])
+    loud = np.flatnonzero(envelope[start:end] >= reference - FADE_DB)
+    outro_frame = start + loud[-1] + 1 if len(loud) else end
+    if (end - outro_frame) * FRAME_SECONDS < MIN_FADE_SECONDS:
+        # Hard ending: segue at the start of the trailing silence
+        outro_frame = end
+
+    return {
+        'intro_point': round(float(start * FRAME_SECONDS), 3),
+        'vocal_point': round(float(vocal_frame * FRAME_SECONDS), 3) if vocal_frame is not None else None,
+        'aux_point': round(float(min(outro_frame, len(levels)) * FRAME_SECONDS), 3),
+    }
+
+
+def cue_block_frames(memory_bytes):
+    """
+    Mono frames per decoded block that keep frame analysis within
+    ``memory_bytes``
+    """
+    # Each sample is in four overlapping frames, windowed (float32) and as a
+    # complex spectrum and power (float64): roughly 96 bytes of working set
+    return max(FRAME_SIZE * 4, memory_bytes // 96)
+
+
+def detect_cues(source, memory_bytes=64 * 1024 * 1024):
+    """
+    Decode a file path or URL as mono blocks sized for ``memory_bytes`` and
+    return its cue points in seconds
+    """
+    features = FrameFeatures()
+    for block in decode_blocks(source, cue_block_frames(memory_bytes), channels=1, sample_rate=CUE_SAMPLE_RATE):
+        features.update(block[:, 0])
+    return find_cues(*features.arrays())
@@ -0,0 +1,88 @@
+"""
+Streaming PCM decoding through ffmpeg. Kept free of Django imports so the
+analysis process pool can use it from spawned workers.
+"""
+import json
+import subprocess
+from collections import namedtuple
+
+import numpy as np
+
+# Rate everything is decoded at; the BS.1770 filters are defined for it
+SAMPLE_RATE = 48000
+BYTES_PER_SAMPLE = 4
+
+AudioInfo = namedtuple('AudioInfo', ['channels', 'sample_rate', 'duration'])
+
+
+class DecodeError(RuntimeError):
+    pass
+
+
+def probe(source):
+    """
+    Channels, native sample rate and container duration of the first audio
+    stream of a file path or URL
+    """
+    command = [
+        'ffprobe', '-v', 'error', '-select_streams', 'a:0',
+        '-show_entries', 'stream=channels,sample_rate:format=duration',
+        '-of', 'json', source,
+    ]
+    result = subprocess.run(command, capture_output=True)
+    if result.returncode != 0:
+        raise DecodeError(result.stderr.decode(errors='replace').strip() or f'ffprobe failed for {source}')
+
+    data = json.loads(result.stdout or b'{}')
+    streams = data.get('streams') or []
+    if not streams:
+        raise DecodeError(f'No audio stream in {source}')
+    duration = data.get('format', {}).get('duration')
+    return AudioInfo(
+        int(streams[0].get('channels') or 0),
+        int(streams[0].get('sample_rate') or 0),
+        float(duration) if duration not in (None, 'N/A') else None,
+    )
+
+
+def decode_blocks(source, block_frames, channels=2, sample_rate=SAMPLE_RATE):
+    """
+    Yield the decoded audio as float32 arrays of shape (frames, channels),
+    at most ``block_frames`` frames each, so memory stays bounded by the
+    block size regardless of the file's length
+    """
+    command = [
+        'ffmpeg', '-nostdin', '-v', 'error', '-i', source, '-vn',
+        '-f', 'f32le', '-acodec', 'pcm_f32le', '-ac', str(channels), '-ar', str(sample_rate), '-',
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0)
+    frame_bytes = BYTES_PER_SAMPLE * channels
+    block_bytes = block_frames * frame_bytes
+    finished = False
+    try:
+        while True:
+            buffer = bytearray(block_bytes)
+            view = memoryview(buffer)
+            filled = 0
+            while filled < block_bytes:
+                read = process.stdout.readinto(view[filled:])
+                if not read:
+                    break
+                filled += read
+            usable = filled - filled % frame_bytes
+            if usable:
+                yield np.frombuffer(buffer, dtype=np.float32, count=usable // BYTES_PER_SAMPLE).reshape(-1, channels)
+            if filled < block_bytes:
+                finished = True
+                break
+    finally:
+        if not finished and process.poll() is None:
+            # The consumer stopped early
+            process.kill()
+        process.stdout.close()
+        errors = process.stderr.read()
+        process.stderr.close()
+        returncode = process.wait()
+
+    if finished and returncode != 0:
+        raise DecodeError(errors.decode(errors='replace').strip() or f'ffmpeg failed for {source}')
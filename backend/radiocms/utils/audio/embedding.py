@@ -0,0 +1,135 @@
+"""
+Track embeddings for similarity search: summary statistics of MFCCs
+(timbre) and chroma (harmony) over the whole track, as one unit-length
+vector whose cosine distance to another track's ranks how alike they
+sound. Frame features are accumulated as running sums, so memory does not
+grow with the length of the audio.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.fft import dct
+
+from .decode import decode_blocks
+
+EMBEDDING_SAMPLE_RATE = 22050
+FRAME_SIZE = 2048
+HOP_SIZE = 1024
+BLOCK_FRAMES = EMBEDDING_SAMPLE_RATE * 30
+
+MEL_BANDS = 40
+MEL_RANGE = (40.0, 8000.0)
+# Coefficients 1..MFCC_COEFFICIENTS; c0 is overall level and says nothing
+# about timbre
+MFCC_COEFFICIENTS = 20
+CHROMA_RANGE = (55.0, 5000.0)
+# Frames quieter than this (dBFS) are left out of the statistics
+SILENCE_DB = -60.0
+
+# MFCC mean and standard deviation, then chroma mean and standard deviation
+EMBEDDING_DIMENSIONS = 2 * MFCC_COEFFICIENTS + 2 * 12
+
+_WINDOW = np.hanning(FRAME_SIZE).astype(np.float32)
+_FREQUENCIES = np.fft.rfftfreq(FRAME_SIZE, 1 / EMBEDDING_SAMPLE_RATE)
+
+
+def _hz_to_mel(hz):
+    return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+
+def _mel_filterbank():
+    edges = 700.0 * (10 ** (np.linspace(*_hz_to_mel(np.array(MEL_RANGE)), MEL_BANDS + 2) / 2595.0) - 1.0)
+    bank = np.zeros((MEL_BANDS, len(_FREQUENCIES)), dtype=np.float32)
+    for band in range(MEL_BANDS):
+        low, centre, high = edges[band:band + 3]
+        rising = (_FREQUENCIES - low) / (centre - low)
+        falling = (high - _FREQUENCIES) / (high - centre)
+        bank[band] = np.clip(np.minimum(rising, falling), 0, None)
+    return bank
+
+
+def _chroma_map():
+    mapping = np.zeros((12, len(_FREQUENCIES)), dtype=np.float32)
+    bins = np.flatnonzero((_FREQUENCIES >= CHROMA_RANGE[0]) & (_FREQUENCIES <= CHROMA_RANGE[1]))
+    # Pitch class relative to A440
+    pitch_classes = np.round(12 * np.log2(_FREQUENCIES[bins] / 440.0)).astype(int) % 12
+    mapping[pitch_classes, bins] = 1.0
+    return mapping
+
+
+_MEL_FILTERBANK = _mel_filterbank()
+_CHROMA_MAP = _chroma_map()
+
+
+class _RunningStats:
+    def __init__(self, size):
+        self.count = 0
+        self._sum = np.zeros(size)
+        self._squares = np.zeros(size)
+
+    def update(self, values):
+        self.count += len(values)
+        self._sum += values.sum(axis=0)
+        self._squares += np.square(values).sum(axis=0)
+
+    def mean_std(self):
+        mean = self._sum / max(self.count, 1)
+        variance = np.maximum(self._squares / max(self.count, 1) - np.square(mean), 0)
+        return mean, np.sqrt(variance)
+
+
+class EmbeddingExtractor:
+    """
+    MFCC and chroma statistics of streamed mono blocks
+    """
+
+    def __init__(self):
+        self._carry = np.zeros(0, dtype=np.float32)
+        self._mfcc = _RunningStats(MFCC_COEFFICIENTS)
+        self._chroma = _RunningStats(12)
+
+    def update(self, block):
+        samples = np.concatenate([self._carry, block]) if len(self._carry) else block
+        if len(samples) < FRAME_SIZE:
+            self._carry = samples.copy()
+            return
+        frames = sliding_window_view(samples, FRAME_SIZE)[::HOP_SIZE]
+        self._carry = samples[len(frames) * HOP_SIZE:].copy()
+
+        rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+        frames = frames[20 * np.log10(np.maximum(rms, 1e-10)) > SILENCE_DB]
+        if not len(frames):
+            return
+        power = np.square(np.abs(np.fft.rfft(frames * _WINDOW, axis=1)))
+
+        log_mel = np.log(power @ _MEL_FILTERBANK.T + 1e-10)
+        self._mfcc.update(dct(log_mel, type=2, norm='ortho', axis=1)[:, 1:MFCC_COEFFICIENTS + 1])
+
+        chroma = power @ _CHROMA_MAP.T
+        self._chroma.update(chroma / (chroma.sum(axis=1, keepdims=True) + 1e-10))
+
+    def embedding(self):
+        """
+        Unit-length EMBEDDING_DIMENSIONS vector, or None if the audio was
+        silent. Each statistic is scaled to unit length first so that all
+        four weigh the same in the cosine distance.
+        """
+        if not self._mfcc.count:
+            return None
+        parts = [*self._mfcc.mean_std(), *self._chroma.mean_std()]
+        vector = np.concatenate([part / (np.linalg.norm(part) or 1.0) for part in parts])
+        return vector / np.linalg.norm(vector)
+
+
+def embed_source(source):
+    """
+    Embedding of a file path or URL as a list of floats, or None for silence
+    """
+    extractor = EmbeddingExtractor()
+    for block in decode_blocks(source, BLOCK_FRAMES, channels=1, sample_rate=EMBEDDING_SAMPLE_RATE):
+        extractor.update(block[:, 0])
+    return _embedding_result(extractor)
+
+
+def _embedding_result(extractor):
+    embedding = extractor.embedding()
+    return None if embedding is None else embedding.astype(np.float32).tolist()
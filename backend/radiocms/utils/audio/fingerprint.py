@@ -0,0 +1,309 @@
+"""
+Acoustic fingerprints for near-duplicate detection.
+
+Spectral peaks of a low-rate mono decode are paired into landmark hashes
+(peak frequency, paired frequency, time gap), which survive re-encoding
+and level changes. A track's set of landmark hashes is reduced to a
+MinHash signature, whose agreement estimates the Jaccard similarity of two
+tracks. Signatures are cut into LSH bands so candidates are found by exact
+key lookups rather than by comparing every pair of tracks.
+
+Shared hashes alone do not make a duplicate: songs in the same key share
+many of them, just not at the same moments. Candidates are confirmed by
+alignment(), which counts the landmarks of two tracks that line up at one
+time offset.
+"""
+import hashlib
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.ndimage import maximum_filter
+
+from .decode import decode_blocks
+
+# The rate of the other mono analyzers, so ingest can feed them all from one
+# decode. Frames of 2048 give 10.8 Hz bins; the 11.6 ms hop places peaks
+# finely enough that a re-encode's sub-frame shift seldom moves them.
+FINGERPRINT_SAMPLE_RATE = 22050
+FRAME_SIZE = 2048
+HOP_SIZE = 256
+BLOCK_FRAMES = FINGERPRINT_SAMPLE_RATE * 30
+
+# Peaks are picked between these frequencies
+PEAK_RANGE = (300, 5000)
+# A peak must stand this far (in natural-log magnitude) above its frame's
+# mean, and be the largest value within this many frames (0.23 s) and bins
+# either side of it, which leaves around ten peaks per second
+PEAK_MIN_PROMINENCE = 3.0
+PEAK_NEIGHBOURHOOD = (20, 15)
+# Each peak is paired with the next FAN_OUT peaks less than MAX_PAIR_FRAMES
+# (1.5 s) later. Gaps are hashed in steps of GAP_FRAMES, so that peaks
+# landing a frame apart in a re-encode still give the same hash.
+FAN_OUT = 10
+MAX_PAIR_FRAMES = 129
+GAP_FRAMES = 4
+# Packed peaks are ``frame << PEAK_BIN_BITS | bin``, which leaves 27 hours
+# of frames
+PEAK_BIN_BITS = 9
+# Landmarks recurring more often than this in the other track (a held note)
+# do not vote on the offset, and landmarks within OFFSET_TOLERANCE frames of
+# the winning offset count as aligned
+MAX_HASH_REPEATS = 50
+OFFSET_TOLERANCE = GAP_FRAMES // 2
+
+MINHASH_PERMUTATIONS = 128
+# Fewer landmark hashes than this (silence, very short clips) leave most
+# MinHash values at their maximum, so such signatures all look alike and
+# are kept out of duplicate detection
+MIN_FINGERPRINT_HASHES = 100
+# A pair becomes a candidate with probability 1 - (1 - s ** LSH_ROWS) ** LSH_BANDS
+# at similarity s. Degraded copies and edits keep a similarity of 0.45 or
+# more, which 64 bands of 2 rows miss about once in a million (midpoint of
+# the S-curve near 0.125). Unrelated songs in the same key average 0.06 but
+# reach 0.3, so some become candidates for alignment() to reject.
+LSH_BANDS = 64
+LSH_ROWS = MINHASH_PERMUTATIONS // LSH_BANDS
+
+_WINDOW = np.hanning(FRAME_SIZE).astype(np.float32)
+_FREQUENCIES = np.fft.rfftfreq(FRAME_SIZE, 1 / FINGERPRINT_SAMPLE_RATE)
+# A frame's mean level is taken below this, so the empty top octave of
+# band-limited sources does not lower the peak threshold
+_MEAN_BINS = np.flatnonzero(_FREQUENCIES <= 5500)
+_PEAK_BINS = np.flatnonzero((_FREQUENCIES >= PEAK_RANGE[0]) & (_FREQUENCIES < PEAK_RANGE[1]))
+_NEIGHBOUR_FRAMES, _NEIGHBOUR_BINS = PEAK_NEIGHBOURHOOD
+
+# Fixed multiply-shift hash family, so signatures are comparable across runs
+_rng = np.random.default_rng(0x5EED)
+_MINHASH_A = _rng.integers(1, 2 ** 63, MINHASH_PERMUTATIONS, dtype=np.uint64) | np.uint64(1)
+_MINHASH_B = _rng.integers(0, 2 ** 63, MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+
+class PeakExtractor:
+    """
+    Spectral peaks (frame, bin) of streamed mono blocks. A frame's peaks are
+    picked once the PEAK_NEIGHBOURHOOD frames after it have been seen, so
+    they do not depend on where the blocks were cut.
+    """
+
+    def __init__(self):
+        self._carry = np.zeros(0, dtype=np.float32)
+        # Magnitudes of the frames still to be picked, after the frames
+        # before them that they are compared with (the track starts in
+        # silence), and the level each frame's peaks must exceed
+        self._pending = np.full((_NEIGHBOUR_FRAMES, len(_PEAK_BINS)), -np.inf, dtype=np.float32)
+        self._thresholds = np.full(_NEIGHBOUR_FRAMES, np.inf, dtype=np.float32)
+        self._pending_start = -_NEIGHBOUR_FRAMES
+        self._frames = []
+        self._bins = []
+
+    def update(self, block):
+        samples = np.concatenate([self._carry, block]) if len(self._carry) else block
+        if len(samples) < FRAME_SIZE:
+            self._carry = samples.copy()
+            return
+        frames = sliding_window_view(samples, FRAME_SIZE)[::HOP_SIZE]
+        self._carry = samples[len(frames) * HOP_SIZE:].copy()
+
+        magnitude = np.log(np.abs(np.fft.rfft(frames * _WINDOW, axis=1)) + 1e-6)
+        thresholds = magnitude[:, _MEAN_BINS].mean(axis=1) + PEAK_MIN_PROMINENCE
+        self._pending = np.concatenate([self._pending, magnitude[:, _PEAK_BINS].astype(np.float32)])
+        self._thresholds = np.concatenate([self._thresholds, thresholds.astype(np.float32)])
+
+        end = len(self._pending) - _NEIGHBOUR_FRAMES
+        if end > _NEIGHBOUR_FRAMES:
+            frame_numbers, bins = self._pick(self._pending, end)
+            self._frames.append(frame_numbers)
+            self._bins.append(bins)
+            self._pending = self._pending[end - _NEIGHBOUR_FRAMES:]
+            self._thresholds = self._thresholds[end - _NEIGHBOUR_FRAMES:]
+            self._pending_start += end - _NEIGHBOUR_FRAMES
+
+    def _pick(self, pending, end):
+        """
+        Peaks of the pending frames before ``end``, which must be followed
+        by at least _NEIGHBOUR_FRAMES more
+        """
+        size = (2 * _NEIGHBOUR_FRAMES + 1, 2 * _NEIGHBOUR_BINS + 1)
+        maxima = maximum_filter(pending[:end + _NEIGHBOUR_FRAMES], size=size, mode='constant', cval=-np.inf)
+        levels = pending[_NEIGHBOUR_FRAMES:end]
+        thresholds = self._thresholds[_NEIGHBOUR_FRAMES:end, None]
+        frames, bins = np.nonzero((levels == maxima[_NEIGHBOUR_FRAMES:end]) & (levels > thresholds))
+        return frames + self._pending_start + _NEIGHBOUR_FRAMES, _PEAK_BINS[bins]
+
+    def peaks(self):
+        """
+        Time-sorted ``(frames, bins)`` of every peak so far, taking the track
+        to end in silence
+        """
+        frames, bins = list(self._frames), list(self._bins)
+        end = len(self._pending)
+        if end > _NEIGHBOUR_FRAMES:
+            silence = np.full((_NEIGHBOUR_FRAMES, len(_PEAK_BINS)), -np.inf, dtype=np.float32)
+            last_frames, last_bins = self._pick(np.concatenate([self._pending, silence]), end)
+            frames.append(last_frames)
+            bins.append(last_bins)
+        if not frames:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        frames = np.concatenate(frames).astype(np.int64)
+        bins = np.concatenate(bins).astype(np.int64)
+        order = np.lexsort((bins, frames))
+        return frames[order], bins[order]
+
+
+def landmarks(frames, bins):
+    """
+    ``(hashes, anchor frames)`` of every landmark ``f1 << 15 | f2 << 6 | dt``
+    of time-sorted peaks, each paired with the next FAN_OUT peaks; ``dt`` is
+    the gap in GAP_FRAMES steps
+    """
+    hashes = []
+    anchors = []
+    for step in range(1, FAN_OUT + 1):
+        if step >= len(frames):
+            break
+        gap = frames[step:] - frames[:-step]
+        keep = (gap > 0) & (gap < MAX_PAIR_FRAMES)
+        steps = (gap[keep] + GAP_FRAMES // 2) // GAP_FRAMES
+        hashes.append((bins[:-step][keep] << 15) | (bins[step:][keep] << 6) | steps)
+        anchors.append(frames[:-step][keep])
+    if not hashes:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64)
+    return np.concatenate(hashes).astype(np.uint64), np.concatenate(anchors)
+
+
+def landmark_hashes(frames, bins):
+    """
+    Unique landmark hashes of time-sorted peaks
+    """
+    return np.unique(landmarks(frames, bins)[0])
+
+
+def alignment(peaks, other):
+    """
+    Share of the landmarks of the track with fewer that recur in the other
+    at one time offset, from two ``(frames, bins)`` peak sets. A re-encode,
+    or an edit of the same recording, lines up; unrelated songs in the same
+    key share landmarks at scattered offsets and score near zero.
+    """
+    hashes, anchors = landmarks(*peaks)
+    other_hashes, other_anchors = landmarks(*other)
+    if not len(hashes) or not len(other_hashes):
+        return 0.0
+
+    order = np.argsort(other_hashes, kind='stable')
+    other_hashes, other_anchors = other_hashes[order], other_anchors[order]
+    first = np.searchsorted(other_hashes, hashes, 'left')
+    counts = np.searchsorted(other_hashes, hashes, 'right') - first
+    matched = np.flatnonzero((counts > 0) & (counts <= MAX_HASH_REPEATS))
+    if not len(matched):
+        return 0.0
+
+    # Every pairing of a matched landmark with its recurrences in the other
+    # track votes for the offset between them
+    counts = counts[matched]
+    landmark = np.repeat(matched, counts)
+    position = np.repeat(first[matched] - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+    offsets = other_anchors[position] - anchors[landmark]
+    offsets -= offsets.min()
+    votes = np.convolve(np.bincount(offsets), np.ones(2 * OFFSET_TOLERANCE + 1), 'same')
+    aligned = np.unique(landmark[np.abs(offsets - votes.argmax()) <= OFFSET_TOLERANCE])
+    return min(1.0, len(aligned) / min(len(hashes), len(other_hashes)))
+
+
+def minhash_signature(hashes, chunk=4096):
+    """
+    MINHASH_PERMUTATIONS minimum hash values (uint32) of a hash set
+    """
+    signature = np.full(MINHASH_PERMUTATIONS, np.iinfo(np.uint32).max, dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for start in range(0, len(hashes), chunk):
+            values = hashes[start:start + chunk, None] * _MINHASH_A + _MINHASH_B
+            signature = np.minimum(signature, (values >> np.uint64(32)).min(axis=0))
+    return signature.astype(np.uint32)
+
+
+def lsh_keys(signature):
+    """
+    One signed 64-bit key per LSH band; tracks sharing any key are
+    candidate duplicates
+    """
+    keys = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].astype('<u4').tobytes()
+        digest = hashlib.blake2b(bytes([band]) + rows, digest_size=8).digest()
+        keys.append(int.from_bytes(digest, 'little', signed=True))
+    return keys
+
+
+def similarity(signature, other):
+    """
+    Estimated Jaccard similarity of the landmark sets behind two signatures
+    """
+    return float(np.mean(signature == other))
+
+
+def pack_signature(signature):
+    return signature.astype('<u4').tobytes()
+
+
+def unpack_signature(data):
+    return np.frombuffer(data, dtype='<u4')
+
+
+def pack_peaks(frames, bins):
+    return ((frames << PEAK_BIN_BITS) | bins).astype('<u4').tobytes()
+
+
+def unpack_peaks(data):
+    packed = np.frombuffer(data, dtype='<u4').astype(np.int64)
+    return packed >> PEAK_BIN_BITS, packed & ((1 << PEAK_BIN_BITS) - 1)
+
+
+def fingerprint_source(source):
+    """
+    ``(packed signature, landmark count, packed peaks)`` of a file path or
+    URL
+    """
+    extractor = PeakExtractor()
+    for block in decode_blocks(source, BLOCK_FRAMES, channels=1, sample_rate=FINGERPRINT_SAMPLE_RATE):
+        extractor.update(block[:, 0])
+    return _fingerprint_result(extractor)
+
+
+def _fingerprint_result(extractor):
+    peaks = extractor.peaks()
+    hashes = landmark_hashes(*peaks)
+    return pack_signature(minhash_signature(hashes)), len(hashes), pack_peaks(*peaks)
+
+
+class MinHashLSHIndex:
+    """
+    In-memory LSH index over signatures, the same banding as the
+    FingerprintBucket table, confirming candidates by alignment()
+    """
+
+    def __init__(self):
+        self._buckets = {}
+        self._peaks = {}
+
+    def add(self, key, signature, peaks):
+        self._peaks[key] = peaks
+        for band_key in lsh_keys(signature):
+            self._buckets.setdefault(band_key, []).append(key)
+
+    def candidates(self, signature):
+        """
+        Keys of the indexed tracks sharing an LSH bucket with ``signature``
+        """
+        candidates = set()
+        for band_key in lsh_keys(signature):
+            candidates.update(self._buckets.get(band_key, ()))
+        return candidates
+
+    def query(self, signature, peaks, threshold):
+        """
+        ``[(key, alignment), ...]`` of indexed tracks at or above
+        ``threshold``, best aligned first
+        """
+        matches = [(key, alignment(peaks, self._peaks[key])) for key in self.candidates(signature)]
+        return sorted((match for match in matches if match[1] >= threshold), key=lambda match: -match[1])
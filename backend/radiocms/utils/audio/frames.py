@@ -0,0 +1,264 @@
+"""
+Frame index for MP3 (MPEG audio) and AAC (ADTS) files: the byte offset of
+every frame, so a time maps to a byte position with one array lookup. Only
+frame headers are parsed; the audio is never decoded. Other containers
+(WAV, FLAC, MP4) are not indexed.
+"""
+import sys
+import urllib.request
+from array import array
+from collections import namedtuple
+
+CHUNK_SIZE = 1024 * 1024
+# Bytes kept behind the read position, enough to step back over the largest
+# frame (8 KB for ADTS) while resynchronising
+LOOKBEHIND = 64 * 1024
+# Layer III frames can take up to 511 bytes of main data from the frames
+# before them (the bit reservoir)
+MP3_RESERVOIR_BYTES = 511
+# Most bytes of a Layer III frame that are not main data: header, CRC and
+# MPEG-1 stereo side information
+MP3_MAX_FRAME_OVERHEAD = 4 + 2 + 32
+
+FrameIndexData = namedtuple(
+    'FrameIndexData', ['format', 'sample_rate', 'samples_per_frame', 'frame_count', 'data_end', 'offsets']
+)
+
+
+class UnsupportedFormat(ValueError):
+    pass
+
+
+_MPEG_BITRATES = {
+    # (version is MPEG-1, layer) -> kbit/s by index
+    (True, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (True, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (True, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (False, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (False, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (False, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+# Version bits -> sample rates by index
+_MPEG_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+_ADTS_SAMPLE_RATES = (96000, 88200, 64000, 48000, 44100, 32000, 24000, 22050, 16000, 12000, 11025, 8000, 7350)
+
+
+def parse_mpeg_header(header):
+    """
+    ``(frame_length, sample_rate, samples_per_frame, side_info_size)`` of
+    a 4-byte MPEG audio frame header, or None if it is not one
+    """
+    if header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = (header[1] >> 3) & 0x03
+    layer = 4 - ((header[1] >> 1) & 0x03)
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 0x03
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        # Reserved values; free-format (index 0) streams are not supported
+        return None
+
+    mpeg1 = version == 3
+    bitrate = _MPEG_BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = _MPEG_SAMPLE_RATES[version][rate_index]
+    padding = (header[2] >> 1) & 0x01
+    if layer == 1:
+        return (12 * bitrate // sample_rate + padding) * 4, sample_rate, 384, 0
+    if layer == 2:
+        return 144 * bitrate // sample_rate + padding, sample_rate, 1152, 0
+
+    mono = (header[3] >> 6) == 3
+    if mpeg1:
+        return 144 * bitrate // sample_rate + padding, sample_rate, 1152, 17 if mono else 32
+    return 72 * bitrate // sample_rate + padding, sample_rate, 576, 9 if mono else 17
+
+
+def parse_adts_header(header):
+    """
+    ``(frame_length, sample_rate, samples_per_frame)`` of a 7-byte ADTS
+    header, or None if it is not one
+    """
+    if header[0] != 0xFF or header[1] & 0xF6 != 0xF0:
+        return None
+    rate_index = (header[2] >> 2) & 0x0F
+    if rate_index >= len(_ADTS_SAMPLE_RATES):
+        return None
+    frame_length = ((header[3] & 0x03) << 11) | (header[4] << 3) | (header[5] >> 5)
+    if frame_length < 7:
+        return None
+    return frame_length, _ADTS_SAMPLE_RATES[rate_index], 1024 * ((header[6] & 0x03) + 1)
+
+
+def id3v2_size(data):
+    """
+    Bytes taken by an ID3v2 tag at the start of ``data`` (0 if none)
+    """
+    if len(data) < 10 or data[:3] != b'ID3':
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+class _Reader:
+    """
+    Mostly-forward view of a stream, refilled in CHUNK_SIZE reads; ``peek``
+    takes absolute file offsets no more than LOOKBEHIND behind the furthest
+    one read
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._buffer = b''
+        self._base = 0
+        self._eof = False
+
+    def peek(self, offset, size):
+        start = offset - self._base
+        while len(self._buffer) - start < size and not self._eof:
+            chunk = self._stream.read(CHUNK_SIZE)
+            if not chunk:
+                self._eof = True
+                break
+            # Drop consumed bytes before growing the buffer
+            drop = max(0, start - LOOKBEHIND)
+            self._buffer = self._buffer[drop:] + chunk
+            self._base += drop
+            start = offset - self._base
+        return self._buffer[start:start + size]
+
+    def find_sync(self, offset):
+        """
+        Offset of the next 0xFF byte at or after ``offset``, or None
+        """
+        while True:
+            data = self.peek(offset, CHUNK_SIZE)
+            if not data:
+                return None
+            position = data.find(b'\xff')
+            if position >= 0:
+                return offset + position
+            offset += len(data)
+
+
+def _is_info_frame(frame, side_info_size):
+    """
+    Whether a first MP3 frame is a Xing/Info/VBRI header rather than audio
+    """
+    # A 16-bit CRC follows the header unless the protection bit is set
+    crc_size = 0 if frame[1] & 0x01 else 2
+    tag_offset = 4 + crc_size + side_info_size
+    return frame[tag_offset:tag_offset + 4] in (b'Xing', b'Info') or frame[36:40] == b'VBRI'
+
+
+def build_frame_index(stream):
+    """
+    Scan a binary stream and return its FrameIndexData. Garbage between
+    frames is skipped by resynchronising on the next pair of consistent
+    headers. Raises UnsupportedFormat for anything but MP3 or ADTS AAC.
+    """
+    reader = _Reader(stream)
+    offset = id3v2_size(reader.peek(0, 10))
+
+    first = reader.peek(offset, 7)
+    if parse_adts_header(first):
+        fmt, parse, header_size = 'aac', parse_adts_header, 7
+    elif parse_mpeg_header(first):
+        fmt, parse, header_size = 'mp3', parse_mpeg_header, 4
+    else:
+        raise UnsupportedFormat('Not an MP3 or ADTS AAC stream')
+
+    offsets = array('I')
+    sample_rate = samples_per_frame = None
+    data_end = offset
+    while True:
+        header = reader.peek(offset, header_size)
+        if len(header) < header_size:
+            break
+        parsed = parse(header)
+        if parsed and sample_rate is not None and parsed[1:3] != (sample_rate, samples_per_frame):
+            parsed = None
+        if parsed is None:
+            # Lost sync (or an ID3v1/APE tag at the end): look for the next
+            # header that is followed by another consistent one
+            resync = reader.find_sync(offset + 1)
+            while resync is not None:
+                candidate = parse(reader.peek(resync, header_size))
+                if candidate and (sample_rate is None or candidate[1:3] == (sample_rate, samples_per_frame)):
+                    following = parse(reader.peek(resync + candidate[0], header_size))
+                    if following and following[1:3] == candidate[1:3]:
+                        break
+                resync = reader.find_sync(resync + 1)
+            if resync is None:
+                break
+            offset = resync
+            continue
+
+        frame_length = parsed[0]
+        if sample_rate is None:
+            sample_rate, samples_per_frame = parsed[1], parsed[2]
+            if fmt == 'mp3' and _is_info_frame(reader.peek(offset, 64), parsed[3]):
+                # The VBR header frame carries no audio
+                offset += frame_length
+                data_end = offset
+                continue
+        if len(reader.peek(offset, frame_length)) < frame_length:
+            # Truncated last frame
+            break
+        offsets.append(offset)
+        offset += frame_length
+        data_end = offset
+
+    if not offsets:
+        raise UnsupportedFormat('No audio frames found')
+    return FrameIndexData(fmt, sample_rate, samples_per_frame, len(offsets), data_end, offsets)
+
+
+def mp3_preroll_start(offsets, first):
+    """
+    Frame to start decoding at so that frame ``first`` comes out exactly.
+    The MDCT overlaps each frame with the one before, so that frame has to
+    be decoded too, and its main data may start up to MP3_RESERVOIR_BYTES
+    back in earlier frames: step back until those frames hold at least that
+    much main data.
+    """
+    target = max(0, first - 1)
+    start = target
+    while start > 0 and (offsets[target] - offsets[start]
+                         - (target - start) * MP3_MAX_FRAME_OVERHEAD) < MP3_RESERVOIR_BYTES:
+        start -= 1
+    return start
+
+
+def pack_offsets(offsets):
+    """
+    Offsets as little-endian uint32 bytes for storage
+    """
+    offsets = array('I', offsets)
+    if sys.byteorder != 'little':
+        offsets.byteswap()
+    return offsets.tobytes()
+
+
+def unpack_offsets(data):
+    offsets = array('I')
+    offsets.frombytes(data)
+    if sys.byteorder != 'little':
+        offsets.byteswap()
+    return offsets
+
+
+def open_source(source):
+    if source.startswith(('http://', 'https://')):
+        return urllib.request.urlopen(source)
+    return open(source, 'rb')
+
+
+def index_source(source):
+    """
+    FrameIndexData of a file path or URL, with the offsets packed for
+    storage (so the result is cheap to send back from a worker process)
+    """
+    with open_source(source) as stream:
+        index = build_frame_index(stream)
+    return index._replace(offsets=pack_offsets(index.offsets))
@@ -0,0 +1,173 @@
+"""
+EBU R128 / ITU-R BS.1770-4 measurement over streamed blocks: integrated
+loudness, loudness range (EBU Tech 3342) and true peak. Filters carry their
+state between blocks, so results match a whole-file computation.
+"""
+import numpy as np
+from scipy.signal import resample_poly, sosfilt
+
+from .decode import SAMPLE_RATE, decode_blocks, probe
+
+# K-weighting at 48 kHz: the high-shelf pre-filter, then the RLB high-pass
+K_WEIGHTING_SOS = np.array([
+    [1.53512485958697, -2.69169618940638, 1.19839281085285, 1.0, -1.69065929318241, 0.73248077421585],
+    [1.0, -2.0, 1.0, 1.0, -1.99004745483398, 0.99007225036621],
+])
+
+# Energies are kept per 100 ms hop; gating blocks are built from them
+HOP_FRAMES = SAMPLE_RATE // 10
+MOMENTARY_HOPS = 4     # 400 ms blocks, 75 % overlap
+SHORT_TERM_HOPS = 30   # 3 s blocks for the loudness range
+
+ABSOLUTE_GATE = -70.0
+RELATIVE_GATE = -10.0
+LRA_RELATIVE_GATE = -20.0
+
+TRUE_PEAK_OVERSAMPLING = 4
+# Input samples of context either side of a block for the oversampling
+# filter (resample_poly's default filter spans 10 input samples per side)
+TRUE_PEAK_CONTEXT = 16
+
+# Working bytes per decoded sample: the float32 block, its float64 filtered
+# copy and squares, and the 4x oversampled float64 copy for the true peak
+WORKING_BYTES_PER_SAMPLE = 4 + 8 + 8 + TRUE_PEAK_OVERSAMPLING * 8
+
+
+def energy_to_lufs(energy):
+    with np.errstate(divide='ignore'):
+        return -0.691 + 10 * np.log10(energy)
+
+
+def _windowed_mean(values, width):
+    if len(values) < width:
+        return np.empty(0)
+    cumulative = np.concatenate([[0.0], np.cumsum(values)])
+    return (cumulative[width:] - cumulative[:-width]) / width
+
+
+class LoudnessMeter:
+    def __init__(self, channels):
+        self._zi = np.zeros((K_WEIGHTING_SOS.shape[0], 2, channels))
+        self._remainder = np.zeros((0, channels))
+        self._hops = []
+
+    def update(self, block):
+        filtered, self._zi = sosfilt(K_WEIGHTING_SOS, block, axis=0, zi=self._zi)
+        if len(self._remainder):
+            filtered = np.concatenate([self._remainder, filtered])
+        count = len(filtered) // HOP_FRAMES
+        squares = np.square(filtered[:count * HOP_FRAMES], out=filtered[:count * HOP_FRAMES])
+        # Mean square per hop, summed over channels (L/R weights are 1)
+        self._hops.append(squares.reshape(count, HOP_FRAMES, filtered.shape[1]).mean(axis=1).sum(axis=1))
+        self._remainder = filtered[count * HOP_FRAMES:].copy()
+
+    @property
+    def hops(self):
+        return np.concatenate(self._hops) if self._hops else np.empty(0)
+
+    def integrated(self):
+        """
+        Gated integrated loudness in LUFS, or None for silence or audio
+        shorter than one 400 ms block
+        """
+        blocks = _windowed_mean(self.hops, MOMENTARY_HOPS)
+        loudness = energy_to_lufs(blocks)
+        gated = blocks[loudness > ABSOLUTE_GATE]
+        if not len(gated):
+            return None
+        threshold = energy_to_lufs(gated.mean()) + RELATIVE_GATE
+        gated = blocks[(loudness > ABSOLUTE_GATE) & (loudness > threshold)]
+        return float(energy_to_lufs(gated.mean()))
+
+    def loudness_range(self):
+        """
+        Loudness range in LU: the spread between the 10th and 95th percentile
+        of gated 3 s short-term loudness
+        """
+        blocks = _windowed_mean(self.hops, SHORT_TERM_HOPS)
+        loudness = energy_to_lufs(blocks)
+        gated = blocks[loudness > ABSOLUTE_GATE]
+        if not len(gated):
+            return None
+        threshold = energy_to_lufs(gated.mean()) + LRA_RELATIVE_GATE
+        values = loudness[(loudness > ABSOLUTE_GATE) & (loudness > threshold)]
+        low, high = np.percentile(values, [10, 95])
+        return float(high - low)
+
+
+class TruePeakMeter:
+    """
+    Peak of the 4x oversampled signal. Each block is resampled together with
+    a little context from the previous one, and its last few samples are
+    held back until the next block supplies their right-hand context.
+    """
+
+    def __init__(self, channels):
+        self._tail = np.zeros((0, channels), dtype=np.float32)
+        self._offset = 0
+        self.peak = 0.0
+
+    def update(self, block, final=False):
+        buffer = np.concatenate([self._tail, block]) if len(self._tail) else block
+        start = self._offset
+        end = len(buffer) if final else len(buffer) - TRUE_PEAK_CONTEXT
+        if end <= start:
+            self._tail = buffer
+            return
+        upsampled = resample_poly(buffer, TRUE_PEAK_OVERSAMPLING, 1, axis=0)
+        section = upsampled[start * TRUE_PEAK_OVERSAMPLING:end * TRUE_PEAK_OVERSAMPLING]
+        if section.size:
+            self.peak = max(self.peak, float(np.abs(section).max()))
+        keep = max(0, end - TRUE_PEAK_CONTEXT)
+        self._tail = buffer[keep:].copy()
+        self._offset = end - keep
+
+    def finish(self):
+        self.update(np.zeros((0, self._tail.shape[1]), dtype=np.float32), final=True)
+
+    def dbtp(self):
+        if self.peak <= 0:
+            return None
+        return float(20 * np.log10(self.peak))
+
+
+def block_frames_for_budget(memory_bytes, channels):
+    """
+    Frames per decoded block that keep a worker's working set near
+    ``memory_bytes``
+    """
+    return max(HOP_FRAMES, memory_bytes // (channels * WORKING_BYTES_PER_SAMPLE))
+
+
+def source_channels(source):
+    """
+    Channels to decode a file at: its own, mono or stereo
+    """
+    return min(max(probe(source).channels, 1), 2)
+
+
+def _analysis_result(loudness, true_peak, frames):
+    return {
+        'duration': frames / SAMPLE_RATE,
+        'loudness_lufs': loudness.integrated(),
+        'loudness_range': loudness.loudness_range(),
+        'true_peak_dbtp': true_peak.dbtp(),
+    }
+
+
+def analyze_file(source, memory_bytes=64 * 1024 * 1024):
+    """
+    Duration (s), integrated loudness (LUFS), loudness range (LU) and true
+    peak (dBTP) of a file path or URL, decoded in blocks sized for
+    ``memory_bytes``
+    """
+    channels = source_channels(source)
+    loudness = LoudnessMeter(channels)
+    true_peak = TruePeakMeter(channels)
+    frames = 0
+    for block in decode_blocks(source, block_frames_for_budget(memory_bytes, channels), channels):
+        loudness.update(block)
+        true_peak.update(block)
+        frames += len(block)
+    true_peak.finish()
+    return _analysis_result(loudness, true_peak, frames)
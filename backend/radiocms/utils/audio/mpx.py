@@ -0,0 +1,134 @@
+"""
+ITU-R BS.412 multiplex power estimate. The stereo multiplex is modelled
+from pre-emphasized L/R as the mono sum plus the DSB-SC L-R subcarrier
+(which carries half its audio power) plus the pilot, scaled so full-scale
+audio reaches AUDIO_DEVIATION_KHZ. Power is accumulated per 100 ms hop,
+and every 60 s sliding window is averaged from a cumulative sum. Levels
+are in dBr against BS.412's reference, a tone at +-19 kHz deviation.
+
+The meter runs in the same decode pass as the loudness analysis, so each
+track is decoded once for both. Kept free of Django imports so the
+analysis process pool can use it.
+"""
+import math
+
+import numpy as np
+from scipy.signal import bilinear, sosfilt, tf2sos
+
+from .decode import SAMPLE_RATE, decode_blocks
+from .loudness import (ABSOLUTE_GATE, HOP_FRAMES, MOMENTARY_HOPS, SHORT_TERM_HOPS, LoudnessMeter, TruePeakMeter,
+                       block_frames_for_budget, energy_to_lufs, source_channels, _analysis_result, _windowed_mean)
+
+MAX_DEVIATION_KHZ = 75.0
+PILOT_DEVIATION_KHZ = 6.75
+AUDIO_DEVIATION_KHZ = MAX_DEVIATION_KHZ - PILOT_DEVIATION_KHZ
+# 0 dBr: mean square deviation of a sine at +-19 kHz peak
+REFERENCE_POWER = 19.0 ** 2 / 2
+PILOT_POWER = PILOT_DEVIATION_KHZ ** 2 / 2
+
+WINDOW_SECONDS = 60
+WINDOW_HOPS = WINDOW_SECONDS * SAMPLE_RATE // HOP_FRAMES
+# Pre-emphasis stops rising here, as the 15 kHz low-pass of a real chain would
+PREEMPHASIS_CORNER_HZ = 20000.0
+
+
+def power_to_dbr(power):
+    with np.errstate(divide='ignore'):
+        return 10 * np.log10(np.asarray(power) / REFERENCE_POWER)
+
+
+def preemphasis_sos(time_constant_us, sample_rate=SAMPLE_RATE):
+    """
+    First-order FM pre-emphasis (50 us in Europe, 75 us in the Americas)
+    """
+    tau = time_constant_us * 1e-6
+    corner = 1 / (2 * math.pi * PREEMPHASIS_CORNER_HZ)
+    b, a = bilinear([tau, 1], [corner, 1], sample_rate)
+    return tf2sos(b, a)
+
+
+class MpxPowerMeter:
+    def __init__(self, channels, preemphasis_us=50):
+        self.channels = channels
+        self._sos = preemphasis_sos(preemphasis_us)
+        self._zi = np.zeros((self._sos.shape[0], 2, channels))
+        self._remainder = np.zeros((0, 2))
+        self._hops = []
+
+    def update(self, block):
+        emphasized, self._zi = sosfilt(self._sos, block, axis=0, zi=self._zi)
+        if self.channels == 1:
+            mid, side = emphasized[:, 0], np.zeros(len(emphasized))
+        else:
+            mid = (emphasized[:, 0] + emphasized[:, 1]) / 2
+            side = (emphasized[:, 0] - emphasized[:, 1]) / 2
+        signals = np.stack([mid, side], axis=1)
+        if len(self._remainder):
+            signals = np.concatenate([self._remainder, signals])
+        count = len(signals) // HOP_FRAMES
+        squares = np.square(signals[:count * HOP_FRAMES]).reshape(count, HOP_FRAMES, 2).mean(axis=1)
+        self._hops.append(squares[:, 0] + squares[:, 1] / 2)
+        self._remainder = signals[count * HOP_FRAMES:].copy()
+
+    @property
+    def hops(self):
+        """
+        MPX power (kHz^2 of deviation) per 100 ms hop
+        """
+        audio = np.concatenate(self._hops) if self._hops else np.empty(0)
+        return audio * AUDIO_DEVIATION_KHZ ** 2 + PILOT_POWER
+
+    def window_powers(self):
+        """
+        MPX power of every 60 s window, one per hop; a track shorter than
+        that gets a single whole-track window
+        """
+        hops = self.hops
+        if len(hops) < WINDOW_HOPS:
+            return hops.mean(keepdims=True) if len(hops) else hops
+        return _windowed_mean(hops, WINDOW_HOPS)
+
+
+def _scan_result(mpx, loudness, frames, limit_dbr):
+    windows = power_to_dbr(mpx.window_powers())
+    # Each window position stands for one hop, or for the whole short track
+    window_seconds = HOP_FRAMES / SAMPLE_RATE if len(windows) > 1 else frames / SAMPLE_RATE
+    hops = loudness.hops
+    momentary = energy_to_lufs(_windowed_mean(hops, MOMENTARY_HOPS))
+    short_term = energy_to_lufs(_windowed_mean(hops, SHORT_TERM_HOPS))
+
+    def loudest(values):
+        values = values[values > ABSOLUTE_GATE]
+        return float(values.max()) if len(values) else None
+
+    return {
+        'mpx_power_max_dbr': float(windows.max()) if len(windows) else None,
+        'mpx_power_mean_dbr': float(power_to_dbr(mpx.hops.mean())) if len(mpx.hops) else None,
+        'seconds_over_limit': float((windows > limit_dbr).sum() * window_seconds),
+        'loudness_lufs': loudness.integrated(),
+        'momentary_max_lufs': loudest(momentary),
+        'short_term_max_lufs': loudest(short_term),
+    }
+
+
+def analyze_and_scan_file(source, memory_bytes=64 * 1024 * 1024, preemphasis_us=50, limit_dbr=0.0):
+    """
+    ``(analysis, scan)`` of a file path or URL from one decode: the
+    analyze_file results, and its BS.412 MPX power and loudness statistics:
+    the loudest 60 s window, the whole-track average, and how many seconds
+    of window positions exceed ``limit_dbr``, plus integrated, maximum
+    momentary and maximum short-term loudness. A mono file's multiplex has
+    no L-R subcarrier.
+    """
+    channels = source_channels(source)
+    loudness = LoudnessMeter(channels)
+    true_peak = TruePeakMeter(channels)
+    mpx = MpxPowerMeter(channels, preemphasis_us)
+    frames = 0
+    for block in decode_blocks(source, block_frames_for_budget(memory_bytes, channels), channels):
+        loudness.update(block)
+        true_peak.update(block)
+        mpx.update(block)
+        frames += len(block)
+    true_peak.finish()
+    return _analysis_result(loudness, true_peak, frames), _scan_result(mpx, loudness, frames, limit_dbr)
@@ -0,0 +1,129 @@
+"""
+Multi-resolution min/max waveform peaks, stored as a small binary sidecar
+next to the audio object.
+
+Layout (little-endian): a header of magic, bits per value (8 or 16), level
+count, sample rate and total frames; one (samples_per_peak, count, offset)
+entry per level, finest first; then each level's data as interleaved
+min/max pairs of int8 or int16. Every level is a contiguous byte range, so
+a zoom level can be fetched with a single range request.
+"""
+import struct
+
+import numpy as np
+
+from .decode import decode_blocks
+
+MAGIC = b'RPK1'
+HEADER = struct.Struct('<4sBBHIQ')
+LEVEL = struct.Struct('<IIQ')
+
+PEAK_SAMPLE_RATE = 22050
+BASE_SAMPLES_PER_PEAK = 128
+# Coarser levels halve the resolution until a level has fewer peaks than this
+MIN_PEAKS = 1024
+MAX_LEVELS = 12
+
+BLOCK_FRAMES = PEAK_SAMPLE_RATE * 30
+
+
+class PeakBuilder:
+    """
+    Finest-level min/max per BASE_SAMPLES_PER_PEAK samples, from streamed
+    mono blocks. Memory grows with the peaks, not with the audio.
+    """
+
+    def __init__(self):
+        self._carry = np.zeros(0, dtype=np.float32)
+        self._mins = []
+        self._maxs = []
+        self.frames = 0
+
+    def update(self, block):
+        self.frames += len(block)
+        samples = np.concatenate([self._carry, block]) if len(self._carry) else block
+        count = len(samples) // BASE_SAMPLES_PER_PEAK
+        bins = samples[:count * BASE_SAMPLES_PER_PEAK].reshape(count, BASE_SAMPLES_PER_PEAK)
+        self._mins.append(bins.min(axis=1))
+        self._maxs.append(bins.max(axis=1))
+        self._carry = samples[count * BASE_SAMPLES_PER_PEAK:].copy()
+
+    def levels(self):
+        """
+        ``[(samples_per_peak, mins, maxs), ...]``, finest first
+        """
+        mins, maxs = list(self._mins), list(self._maxs)
+        if len(self._carry):
+            mins.append(self._carry.min(keepdims=True))
+            maxs.append(self._carry.max(keepdims=True))
+        mins = np.concatenate(mins) if mins else np.zeros(0, dtype=np.float32)
+        maxs = np.concatenate(maxs) if maxs else np.zeros(0, dtype=np.float32)
+
+        levels = [(BASE_SAMPLES_PER_PEAK, mins, maxs)]
+        while len(mins) > MIN_PEAKS and len(levels) < MAX_LEVELS:
+            if len(mins) % 2:
+                mins, maxs = np.append(mins, mins[-1]), np.append(maxs, maxs[-1])
+            mins = mins.reshape(-1, 2).min(axis=1)
+            maxs = maxs.reshape(-1, 2).max(axis=1)
+            levels.append((levels[-1][0] * 2, mins, maxs))
+        return levels
+
+
+def encode_peaks(levels, frames, bits=8):
+    """
+    Serialize ``levels`` with values quantized to int8 or int16, rounding
+    outwards so the drawn envelope never clips the real one
+    """
+    dtype, scale = ('<i1', 127) if bits == 8 else ('<i2', 32767)
+    header_size = HEADER.size + LEVEL.size * len(levels)
+
+    entries = []
+    data = []
+    offset = header_size
+    for samples_per_peak, mins, maxs in levels:
+        pairs = np.stack([
+            np.clip(np.floor(mins * scale), -scale, scale),
+            np.clip(np.ceil(maxs * scale), -scale, scale),
+        ], axis=1).astype(dtype).tobytes()
+        entries.append(LEVEL.pack(samples_per_peak, len(mins), offset))
+        data.append(pairs)
+        offset += len(pairs)
+
+    header = HEADER.pack(MAGIC, bits, len(levels), 0, PEAK_SAMPLE_RATE, frames)
+    return b''.join([header, *entries, *data])
+
+
+def header_size(level_count):
+    return HEADER.size + LEVEL.size * level_count
+
+
+def decode_header(data):
+    """
+    Parse the header of a peaks file from its first bytes (at least
+    header_size() of the level count). Raises ValueError if it is not one.
+    """
+    magic, bits, level_count, _, sample_rate, frames = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError('Not a waveform peaks file')
+    value_bytes = bits // 8
+    levels = []
+    for index in range(level_count):
+        samples_per_peak, count, offset = LEVEL.unpack_from(data, HEADER.size + index * LEVEL.size)
+        levels.append({
+            'level': index,
+            'samples_per_peak': samples_per_peak,
+            'count': count,
+            'offset': offset,
+            'length': count * 2 * value_bytes,
+        })
+    return {'bits': bits, 'sample_rate': sample_rate, 'frames': frames, 'levels': levels}
+
+
+def generate_peaks(source, bits=8):
+    """
+    Decode a file path or URL as mono blocks and return its peaks file
+    """
+    builder = PeakBuilder()
+    for block in decode_blocks(source, BLOCK_FRAMES, channels=1, sample_rate=PEAK_SAMPLE_RATE):
+        builder.update(block[:, 0])
+    return encode_peaks(builder.levels(), builder.frames, bits)
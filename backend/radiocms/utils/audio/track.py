@@ -0,0 +1,105 @@
+"""
+Every analysis of a newly ingested track from as few reads of its audio as
+possible. A remote source is downloaded once to a temporary file. Loudness
+and MPX power come from one 48 kHz decode, as BS.1770 requires; cues,
+waveform peaks, fingerprint and embedding share one 22.05 kHz mono decode.
+Kept free of Django imports so it can run in the analysis process pool.
+"""
+import os
+import shutil
+import tempfile
+import urllib.parse
+import urllib.request
+from contextlib import contextmanager
+
+from .cues import CUE_SAMPLE_RATE, FrameFeatures, cue_block_frames, find_cues
+from .decode import DecodeError, decode_blocks
+from .embedding import EMBEDDING_SAMPLE_RATE, EmbeddingExtractor, _embedding_result
+from .fingerprint import FINGERPRINT_SAMPLE_RATE, PeakExtractor, _fingerprint_result
+from .frames import UnsupportedFormat, index_source
+from .mpx import analyze_and_scan_file
+from .peaks import PEAK_SAMPLE_RATE, PeakBuilder, encode_peaks
+
+# Stages of analyze_track, in the order they run
+TRACK_STAGES = ('analysis', 'frames', 'cues', 'peaks', 'fingerprint', 'embedding')
+MONO_SAMPLE_RATE = CUE_SAMPLE_RATE
+
+assert PEAK_SAMPLE_RATE == FINGERPRINT_SAMPLE_RATE == EMBEDDING_SAMPLE_RATE == MONO_SAMPLE_RATE
+
+
+@contextmanager
+def local_copy(source):
+    """
+    A path to read ``source`` from: the file itself, or a temporary download
+    of a URL that is removed afterwards
+    """
+    if not source.startswith(('http://', 'https://')):
+        yield source
+        return
+
+    suffix = os.path.splitext(urllib.parse.urlparse(source).path)[1]
+    with tempfile.NamedTemporaryFile(suffix=suffix) as copy:
+        try:
+            with urllib.request.urlopen(source) as response:
+                shutil.copyfileobj(response, copy, 1024 * 1024)
+        except Exception as e:
+            # HTTPError does not survive the trip back from a worker process
+            raise DecodeError(f'Could not download {source}: {str(e)}') from None
+        copy.flush()
+        yield copy.name
+
+
+def analyze_track(source, memory_bytes=64 * 1024 * 1024, preemphasis_us=50, limit_dbr=0.0, peak_bits=8,
+                  index_frames=True):
+    """
+    ``(results, errors)`` of every stage in TRACK_STAGES for a file path or
+    URL: results maps a stage to what its standalone function returns
+    (analyze_and_scan_file, index_source, detect_cues, generate_peaks,
+    fingerprint_source, embed_source); errors maps a failed stage to its
+    message. ``frames`` is None for audio that is not MPEG or ADTS and is
+    left out unless ``index_frames``.
+    """
+    results = {}
+    errors = {}
+    with local_copy(source) as path:
+        if index_frames:
+            try:
+                results['frames'] = index_source(path)
+            except UnsupportedFormat:
+                results['frames'] = None
+            except Exception as e:
+                errors['frames'] = str(e)
+
+        try:
+            results['analysis'] = analyze_and_scan_file(path, memory_bytes, preemphasis_us, limit_dbr)
+        except Exception as e:
+            errors['analysis'] = str(e)
+
+        features = FrameFeatures()
+        peaks = PeakBuilder()
+        landmarks = PeakExtractor()
+        embedding = EmbeddingExtractor()
+        try:
+            for block in decode_blocks(path, cue_block_frames(memory_bytes), channels=1,
+                                       sample_rate=MONO_SAMPLE_RATE):
+                mono = block[:, 0]
+                features.update(mono)
+                peaks.update(mono)
+                landmarks.update(mono)
+                embedding.update(mono)
+        except Exception as e:
+            errors.update(dict.fromkeys(('cues', 'peaks', 'fingerprint', 'embedding'), str(e)))
+            return results, errors
+
+    finishers = {
+        'cues': lambda: find_cues(*features.arrays()),
+        'peaks': lambda: encode_peaks(peaks.levels(), peaks.frames, peak_bits),
+        'fingerprint': lambda: _fingerprint_result(landmarks),
+        'embedding': lambda: _embedding_result(embedding),
+    }
+    for stage, finish in finishers.items():
+        try:
+            results[stage] = finish()
+        except Exception as e:
+            errors[stage] = str(e)
+    return results, errors
@@ -0,0 +1,27 @@
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .base import ObjectStat, StorageBackend
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_storage_backend():
+    """
+    The media storage backend selected by MEDIA_STORAGE_BACKEND
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = import_string(settings.MEDIA_STORAGE_BACKEND)()
+    return _backend
+
+
+def reset_storage_backend():
+    global _backend
+    with _backend_lock:
+        _backend = None
@@ -0,0 +1,105 @@
+from collections import namedtuple
+
+# size in bytes; checksum_sha256 is the base64 S3-style checksum when known
+ObjectStat = namedtuple('ObjectStat', ['size', 'content_type', 'checksum_sha256'])
+
+
+class StorageBackend:
+    """
+    Interface of a media storage backend. Keys are '/'-separated paths
+    relative to the media root, e.g. audio/ab/<sha256>.wav.
+
+    Methods raise on failure; callers in radiocms.utils.storage log and turn
+    errors into their usual None/False results.
+    """
+
+    # Whether clients can upload straight to the backend with presigned URLs
+    supports_presigned_uploads = False
+
+    def check(self):
+        """
+        Return True if the backend is reachable and writable
+        """
+        return True
+
+    def put(self, key, file, content_type=None):
+        """
+        Store ``file`` (a filesystem path or a readable binary file object)
+        under ``key`` without buffering it in memory
+        """
+        raise NotImplementedError
+
+    def get(self, key):
+        """
+        Open the object for streaming; the caller closes the returned stream
+        """
+        raise NotImplementedError
+
+    def stat(self, key):
+        """
+        ObjectStat for the object, or None if it does not exist
+        """
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def read_range(self, key, start, end):
+        """
+        Bytes ``start`` to ``end`` (inclusive) of the object
+        """
+        raise NotImplementedError
+
+    def url(self, key):
+        """
+        Public URL of the object
+        """
+        raise NotImplementedError
+
+    def key_from_url(self, url):
+        """
+        Key of a URL returned by url(), or None for foreign URLs
+        """
+        prefix = self.url('')
+        if not url or not url.startswith(prefix):
+            return None
+        return url[len(prefix):]
+
+    def exists(self, key):
+        return self.stat(key) is not None
+
+    def copy(self, source_key, key):
+        with self.get(source_key) as source:
+            self.put(key, source, self.stat(source_key).content_type)
+
+    # Multipart uploads, driven by the server (resumable uploads) or by the
+    # client through presigned part URLs
+
+    def start_multipart(self, key, content_type=None):
+        raise NotImplementedError
+
+    def upload_part(self, key, upload_id, part_number, body):
+        """
+        Store one part and return its ETag
+        """
+        raise NotImplementedError
+
+    def complete_multipart(self, key, upload_id, parts):
+        """
+        Assemble the object from ``parts``: dicts with part_number and etag
+        """
+        raise NotImplementedError
+
+    def abort_multipart(self, key, upload_id):
+        raise NotImplementedError
+
+    # Presigned direct uploads (only when supports_presigned_uploads)
+
+    def presign_put(self, key, content_type, checksum_sha256=None, expires_in=3600):
+        """
+        Return ``(url, headers)`` for a direct PUT of the object
+        """
+        raise NotImplementedError
+
+    def presign_part(self, key, upload_id, part_number, expires_in=3600):
+        raise NotImplementedError
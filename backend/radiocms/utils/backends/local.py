@@ -0,0 +1,160 @@
+import mimetypes
+import os
+import shutil
+import tempfile
+import uuid
+
+from django.conf import settings
+
+from .base import ObjectStat, StorageBackend
+
+MULTIPART_DIR = '.multipart'
+
+
+def zero_copy(source, destination, count=None):
+    """
+    Copy ``count`` bytes (default: the rest) between file objects with
+    os.sendfile, so the data never enters user space. Falls back to a
+    buffered copy where sendfile is unavailable.
+    """
+    try:
+        in_fd, out_fd = source.fileno(), destination.fileno()
+    except (AttributeError, OSError):
+        in_fd = out_fd = None
+
+    if in_fd is not None and hasattr(os, 'sendfile'):
+        destination.flush()
+        offset = source.tell()
+        remaining = os.fstat(in_fd).st_size - offset if count is None else count
+        try:
+            while remaining > 0:
+                sent = os.sendfile(out_fd, in_fd, offset, remaining)
+                if sent == 0:
+                    break
+                offset += sent
+                remaining -= sent
+            source.seek(offset)
+            destination.seek(0, os.SEEK_END)
+            return
+        except OSError:
+            # e.g. EINVAL on filesystems that don't support it; resume buffered
+            source.seek(offset)
+            count = None if count is None else remaining
+
+    if count is None:
+        shutil.copyfileobj(source, destination, 1024 * 1024)
+    else:
+        while count > 0:
+            chunk = source.read(min(1024 * 1024, count))
+            if not chunk:
+                break
+            destination.write(chunk)
+            count -= len(chunk)
+
+
+class LocalStorageBackend(StorageBackend):
+    """
+    Media on the local disk under MEDIA_ROOT, served by radiocms.views.media.
+    Writes go to a temporary file that is renamed into place, so readers
+    never see partial objects.
+    """
+
+    def __init__(self, root=None, base_url=None):
+        self.root = os.path.abspath(root or settings.MEDIA_ROOT)
+        self.base_url = (base_url if base_url is not None else settings.LOCAL_MEDIA_BASE_URL).rstrip('/')
+
+    def path(self, key):
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid media key: {key}")
+        return path
+
+    def check(self):
+        os.makedirs(self.root, exist_ok=True)
+        return os.access(self.root, os.W_OK)
+
+    def _write(self, key, write):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as destination:
+                write(destination)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def put(self, key, file, content_type=None):
+        if isinstance(file, str):
+            with open(file, 'rb') as source:
+                self._write(key, lambda destination: zero_copy(source, destination))
+        else:
+            self._write(key, lambda destination: zero_copy(file, destination))
+
+    def get(self, key):
+        return open(self.path(key), 'rb')
+
+    def stat(self, key):
+        try:
+            size = os.stat(self.path(key)).st_size
+        except FileNotFoundError:
+            return None
+        return ObjectStat(size, mimetypes.guess_type(key)[0] or 'application/octet-stream', None)
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def read_range(self, key, start, end):
+        with open(self.path(key), 'rb') as f:
+            f.seek(start)
+            return f.read(end - start + 1)
+
+    def url(self, key):
+        return f"{self.base_url}{settings.MEDIA_URL}{key}"
+
+    def copy(self, source_key, key):
+        source_path = self.path(source_key)
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            # Objects are immutable once written, so a hard link is a safe copy
+            os.link(source_path, path)
+        except FileExistsError:
+            pass
+        except OSError:
+            shutil.copyfile(source_path, path)
+
+    def _parts_dir(self, upload_id):
+        return self.path(f"{MULTIPART_DIR}/{upload_id}")
+
+    def start_multipart(self, key, content_type=None):
+        upload_id = uuid.uuid4().hex
+        os.makedirs(self._parts_dir(upload_id))
+        return upload_id
+
+    def upload_part(self, key, upload_id, part_number, body):
+        part_path = os.path.join(self._parts_dir(upload_id), f"{int(part_number)}.part")
+        with open(part_path, 'wb') as f:
+            if isinstance(body, (bytes, bytearray, memoryview)):
+                f.write(body)
+            else:
+                zero_copy(body, f)
+        return f'"{upload_id}-{int(part_number)}"'
+
+    def complete_multipart(self, key, upload_id, parts):
+        parts_dir = self._parts_dir(upload_id)
+
+        def assemble(destination):
+            for part in sorted(parts, key=lambda part: int(part['part_number'])):
+                with open(os.path.join(parts_dir, f"{int(part['part_number'])}.part"), 'rb') as source:
+                    zero_copy(source, destination)
+
+        self._write(key, assemble)
+        shutil.rmtree(parts_dir, ignore_errors=True)
+
+    def abort_multipart(self, key, upload_id):
+        shutil.rmtree(self._parts_dir(upload_id), ignore_errors=True)
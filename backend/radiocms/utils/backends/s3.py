@@ -0,0 +1,100 @@
+from django.conf import settings
+from botocore.exceptions import ClientError
+
+from ...config.storage import get_s3_client, get_transfer_config, verify_bucket
+from .base import ObjectStat, StorageBackend
+
+
+class S3StorageBackend(StorageBackend):
+    """
+    Media in the AWS_STORAGE_BUCKET_NAME bucket, through the shared pooled client
+    """
+
+    supports_presigned_uploads = True
+
+    @property
+    def bucket(self):
+        return settings.AWS_STORAGE_BUCKET_NAME
+
+    def check(self):
+        # Cached, re-checked on AWS_S3_BUCKET_CHECK_TTL
+        return verify_bucket()
+
+    def put(self, key, file, content_type=None):
+        extra_args = {'ContentType': content_type or 'application/octet-stream'}
+        # The transfer manager reads the source in multipart-sized chunks
+        if isinstance(file, str):
+            get_s3_client().upload_file(file, self.bucket, key, ExtraArgs=extra_args, Config=get_transfer_config())
+        else:
+            get_s3_client().upload_fileobj(file, self.bucket, key, ExtraArgs=extra_args, Config=get_transfer_config())
+
+    def get(self, key):
+        return get_s3_client().get_object(Bucket=self.bucket, Key=key)['Body']
+
+    def stat(self, key):
+        try:
+            head = get_s3_client().head_object(Bucket=self.bucket, Key=key, ChecksumMode='ENABLED')
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code', '') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+        return ObjectStat(head['ContentLength'], head.get('ContentType'), head.get('ChecksumSHA256'))
+
+    def delete(self, key):
+        get_s3_client().delete_object(Bucket=self.bucket, Key=key)
+
+    def read_range(self, key, start, end):
+        response = get_s3_client().get_object(Bucket=self.bucket, Key=key, Range=f'bytes={start}-{end}')
+        return response['Body'].read()
+
+    def url(self, key):
+        if settings.AWS_S3_ENDPOINT_URL:
+            return f"{settings.AWS_S3_ENDPOINT_URL.rstrip('/')}/{self.bucket}/{key}"
+        return f"https://{self.bucket}.s3.{settings.AWS_S3_REGION_NAME}.amazonaws.com/{key}"
+
+    def copy(self, source_key, key):
+        # Server-side copy, no bytes pass through this process
+        get_s3_client().copy({'Bucket': self.bucket, 'Key': source_key}, self.bucket, key, Config=get_transfer_config())
+
+    def start_multipart(self, key, content_type=None):
+        upload = get_s3_client().create_multipart_upload(
+            Bucket=self.bucket, Key=key, ContentType=content_type or 'application/octet-stream'
+        )
+        return upload['UploadId']
+
+    def upload_part(self, key, upload_id, part_number, body):
+        response = get_s3_client().upload_part(
+            Bucket=self.bucket, Key=key, UploadId=upload_id, PartNumber=part_number, Body=body
+        )
+        return response['ETag']
+
+    def complete_multipart(self, key, upload_id, parts):
+        get_s3_client().complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={'Parts': [
+                {'PartNumber': int(part['part_number']), 'ETag': part['etag']}
+                for part in sorted(parts, key=lambda part: int(part['part_number']))
+            ]}
+        )
+
+    def abort_multipart(self, key, upload_id):
+        get_s3_client().abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+
+    def presign_put(self, key, content_type, checksum_sha256=None, expires_in=3600):
+        params = {'Bucket': self.bucket, 'Key': key, 'ContentType': content_type}
+        headers = {'Content-Type': content_type}
+        if checksum_sha256:
+            # S3 rejects the PUT if the body does not match the declared hash
+            params['ChecksumSHA256'] = headers['x-amz-checksum-sha256'] = checksum_sha256
+        url = get_s3_client().generate_presigned_url('put_object', Params=params, ExpiresIn=expires_in)
+        return url, headers
+
+    def presign_part(self, key, upload_id, part_number, expires_in=3600):
+        return get_s3_client().generate_presigned_url('upload_part', Params={
+            'Bucket': self.bucket,
+            'Key': key,
+            'UploadId': upload_id,
+            'PartNumber': part_number,
+        }, ExpiresIn=expires_in)
@@ -0,0 +1,356 @@
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files import File
+from django.db import close_old_connections
+
+from radiocms.models.library import LibraryItem
+
+from .analysis import analyze_new_items, check_duplicates
+from .library import ASSET_FOLDERS, create_item_from_urls
+from .mass_import import import_manifest, manifest_format
+from .storage import discard_uploads, upload_assets
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_RETRYING = 'retrying'
+STATUS_SUCCEEDED = 'succeeded'
+STATUS_FAILED = 'failed'
+
+
+class LocalIngestQueue:
+    """
+    In-process queue for tests and single-process deployments
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._statuses = {}
+        self._lock = threading.Lock()
+
+    def enqueue(self, job):
+        self.set_status(job['id'], status=STATUS_QUEUED, attempts=job['attempts'])
+        self._queue.put(job)
+
+    def dequeue(self, timeout=1):
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def schedule_retry(self, job, delay):
+        self.set_status(job['id'], status=STATUS_RETRYING, attempts=job['attempts'])
+        timer = threading.Timer(delay, self._queue.put, args=(job,))
+        timer.daemon = True
+        timer.start()
+
+    def set_status(self, job_id, **fields):
+        with self._lock:
+            self._statuses.setdefault(job_id, {'id': job_id}).update(fields)
+
+    def get_status(self, job_id):
+        with self._lock:
+            status = self._statuses.get(job_id)
+            return dict(status) if status else None
+
+
+class RedisIngestQueue:
+    """
+    Redis-backed queue shared by the web processes and run_ingest_workers.
+    Retries wait in a sorted set scored by the time they become due.
+    """
+
+    def __init__(self, url, prefix='radiocms:ingest'):
+        import redis
+
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self._queue_key = f'{prefix}:queue'
+        self._delayed_key = f'{prefix}:delayed'
+        self._status_prefix = f'{prefix}:job:'
+
+    def enqueue(self, job):
+        self.set_status(job['id'], status=STATUS_QUEUED, attempts=job['attempts'])
+        self._redis.lpush(self._queue_key, json.dumps(job))
+
+    def dequeue(self, timeout=1):
+        self._promote_due_retries()
+        item = self._redis.brpop(self._queue_key, timeout=timeout)
+        return json.loads(item[1]) if item else None
+
+    def schedule_retry(self, job, delay):
+        self.set_status(job['id'], status=STATUS_RETRYING, attempts=job['attempts'])
+        self._redis.zadd(self._delayed_key, {json.dumps(job): time.time() + delay})
+
+    def _promote_due_retries(self):
+        for payload in self._redis.zrangebyscore(self._delayed_key, 0, time.time(), start=0, num=100):
+            # Only the worker that removes the entry re-queues it
+            if self._redis.zrem(self._delayed_key, payload):
+                self._redis.lpush(self._queue_key, payload)
+
+    def set_status(self, job_id, **fields):
+        key = f'{self._status_prefix}{job_id}'
+        pipe = self._redis.pipeline()
+        pipe.hset(key, mapping={name: json.dumps(value) for name, value in fields.items()})
+        pipe.expire(key, settings.INGEST_STATUS_TTL)
+        pipe.execute()
+
+    def get_status(self, job_id):
+        status = self._redis.hgetall(f'{self._status_prefix}{job_id}')
+        if not status:
+            return None
+        return {'id': job_id, **{name: json.loads(value) for name, value in status.items()}}
+
+
+_queue = None
+_queue_lock = threading.Lock()
+_local_pool = None
+_local_pool_lock = threading.Lock()
+
+
+def get_ingest_queue():
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                if settings.INGEST_QUEUE_BACKEND == 'redis':
+                    _queue = RedisIngestQueue(settings.REDIS_URL)
+                else:
+                    _queue = LocalIngestQueue()
+    return _queue
+
+
+def stage_files(job_id, files):
+    """
+    Copy uploaded files out of the request into the staging area, where they
+    stay until the job has uploaded them
+    """
+    job_dir = os.path.join(settings.UPLOAD_STAGING_ROOT, 'ingest', job_id)
+    os.makedirs(job_dir, exist_ok=True)
+
+    staged = {}
+    for name, file in files.items():
+        if not file:
+            continue
+        path = os.path.join(job_dir, name)
+        with open(path, 'wb') as destination:
+            for chunk in file.chunks():
+                destination.write(chunk)
+        staged[name] = {
+            'path': path,
+            'name': file.name,
+            'content_type': getattr(file, 'content_type', None) or 'application/octet-stream',
+        }
+    return staged
+
+
+def enqueue_library_item(fields, files, user):
+    """
+    Stage the request's files and queue a job that uploads them and creates
+    the LibraryItem. Returns the job id.
+    """
+    job_id = str(uuid.uuid4())
+    job = {
+        'id': job_id,
+        'fields': fields,
+        'files': stage_files(job_id, files),
+        'user_id': user.pk,
+        'attempts': 0,
+    }
+    get_ingest_queue().enqueue(job)
+    if settings.INGEST_QUEUE_BACKEND != 'redis':
+        start_local_workers()
+    return job_id
+
+
+def enqueue_import(manifest, user):
+    """
+    Stage an uploaded import manifest and queue a job that runs it through
+    the MassImporter. Returns the job id.
+    """
+    job_id = str(uuid.uuid4())
+    job = {
+        'id': job_id,
+        'type': 'import',
+        'format': manifest_format(manifest.name),
+        'files': stage_files(job_id, {'manifest': manifest}),
+        'user_id': user.pk,
+        'attempts': 0,
+    }
+    get_ingest_queue().enqueue(job)
+    if settings.INGEST_QUEUE_BACKEND != 'redis':
+        start_local_workers()
+    return job_id
+
+
+def process_import_job(job):
+    """
+    Import a staged manifest, publishing the importer's counters as job
+    status after every batch. Rows imported by a failed attempt are skipped
+    as existing when the job is retried.
+    """
+    ingest_queue = get_ingest_queue()
+    report = import_manifest(
+        job['files']['manifest']['path'],
+        job['format'],
+        user=User.objects.filter(pk=job['user_id']).first(),
+        batch_size=settings.MASS_IMPORT_BATCH_SIZE,
+        workers=settings.MEDIA_UPLOAD_WORKERS,
+        media_root=settings.MASS_IMPORT_MEDIA_ROOT or None,
+        progress=lambda report: ingest_queue.set_status(job['id'], **report.as_dict()),
+    )
+    ingest_queue.set_status(job['id'], **report.as_dict())
+    return None
+
+
+def enqueue_analysis(item_ids):
+    """
+    Queue audio analysis of newly created library items. Returns the job id.
+    """
+    job_id = str(uuid.uuid4())
+    job = {
+        'id': job_id,
+        'type': 'analyze',
+        'item_ids': [str(item_id) for item_id in item_ids],
+        'files': {},
+        'user_id': None,
+        'attempts': 0,
+    }
+    get_ingest_queue().enqueue(job)
+    if settings.INGEST_QUEUE_BACKEND != 'redis':
+        start_local_workers()
+    return job_id
+
+
+def process_analysis_job(job):
+    items = list(LibraryItem.objects.filter(pk__in=job['item_ids']).only('id', 'audio_file'))
+    counts = analyze_new_items(items)
+    get_ingest_queue().set_status(
+        job['id'], analyzed=counts['analysis'][0], failed=counts['analysis'][1],
+        cues_detected=counts['cues'][0], cues_failed=counts['cues'][1],
+        peaks_generated=counts['peaks'][0], peaks_failed=counts['peaks'][1],
+        frames_indexed=counts['frames'][0], frames_failed=counts['frames'][1],
+        fingerprinted=counts['fingerprint'][0], fingerprints_failed=counts['fingerprint'][1],
+        embedded=counts['embedding'][0], embeddings_failed=counts['embedding'][1],
+        duplicates=check_duplicates(items),
+    )
+    return None
+
+
+def process_job(job):
+    """
+    Upload a job's staged files and create its LibraryItem. Raises on failure
+    so the worker can retry.
+    """
+    if job.get('type') == 'import':
+        return process_import_job(job)
+    if job.get('type') == 'analyze':
+        return process_analysis_job(job)
+
+    handles = {}
+    try:
+        assets = {}
+        for name, staged in job['files'].items():
+            handle = File(open(staged['path'], 'rb'), name=staged['name'])
+            handle.content_type = staged['content_type']
+            handles[name] = handle
+            assets[name] = (handle, ASSET_FOLDERS[name], name == 'audio')
+
+        urls, created = upload_assets(assets)
+        if not urls:
+            raise RuntimeError('Failed to upload audio file')
+
+        try:
+            user = User.objects.filter(pk=job['user_id']).first()
+            item = create_item_from_urls(job['fields'], urls, user)
+        except Exception:
+            discard_uploads(created)
+            raise
+        return item
+    finally:
+        for handle in handles.values():
+            handle.close()
+
+
+def _discard_staged(job):
+    if job['files']:
+        shutil.rmtree(os.path.dirname(next(iter(job['files'].values()))['path']), ignore_errors=True)
+
+
+class IngestWorkerPool:
+    """
+    Threads that take jobs off the ingest queue, retrying failures with
+    exponential backoff up to INGEST_MAX_ATTEMPTS
+    """
+
+    def __init__(self, ingest_queue, workers, handler=process_job):
+        self.queue = ingest_queue
+        self.workers = workers
+        self.handler = handler
+        self._stopping = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f'ingest-worker-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, wait=True):
+        self._stopping.set()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            job = self.queue.dequeue(timeout=1)
+            if job is None:
+                continue
+            self._handle(job)
+
+    def _handle(self, job):
+        job['attempts'] += 1
+        self.queue.set_status(job['id'], status=STATUS_RUNNING, attempts=job['attempts'])
+        close_old_connections()
+        try:
+            item = self.handler(job)
+        except Exception as e:
+            logger.error(f"Ingest job {job['id']} attempt {job['attempts']} failed: {str(e)}", exc_info=True)
+            if job['attempts'] < settings.INGEST_MAX_ATTEMPTS:
+                self.queue.schedule_retry(job, settings.INGEST_RETRY_BACKOFF * 2 ** (job['attempts'] - 1))
+            else:
+                self.queue.set_status(job['id'], status=STATUS_FAILED, error=str(e))
+                _discard_staged(job)
+            return
+        finally:
+            close_old_connections()
+
+        self.queue.set_status(
+            job['id'], status=STATUS_SUCCEEDED, item_id=str(item.pk) if item is not None else None
+        )
+        _discard_staged(job)
+
+
+def start_local_workers():
+    """
+    Start the in-process worker pool used when there is no Redis queue
+    """
+    global _local_pool
+    if _local_pool is None:
+        with _local_pool_lock:
+            if _local_pool is None:
+                _local_pool = IngestWorkerPool(get_ingest_queue(), settings.INGEST_WORKERS).start()
+    return _local_pool
@@ -0,0 +1,68 @@
+import json
+
+from django.conf import settings
+from django.db import transaction
+
+from radiocms.models.library import LibraryItem
+
+# Asset name -> storage folder, as used by create_library_item
+ASSET_FOLDERS = {
+    'audio': 'audio',
+    'cover_art': 'images',
+    'lyrics': 'lyrics',
+}
+
+
+def _as_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).lower() == 'true'
+
+
+def library_item_fields(data):
+    """
+    LibraryItem fields from the form or JSON data accepted by
+    create_library_item (title, artist, genre, rotation, markers, flags)
+    """
+    markers = data.get('markers') or '{}'
+    if isinstance(markers, str):
+        markers = json.loads(markers)
+
+    return {
+        'title': data.get('title', ''),
+        'artist': data.get('artist', ''),
+        'genre': data.get('genre', ''),
+        'rotation': data.get('rotation', 'medium'),
+        'intro_point': float(markers.get('in', 0)),
+        'vocal_point': float(markers.get('vox', 0)),
+        'aux_point': float(markers.get('aux', 0)),
+        'allow_skip': _as_bool(data.get('allow_skip', 'false')),
+        'is_clean': _as_bool(data.get('is_clean', 'false')),
+    }
+
+
+def schedule_analysis(item_ids):
+    """
+    Queue audio analysis of new items once the current transaction commits
+    """
+    if not settings.AUDIO_ANALYSIS_ON_INGEST or not item_ids:
+        return
+    # Imported here: the ingest module builds on this one
+    from .ingest import enqueue_analysis
+
+    transaction.on_commit(lambda: enqueue_analysis(item_ids))
+
+
+def create_item_from_urls(fields, urls, user):
+    """
+    Create a LibraryItem for media that is already in storage
+    """
+    item = LibraryItem.objects.create(
+        audio_file=urls['audio'],
+        cover_art=urls.get('cover_art') or '',
+        lyrics_file=urls.get('lyrics') or '',
+        created_by=user,
+        **fields
+    )
+    schedule_analysis([item.pk])
+    return item
@@ -0,0 +1,313 @@
+import csv
+import io
+import json
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.files import File
+from django.db import transaction
+
+from radiocms.apps.airadio.models.category import Category
+from radiocms.apps.airadio.models.settings import Format
+from radiocms.models.library import LibraryItem, library_dedupe_key
+
+from .library import ASSET_FOLDERS, library_item_fields, schedule_analysis
+from .storage import discard_uploads, store_file
+
+logger = logging.getLogger(__name__)
+
+# Manifest column -> asset name in ASSET_FOLDERS
+MEDIA_COLUMNS = {
+    'audio': 'audio',
+    'audio_file': 'audio',
+    'cover_art': 'cover_art',
+    'lyrics': 'lyrics',
+    'lyrics_file': 'lyrics',
+}
+ROTATIONS = {value for value, label in LibraryItem.ROTATION_CHOICES}
+# Errors kept in the report; the counters cover the rest
+MAX_REPORTED_ERRORS = 100
+
+
+class ManifestError(ValueError):
+    pass
+
+
+def read_manifest(stream, fmt):
+    """
+    Yield row dicts from a CSV (with a header row) or JSON Lines manifest,
+    reading the stream incrementally. ``stream`` may be text or binary.
+    """
+    if isinstance(stream.read(0), bytes):
+        stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+    elif fmt == 'jsonl':
+        for line_number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                raise ManifestError(f'Line {line_number}: {str(e)}')
+            if not isinstance(row, dict):
+                raise ManifestError(f'Line {line_number}: expected an object')
+            yield row
+    else:
+        raise ManifestError(f'Unknown manifest format: {fmt}')
+
+
+def manifest_format(name):
+    """
+    Manifest format from a file name: 'jsonl' for .jsonl/.ndjson, else 'csv'
+    """
+    return 'jsonl' if name.lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+class ImportReport:
+    def __init__(self):
+        self.processed = 0
+        self.created = 0
+        self.existing = 0
+        self.duplicates = 0
+        self.failed = 0
+        self.errors = []
+        self.started = time.monotonic()
+
+    def error(self, row_number, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'error': message})
+
+    @property
+    def rate(self):
+        elapsed = time.monotonic() - self.started
+        return self.processed / elapsed if elapsed else 0.0
+
+    def as_dict(self):
+        return {
+            'processed': self.processed,
+            'created': self.created,
+            'existing': self.existing,
+            'duplicates': self.duplicates,
+            'failed': self.failed,
+            'rows_per_second': round(self.rate, 1),
+            'errors': self.errors,
+        }
+
+
+def _labels(value):
+    if value in (None, ''):
+        return []
+    if isinstance(value, str):
+        return [label.strip() for label in value.split('|') if label.strip()]
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [value]
+
+
+class MassImporter:
+    """
+    Imports manifest rows in batches. Each batch is checked against the
+    library with one query on LibraryItem.dedupe_key, so rows whose
+    normalized title/artist already exists (or repeats earlier in the
+    manifest) are skipped. New media is uploaded on a thread pool, and the
+    batch's items and their format/category links are inserted with
+    bulk_create.
+
+    Media columns (audio, cover_art, lyrics) hold either an http(s) URL,
+    stored as is, or a path relative to ``media_root``, uploaded to media
+    storage. Without a media_root only URLs are accepted.
+    """
+
+    def __init__(self, user=None, batch_size=1000, workers=8, media_root=None, dry_run=False, progress=None):
+        self.user = user
+        self.batch_size = batch_size
+        self.workers = workers
+        self.media_root = os.path.abspath(media_root) if media_root else None
+        self.dry_run = dry_run
+        self.progress = progress
+        self.report = ImportReport()
+        # Keys of every row taken so far, to spot repeats across batches
+        self._seen = set()
+        self._formats = self._lookup(Format)
+        self._categories = self._lookup(Category)
+
+    @staticmethod
+    def _lookup(model):
+        lookup = {}
+        for pk, name in model.objects.values_list('pk', 'name'):
+            lookup[str(pk)] = pk
+            lookup.setdefault(name.casefold(), pk)
+        return lookup
+
+    def run(self, rows):
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='mass-import') as executor:
+            self._executor = executor
+            batch = []
+            for row_number, row in enumerate(rows, 1):
+                batch.append((row_number, row))
+                if len(batch) >= self.batch_size:
+                    self._import_batch(batch)
+                    batch = []
+            if batch:
+                self._import_batch(batch)
+        return self.report
+
+    def _import_batch(self, batch):
+        pending = {}
+        for row_number, row in batch:
+            try:
+                parsed = self._parse_row(row)
+            except (ValueError, TypeError) as e:
+                self.report.error(row_number, str(e))
+                continue
+            key = library_dedupe_key(parsed['fields']['title'], parsed['fields']['artist'])
+            if key in pending or key in self._seen:
+                self.report.duplicates += 1
+                continue
+            pending[key] = (row_number, parsed)
+        self._seen.update(pending)
+
+        existing = set(
+            LibraryItem.objects.filter(dedupe_key__in=list(pending)).values_list('dedupe_key', flat=True)
+        )
+        self.report.existing += len(existing)
+        pending = {key: value for key, value in pending.items() if key not in existing}
+
+        if self.dry_run:
+            self.report.created += len(pending)
+        else:
+            self._create(pending)
+
+        self.report.processed += len(batch)
+        if self.progress:
+            self.progress(self.report)
+
+    def _parse_row(self, row):
+        row = {name: value for name, value in row.items() if name and value not in ('', None)}
+        if 'markers' not in row:
+            row['markers'] = {
+                marker: row[column]
+                for marker, column in (('in', 'intro_point'), ('vox', 'vocal_point'), ('aux', 'aux_point'))
+                if column in row
+            }
+        fields = library_item_fields(row)
+        fields['title'] = str(fields['title']).strip()
+        fields['artist'] = str(fields['artist']).strip()
+        if not fields['title'] or not fields['artist']:
+            raise ValueError('title and artist are required')
+        if fields['rotation'] not in ROTATIONS:
+            raise ValueError(f"Unknown rotation: {fields['rotation']}")
+
+        media = {}
+        for column, name in MEDIA_COLUMNS.items():
+            if column in row:
+                media[name] = self._media_source(str(row[column]))
+        if 'audio' not in media:
+            raise ValueError('audio is required')
+
+        return {
+            'fields': fields,
+            'media': media,
+            'formats': self._resolve(self._formats, row.get('formats'), 'format'),
+            'categories': self._resolve(self._categories, row.get('categories'), 'category'),
+        }
+
+    def _media_source(self, value):
+        if value.startswith(('http://', 'https://')):
+            return value
+        if not self.media_root:
+            raise ValueError(f'Not a URL: {value}')
+        path = os.path.abspath(os.path.join(self.media_root, value))
+        if not path.startswith(self.media_root + os.sep):
+            raise ValueError(f'Path outside the import directory: {value}')
+        if not os.path.isfile(path):
+            raise ValueError(f'File not found: {value}')
+        return path
+
+    @staticmethod
+    def _resolve(lookup, value, kind):
+        pks = []
+        for label in _labels(value):
+            pk = lookup.get(str(label).strip().casefold())
+            if pk is None:
+                raise ValueError(f'Unknown {kind}: {label}')
+            pks.append(pk)
+        return pks
+
+    def _upload(self, path, name):
+        with open(path, 'rb') as handle:
+            return store_file(File(handle, name=os.path.basename(path)), ASSET_FOLDERS[name])
+
+    def _create(self, pending):
+        futures = {
+            (key, name): self._executor.submit(self._upload, source, name)
+            for key, (row_number, parsed) in pending.items()
+            for name, source in parsed['media'].items()
+            if not source.startswith(('http://', 'https://'))
+        }
+
+        items = []
+        format_links = []
+        category_links = []
+        created_urls = []
+        FormatLink = LibraryItem.formats.through
+        CategoryLink = LibraryItem.categories.through
+        for key, (row_number, parsed) in pending.items():
+            urls = {}
+            row_created = []
+            for name, source in parsed['media'].items():
+                if (key, name) not in futures:
+                    urls[name] = source
+                    continue
+                url, was_created = futures[(key, name)].result()
+                if url:
+                    urls[name] = url
+                    if was_created:
+                        row_created.append(url)
+            if 'audio' not in urls or len(urls) < len(parsed['media']):
+                discard_uploads(row_created)
+                self.report.error(row_number, 'Media upload failed')
+                continue
+
+            item = LibraryItem(
+                id=uuid.uuid4(),
+                audio_file=urls['audio'],
+                cover_art=urls.get('cover_art', ''),
+                lyrics_file=urls.get('lyrics', ''),
+                created_by=self.user,
+                dedupe_key=key,
+                **parsed['fields']
+            )
+            items.append(item)
+            created_urls.extend(row_created)
+            format_links.extend(FormatLink(libraryitem_id=item.id, format_id=pk) for pk in parsed['formats'])
+            category_links.extend(
+                CategoryLink(libraryitem_id=item.id, category_id=pk) for pk in parsed['categories']
+            )
+
+        try:
+            with transaction.atomic():
+                LibraryItem.objects.bulk_create(items)
+                FormatLink.objects.bulk_create(format_links)
+                CategoryLink.objects.bulk_create(category_links)
+                schedule_analysis([item.pk for item in items])
+        except Exception:
+            # Don't leave orphaned objects in storage
+            discard_uploads(created_urls)
+            raise
+        self.report.created += len(items)
+
+
+def import_manifest(path, fmt=None, **options):
+    """
+    Run a MassImporter over the manifest file at ``path``
+    """
+    importer = MassImporter(**options)
+    with open(path, 'rb') as stream:
+        return importer.run(read_manifest(stream, fmt or manifest_format(path)))
@@ -0,0 +1,299 @@
+"""
+Playlist order as sparse float positions. Items are spaced POSITION_STEP
+apart. An append is one Max() and one INSERT. An insert or move between two
+items takes the midpoint of its neighbours and writes one row. A delete
+leaves a gap instead of renumbering. When repeated inserts at one spot use
+up the gap, the playlist is respaced once (rebalance).
+
+Writers lock the playlist row first, so concurrent appends cannot pick the
+same position.
+"""
+import uuid
+
+from django.db import transaction
+from django.db.models import Max
+
+from radiocms.models.library import LibraryItem
+from radiocms.models.playlist import Playlist
+from radiocms.models.playlistitem import PlaylistItem
+
+POSITION_STEP = 1024.0
+# Neighbours closer than this are respaced rather than split again
+MIN_POSITION_GAP = 1e-6
+
+
+class PlaylistOperationError(ValueError):
+    def __init__(self, index, message):
+        super().__init__(message)
+        self.index = index
+
+
+def position_between(before, after):
+    """
+    A position between ``before`` and ``after`` (None for the start or end
+    of the playlist), or None when they are too close and the playlist
+    needs a rebalance
+    """
+    if before is None and after is None:
+        return POSITION_STEP
+    if before is None:
+        return after - POSITION_STEP if after > POSITION_STEP else after / 2 if after > MIN_POSITION_GAP else None
+    if after is None:
+        return before + POSITION_STEP
+    if after - before < MIN_POSITION_GAP:
+        return None
+    return (before + after) / 2
+
+
+def lock_playlist(playlist_id):
+    return Playlist.objects.select_for_update().get(pk=playlist_id)
+
+
+def append_position(playlist_id):
+    last = PlaylistItem.objects.filter(playlist_id=playlist_id).aggregate(last=Max('position'))['last']
+    return position_between(last, None)
+
+
+def rebalance(playlist_id):
+    """
+    Respace every item of the playlist POSITION_STEP apart, keeping the order
+    """
+    items = list(PlaylistItem.objects.filter(playlist_id=playlist_id).order_by('position', 'id').only('id', 'position'))
+    for index, item in enumerate(items, start=1):
+        item.position = index * POSITION_STEP
+    PlaylistItem.objects.bulk_update(items, ['position'], batch_size=1000)
+
+
+def _neighbour_position(playlist_id, after_id, exclude=None):
+    """
+    Position for an item placed right after ``after_id`` (None: first)
+    """
+    items = PlaylistItem.objects.filter(playlist_id=playlist_id)
+    if exclude is not None:
+        items = items.exclude(pk=exclude)
+    before = None
+    if after_id is not None:
+        before = items.values_list('position', flat=True).get(pk=after_id)
+        items = items.filter(position__gt=before)
+    after = items.order_by('position').values_list('position', flat=True).first()
+    return position_between(before, after)
+
+
+def position_after(playlist_id, after_id, exclude=None):
+    """
+    Position for an item placed right after the playlist item ``after_id``
+    (None: at the top), rebalancing first if the gap is used up. Call with
+    the playlist locked.
+    """
+    position = _neighbour_position(playlist_id, after_id, exclude)
+    if position is None:
+        rebalance(playlist_id)
+        position = _neighbour_position(playlist_id, after_id, exclude)
+    return position
+
+
+def move_item(item, after_id):
+    """
+    Move ``item`` right after the playlist item ``after_id`` (None: to the
+    top); writes one row unless the playlist needs respacing
+    """
+    if str(after_id) == str(item.pk):
+        return item
+    with transaction.atomic():
+        lock_playlist(item.playlist_id)
+        item.position = position_after(item.playlist_id, after_id, exclude=item.pk)
+        PlaylistItem.objects.filter(pk=item.pk).update(position=item.position)
+    return item
+
+
+class PlaylistOrder:
+    """
+    A playlist's order in memory, for applying many operations with a
+    fixed number of queries: parallel lists of positions and item ids
+    sorted by position, and the items whose position changed
+    """
+
+    def __init__(self, rows):
+        rows = sorted(rows)
+        self.positions = [position for position, _ in rows]
+        self.ids = [item_id for _, item_id in rows]
+        self._members = set(self.ids)
+        self.changed = set()
+
+    def __contains__(self, item_id):
+        return item_id in self._members
+
+    def remove(self, item_id):
+        index = self.ids.index(item_id)
+        del self.positions[index]
+        del self.ids[index]
+        self._members.discard(item_id)
+        self.changed.discard(item_id)
+
+    def place(self, item_id, after_id):
+        """
+        Put ``item_id`` (not in the order) right after ``after_id``, None for
+        the top, or at the end when ``after_id`` is ``...``
+        """
+        if after_id is ...:
+            index = len(self.ids)
+        elif after_id is None:
+            index = 0
+        else:
+            index = self.ids.index(after_id) + 1
+        before = self.positions[index - 1] if index > 0 else None
+        after = self.positions[index] if index < len(self.positions) else None
+        position = position_between(before, after)
+        self.positions.insert(index, position)
+        self.ids.insert(index, item_id)
+        self._members.add(item_id)
+        if position is None:
+            # Respace everything; every row changes
+            self.positions = [(number + 1) * POSITION_STEP for number in range(len(self.ids))]
+            self.changed.update(self.ids)
+        else:
+            self.changed.add(item_id)
+
+    def position_of(self, item_id):
+        return self.positions[self.ids.index(item_id)]
+
+
+def _uuid(value):
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+def add_items(playlist_id, library_item_ids, user, rotation='medium'):
+    """
+    Append library items to a playlist in one transaction: the ids are
+    checked with one IN query, songs already on the playlist (or repeated
+    in the request) are skipped, and the rest are inserted with one bulk
+    INSERT at consecutive positions after the current last. Returns one
+    result per requested id, in request order, with a status of 'added',
+    'duplicate', 'not_found' or 'invalid'.
+    """
+    requested = [_uuid(value) for value in library_item_ids]
+    with transaction.atomic():
+        lock_playlist(playlist_id)
+        known = set(LibraryItem.objects.filter(pk__in={pk for pk in requested if pk}).values_list('pk', flat=True))
+        existing = dict(PlaylistItem.objects.filter(playlist_id=playlist_id, library_item_id__in=known)
+                        .values_list('library_item_id', 'id'))
+        position = append_position(playlist_id) - POSITION_STEP
+
+        results = []
+        created = []
+        for value, pk in zip(library_item_ids, requested):
+            if pk is None:
+                results.append({'library_item': value, 'status': 'invalid'})
+            elif pk not in known:
+                results.append({'library_item': str(pk), 'status': 'not_found'})
+            elif pk in existing:
+                results.append({'library_item': str(pk), 'status': 'duplicate', 'item': str(existing[pk])})
+            else:
+                position += POSITION_STEP
+                item = PlaylistItem(playlist_id=playlist_id, library_item_id=pk, added_by=user, rotation=rotation,
+                                    position=position)
+                existing[pk] = item.pk
+                created.append(item)
+                results.append({'library_item': str(pk), 'status': 'added', 'item': str(item.pk),
+                                'position': position})
+        PlaylistItem.objects.bulk_create(created, batch_size=1000)
+    return results
+
+
+def _item_id(operation, key, index):
+    value = _uuid(operation.get(key))
+    if value is None:
+        raise PlaylistOperationError(index, f'{key} must be an id')
+    return str(value)
+
+
+def apply_operations(playlist_id, operations, user):
+    """
+    Apply a list of insert/move/remove operations to a playlist in one
+    transaction, all or nothing:
+
+        {"op": "insert", "library_item": <id>, "after": <item id> | null, "rotation": "high"}
+        {"op": "move", "item": <item id>, "after": <item id> | null}
+        {"op": "remove", "item": <item id>}
+
+    ``after`` null places the item at the top; an insert or move without
+    ``after`` goes to the end. The playlist is read once, and the result written with one
+    DELETE, one bulk UPDATE and one bulk INSERT. Returns one result per
+    operation; raises PlaylistOperationError (with the operation's index)
+    or Playlist.DoesNotExist.
+    """
+    with transaction.atomic():
+        lock_playlist(playlist_id)
+        rows = list(PlaylistItem.objects.filter(playlist_id=playlist_id)
+                    .values_list('position', 'id', 'library_item_id'))
+        order = PlaylistOrder([(position, str(item_id)) for position, item_id, _ in rows])
+        library_items = {str(item_id): str(library_item_id) for _, item_id, library_item_id in rows}
+        requested = {_uuid(operation.get('library_item')) for operation in operations
+                     if isinstance(operation, dict) and operation.get('op') == 'insert'} - {None}
+        known = {str(pk) for pk in LibraryItem.objects.filter(pk__in=requested).values_list('pk', flat=True)}
+
+        in_playlist = set(library_items.values())
+        rotations = {value for value, _ in PlaylistItem.ROTATION_CHOICES}
+
+        created = {}
+        removed = []
+        results = []
+        for index, operation in enumerate(operations):
+            if not isinstance(operation, dict):
+                raise PlaylistOperationError(index, 'Operations are objects')
+            op = operation.get('op')
+            after = operation.get('after', ...)
+            if after not in (None, ...):
+                if str(_uuid(after)) not in order:
+                    raise PlaylistOperationError(index, f'{after} is not in this playlist')
+                after = str(_uuid(after))
+
+            if op == 'insert':
+                library_item_id = _item_id(operation, 'library_item', index)
+                rotation = operation.get('rotation') or 'medium'
+                if library_item_id not in known:
+                    raise PlaylistOperationError(index, f'Library item {library_item_id} not found')
+                if library_item_id in in_playlist:
+                    raise PlaylistOperationError(index, f'Library item {library_item_id} is already in this playlist')
+                if not isinstance(rotation, str) or rotation not in rotations:
+                    raise PlaylistOperationError(index, f'rotation must be one of {", ".join(sorted(rotations))}')
+                item = PlaylistItem(playlist_id=playlist_id, library_item_id=library_item_id, added_by=user,
+                                    rotation=rotation)
+                item_id = str(item.pk)
+                created[item_id] = item
+                library_items[item_id] = library_item_id
+                in_playlist.add(library_item_id)
+                order.place(item_id, after)
+            elif op in ('move', 'remove'):
+                item_id = _item_id(operation, 'item', index)
+                if item_id not in order:
+                    raise PlaylistOperationError(index, f'{item_id} is not in this playlist')
+                if op == 'remove':
+                    order.remove(item_id)
+                    in_playlist.discard(library_items.pop(item_id))
+                    if created.pop(item_id, None) is None:
+                        removed.append(item_id)
+                elif item_id != after:
+                    order.remove(item_id)
+                    order.place(item_id, after)
+            else:
+                raise PlaylistOperationError(index, 'op must be insert, move or remove')
+            results.append({'op': op, 'item': item_id})
+
+        for item_id, item in created.items():
+            item.position = order.position_of(item_id)
+        updated = [PlaylistItem(pk=item_id, position=order.position_of(item_id))
+                   for item_id in order.changed if item_id not in created]
+
+        if removed:
+            PlaylistItem.objects.filter(pk__in=removed).delete()
+        PlaylistItem.objects.bulk_update(updated, ['position'], batch_size=1000)
+        PlaylistItem.objects.bulk_create(created.values(), batch_size=1000)
+
+    positions = dict(zip(order.ids, order.positions))
+    for result in results:
+        result['position'] = positions.get(result['item'])
+    return results
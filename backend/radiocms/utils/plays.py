@@ -0,0 +1,265 @@
+"""
+Write-behind play counters. Play events only bump an in-memory (or Redis)
+counter; a flusher periodically turns the aggregated deltas into a handful
+of bulk statements, so the database sees writes per flush rather than per
+play. Items with the same delta are incremented by a single UPDATE, and
+decayed popularity is brought up to date in the same transaction.
+"""
+import atexit
+import logging
+import math
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, FloatField, Func, Value
+from django.db.models.functions import Exp
+from django.utils import timezone
+
+from radiocms.apps.airadio.models.settings import Station
+from radiocms.models.library import POPULARITY_HALF_LIVES, LibraryItem
+from radiocms.models.plays import StationPlayCount
+
+logger = logging.getLogger(__name__)
+
+# Scores this small are zeroed so idle items drop out of the decay pass
+POPULARITY_FLOOR = 1e-3
+
+
+class SecondsSince(Func):
+    """
+    Seconds from the second expression to the first (timestamps)
+    """
+    arity = 2
+    output_field = FloatField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, template='EXTRACT(EPOCH FROM (%(expressions)s))::double precision',
+                              arg_joiner=' - ', **extra_context)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, template='((julianday(%(expressions)s)) * 86400.0)',
+                              arg_joiner=') - julianday(', **extra_context)
+
+
+def _decayed(field, window, now):
+    rate = math.log(2) / POPULARITY_HALF_LIVES[window]
+    return F(field) * Exp(-rate * SecondsSince(Value(now), F('popularity_updated_at')))
+
+
+def decay_popularity(queryset, now):
+    """
+    Bring the stored popularity of ``queryset`` forward to ``now``. Each row
+    decays from its own popularity_updated_at, so running this twice, or
+    concurrently, never decays a row twice.
+    """
+    updated = queryset.filter(popularity_updated_at__lt=now).update(
+        popularity_updated_at=now,
+        **{f'popularity_{window}': _decayed(f'popularity_{window}', window, now) for window in POPULARITY_HALF_LIVES},
+    )
+    queryset.filter(popularity_weekly__gt=0, popularity_weekly__lt=POPULARITY_FLOOR).update(
+        **{f'popularity_{window}': 0 for window in POPULARITY_HALF_LIVES},
+    )
+    return updated
+
+
+class LocalPlayBuffer:
+    """
+    Per-process counters, for single-process deployments and tests
+    """
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, events):
+        with self._lock:
+            self._counts.update(events)
+
+    def drain(self):
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        return counts
+
+
+class RedisPlayBuffer:
+    """
+    Counters in a Redis hash shared by every web process. A drain renames
+    the hash first, so each increment is flushed by exactly one process.
+    """
+
+    def __init__(self, url, prefix='radiocms:plays'):
+        import redis
+
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self._pending_key = f'{prefix}:pending'
+        self._flushing_prefix = f'{prefix}:flushing:'
+
+    def add(self, events):
+        pipe = self._redis.pipeline(transaction=False)
+        for (item_id, station_id), count in events.items():
+            pipe.hincrby(self._pending_key, f'{item_id}:{station_id or ""}', count)
+        pipe.execute()
+
+    def drain(self):
+        import redis
+
+        flushing_key = f'{self._flushing_prefix}{uuid.uuid4()}'
+        try:
+            self._redis.rename(self._pending_key, flushing_key)
+        except redis.ResponseError:
+            # No pending key: nothing was played since the last drain
+            return Counter()
+        counts = Counter()
+        for field, count in self._redis.hgetall(flushing_key).items():
+            item_id, station_id = field.split(':')
+            counts[(item_id, int(station_id) if station_id else None)] += int(count)
+        self._redis.delete(flushing_key)
+        return counts
+
+
+class PlayCounter:
+    """
+    Front of the write-behind counters: ``record`` is cheap and never
+    touches the database; ``flush`` writes everything recorded so far.
+    Unless ``autoflush`` is off, a daemon thread flushes every
+    PLAY_FLUSH_INTERVAL seconds.
+    """
+
+    def __init__(self, buffer, autoflush=True):
+        self.buffer = buffer
+        self.autoflush = autoflush
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._last_decay = 0.0
+
+    def record(self, events):
+        """
+        Count plays: ``events`` is an iterable of ``(library_item_id,
+        station_id or None)``
+        """
+        counts = Counter((str(item_id), station_id) for item_id, station_id in events)
+        if counts:
+            self.buffer.add(counts)
+            if self.autoflush:
+                self._ensure_flusher()
+        return sum(counts.values())
+
+    def _ensure_flusher(self):
+        if self._thread is not None:
+            return
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='play-counter-flusher', daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            time.sleep(settings.PLAY_FLUSH_INTERVAL)
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Play count flush failed: {str(e)}")
+
+    def flush(self, now=None):
+        """
+        Write the buffered plays. Returns the number of plays written.
+        Deltas are put back into the buffer if the write fails.
+        """
+        counts = self.buffer.drain()
+        now = now or timezone.now()
+        try:
+            written = write_play_counts(counts, now)
+        except Exception:
+            self.buffer.add(counts)
+            raise
+        if time.monotonic() - self._last_decay >= settings.POPULARITY_DECAY_INTERVAL:
+            self._last_decay = time.monotonic()
+            stale = now - timedelta(seconds=settings.POPULARITY_DECAY_INTERVAL)
+            decay_popularity(LibraryItem.objects.filter(popularity_weekly__gt=0, popularity_updated_at__lt=stale), now)
+        return written
+
+
+def _group_by_delta(deltas):
+    groups = defaultdict(list)
+    for key, delta in deltas.items():
+        groups[delta].append(key)
+    return groups
+
+
+def write_play_counts(counts, now):
+    """
+    Apply ``{(library_item_id, station_id or None): plays}`` in bulk: one
+    UPDATE per distinct delta for items and for station counts, plus one
+    INSERT for station counts seen for the first time. Events for items or
+    stations that no longer exist are dropped. Returns the plays written.
+    """
+    if not counts:
+        return 0
+    item_deltas = Counter()
+    for (item_id, _), count in counts.items():
+        item_deltas[item_id] += count
+
+    with transaction.atomic():
+        existing = {str(pk) for pk in LibraryItem.objects.filter(pk__in=list(item_deltas)).values_list('pk', flat=True)}
+        item_deltas = Counter({item_id: count for item_id, count in item_deltas.items() if item_id in existing})
+        if not item_deltas:
+            return 0
+
+        items = LibraryItem.objects.filter(pk__in=list(item_deltas))
+        decay_popularity(items, now)
+        for delta, ids in _group_by_delta(item_deltas).items():
+            LibraryItem.objects.filter(pk__in=ids).update(
+                play_count=F('play_count') + delta,
+                last_played_at=now,
+                popularity_updated_at=now,
+                **{f'popularity_{window}': F(f'popularity_{window}') + delta for window in POPULARITY_HALF_LIVES},
+            )
+
+        station_deltas = Counter({
+            (item_id, station_id): count
+            for (item_id, station_id), count in counts.items()
+            if station_id is not None and item_id in existing
+        })
+        if station_deltas:
+            _write_station_counts(station_deltas, now)
+    return sum(item_deltas.values())
+
+
+def _write_station_counts(deltas, now):
+    stations = set(Station.objects.filter(pk__in={station for _, station in deltas}).values_list('pk', flat=True))
+    deltas = {key: count for key, count in deltas.items() if key[1] in stations}
+    StationPlayCount.objects.bulk_create(
+        [StationPlayCount(library_item_id=item_id, station_id=station_id) for item_id, station_id in deltas],
+        ignore_conflicts=True,
+    )
+    rows = StationPlayCount.objects.filter(
+        library_item_id__in={item_id for item_id, _ in deltas}, station_id__in=stations,
+    ).values_list('pk', 'library_item_id', 'station_id')
+    ids = {(str(item_id), station_id): pk for pk, item_id, station_id in rows}
+    for delta, keys in _group_by_delta(deltas).items():
+        StationPlayCount.objects.filter(pk__in=[ids[key] for key in keys]).update(
+            play_count=F('play_count') + delta, last_played_at=now,
+        )
+
+
+_counter = None
+_counter_lock = threading.Lock()
+
+
+def get_play_counter():
+    global _counter
+    if _counter is None:
+        with _counter_lock:
+            if _counter is None:
+                if settings.PLAY_COUNTER_BACKEND == 'redis':
+                    _counter = PlayCounter(RedisPlayBuffer(settings.REDIS_URL))
+                else:
+                    _counter = PlayCounter(LocalPlayBuffer())
+    return _counter
@@ -0,0 +1,415 @@
+"""
+Offline rendering of a Stereo Tool mic chain: Noise Gate, Equalizer,
+Singleband Compressor and Final Limiter, compiled from an .sts preset.
+
+Audio is processed in fixed-size streamed blocks. Filters are cascaded
+biquads run by sosfilt with their state carried between blocks. Dynamics
+run at control rate: detectors and static gain curves are vectorized over
+CONTROL_FRAMES-sample frames, only the attack/release ballistics step frame
+by frame, and the resulting gains are interpolated back to sample rate.
+The limiter looks ahead far enough to reach its gain before a peak, so its
+output never exceeds the ceiling.
+
+Kept free of Django imports so the analysis process pool can use it.
+"""
+import math
+import subprocess
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import sosfilt
+
+from ..audio.decode import SAMPLE_RATE, DecodeError, decode_blocks
+from . import sts
+
+CHANNELS = 2
+BLOCK_FRAMES = SAMPLE_RATE * 10
+# Samples per gain computation (0.67 ms at 48 kHz)
+CONTROL_FRAMES = 32
+
+# Stereo Tool levels are on a 16-bit scale
+FULL_SCALE = 32768.0
+SILENCE_DB = -120.0
+
+GATE_ATTACK_MS = 1.0
+GATE_HOLD_MS = 50.0
+GATE_RELEASE_MS = 150.0
+
+LIMITER_CEILING_DB = -1.0
+LIMITER_LOOKAHEAD_MS = 2.0
+# Time to recover 10 dB
+LIMITER_RELEASE_MS = 60.0
+
+# Stages the preset enables but this engine does not render
+UNSUPPORTED_STAGES = ('Multiband Compressor',)
+
+
+def to_db(linear):
+    return 20.0 * np.log10(np.maximum(linear, 10 ** (SILENCE_DB / 20)))
+
+
+def to_linear(db):
+    return np.power(10.0, np.asarray(db) / 20.0)
+
+
+def _frame_peaks(block):
+    """
+    Peak of each CONTROL_FRAMES frame over all channels (linked detection)
+    """
+    return np.abs(block).reshape(-1, CONTROL_FRAMES * block.shape[1]).max(axis=1)
+
+
+def _ramp(start, gains):
+    """
+    Per-sample gains ramping linearly from the gain at each frame's start
+    to the gain at its end; ``start`` is the gain before the first frame
+    """
+    starts = np.concatenate([[start], gains[:-1]])
+    steps = np.arange(1, CONTROL_FRAMES + 1) / CONTROL_FRAMES
+    return (starts[:, None] + (gains - starts)[:, None] * steps).reshape(-1, 1)
+
+
+def _attack_coefficient(time_ms, sample_rate):
+    """
+    One-pole coefficient per control frame for a time constant in ms
+    """
+    return math.exp(-CONTROL_FRAMES / (max(time_ms, 1e-3) / 1000.0 * sample_rate))
+
+
+# Biquads (RBJ Audio EQ Cookbook), as sosfilt rows [b0, b1, b2, 1, a1, a2]
+
+def _normalized(b, a):
+    return [b[0] / a[0], b[1] / a[0], b[2] / a[0], 1.0, a[1] / a[0], a[2] / a[0]]
+
+
+def peaking(frequency, gain_db, q, sample_rate):
+    amplitude = 10 ** (gain_db / 40)
+    w = 2 * math.pi * frequency / sample_rate
+    alpha = math.sin(w) / (2 * q)
+    return _normalized(
+        [1 + alpha * amplitude, -2 * math.cos(w), 1 - alpha * amplitude],
+        [1 + alpha / amplitude, -2 * math.cos(w), 1 - alpha / amplitude],
+    )
+
+
+def shelf(frequency, gain_db, q, sample_rate, high=False):
+    amplitude = 10 ** (gain_db / 40)
+    w = 2 * math.pi * frequency / sample_rate
+    cos_w = math.cos(w)
+    beta = 2 * math.sqrt(amplitude) * math.sin(w) / (2 * q)
+    sign = -1 if high else 1
+    return _normalized(
+        [amplitude * ((amplitude + 1) - sign * (amplitude - 1) * cos_w + beta),
+         sign * 2 * amplitude * ((amplitude - 1) - sign * (amplitude + 1) * cos_w),
+         amplitude * ((amplitude + 1) - sign * (amplitude - 1) * cos_w - beta)],
+        [(amplitude + 1) + sign * (amplitude - 1) * cos_w + beta,
+         -sign * 2 * ((amplitude - 1) + sign * (amplitude + 1) * cos_w),
+         (amplitude + 1) + sign * (amplitude - 1) * cos_w - beta],
+    )
+
+
+def compile_equalizer(section, sample_rate=SAMPLE_RATE):
+    """
+    ``(sections, 6)`` SOS array for an [Equalizer] section's parametric
+    bands and shelves, leaving out flat ones; None if nothing is left.
+    Stereo Tool's legacy (non-parametric) curve is not compiled.
+    """
+    nyquist = sample_rate / 2
+    rows = []
+    for band in range(1, 7):
+        frequency = section.get(f'Parametric equalizer frequency {band}', 0)
+        gain = section.get(f'Parametric equalizer gain {band}', 0)
+        if gain and 0 < frequency < nyquist:
+            rows.append(peaking(frequency, gain, section.get(f'Parametric equalizer Q {band}', 1) or 1, sample_rate))
+    for side in ('LF', 'HF'):
+        frequency = section.get(f'Parametric equalizer {side} frequency', 0)
+        gain = section.get(f'Parametric equalizer {side} gain', 0)
+        if gain and 0 < frequency < nyquist:
+            rows.append(shelf(frequency, gain, section.get(f'Parametric equalizer {side} Q', 0.5) or 0.5,
+                              sample_rate, high=side == 'HF'))
+    frequency = section.get('Parametric equalizer LF slope frequency', 0)
+    gain = section.get('Parametric equalizer LF slope gain', 0)
+    if gain and 0 < frequency < nyquist:
+        rows.append(shelf(frequency, gain, 0.5, sample_rate))
+    return np.array(rows) if rows else None
+
+
+class Equalizer:
+    def __init__(self, sos, channels=CHANNELS):
+        self.sos = sos
+        self._zi = np.zeros((len(sos), 2, channels))
+
+    def process(self, block):
+        output, self._zi = sosfilt(self.sos, block, axis=0, zi=self._zi)
+        return output
+
+
+class NoiseGate:
+    """
+    Wideband gate: attenuates by ``range_db`` once the input has stayed
+    below ``threshold`` for the hold time
+    """
+
+    def __init__(self, threshold, range_db, sample_rate=SAMPLE_RATE):
+        self.threshold_db = float(to_db(threshold))
+        self.floor_db = -abs(range_db)
+        self._attack = _attack_coefficient(GATE_ATTACK_MS, sample_rate)
+        self._release = _attack_coefficient(GATE_RELEASE_MS, sample_rate)
+        self._hold_frames = int(GATE_HOLD_MS / 1000 * sample_rate / CONTROL_FRAMES)
+        self._held = 0
+        self._gain_db = 0.0
+
+    def process(self, block):
+        open_frames = (to_db(_frame_peaks(block)) >= self.threshold_db).tolist()
+        gains = np.empty(len(open_frames))
+        start = to_linear(self._gain_db)
+        gain, held, floor = self._gain_db, self._held, self.floor_db
+        attack, release, hold = self._attack, self._release, self._hold_frames
+        for index, is_open in enumerate(open_frames):
+            if is_open:
+                held = 0
+                gain *= attack
+            else:
+                held += 1
+                if held > hold:
+                    gain = floor + (gain - floor) * release
+            gains[index] = gain
+        self._gain_db, self._held = gain, held
+        return block * _ramp(start, to_linear(gains))
+
+
+class Compressor:
+    """
+    Feed-forward peak compressor with a soft knee. Attack is exponential,
+    release is linear in dB; while the input is below ``gate`` the gain is
+    held instead of released, so pauses are not pumped up.
+    """
+
+    def __init__(self, threshold, ratio, knee_db, attack_ms, release_ms, gate=0.0, drive=1.0, output=1.0,
+                 sample_rate=SAMPLE_RATE):
+        self.threshold_db = float(to_db(threshold))
+        self.slope = 1.0 / max(ratio, 1.0) - 1.0
+        self.knee_db = max(knee_db, 0.0)
+        self.gate_db = float(to_db(gate)) if gate else SILENCE_DB
+        self.drive = drive
+        self.output = output
+        # Attack is given as the time to drop 86 %, i.e. two time constants
+        self._attack = _attack_coefficient(attack_ms / 2, sample_rate)
+        self._release_step = 10.0 * CONTROL_FRAMES / (max(release_ms, 1e-3) / 1000.0 * sample_rate)
+        self._gain_db = 0.0
+
+    def gain_computer(self, levels_db):
+        """
+        Static gain change in dB for input levels in dB
+        """
+        over = levels_db - self.threshold_db
+        gain = self.slope * np.maximum(over, 0.0)
+        if self.knee_db:
+            in_knee = np.abs(over) * 2 <= self.knee_db
+            gain[in_knee] = self.slope * np.square(over[in_knee] + self.knee_db / 2) / (2 * self.knee_db)
+        return gain
+
+    def process(self, block):
+        block = block * self.drive
+        levels = to_db(_frame_peaks(block))
+        targets = self.gain_computer(levels).tolist()
+        gated = (levels < self.gate_db).tolist()
+        gains = np.empty(len(targets))
+        start = to_linear(self._gain_db)
+        gain, attack, release_step = self._gain_db, self._attack, self._release_step
+        for index, target in enumerate(targets):
+            if target < gain:
+                gain = target + (gain - target) * attack
+            elif not gated[index]:
+                gain = min(target, gain + release_step)
+            gains[index] = gain
+        self._gain_db = gain
+        return block * (_ramp(start, to_linear(gains)) * self.output)
+
+
+class Limiter:
+    """
+    Look-ahead brickwall limiter. Per frame it needs the gain that keeps
+    the frame's peak under the ceiling; a minimum over the look-ahead
+    window followed by a moving average of the same length fades the gain
+    down before each peak without ever exceeding that requirement. Delays
+    the audio by ``latency`` samples.
+    """
+
+    def __init__(self, ceiling_db=LIMITER_CEILING_DB, pre_amp=1.0, channels=CHANNELS, sample_rate=SAMPLE_RATE):
+        self.ceiling_db = ceiling_db
+        self.pre_amp = pre_amp
+        self.window = max(int(LIMITER_LOOKAHEAD_MS / 1000 * sample_rate / CONTROL_FRAMES), 1)
+        self.latency = self.window * CONTROL_FRAMES
+        self._release_step = 10.0 * CONTROL_FRAMES / (LIMITER_RELEASE_MS / 1000.0 * sample_rate)
+        self._delay = np.zeros((self.latency, channels))
+        self._history = np.zeros(2 * self.window - 2)
+        self._required_db = 0.0
+        self._gain_db = 0.0
+        self._boundary = 1.0
+
+    def process(self, block):
+        block = block * self.pre_amp
+        required = np.minimum(self.ceiling_db - to_db(_frame_peaks(block)), 0.0)
+        # A frame's start gain also bounds the end of the frame before it
+        boundaries = np.minimum(np.concatenate([[self._required_db], required[:-1]]), required).tolist()
+        self._required_db = float(required[-1])
+
+        released = np.empty(len(boundaries))
+        gain, release_step = self._gain_db, self._release_step
+        for index, target in enumerate(boundaries):
+            gain = min(target, gain + release_step)
+            released[index] = gain
+        self._gain_db = gain
+
+        series = np.concatenate([self._history, released])
+        self._history = series[len(series) - len(self._history):]
+        held = sliding_window_view(series, self.window).min(axis=1)
+        smoothed = to_linear(sliding_window_view(held, self.window).mean(axis=1))
+
+        delayed = np.concatenate([self._delay, block])
+        self._delay = delayed[len(block):]
+        start, self._boundary = self._boundary, float(smoothed[-1])
+        ceiling = float(to_linear(self.ceiling_db))
+        return np.clip(delayed[:len(block)] * _ramp(start, smoothed), -ceiling, ceiling)
+
+
+class MicChain:
+    """
+    Stages compiled from a preset, run over streamed blocks. ``process``
+    may return fewer samples than it was given (partial control frames are
+    buffered, and look-ahead delays the output); ``finish`` returns the
+    rest, so the concatenated output is sample-aligned with the input.
+    """
+
+    def __init__(self, stages, channels=CHANNELS, sample_rate=SAMPLE_RATE, skipped=()):
+        self.stages = stages
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.skipped = tuple(skipped)
+        self.latency = sum(getattr(stage, 'latency', 0) for stage in stages)
+        self._pending = np.zeros((0, channels))
+        self._to_trim = self.latency
+        self._frames_in = 0
+        self._frames_out = 0
+
+    def _run(self, block):
+        if not len(block):
+            return block
+        for stage in self.stages:
+            block = stage.process(block)
+        if self._to_trim:
+            trimmed = min(self._to_trim, len(block))
+            block = block[trimmed:]
+            self._to_trim -= trimmed
+        return block
+
+    def process(self, block):
+        self._frames_in += len(block)
+        if len(self._pending):
+            block = np.concatenate([self._pending, block])
+        usable = len(block) - len(block) % CONTROL_FRAMES
+        self._pending = block[usable:]
+        output = self._run(block[:usable]) if usable else block[:0]
+        self._frames_out += len(output)
+        return output
+
+    def finish(self):
+        """
+        Flush the buffered tail through the chain
+        """
+        remaining = self._frames_in - self._frames_out
+        padding = -(len(self._pending) + self.latency) % CONTROL_FRAMES + self.latency
+        tail = np.concatenate([self._pending, np.zeros((padding, self.channels))])
+        self._pending = np.zeros((0, self.channels))
+        output = self._run(tail)[:remaining]
+        self._frames_out += len(output)
+        return output
+
+
+def _enabled(preset, name):
+    section = preset.get(name)
+    return section is not None and bool(section.get('Enabled', 0))
+
+
+def compile_chain(preset, channels=CHANNELS, sample_rate=SAMPLE_RATE, force=()):
+    """
+    MicChain for the stages ``preset`` enables, plus any named in
+    ``force`` (section names). ``skipped`` on the result lists enabled
+    stages that are not rendered.
+    """
+    def wanted(name):
+        return name in force or _enabled(preset, name)
+
+    stages = []
+    if wanted('Noise Gate'):
+        gate = preset['Noise Gate']
+        ranges = [value for key, value in gate.items() if key.startswith('Relative noise gate level')]
+        stages.append(NoiseGate(gate.get('Noise level', 0.01), sum(ranges) / len(ranges) if ranges else 10,
+                                sample_rate))
+    if wanted('Equalizer'):
+        sos = compile_equalizer(preset['Equalizer'], sample_rate)
+        if sos is not None:
+            stages.append(Equalizer(sos, channels))
+    if wanted('Singleband Compressor 2'):
+        compressor = preset['Singleband Compressor 2']
+        stages.append(Compressor(
+            threshold=compressor.get('Threshold level', 16384) / FULL_SCALE,
+            ratio=compressor.get('Ratio', 4),
+            knee_db=compressor.get('Knee', 0),
+            attack_ms=compressor.get('Attack (time to drop 86%% in ms)', 10),
+            release_ms=compressor.get('Release (time to rise 10 dB in ms)', 250),
+            gate=compressor.get('Gate level', 0) / FULL_SCALE,
+            drive=compressor.get('Singleband Drive', 1),
+            output=compressor.get('Output Level', 1),
+            sample_rate=sample_rate,
+        ))
+    if wanted('Final Limiter'):
+        stages.append(Limiter(pre_amp=preset['Final Limiter'].get('Pre-amp', 1), channels=channels,
+                              sample_rate=sample_rate))
+    skipped = [name for name in UNSUPPORTED_STAGES if _enabled(preset, name)]
+    return MicChain(stages, channels, sample_rate, skipped)
+
+
+def process_blocks(chain, blocks):
+    """
+    Yield ``chain``'s output for an iterable of (frames, channels) blocks,
+    as float32
+    """
+    for block in blocks:
+        output = chain.process(block)
+        if len(output):
+            yield output.astype(np.float32)
+    output = chain.finish()
+    if len(output):
+        yield output.astype(np.float32)
+
+
+def render_file(source, destination, preset_data, force=()):
+    """
+    Process a file path or URL through the chain compiled from the .sts
+    bytes ``preset_data`` and encode the result to ``destination`` (a
+    path; ffmpeg picks the format from its extension). Returns
+    ``(duration, skipped_stages)``.
+    """
+    chain = compile_chain(sts.load(preset_data), force=force)
+    command = [
+        'ffmpeg', '-nostdin', '-v', 'error', '-y', '-f', 'f32le', '-ar', str(SAMPLE_RATE),
+        '-ac', str(CHANNELS), '-i', '-', destination,
+    ]
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+    frames = 0
+    try:
+        for output in process_blocks(chain, decode_blocks(source, BLOCK_FRAMES, CHANNELS)):
+            process.stdin.write(output.tobytes())
+            frames += len(output)
+    except BrokenPipeError:
+        pass
+    finally:
+        process.stdin.close()
+        errors = process.stderr.read()
+        process.stderr.close()
+        returncode = process.wait()
+    if returncode != 0:
+        raise DecodeError(errors.decode(errors='replace').strip() or f'ffmpeg failed to encode {destination}')
+    return frames / SAMPLE_RATE, chain.skipped
@@ -0,0 +1,314 @@
+"""
+Low-latency mic processing for live voice breaks: Noise Gate, Pre
+Compressor (a slow AGC levelling the voice) and Final Limiter from an .sts
+preset, run over fixed BLOCK_FRAMES blocks as PCM arrives.
+
+Incoming samples go into a preallocated ring buffer; each full block is
+copied into a preallocated work array, processed in place and written to
+the output ring. Every intermediate (detector levels, gains, ramps, the
+limiter's look-ahead history and delay line) lives in arrays allocated
+once, so the steady state allocates no NumPy buffers. Dynamics work at the
+control rate of radiocms.utils.processing.dsp.
+
+Kept free of Django imports.
+"""
+import numpy as np
+
+from ..audio.decode import SAMPLE_RATE
+from .dsp import (CONTROL_FRAMES, FULL_SCALE, GATE_ATTACK_MS, GATE_HOLD_MS, GATE_RELEASE_MS, LIMITER_CEILING_DB,
+                  LIMITER_LOOKAHEAD_MS, LIMITER_RELEASE_MS, SILENCE_DB, _attack_coefficient)
+
+# 5.3 ms at 48 kHz
+BLOCK_FRAMES = 256
+RING_FRAMES = SAMPLE_RATE * 2
+# How far the AGC may lift or cut the voice
+AGC_MAX_GAIN_DB = 15.0
+AGC_MAX_CUT_DB = 20.0
+# Stages a live preset may enable that are not rendered live
+UNSUPPORTED_STAGES = ('Speech Detection',)
+
+_FLOOR = 10 ** (SILENCE_DB / 20)
+
+
+class BufferOverflow(RuntimeError):
+    pass
+
+
+class RingBuffer:
+    """
+    Fixed-capacity FIFO of (frames, channels) float32 samples
+    """
+
+    def __init__(self, capacity, channels):
+        self._data = np.zeros((capacity, channels), dtype=np.float32)
+        self.capacity = capacity
+        self._start = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def write(self, samples, scale=None):
+        """
+        Append ``samples`` (any numeric dtype), multiplied by ``scale`` if
+        given. Raises BufferOverflow if they do not fit.
+        """
+        count = len(samples)
+        if count > self.capacity - self._size:
+            raise BufferOverflow(f'{count} frames do not fit in {self.capacity - self._size} free frames')
+        end = (self._start + self._size) % self.capacity
+        first = min(count, self.capacity - end)
+        for target, source in ((self._data[end:end + first], samples[:first]),
+                               (self._data[:count - first], samples[first:])):
+            if len(source):
+                np.copyto(target, source, casting='unsafe')
+                if scale is not None:
+                    target *= scale
+        self._size += count
+
+    def read_into(self, out):
+        """
+        Move the oldest len(out) frames into ``out``
+        """
+        count = len(out)
+        if count > self._size:
+            raise ValueError(f'Only {self._size} frames buffered')
+        first = min(count, self.capacity - self._start)
+        np.copyto(out[:first], self._data[self._start:self._start + first])
+        if count > first:
+            np.copyto(out[first:], self._data[:count - first])
+        self._start = (self._start + count) % self.capacity
+        self._size -= count
+
+
+class _BlockDynamics:
+    """
+    Shared scratch arrays: per-control-frame levels, gains in dB (index 0
+    is the gain at the start of the block) and the per-sample gain ramp
+    """
+
+    def __init__(self, block_frames, channels):
+        self.frames = block_frames // CONTROL_FRAMES
+        self._scratch = np.empty((block_frames, channels), dtype=np.float32)
+        self._levels = np.empty(self.frames, dtype=np.float32)
+        self._gains = np.zeros(self.frames + 1)
+        self._linear = np.empty(self.frames + 1)
+        self._deltas = np.empty(self.frames)
+        self._ramp = np.empty((self.frames, CONTROL_FRAMES))
+        self._steps = np.arange(1, CONTROL_FRAMES + 1) / CONTROL_FRAMES
+
+    def _peak_levels(self, block):
+        np.abs(block, out=self._scratch)
+        self._scratch.reshape(self.frames, -1).max(axis=1, out=self._levels)
+        self._to_db(self._levels, 20)
+
+    def _rms_levels(self, block):
+        np.square(block, out=self._scratch)
+        self._scratch.reshape(self.frames, -1).mean(axis=1, out=self._levels)
+        self._to_db(self._levels, 10)
+
+    @staticmethod
+    def _to_db(values, factor):
+        np.maximum(values, _FLOOR, out=values)
+        np.log10(values, out=values)
+        values *= factor
+
+    def _apply(self, block):
+        np.divide(self._gains, 20.0, out=self._linear)
+        np.power(10.0, self._linear, out=self._linear)
+        np.subtract(self._linear[1:], self._linear[:-1], out=self._deltas)
+        np.multiply(self._deltas[:, None], self._steps, out=self._ramp)
+        self._ramp += self._linear[:-1, None]
+        block *= self._ramp.reshape(-1, 1)
+        self._gains[0] = self._gains[-1]
+
+
+class RealtimeGate(_BlockDynamics):
+    def __init__(self, threshold, range_db, block_frames, channels, sample_rate=SAMPLE_RATE):
+        super().__init__(block_frames, channels)
+        self.threshold_db = 20 * np.log10(max(threshold, _FLOOR))
+        self.floor_db = -abs(range_db)
+        self._attack = _attack_coefficient(GATE_ATTACK_MS, sample_rate)
+        self._release = _attack_coefficient(GATE_RELEASE_MS, sample_rate)
+        self._hold_frames = int(GATE_HOLD_MS / 1000 * sample_rate / CONTROL_FRAMES)
+        self._held = 0
+
+    def process(self, block):
+        self._peak_levels(block)
+        gain, held, gains = float(self._gains[0]), self._held, self._gains
+        for index, level in enumerate(self._levels.tolist()):
+            if level >= self.threshold_db:
+                held = 0
+                gain *= self._attack
+            else:
+                held += 1
+                if held > self._hold_frames:
+                    gain = self.floor_db + (gain - self.floor_db) * self._release
+            gains[index + 1] = gain
+        self._held = held
+        self._apply(block)
+
+
+class RealtimeAutoGain(_BlockDynamics):
+    """
+    Slow AGC towards ``target`` RMS: cuts with an exponential attack, lifts
+    at a fixed dB rate, and holds while the input is below ``gate``
+    """
+
+    def __init__(self, target, attack_ms, release_ms, gate, drive, block_frames, channels,
+                 sample_rate=SAMPLE_RATE):
+        super().__init__(block_frames, channels)
+        self.target_db = 20 * np.log10(max(target, _FLOOR))
+        self.gate_db = 20 * np.log10(max(gate, _FLOOR))
+        self.drive = drive
+        # Attack is given as the time to drop 86 %, i.e. two time constants
+        self._attack = _attack_coefficient(attack_ms / 2, sample_rate)
+        self._release_step = 10.0 * CONTROL_FRAMES / (max(release_ms, 1e-3) / 1000.0 * sample_rate)
+
+    def process(self, block):
+        if self.drive != 1:
+            block *= self.drive
+        self._rms_levels(block)
+        gain, gains = float(self._gains[0]), self._gains
+        for index, level in enumerate(self._levels.tolist()):
+            if level >= self.gate_db:
+                target = min(max(self.target_db - level, -AGC_MAX_CUT_DB), AGC_MAX_GAIN_DB)
+                if target < gain:
+                    gain = target + (gain - target) * self._attack
+                else:
+                    gain = min(target, gain + self._release_step)
+            gains[index + 1] = gain
+        self._apply(block)
+
+
+class RealtimeLimiter(_BlockDynamics):
+    """
+    The look-ahead limiter of radiocms.utils.processing.dsp.Limiter with its
+    history and delay line kept in preallocated arrays
+    """
+
+    def __init__(self, block_frames, channels, pre_amp=1.0, ceiling_db=LIMITER_CEILING_DB, sample_rate=SAMPLE_RATE):
+        super().__init__(block_frames, channels)
+        self.pre_amp = pre_amp
+        self.ceiling_db = ceiling_db
+        self.ceiling = 10 ** (ceiling_db / 20)
+        self.window = max(int(LIMITER_LOOKAHEAD_MS / 1000 * sample_rate / CONTROL_FRAMES), 1)
+        self.latency = self.window * CONTROL_FRAMES
+        self._release_step = 10.0 * CONTROL_FRAMES / (LIMITER_RELEASE_MS / 1000.0 * sample_rate)
+        history = 2 * self.window - 2
+        self._series = np.zeros(history + self.frames)
+        self._held = np.empty(history + self.frames - self.window + 1)
+        self._smoothed = np.empty(self.frames)
+        self._delay = np.zeros((self.latency + block_frames, channels), dtype=np.float32)
+        self._required_db = 0.0
+        self._released_db = 0.0
+
+    def process(self, block):
+        if self.pre_amp != 1:
+            block *= self.pre_amp
+        self._peak_levels(block)
+        history = len(self._series) - self.frames
+        previous, gain, series = self._required_db, self._released_db, self._series
+        for index, level in enumerate(self._levels.tolist()):
+            required = min(self.ceiling_db - level, 0.0)
+            # A frame's start gain also bounds the end of the frame before it
+            gain = min(previous, required, gain + self._release_step)
+            series[history + index] = gain
+            previous = required
+        self._required_db, self._released_db = previous, gain
+
+        # Minimum over the look-ahead window, then its moving average
+        count = len(self._held)
+        np.copyto(self._held, series[:count])
+        for shift in range(1, self.window):
+            np.minimum(self._held, series[shift:shift + count], out=self._held)
+        np.copyto(self._smoothed, self._held[:self.frames])
+        for shift in range(1, self.window):
+            self._smoothed += self._held[shift:shift + self.frames]
+        self._smoothed /= self.window
+        np.copyto(self._gains[1:], self._smoothed)
+        if history:
+            series[:history] = series[self.frames:]
+
+        np.copyto(self._delay[self.latency:], block)
+        np.copyto(block, self._delay[:len(block)])
+        np.copyto(self._delay[:self.latency], self._delay[len(block):])
+        self._apply(block)
+        np.clip(block, -self.ceiling, self.ceiling, out=block)
+
+
+def _enabled(preset, name):
+    section = preset.get(name)
+    return section is not None and bool(section.get('Enabled', 0))
+
+
+class RealtimeMicProcessor:
+    """
+    Streaming mic chain: ``push`` PCM in any amount, ``pull_into`` the
+    processed audio. Output lags input by ``latency`` frames (the block
+    plus the limiter's look-ahead). The limiter always runs, whatever the
+    preset says, so a live mic can never clip the output.
+    """
+
+    def __init__(self, preset, channels=1, block_frames=BLOCK_FRAMES, sample_rate=SAMPLE_RATE):
+        if block_frames % CONTROL_FRAMES:
+            raise ValueError(f'block_frames must be a multiple of {CONTROL_FRAMES}')
+        self.channels = channels
+        self.block_frames = block_frames
+        self.sample_rate = sample_rate
+        self.input = RingBuffer(RING_FRAMES, channels)
+        self.output = RingBuffer(RING_FRAMES, channels)
+        self._block = np.zeros((block_frames, channels), dtype=np.float32)
+
+        self.stages = []
+        if _enabled(preset, 'Noise Gate'):
+            gate = preset['Noise Gate']
+            ranges = [value for key, value in gate.items() if key.startswith('Relative noise gate level')]
+            self.stages.append(RealtimeGate(gate.get('Noise level', 0.01), sum(ranges) / len(ranges) if ranges else 10,
+                                            block_frames, channels, sample_rate))
+        if _enabled(preset, 'Pre Compressor'):
+            agc = preset['Pre Compressor']
+            self.stages.append(RealtimeAutoGain(
+                target=agc.get('Maximum volume - Band 1', 5500) / FULL_SCALE,
+                attack_ms=agc.get('Attack (time to drop 86%% in ms)', 1500),
+                release_ms=agc.get('Release (time to rise 10 dB in ms)', 2500),
+                gate=agc.get('Gate level', 512) / FULL_SCALE,
+                drive=agc.get('Drive', 1),
+                block_frames=block_frames, channels=channels, sample_rate=sample_rate,
+            ))
+        limiter = preset.get('Final Limiter')
+        self.stages.append(RealtimeLimiter(block_frames, channels, limiter.get('Pre-amp', 1) if limiter else 1,
+                                           sample_rate=sample_rate))
+        self.skipped = tuple(name for name in UNSUPPORTED_STAGES if _enabled(preset, name))
+        self.latency = block_frames + sum(getattr(stage, 'latency', 0) for stage in self.stages)
+
+    def push(self, samples, scale=None):
+        """
+        Buffer (frames, channels) ``samples`` and process every complete
+        block. Returns the number of blocks processed.
+        """
+        self.input.write(samples, scale)
+        blocks = 0
+        while len(self.input) >= self.block_frames:
+            self.input.read_into(self._block)
+            self.process_block(self._block)
+            self.output.write(self._block)
+            blocks += 1
+        return blocks
+
+    def process_block(self, block):
+        """
+        Run the stages over one (block_frames, channels) float32 block in
+        place
+        """
+        for stage in self.stages:
+            stage.process(block)
+
+    def pull_into(self, out):
+        """
+        Move up to len(out) processed frames into ``out``; returns how many
+        """
+        count = min(len(out), len(self.output))
+        if count:
+            self.output.read_into(out[:count])
+        return count
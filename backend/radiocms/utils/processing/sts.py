@@ -0,0 +1,376 @@
+"""
+Stereo Tool ``.sts`` presets: INI-style ``[Section]`` headers followed by
+``Key=Value`` lines. Keys are kept verbatim (including Stereo Tool's
+``%%`` escapes), values are typed as int, float or str, and the original
+value text is kept so an unchanged preset serializes back byte for byte.
+
+Parsed presets are immutable, so they are cached by the SHA-256 of the
+file and shared. Each distinct section layout (name and key order)
+compiles once into a ``__slots__`` class with one slot per key, reachable
+by its verbatim key or by a snake_case attribute name.
+"""
+import hashlib
+import re
+import threading
+from collections import OrderedDict, namedtuple
+
+CACHE_SIZE = 64
+VALUE_CACHE_SIZE = 100000
+
+_INT_RE = re.compile(r'[-+]?\d+')
+_FLOAT_RE = re.compile(r'[-+]?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][-+]?\d+)?')
+_IDENTIFIER_RE = re.compile(r'[^0-9a-zA-Z]+')
+_SECTION_RE = re.compile(r'^[ \t]*\[([^\]\r\n]*)\][ \t]*\r?$', re.MULTILINE)
+
+Change = namedtuple('Change', ['section', 'key', 'old', 'new'])
+Conflict = namedtuple('Conflict', ['section', 'key', 'base', 'ours', 'theirs'])
+
+
+class StsError(ValueError):
+    pass
+
+
+class _Missing:
+    """
+    Placeholder for a key or section that a preset does not have
+    """
+    __slots__ = ()
+
+    def __repr__(self):
+        return 'MISSING'
+
+
+MISSING = _Missing()
+
+
+def parse_value(text):
+    if _INT_RE.fullmatch(text):
+        return int(text)
+    if _FLOAT_RE.fullmatch(text):
+        return float(text)
+    return text
+
+
+def _typed_values(raw):
+    """
+    parse_value over ``raw``, memoized: flags and common settings repeat
+    across thousands of keys and across presets
+    """
+    cache = _VALUE_CACHE
+    if len(cache) > VALUE_CACHE_SIZE:
+        cache.clear()
+    values = []
+    for text in raw:
+        value = cache.get(text, MISSING)
+        if value is MISSING:
+            value = cache[text] = parse_value(text)
+        values.append(value)
+    return values
+
+
+_VALUE_CACHE = {}
+
+
+def format_value(value):
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, float):
+        return f'{value:.10g}'
+    return str(value)
+
+
+def attribute_name(key):
+    """
+    snake_case attribute for a key: ``Attack (time to drop 86%% in ms)``
+    becomes ``attack_time_to_drop_86_in_ms``
+    """
+    name = _IDENTIFIER_RE.sub('_', key).strip('_').lower()
+    return f'_{name}' if not name or name[0].isdigit() else name
+
+
+class Section:
+    """
+    Base of the compiled section classes. Subclasses set ``name``,
+    ``keys`` (in file order), ``_index`` (key -> position) and one slot
+    per key; the raw value texts are kept alongside.
+    """
+    __slots__ = ('_raw',)
+    name = None
+    keys = ()
+    _index = {}
+    _setters = ()
+
+    def __init__(self, values, raw):
+        for setter, value in zip(self._setters, values):
+            setter(self, value)
+        Section._raw.__set__(self, raw)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Sections are immutable; use replace()')
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, self.__slots__[self._index[key]])
+        except KeyError:
+            raise KeyError(f'{self.name}: no key {key!r}') from None
+
+    def get(self, key, default=None):
+        index = self._index.get(key)
+        return default if index is None else getattr(self, self.__slots__[index])
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def __iter__(self):
+        return iter(self.keys)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def items(self):
+        return zip(self.keys, self.values())
+
+    def values(self):
+        return [getattr(self, slot) for slot in self.__slots__]
+
+    def raw(self, key):
+        return self._raw[self._index[key]]
+
+    def as_dict(self):
+        return dict(self.items())
+
+    def replace(self, changes):
+        """
+        Copy with ``{key: value}`` applied; MISSING removes a key
+        """
+        keys = [key for key in self.keys if changes.get(key, None) is not MISSING]
+        keys += [key for key, value in changes.items() if key not in self._index and value is not MISSING]
+        values, raw = [], []
+        for key in keys:
+            if key in changes:
+                values.append(changes[key])
+                raw.append(format_value(changes[key]))
+            else:
+                index = self._index[key]
+                values.append(getattr(self, self.__slots__[index]))
+                raw.append(self._raw[index])
+        return section_class(self.name, tuple(keys))(values, tuple(raw))
+
+    def __eq__(self, other):
+        return isinstance(other, Section) and self.name == other.name and self.as_dict() == other.as_dict()
+
+    def __hash__(self):
+        return hash((self.name, self.keys))
+
+    def __repr__(self):
+        return f'<Section [{self.name}] {len(self.keys)} keys>'
+
+
+_classes = {}
+_classes_lock = threading.Lock()
+
+
+def section_class(name, keys):
+    """
+    The compiled Section subclass for a section name and key order
+    """
+    cls = _classes.get((name, keys))
+    if cls is not None:
+        return cls
+    slots, seen = [], set()
+    for key in keys:
+        slot = attribute_name(key)
+        while slot in seen or slot in ('name', 'keys', 'get', 'items', 'values', 'raw', 'replace', 'as_dict'):
+            slot += '_'
+        seen.add(slot)
+        slots.append(slot)
+    cls = type(_IDENTIFIER_RE.sub('', name.title()) + 'Section', (Section,), {
+        '__slots__': tuple(slots),
+        'name': name,
+        'keys': keys,
+        '_index': {key: index for index, key in enumerate(keys)},
+    })
+    cls._setters = tuple(cls.__dict__[slot].__set__ for slot in slots)
+    with _classes_lock:
+        return _classes.setdefault((name, keys), cls)
+
+
+class Preset:
+    """
+    A parsed preset: sections by name, in file order
+    """
+    __slots__ = ('sections', 'digest')
+
+    def __init__(self, sections, digest=None):
+        self.sections = sections
+        self.digest = digest
+
+    def __getitem__(self, name):
+        return self.sections[name]
+
+    def get(self, name, default=None):
+        return self.sections.get(name, default)
+
+    def __contains__(self, name):
+        return name in self.sections
+
+    def __iter__(self):
+        return iter(self.sections.values())
+
+    def __len__(self):
+        return len(self.sections)
+
+    @property
+    def key_count(self):
+        return sum(len(section) for section in self.sections.values())
+
+    def value(self, section, key, default=MISSING):
+        found = self.sections.get(section)
+        return default if found is None else found.get(key, default)
+
+    def as_dict(self):
+        return {name: section.as_dict() for name, section in self.sections.items()}
+
+    def to_text(self):
+        lines = []
+        for section in self.sections.values():
+            lines.append(f'[{section.name}]')
+            lines.extend(f'{key}={raw}' for key, raw in zip(section.keys, section._raw))
+        return '\n'.join(lines) + '\n'
+
+    def replace(self, changes):
+        """
+        Copy with ``{section: {key: value}}`` applied; a MISSING value removes
+        a key and a MISSING section removes the section
+        """
+        sections = dict(self.sections)
+        for name, section_changes in changes.items():
+            if section_changes is MISSING:
+                sections.pop(name, None)
+                continue
+            current = sections.get(name) or section_class(name, ())((), ())
+            updated = current.replace(section_changes)
+            if len(updated):
+                sections[name] = updated
+            else:
+                sections.pop(name, None)
+        return Preset(sections)
+
+    def diff(self, other):
+        """
+        ``[Change(section, key, old, new), ...]`` turning this preset into
+        ``other``; MISSING marks added or removed keys
+        """
+        changes = []
+        for name in _ordered_union(self.sections, other.sections):
+            ours, theirs = self.sections.get(name), other.sections.get(name)
+            if ours is not None and theirs is not None and ours._raw == theirs._raw and ours.keys == theirs.keys:
+                continue
+            ours_values = ours.as_dict() if ours is not None else {}
+            theirs_values = theirs.as_dict() if theirs is not None else {}
+            for key in _ordered_union(ours_values, theirs_values):
+                old, new = ours_values.get(key, MISSING), theirs_values.get(key, MISSING)
+                if old != new:
+                    changes.append(Change(name, key, old, new))
+        return changes
+
+    def __eq__(self, other):
+        return isinstance(other, Preset) and not self.diff(other)
+
+    def __hash__(self):
+        return hash(self.digest)
+
+    def __repr__(self):
+        return f'<Preset {len(self.sections)} sections, {self.key_count} keys>'
+
+
+def _ordered_union(first, second):
+    return list(first) + [name for name in second if name not in first]
+
+
+def merge(base, ours, theirs):
+    """
+    Three-way merge: ``(merged, conflicts)``. A key changed on one side
+    only takes that side's value; a key changed differently on both sides
+    keeps ours and is reported as a Conflict.
+    """
+    changes = {}
+    conflicts = []
+    ours_changes = {(change.section, change.key): change.new for change in base.diff(ours)}
+    for change in base.diff(theirs):
+        position = (change.section, change.key)
+        if position in ours_changes and ours_changes[position] != change.new:
+            conflicts.append(Conflict(change.section, change.key, change.old, ours_changes[position], change.new))
+            continue
+        changes.setdefault(change.section, {})[change.key] = change.new
+    return ours.replace(changes), conflicts
+
+
+def parse(text, digest=None):
+    """
+    Parse the text of an .sts file into a Preset. Raises StsError for text
+    outside a section or a line without ``=``.
+    """
+    parts = _SECTION_RE.split(text)
+    if _content_lines(parts[0]):
+        raise StsError('Expected a [Section] header before the first Key=Value line')
+
+    sections = {}
+    for index in range(1, len(parts), 2):
+        name = parts[index]
+        pairs = [line.partition('=') for line in parts[index + 1].splitlines()]
+        if not all(pair[1] for pair in pairs):
+            pairs = [pair for pair in pairs if pair[1] or _content_lines(pair[0])]
+            for key, separator, _ in pairs:
+                if not separator:
+                    raise StsError(f'[{name}]: expected Key=Value, got {key.strip()!r}')
+        keys = tuple(pair[0] for pair in pairs)
+        raw = tuple(pair[2] for pair in pairs)
+        values = _typed_values(raw)
+        if name in sections:
+            # A repeated section continues the earlier one
+            sections[name] = sections[name].replace(dict(zip(keys, values)))
+        else:
+            sections[name] = section_class(name, keys)(values, raw)
+    return Preset(sections, digest)
+
+
+def _content_lines(text):
+    return [line for line in text.splitlines() if line.strip() and line.lstrip()[0] not in ';#']
+
+
+def file_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def load(data, digest=None):
+    """
+    Preset for the bytes of an .sts file, parsed once per distinct content
+    and then served from an LRU cache keyed by its SHA-256
+    """
+    digest = digest or file_digest(data)
+    with _cache_lock:
+        preset = _cache.get(digest)
+        if preset is not None:
+            _cache.move_to_end(digest)
+            return preset
+    preset = parse(data.decode('utf-8', errors='replace'), digest)
+    with _cache_lock:
+        _cache[digest] = preset
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return preset
+
+
+def load_file(path):
+    with open(path, 'rb') as f:
+        return load(f.read())
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,160 @@
+import base64
+import logging
+import os
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from radiocms.models.upload import UploadSession
+from .library import ASSET_FOLDERS
+from .storage import (
+    abort_multipart_upload, complete_multipart_upload, new_object_key,
+    start_multipart_upload, upload_part,
+)
+
+logger = logging.getLogger(__name__)
+
+TUS_VERSION = '1.0.0'
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadOffsetMismatch(Exception):
+    def __init__(self, offset):
+        super().__init__(f"Upload is at offset {offset}")
+        self.offset = offset
+
+
+class UploadClosed(Exception):
+    pass
+
+
+def parse_upload_metadata(header):
+    """
+    Decode a tus Upload-Metadata header: "key base64value,key2 base64value2"
+    """
+    metadata = {}
+    for pair in filter(None, (item.strip() for item in header.split(','))):
+        key, _, value = pair.partition(' ')
+        metadata[key] = base64.b64decode(value).decode() if value else ''
+    return metadata
+
+
+def staging_path(session, forwarded=None):
+    """
+    Staging file holding the bytes received but not yet sent to S3. The name
+    includes the forwarded offset, so after a crash the database row says
+    which file is current.
+    """
+    forwarded = session.forwarded if forwarded is None else forwarded
+    return os.path.join(settings.UPLOAD_STAGING_ROOT, f"{session.id}.{forwarded}.part")
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def create_upload_session(user, asset, filename, length, content_type='', sha256=''):
+    # The declared hash is never checked against the multipart object, so the
+    # key cannot be content-addressed
+    key = new_object_key(ASSET_FOLDERS[asset], filename)
+    upload_id = start_multipart_upload(key, content_type)
+    session = UploadSession.objects.create(
+        asset=asset,
+        filename=filename,
+        content_type=content_type,
+        sha256=sha256,
+        length=length,
+        key=key,
+        s3_upload_id=upload_id,
+        created_by=user
+    )
+    os.makedirs(settings.UPLOAD_STAGING_ROOT, exist_ok=True)
+    open(staging_path(session), 'wb').close()
+    return session
+
+
+def append_chunk(session_id, user, offset, stream, content_length):
+    """
+    Stage ``content_length`` bytes from ``stream`` at ``offset``, forward any
+    complete parts to S3 and complete the upload once all bytes are in.
+
+    The session row stays locked for the whole call, so concurrent PATCH
+    requests for one upload are serialised.
+    """
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(id=session_id, created_by=user)
+        if session.is_complete:
+            raise UploadClosed('Upload is already complete')
+        if offset != session.offset:
+            raise UploadOffsetMismatch(session.offset)
+        if offset + content_length > session.length:
+            raise UploadClosed('Chunk exceeds Upload-Length')
+
+        path = staging_path(session)
+        staged = session.offset - session.forwarded
+        with open(path, 'r+b' if os.path.exists(path) else 'w+b') as f:
+            # Drop bytes left behind by an interrupted request
+            f.truncate(staged)
+            f.seek(staged)
+            remaining = content_length
+            while remaining:
+                chunk = stream.read(min(COPY_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                f.write(chunk)
+                remaining -= len(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+
+        session.offset += content_length - remaining
+        _forward_parts(session, final=session.offset == session.length)
+        session.save()
+    return session
+
+
+def _forward_parts(session, final):
+    """
+    Send every complete part in the staging file to S3 (and the remainder if
+    this is the last chunk), then move the leftover tail to a new staging file.
+    """
+    part_size = settings.AWS_S3_MULTIPART_CHUNKSIZE
+    staged = session.offset - session.forwarded
+    if staged < part_size and not final:
+        return
+
+    path = staging_path(session)
+    sent = 0
+    with open(path, 'rb') as f:
+        while staged - sent >= part_size or (final and sent < staged):
+            size = min(part_size, staged - sent)
+            f.seek(sent)
+            part_number = len(session.parts) + 1
+            etag = upload_part(session.key, session.s3_upload_id, part_number, f.read(size))
+            session.parts.append({'part_number': part_number, 'etag': etag})
+            sent += size
+            logger.info(f"Forwarded part {part_number} of {session.key} ({size} bytes)")
+        f.seek(sent)
+        tail = f.read(staged - sent)
+
+    session.forwarded += sent
+    if final:
+        complete_multipart_upload(session.key, session.s3_upload_id, session.parts)
+        session.completed_at = timezone.now()
+        logger.info(f"Resumable upload {session.id} completed as {session.key}")
+    else:
+        with open(staging_path(session), 'wb') as f:
+            f.write(tail)
+            f.flush()
+            os.fsync(f.fileno())
+    transaction.on_commit(lambda: _remove(path))
+
+
+def terminate_upload(session):
+    if not session.is_complete:
+        abort_multipart_upload(session.key, session.s3_upload_id)
+    _remove(staging_path(session))
+    session.delete()
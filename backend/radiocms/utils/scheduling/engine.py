@@ -0,0 +1,251 @@
+"""
+Rotation scheduling: turns a station's songs and StationID jingles into a
+play log, one 24-hour day at a time.
+
+Each rotation (high/medium/low) is a card file, a deque in shuffled order.
+A slot's rotation is chosen by smooth weighted round-robin, so a 6:3:1
+weighting spreads high rotation evenly through the hour instead of
+bunching it. The first card in that deque that passes the rules is played
+and moves to the back. The rules are:
+
+- artist and title separation
+- clean-only hours
+
+Artists and titles that are still inside their separation window are kept
+in a dict of release times. A min-heap of those releases expires them, so
+checking a card is a dict lookup. When no card in any rotation passes, the
+one that becomes playable soonest is played, and the entry is marked
+``relaxed``.
+
+Kept free of Django imports so the process pool can generate logs.
+"""
+import heapq
+import random
+from collections import deque, namedtuple
+
+DAY_SECONDS = 24 * 60 * 60
+ROTATIONS = ('high', 'medium', 'low')
+
+Song = namedtuple('Song', ['id', 'title', 'artist', 'duration', 'rotation', 'clean'])
+Jingle = namedtuple('Jingle', ['id', 'title', 'duration'])
+Rules = namedtuple('Rules', [
+    'weights',               # {'high': 6, 'medium': 3, 'low': 1}
+    'artist_separation',     # seconds
+    'title_separation',      # seconds
+    'station_id_interval',   # seconds between jingles; 0 disables them
+    'clean_hours',           # (start hour, end hour) of clean-only airtime, or None
+    'default_duration',      # seconds, for songs not analyzed yet
+])
+
+
+def _key(text):
+    return ' '.join(text.lower().split())
+
+
+class _Separation:
+    """
+    Keys (artists or titles) blocked until a release time
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.blocked = {}
+        self._releases = []
+
+    def block(self, key, played_at):
+        if not key or not self.seconds:
+            return
+        release = played_at + self.seconds
+        self.blocked[key] = release
+        heapq.heappush(self._releases, (release, key))
+
+    def expire(self, now):
+        releases = self._releases
+        while releases and releases[0][0] <= now:
+            release, key = heapq.heappop(releases)
+            # A later play of the key pushed a newer release
+            if self.blocked.get(key) == release:
+                del self.blocked[key]
+
+    def release_of(self, key):
+        return self.blocked.get(key, 0)
+
+
+class LogScheduler:
+    """
+    Generates consecutive days of log for one station. ``songs`` are Song
+    tuples and ``jingles`` Jingle tuples; ``seed`` makes the shuffle
+    reproducible. The clock runs in seconds from the start of the first
+    day, and separation carries over from one day to the next.
+    """
+
+    def __init__(self, songs, jingles, rules, seed=None):
+        self.rules = rules
+        rng = random.Random(seed)
+        self._cards = {}
+        for rotation in ROTATIONS:
+            cards = [song._replace(duration=song.duration or rules.default_duration,
+                                   artist=_key(song.artist), title=_key(song.title))
+                     for song in songs if song.rotation == rotation]
+            if cards and rules.weights.get(rotation, 0) > 0:
+                rng.shuffle(cards)
+                self._cards[rotation] = deque(cards)
+        self._credit = dict.fromkeys(self._cards, 0)
+        self._total_weight = sum(rules.weights[rotation] for rotation in self._cards)
+        self._jingles = deque(jingles)
+        self._artists = _Separation(rules.artist_separation)
+        self._titles = _Separation(rules.title_separation)
+        self._names = {song.id: (song.title, song.artist) for song in songs}
+        self.clock = 0.0
+        self._last_jingle = None
+
+    def _clean_only(self, now):
+        if not self.rules.clean_hours:
+            return False
+        start, end = self.rules.clean_hours
+        hour = now % DAY_SECONDS // 3600
+        return start <= hour < end if start <= end else hour >= start or hour < end
+
+    def _next_rotation(self):
+        # Smooth weighted round-robin
+        for rotation in self._credit:
+            self._credit[rotation] += self.rules.weights[rotation]
+        rotation = max(self._credit, key=self._credit.get)
+        self._credit[rotation] -= self._total_weight
+        return rotation
+
+    def _playable(self, card, clean_only):
+        return ((card.clean or not clean_only)
+                and card.artist not in self._artists.blocked
+                and card.title not in self._titles.blocked)
+
+    def _take(self, rotation, clean_only):
+        cards = self._cards[rotation]
+        for index, card in enumerate(cards):
+            if self._playable(card, clean_only):
+                del cards[index]
+                cards.append(card)
+                return card
+        return None
+
+    def _take_soonest(self, clean_only):
+        """
+        The eligible card whose artist and title are released first
+        """
+        best = None
+        for rotation, cards in self._cards.items():
+            for index, card in enumerate(cards):
+                if clean_only and not card.clean:
+                    continue
+                release = max(self._artists.release_of(card.artist), self._titles.release_of(card.title))
+                if best is None or release < best[0]:
+                    best = (release, rotation, index)
+        if best is None:
+            return None
+        _, rotation, index = best
+        cards = self._cards[rotation]
+        card = cards[index]
+        del cards[index]
+        cards.append(card)
+        return card
+
+    def _pick(self, now):
+        clean_only = self._clean_only(now)
+        self._artists.expire(now)
+        self._titles.expire(now)
+        rotation = self._next_rotation()
+        card = self._take(rotation, clean_only)
+        if card is None:
+            # Any other rotation before relaxing separation
+            for other in sorted(self._cards, key=self.rules.weights.get, reverse=True):
+                if other != rotation:
+                    card = self._take(other, clean_only)
+                    if card is not None:
+                        break
+        if card is not None:
+            return card, False
+        return self._take_soonest(clean_only), True
+
+    def _played(self, card, now):
+        self._artists.block(card.artist, now)
+        self._titles.block(card.title, now)
+
+    def replay(self, entries, day_start):
+        """
+        Apply separation and rotation for a log that was already generated,
+        typically the previous day's, whose entry starts are relative to
+        ``day_start`` on this scheduler's clock
+        """
+        by_id = {card.id: (rotation, card) for rotation, cards in self._cards.items() for card in cards}
+        for entry in entries:
+            start = day_start + entry['start']
+            if entry['type'] == 'station_id':
+                self._last_jingle = start
+                continue
+            rotation, card = by_id.get(entry['id'], (None, None))
+            if card is None:
+                continue
+            self._played(card, start)
+            cards = self._cards[rotation]
+            cards.remove(card)
+            cards.append(card)
+            self.clock = max(self.clock, start + entry['duration'])
+
+    def day(self, day_start):
+        """
+        Entries for the day starting at ``day_start``: dicts with ``start``
+        (seconds from the start of the day), ``type`` ('song' or
+        'station_id'), ``id``, ``title``, ``duration`` and, for songs,
+        ``artist``, ``rotation`` and ``relaxed``. A song running past
+        midnight stays in the day it starts in.
+        """
+        entries = []
+        day_end = day_start + DAY_SECONDS
+        self.clock = max(self.clock, day_start)
+        interval = self.rules.station_id_interval
+        while self.clock < day_end and self._cards:
+            now = self.clock
+            if self._jingles and interval and (self._last_jingle is None or now - self._last_jingle >= interval):
+                jingle = self._jingles[0]
+                self._jingles.rotate(-1)
+                entries.append({
+                    'start': now - day_start,
+                    'type': 'station_id',
+                    'id': jingle.id,
+                    'title': jingle.title,
+                    'duration': jingle.duration,
+                })
+                self._last_jingle = now
+                self.clock += jingle.duration
+                continue
+
+            card, relaxed = self._pick(now)
+            if card is None:
+                # Nothing is clean enough for this hour; leave the rest of it empty
+                self.clock = now - now % 3600 + 3600
+                continue
+            title, artist = self._names[card.id]
+            entries.append({
+                'start': now - day_start,
+                'type': 'song',
+                'id': card.id,
+                'title': title,
+                'artist': artist,
+                'duration': card.duration,
+                'rotation': card.rotation,
+                'relaxed': relaxed,
+            })
+            self._played(card, now)
+            self.clock += card.duration
+        return entries
+
+
+def generate_days(songs, jingles, rules, days, seed=None, history=None):
+    """
+    ``days`` consecutive days of log for one station, optionally continuing
+    from ``history``, the entries of the day before the first
+    """
+    scheduler = LogScheduler(songs, jingles, rules, seed)
+    if history:
+        scheduler.replay(history, -DAY_SECONDS)
+    return [scheduler.day(index * DAY_SECONDS) for index in range(days)]
@@ -0,0 +1,127 @@
+"""
+Ranked library search. On PostgreSQL an item matches when its
+search_vector (title, artist, genre; see migration 0014) matches the query
+or, for typos, when the query is trigram-similar to a word run of its
+title and artist. Both conditions are GIN-indexed. Relevance is blended
+with decayed popularity (SEARCH_POPULARITY_FIELD), and pages are fetched
+with a (score, id) keyset cursor rather than an offset.
+
+The score is computed per row, so every page still scores and sorts the
+whole match set before the cursor filters it; the cursor saves skipping
+rows, not ranking them, and a page costs about as much as the match set
+is large. Popularity also changes as play counts are flushed, so an item
+whose score moves across the cursor between requests can be repeated or
+skipped. Other databases fall back to icontains matching ordered by
+popularity.
+"""
+import base64
+import json
+import re
+import uuid
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import BooleanField, F, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast, Ln
+
+from radiocms.models.library import LibraryItem
+
+SEARCH_CONFIG = 'simple'
+# Must match the trigram index expression in migration 0014
+TRIGRAM_TEXT_SQL = "(title || ' ' || artist)"
+# Weight of trigram similarity (0-1) against ts_rank_cd in the relevance
+TRIGRAM_WEIGHT = 0.5
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(score, pk):
+    return base64.urlsafe_b64encode(json.dumps([score, str(pk)]).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        score, pk = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return float(score), uuid.UUID(pk)
+    except (ValueError, TypeError):
+        raise InvalidCursor('Invalid cursor')
+
+
+def prefix_tsquery(query):
+    """
+    Raw tsquery text matching every word of ``query``, the last one as a
+    prefix (``love & wi:*``), or None if it has no words
+    """
+    tokens = _TOKEN_RE.findall(query.lower())
+    if not tokens:
+        return None
+    return ' & '.join([*tokens[:-1], f'{tokens[-1]}:*'])
+
+
+def _postgres_matches(queryset, query, prefix):
+    if prefix:
+        raw = prefix_tsquery(query)
+        if raw is None:
+            return queryset.none()
+        tsquery = SearchQuery(raw, search_type='raw', config=SEARCH_CONFIG)
+    else:
+        tsquery = SearchQuery(query, search_type='websearch', config=SEARCH_CONFIG)
+
+    popularity = Cast(F(settings.SEARCH_POPULARITY_FIELD), FloatField())
+    popularity = 1 + settings.SEARCH_POPULARITY_WEIGHT * Ln(1 + popularity)
+    return (
+        queryset
+        .annotate(
+            typo_match=RawSQL(f'%s <%% {TRIGRAM_TEXT_SQL}', [query], output_field=BooleanField()),
+            relevance=(
+                SearchRank(F('search_vector'), tsquery, cover_density=True)
+                + TRIGRAM_WEIGHT * RawSQL(f'word_similarity(%s, {TRIGRAM_TEXT_SQL})', [query],
+                                          output_field=FloatField())
+            ),
+        )
+        .filter(Q(search_vector=tsquery) | Q(typo_match=True))
+        .annotate(score=F('relevance') * popularity)
+    )
+
+
+def _fallback_matches(queryset, query, prefix):
+    lookup = 'istartswith' if prefix else 'icontains'
+    fields = ('title', 'artist') if prefix else ('title', 'artist', 'genre')
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f'{field}__{lookup}': query})
+    return queryset.filter(condition).annotate(score=Cast(F(settings.SEARCH_POPULARITY_FIELD), FloatField()))
+
+
+def search_library(query, prefix=False, limit=20, cursor=None, queryset=None):
+    """
+    ``(items, next_cursor)``: up to ``limit`` LibraryItems matching
+    ``query``, best first, each annotated with ``score``. ``prefix`` treats
+    the last word as incomplete, for autocomplete. Pass the returned
+    cursor back to fetch the next page; it is None on the last page. Each
+    page ranks every match again (see the module docstring). Raises
+    InvalidCursor for a malformed cursor.
+    """
+    queryset = LibraryItem.objects.all() if queryset is None else queryset
+    query = query.strip()
+    if not query:
+        return [], None
+
+    if connection.vendor == 'postgresql':
+        matches = _postgres_matches(queryset, query, prefix)
+    else:
+        matches = _fallback_matches(queryset, query, prefix)
+
+    if cursor:
+        score, pk = decode_cursor(cursor)
+        matches = matches.filter(Q(score__lt=Value(score)) | Q(score=Value(score), id__lt=pk))
+
+    items = list(matches.order_by('-score', '-id')[:limit + 1])
+    next_cursor = encode_cursor(items[limit - 1].score, items[limit - 1].pk) if len(items) > limit else None
+    return items[:limit], next_cursor
@@ -0,0 +1,96 @@
+"""
+"Similar tracks" search over LibraryItem.embedding. On PostgreSQL the
+search is a pgvector cosine-distance ORDER BY served by the HNSW index;
+other databases (SQLite in development) get an exact brute-force NumPy
+scan ranked by the same distance.
+"""
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from pgvector.django import CosineDistance
+
+from radiocms.models.library import LibraryItem
+
+
+def filter_candidates(queryset, formats=None, categories=None, is_clean=None):
+    """
+    Restrict ``queryset`` to items in any of ``formats`` and any of
+    ``categories`` (ids), and to clean items when ``is_clean`` is set.
+    EXISTS keeps one row per item without a DISTINCT, which would stop
+    PostgreSQL from walking the index in distance order.
+    """
+    if formats:
+        through = LibraryItem.formats.through
+        queryset = queryset.filter(Exists(
+            through.objects.filter(libraryitem_id=OuterRef('pk'), format_id__in=formats)
+        ))
+    if categories:
+        through = LibraryItem.categories.through
+        queryset = queryset.filter(Exists(
+            through.objects.filter(libraryitem_id=OuterRef('pk'), category_id__in=categories)
+        ))
+    if is_clean is not None:
+        queryset = queryset.filter(is_clean=is_clean)
+    return queryset
+
+
+def cosine_distances(matrix, vector):
+    """
+    Cosine distance (1 - cosine similarity, as pgvector's ``<=>``) of each
+    row of ``matrix`` to ``vector``
+    """
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(vector)
+    return 1.0 - (matrix @ vector) / np.where(norms == 0, 1.0, norms)
+
+
+def top_k(distances, k):
+    """
+    Indices of the ``k`` smallest distances, nearest first
+    """
+    if k < len(distances):
+        nearest = np.argpartition(distances, k)[:k]
+    else:
+        nearest = np.arange(len(distances))
+    return nearest[np.argsort(distances[nearest], kind='stable')]
+
+
+def _search_postgres(queryset, embedding, k):
+    queryset = queryset.annotate(distance=CosineDistance('embedding', embedding)).order_by('distance')
+    with transaction.atomic(), connection.cursor() as cursor:
+        # The index only yields ef_search candidates, some of which the
+        # filters may drop
+        cursor.execute('SET LOCAL hnsw.ef_search = %s', [max(settings.SIMILARITY_EF_SEARCH, k)])
+        return [(item, float(item.distance)) for item in queryset[:k]]
+
+
+def _search_brute_force(queryset, embedding, k):
+    rows = list(queryset.values_list('id', 'embedding'))
+    if not rows:
+        return []
+    ids = [pk for pk, _ in rows]
+    distances = cosine_distances(np.array([vector for _, vector in rows], dtype=np.float32),
+                                 np.asarray(embedding, dtype=np.float32))
+    nearest = top_k(distances, k)
+    items = queryset.in_bulk([ids[index] for index in nearest])
+    return [(items[ids[index]], float(distances[index])) for index in nearest]
+
+
+def similar_items(item, k=10, formats=None, categories=None, is_clean=None):
+    """
+    ``[(library_item, cosine_distance), ...]`` of the ``k`` items that sound
+    most like ``item``, nearest first. Returns an empty list when ``item``
+    has no embedding yet.
+    """
+    if item.embedding is None:
+        return []
+    candidates = (
+        LibraryItem.objects
+        .filter(embedding__isnull=False)
+        .exclude(pk=item.pk)
+        .prefetch_related('formats', 'categories')
+    )
+    queryset = filter_candidates(candidates, formats, categories, is_clean)
+    if connection.vendor == 'postgresql':
+        return _search_postgres(queryset, item.embedding, k)
+    return _search_brute_force(queryset, item.embedding, k)
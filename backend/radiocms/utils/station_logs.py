@@ -0,0 +1,138 @@
+"""
+Daily play logs per station from its playlists, generated by
+radiocms.utils.scheduling.engine and stored as StationLog rows. A station's
+songs and jingles are loaded once for all the days being generated, and
+each new day continues from the stored log of the day before, so
+separation holds across midnight.
+"""
+import logging
+from concurrent.futures import as_completed
+from datetime import timedelta
+
+from django.conf import settings
+
+from radiocms.apps.airadio.models.stationid import StationID
+from radiocms.models.playlistitem import PlaylistItem
+from radiocms.models.schedule import StationLog
+
+from .analysis import get_analysis_pool
+from .scheduling.engine import Jingle, Rules, Song, generate_days
+
+logger = logging.getLogger(__name__)
+
+
+def parse_weights(text):
+    """
+    'high:6,medium:3,low:1' -> {'high': 6.0, 'medium': 3.0, 'low': 1.0}
+    """
+    weights = {}
+    for part in filter(None, (part.strip() for part in text.split(','))):
+        rotation, _, weight = part.partition(':')
+        weights[rotation.strip()] = float(weight)
+    return weights
+
+
+def parse_hours(text):
+    """
+    '6-22' -> (6, 22); empty -> None
+    """
+    if not text:
+        return None
+    start, _, end = text.partition('-')
+    return int(start), int(end)
+
+
+def schedule_rules(**overrides):
+    rules = Rules(
+        weights=parse_weights(settings.SCHEDULE_ROTATION_WEIGHTS),
+        artist_separation=settings.SCHEDULE_ARTIST_SEPARATION_MINUTES * 60,
+        title_separation=settings.SCHEDULE_TITLE_SEPARATION_MINUTES * 60,
+        station_id_interval=settings.SCHEDULE_STATION_ID_INTERVAL_MINUTES * 60,
+        clean_hours=parse_hours(settings.SCHEDULE_CLEAN_HOURS),
+        default_duration=settings.SCHEDULE_DEFAULT_SONG_SECONDS,
+    )
+    return rules._replace(**overrides)
+
+
+def station_catalogues(station_ids):
+    """
+    {station id: (songs, jingles)} in two queries. A song on several of a
+    station's playlists is scheduled once, in the rotation of its first
+    playlist item.
+    """
+    catalogues = {station_id: ([], []) for station_id in station_ids}
+    seen = set()
+    rows = (PlaylistItem.objects
+            .filter(playlist__station_id__in=station_ids)
+            .order_by('playlist__station_id', 'playlist__created_at', 'position')
+            .values_list('playlist__station_id', 'library_item_id', 'library_item__title', 'library_item__artist',
+                         'library_item__duration', 'rotation', 'library_item__is_clean'))
+    for station_id, item_id, title, artist, duration, rotation, clean in rows.iterator(chunk_size=5000):
+        if (station_id, item_id) in seen:
+            continue
+        seen.add((station_id, item_id))
+        catalogues[station_id][0].append(Song(str(item_id), title, artist, duration, rotation, clean))
+
+    jingles = StationID.objects.filter(station_id__in=station_ids).order_by('title')
+    for station_id, jingle_id, title in jingles.values_list('station_id', 'id', 'title'):
+        catalogues[station_id][1].append(Jingle(str(jingle_id), title, settings.SCHEDULE_STATION_ID_SECONDS))
+    return catalogues
+
+
+def _log(station_id, date, entries):
+    songs = [entry for entry in entries if entry['type'] == 'song']
+    return StationLog(
+        station_id=station_id,
+        date=date,
+        entries=entries,
+        song_count=len(songs),
+        relaxed_count=sum(entry['relaxed'] for entry in songs),
+    )
+
+
+def generate_logs(station_ids, start_date, days=1, rules=None, pool=None):
+    """
+    Generate and store ``days`` days of log from ``start_date`` for each
+    of ``station_ids``. A single station is generated inline; more go
+    across the process pool, one task per station. Returns
+    ``(generated, failed)`` counts of station days.
+    """
+    rules = rules or schedule_rules()
+    catalogues = station_catalogues(station_ids)
+    history = dict(StationLog.objects
+                   .filter(station_id__in=station_ids, date=start_date - timedelta(days=1))
+                   .values_list('station_id', 'entries'))
+
+    def job(station_id):
+        songs, jingles = catalogues[station_id]
+        seed = f"{station_id}:{start_date.isoformat()}"
+        return songs, jingles, rules, days, seed, history.get(station_id)
+
+    results = {}
+    failed = 0
+    if len(station_ids) == 1 and pool is None:
+        results[station_ids[0]] = generate_days(*job(station_ids[0]))
+    else:
+        pool = pool or get_analysis_pool()
+        futures = {pool.submit(generate_days, *job(station_id)): station_id for station_id in station_ids}
+        for future in as_completed(futures):
+            station_id = futures[future]
+            try:
+                results[station_id] = future.result()
+            except Exception as e:
+                logger.error(f"Log generation failed for station {station_id}: {str(e)}")
+                failed += days
+
+    logs = [
+        _log(station_id, start_date + timedelta(days=index), entries)
+        for station_id, station_days in results.items()
+        for index, entries in enumerate(station_days)
+    ]
+    StationLog.objects.bulk_create(
+        logs,
+        update_conflicts=True,
+        unique_fields=['station', 'date'],
+        update_fields=['entries', 'song_count', 'relaxed_count', 'generated_at'],
+        batch_size=100,
+    )
+    return len(logs), failed
@@ -1,112 +1,149 @@
-import boto3
 from django.conf import settings
+import base64
+import hashlib
+import math
+import re
 import uuid
 import logging
-from django.core.files.base import File
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from botocore.exceptions import ClientError
-import io
+from django.db.models import Q
+
+from radiocms.models.library import LibraryItem
+from .backends import get_storage_backend
 
 logger = logging.getLogger(__name__)
 
-def upload_to_s3(file, folder):
+HASH_CHUNK_SIZE = 1024 * 1024
+CONTENT_ADDRESSED_KEY_RE = re.compile(r'^[^/]+/[0-9a-f]{2}/[0-9a-f]{64}\.[^/.]+$')
+SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+# S3 allows at most 10,000 parts per multipart upload
+MAX_MULTIPART_PARTS = 10000
+
+_upload_executor = None
+_upload_executor_lock = threading.Lock()
+
+
+def get_upload_executor():
+    """
+    Shared, bounded pool used to fan out the uploads of a single request.
+    """
+    global _upload_executor
+    if _upload_executor is None:
+        with _upload_executor_lock:
+            if _upload_executor is None:
+                _upload_executor = ThreadPoolExecutor(
+                    max_workers=settings.MEDIA_UPLOAD_WORKERS,
+                    thread_name_prefix='media-upload'
+                )
+    return _upload_executor
+
+
+def get_public_url(key):
+    """
+    Public URL of an object in media storage
+    """
+    return get_storage_backend().url(key)
+
+
+def key_from_url(url):
     """
-    Upload a file to S3 and return its URL
+    Object key of a URL returned by upload_file, or None for foreign URLs
+    """
+    return get_storage_backend().key_from_url(url)
+
+
+def hash_file(file):
+    """
+    SHA-256 hex digest of an uploaded file, read in chunks
+    """
+    digest = hashlib.sha256()
+    if hasattr(file, 'chunks'):
+        for chunk in file.chunks(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    else:
+        file.seek(0)
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def content_addressed_key(folder, digest, ext):
+    """
+    Object key derived from the content hash, e.g. audio/ab/ab12...ef.wav
+    """
+    return f"{folder}/{digest[:2]}/{digest}.{ext}"
+
+
+def is_content_addressed_url(url):
+    key = key_from_url(url)
+    return bool(key and CONTENT_ADDRESSED_KEY_RE.match(key))
+
+
+def object_exists(key):
+    return get_storage_backend().exists(key)
+
+
+def upload_file(file, folder):
+    """
+    Upload a file to media storage and return its URL
+    """
+    return store_file(file, folder)[0]
+
+
+def store_file(file, folder):
+    """
+    Upload a file to media storage and return ``(url, created)``.
+
+    With MEDIA_CONTENT_ADDRESSED the key is derived from the file's SHA-256,
+    and ``created`` is False when an identical object was already stored and
+    the transfer was skipped. Returns ``(None, False)`` on failure.
     """
     if not file:
         logger.warning(f"No file provided for {folder} upload")
-        return None
+        return None, False
 
+    backend = get_storage_backend()
     try:
-        # Log AWS settings (without sensitive info)
-        logger.info(f"AWS Settings: Region={settings.AWS_S3_REGION_NAME}, Bucket={settings.AWS_STORAGE_BUCKET_NAME}")
-        logger.info(f"AWS Credentials present: Access Key={'Yes' if settings.AWS_ACCESS_KEY_ID else 'No'}, Secret Key={'Yes' if settings.AWS_SECRET_ACCESS_KEY else 'No'}")
-
-        # Initialize S3 client
-        s3 = boto3.client('s3',
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name=settings.AWS_S3_REGION_NAME
-        )
-        
-        # Test S3 connection and bucket permissions
-        try:
-            s3.head_bucket(Bucket=settings.AWS_STORAGE_BUCKET_NAME)
-            logger.info("Successfully connected to S3 bucket")
-            
-            # Test bucket permissions by trying to list objects
-            s3.list_objects_v2(Bucket=settings.AWS_STORAGE_BUCKET_NAME, MaxKeys=1)
-            logger.info("Successfully verified bucket permissions")
-        except ClientError as e:
-            error_code = e.response.get('Error', {}).get('Code', '')
-            if error_code == '403':
-                logger.error("Permission denied accessing bucket")
-            elif error_code == '404':
-                logger.error("Bucket not found")
-            else:
-                logger.error(f"Failed to connect to S3 bucket: {str(e)}")
-            return None
-        
-        # Generate unique filename
+        # S3 bucket reachability is verified at startup and re-checked on a TTL
+        if not backend.check():
+            return None, False
+
         ext = file.name.split('.')[-1].lower()
-        filename = f"{folder}/{uuid.uuid4()}.{ext}"
-        
-        logger.info(f"Uploading {file.name} to S3 as {filename}")
-        logger.info(f"File type: {type(file)}")
+        if settings.MEDIA_CONTENT_ADDRESSED:
+            # Hash the local copy first so identical content is never re-sent
+            filename = content_addressed_key(folder, hash_file(file), ext)
+            if backend.exists(filename):
+                logger.info(f"{file.name} is already stored as {filename}, skipping upload")
+                return backend.url(filename), False
+        else:
+            # Generate unique filename
+            filename = f"{folder}/{uuid.uuid4()}.{ext}"
+
+        logger.info(f"Uploading {file.name} as {filename}")
         logger.info(f"File content type: {getattr(file, 'content_type', 'unknown')}")
         logger.info(f"File size: {file.size if hasattr(file, 'size') else 'unknown'} bytes")
-        
-        try:
-            # Try to read the file content
-            if hasattr(file, 'temporary_file_path'):
-                # For TemporaryUploadedFile
-                logger.info("Using TemporaryUploadedFile path")
-                with open(file.temporary_file_path(), 'rb') as f:
-                    file_content = f.read()
-            elif hasattr(file, 'read'):
-                # For InMemoryUploadedFile
-                logger.info("Using InMemoryUploadedFile read")
-                file_content = file.read()
-                file.seek(0)
-            else:
-                logger.error(f"Unsupported file type: {type(file)}")
-                return None
-
-            # Create a BytesIO object
-            file_obj = io.BytesIO(file_content)
-            
-            # Upload to S3
-            logger.info(f"Starting S3 upload for {filename}")
-            try:
-                s3.upload_fileobj(
-                    file_obj,
-                    settings.AWS_STORAGE_BUCKET_NAME,
-                    filename,
-                    ExtraArgs={
-                        'ContentType': getattr(file, 'content_type', 'application/octet-stream')
-                    }
-                )
-                logger.info("S3 upload completed successfully")
-            except ClientError as e:
-                error_code = e.response.get('Error', {}).get('Code', '')
-                logger.error(f"S3 upload failed with error code {error_code}: {str(e)}")
-                return None
-            
-            # Generate and return the URL
-            url = f"https://{settings.AWS_STORAGE_BUCKET_NAME}.s3.{settings.AWS_S3_REGION_NAME}.amazonaws.com/{filename}"
-            logger.info(f"File uploaded successfully. URL: {url}")
-            
-            # Verify the uploaded file is accessible
-            try:
-                s3.head_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=filename)
-                logger.info("Successfully verified uploaded file")
-                return url
-            except ClientError as e:
-                logger.error(f"Failed to verify uploaded file: {str(e)}")
-                return None
-
-        except Exception as e:
-            logger.error(f"Error reading file content: {str(e)}", exc_info=True)
-            return None
+
+        content_type = getattr(file, 'content_type', None) or 'application/octet-stream'
+
+        # Stream to storage without reading the whole file into memory
+        if hasattr(file, 'temporary_file_path'):
+            # For TemporaryUploadedFile, let the backend read the temp file directly
+            backend.put(filename, file.temporary_file_path(), content_type)
+        elif hasattr(file, 'read'):
+            # For InMemoryUploadedFile and other file-like objects
+            file.seek(0)
+            backend.put(filename, file, content_type)
+            file.seek(0)
+        else:
+            logger.error(f"Unsupported file type: {type(file)}")
+            return None, False
+
+        url = backend.url(filename)
+        logger.info(f"File uploaded successfully. URL: {url}")
+        return url, True
 
     except ClientError as e:
         error_code = e.response.get('Error', {}).get('Code', '')
@@ -119,7 +156,214 @@ def upload_to_s3(file, folder):
             logger.error("Invalid AWS secret key")
         elif error_code == 'AccessDenied':
             logger.error("Access denied to S3 bucket")
+        return None, False
+    except Exception as e:
+        logger.error(f"Error uploading file: {str(e)}", exc_info=True)
+        return None, False
+
+
+def delete_media(url):
+    """
+    Delete an object previously uploaded with upload_file
+    """
+    key = key_from_url(url)
+    if not key:
+        logger.warning(f"Not deleting {url}: not an object in media storage")
+        return False
+    try:
+        get_storage_backend().delete(key)
+        logger.info(f"Deleted {key} from media storage")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to delete {key} from media storage: {str(e)}")
+        return False
+
+
+def upload_assets(assets):
+    """
+    Upload several files in parallel through the shared upload pool.
+
+    ``assets`` maps a name to ``(file, folder, required)``. Returns
+    ``(urls, created)``: a dict of name -> URL, with '' for optional assets
+    that were not provided or failed to upload, and the URLs of the objects
+    this call created (not content that was already stored), for
+    discard_uploads. If any required upload fails, the created objects are
+    discarded again and ``(None, [])`` is returned.
+    """
+    executor = get_upload_executor()
+    futures = {
+        name: executor.submit(store_file, file, folder)
+        for name, (file, folder, required) in assets.items()
+        if file
+    }
+
+    urls = {}
+    created = []
+    missing = []
+    for name, (file, folder, required) in assets.items():
+        url, was_created = futures[name].result() if name in futures else (None, False)
+        if url:
+            urls[name] = url
+            if was_created:
+                created.append(url)
+        elif required:
+            logger.error(f"Required {name} upload failed")
+            missing.append(name)
+        else:
+            if file:
+                logger.warning(f"Optional {name} upload failed")
+            urls[name] = ''
+
+    if missing:
+        discard_uploads(created)
+        return None, []
+    return urls, created
+
+
+def is_referenced(url):
+    """
+    Whether a library item uses the object at ``url``
+    """
+    return LibraryItem.objects.filter(
+        Q(audio_file=url) | Q(source_audio_file=url) | Q(cover_art=url) | Q(lyrics_file=url) | Q(peaks_file=url)
+    ).exists()
+
+
+def discard_uploads(urls):
+    """
+    Delete objects uploaded for a request that could not be completed.
+    ``urls`` must be objects the request created, never content it found
+    already stored. A content-addressed object is still kept if a library
+    item uses it, as another request may have found it in storage meanwhile.
+    """
+    for url in urls:
+        if not url:
+            continue
+        if is_content_addressed_url(url) and is_referenced(url):
+            logger.info(f"Keeping {url}: another library item uses it")
+            continue
+        delete_media(url)
+
+
+def sha256_to_checksum(digest):
+    """
+    Hex SHA-256 digest -> base64 form used by S3's x-amz-checksum-sha256
+    """
+    return base64.b64encode(bytes.fromhex(digest)).decode()
+
+
+def new_object_key(folder, name, sha256=None):
+    """
+    Key for a new object: content-addressed when the hash is known up front
+    and MEDIA_CONTENT_ADDRESSED is on, otherwise a random uuid
+    """
+    ext = name.split('.')[-1].lower()
+    if settings.MEDIA_CONTENT_ADDRESSED and sha256:
+        return content_addressed_key(folder, sha256, ext)
+    return f"{folder}/{uuid.uuid4()}.{ext}"
+
+
+def presign_upload(folder, name, size, content_type, sha256=None):
+    """
+    Reserve a key for a direct upload and return what the client needs to
+    send the bytes itself: a presigned PUT for small files, or a multipart
+    upload with one presigned URL per part. With content addressing,
+    ``exists`` is True when the content is already stored and nothing needs
+    to be uploaded. Only single PUTs get content-addressed keys, since S3
+    checks their SHA-256 on upload; multipart uploads cannot be checked
+    that way and get a uuid key. Returns None if the storage backend does
+    not accept direct uploads.
+    """
+    backend = get_storage_backend()
+    if not backend.supports_presigned_uploads:
         return None
+    content_type = content_type or 'application/octet-stream'
+
+    expiry = settings.AWS_S3_PRESIGNED_EXPIRY
+    if size <= settings.AWS_S3_MULTIPART_THRESHOLD:
+        key = new_object_key(folder, name, sha256)
+        if is_content_addressed_url(backend.url(key)) and backend.exists(key):
+            return {'key': key, 'exists': True}
+        checksum = sha256_to_checksum(sha256) if sha256 else None
+        url, headers = backend.presign_put(key, content_type, checksum, expiry)
+        return {
+            'key': key,
+            'exists': False,
+            'method': 'PUT',
+            'url': url,
+            'headers': headers,
+        }
+
+    key = new_object_key(folder, name)
+    part_size = max(settings.AWS_S3_MULTIPART_CHUNKSIZE, math.ceil(size / MAX_MULTIPART_PARTS))
+    upload_id = backend.start_multipart(key, content_type)
+    return {
+        'key': key,
+        'exists': False,
+        'method': 'MULTIPART',
+        'upload_id': upload_id,
+        'part_size': part_size,
+        'parts': [
+            {'part_number': part_number, 'url': backend.presign_part(key, upload_id, part_number, expiry)}
+            for part_number in range(1, math.ceil(size / part_size) + 1)
+        ],
+    }
+
+
+def start_multipart_upload(key, content_type=None):
+    """
+    Start a server-driven multipart upload and return its upload id
+    """
+    return get_storage_backend().start_multipart(key, content_type)
+
+
+def upload_part(key, upload_id, part_number, body):
+    """
+    Upload one part of a multipart upload and return its ETag
+    """
+    return get_storage_backend().upload_part(key, upload_id, part_number, body)
+
+
+def complete_multipart_upload(key, upload_id, parts):
+    """
+    Complete a multipart upload from its ``part_number``/``etag`` list
+    """
+    get_storage_backend().complete_multipart(key, upload_id, parts)
+
+
+def abort_multipart_upload(key, upload_id):
+    try:
+        get_storage_backend().abort_multipart(key, upload_id)
+    except Exception as e:
+        logger.error(f"Failed to abort multipart upload {upload_id} for {key}: {str(e)}")
+
+
+def verify_object(key, size, sha256=None):
+    """
+    Check a directly uploaded object against the size and SHA-256 the client
+    declared. Returns an error message, or None if the object matches.
+
+    Single-part S3 uploads carry a full-object checksum that S3 verified on
+    upload. Multipart objects only have a composite checksum, so only their
+    size is checked. A new content-addressed object is only accepted once
+    its stored checksum matches, since the key is derived from the declared
+    hash.
+    """
+    try:
+        stat = get_storage_backend().stat(key)
     except Exception as e:
-        logger.error(f"Error uploading file to S3: {str(e)}", exc_info=True)
-        return None 
\ No newline at end of file
+        logger.error(f"Failed to verify {key}: {str(e)}")
+        stat = None
+    if stat is None:
+        return 'Uploaded object not found'
+
+    if stat.size != int(size):
+        return f"Size mismatch: expected {size} bytes, stored {stat.size}"
+
+    checksum = stat.checksum_sha256
+    full_checksum = checksum if checksum and '-' not in checksum else None
+    if sha256 and full_checksum and full_checksum != sha256_to_checksum(sha256):
+        return 'Checksum mismatch'
+    if sha256 and not full_checksum and is_content_addressed_url(get_storage_backend().url(key)):
+        return 'Content-addressed object has no verified checksum'
+    return None
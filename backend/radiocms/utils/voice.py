@@ -0,0 +1,104 @@
+"""
+Voice tracks and StationID jingles rendered through the mic processing
+chain (radiocms.utils.processing.dsp) so they sound like the live mic.
+The render replaces the object's audio URL; the upload it came from is
+kept in its source field, and re-processing always starts from there.
+"""
+import logging
+import mimetypes
+import os
+import posixpath
+import tempfile
+from concurrent.futures import as_completed
+from pathlib import Path
+
+from django.conf import settings
+
+from radiocms.apps.airadio.models.stationid import StationID
+from radiocms.models.library import LibraryItem
+
+from .analysis import get_analysis_pool, media_source
+from .backends import get_storage_backend
+from .processing import sts
+from .processing.dsp import render_file
+
+logger = logging.getLogger(__name__)
+
+# Container for renders of sources whose extension ffmpeg cannot write
+DEFAULT_EXTENSION = '.flac'
+RENDER_EXTENSIONS = ('.mp3', '.wav', '.flac', '.ogg', '.opus', '.m4a', '.aac')
+
+
+def default_preset_data():
+    return Path(settings.MIC_PROCESSING_PRESET).read_bytes()
+
+
+def render_key(source_url, pk, digest):
+    """
+    Storage key of a render: under processed/<preset digest>/, named after
+    the source object when it is in media storage
+    """
+    source_key = get_storage_backend().key_from_url(source_url)
+    name = source_key or f"{pk}{posixpath.splitext(source_url.split('?')[0])[1]}"
+    stem, extension = posixpath.splitext(name)
+    if extension.lower() not in RENDER_EXTENSIONS:
+        extension = DEFAULT_EXTENSION
+    return f"processed/{digest[:16]}/{stem}{extension}"
+
+
+def _render_objects(objects, url_field, source_field, preset_data, pool):
+    pool = pool or get_analysis_pool()
+    backend = get_storage_backend()
+    digest = sts.file_digest(preset_data)
+
+    futures = {}
+    for obj in objects:
+        source_url = getattr(obj, source_field) or getattr(obj, url_field)
+        key = render_key(source_url, obj.pk, digest)
+        handle, path = tempfile.mkstemp(suffix=posixpath.splitext(key)[1])
+        os.close(handle)
+        future = pool.submit(render_file, media_source(source_url), path, preset_data)
+        futures[future] = (obj, source_url, key, path)
+
+    rendered = []
+    failed = 0
+    for future in as_completed(futures):
+        obj, source_url, key, path = futures[future]
+        try:
+            _, skipped = future.result()
+            if skipped:
+                logger.warning(f"Processing {obj.pk}: stages not rendered: {', '.join(skipped)}")
+            backend.put(key, path, mimetypes.guess_type(key)[0] or 'application/octet-stream')
+        except Exception as e:
+            logger.error(f"Mic processing failed for {obj.pk} ({source_url}): {str(e)}")
+            failed += 1
+            continue
+        finally:
+            os.unlink(path)
+        setattr(obj, source_field, source_url)
+        setattr(obj, url_field, backend.url(key))
+        rendered.append(obj)
+    return rendered, failed
+
+
+def process_voice_items(items, preset_data=None, pool=None):
+    """
+    Render LibraryItem voice tracks through the mic chain of the .sts bytes
+    ``preset_data`` (default: MIC_PROCESSING_PRESET) across the process
+    pool and point them at the renders. Returns ``(processed, failed)``
+    counts; processed items should be re-analyzed.
+    """
+    rendered, failed = _render_objects(items, 'audio_file', 'source_audio_file',
+                                       preset_data or default_preset_data(), pool)
+    LibraryItem.objects.bulk_update(rendered, ['audio_file', 'source_audio_file'], batch_size=500)
+    return len(rendered), failed
+
+
+def process_station_ids(station_ids, preset_data=None, pool=None):
+    """
+    process_voice_items for StationID jingles
+    """
+    rendered, failed = _render_objects(station_ids, 'media_url', 'source_media_url',
+                                       preset_data or default_preset_data(), pool)
+    StationID.objects.bulk_update(rendered, ['media_url', 'source_media_url'], batch_size=500)
+    return len(rendered), failed
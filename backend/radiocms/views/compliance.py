@@ -0,0 +1,89 @@
+import uuid
+
+from django.conf import settings
+from django.db.models import Avg, Count, Exists, Max, OuterRef, Q
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes, authentication_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework.response import Response
+
+from ..models.library import LibraryItem
+from ..models.mpx import MpxScan
+from ..models.playlistitem import PlaylistItem
+
+REPORT_MAX_RESULTS = 500
+
+
+def _rounded(value):
+    return round(value, 2) if value is not None else None
+
+
+@api_view(['GET'])
+@authentication_classes([JWTAuthentication])
+@permission_classes([IsAuthenticated])
+def bs412_report(request):
+    """
+    BS.412 MPX power report, loudest first:
+    ?station=<id>&playlist=<id>&over_limit=true&limit=<count>. station and
+    playlist restrict it to tracks on that station's (or that) playlist.
+    The summary counts tracks in scope that have not been scanned yet.
+    """
+    params = request.query_params
+    try:
+        limit = int(params.get('limit', 100))
+        station = int(params['station']) if params.get('station') else None
+        playlist = uuid.UUID(params['playlist']) if params.get('playlist') else None
+    except ValueError:
+        return Response({'message': 'station and limit must be integers, playlist an id'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    if not 1 <= limit <= REPORT_MAX_RESULTS:
+        return Response({'message': f'limit must be between 1 and {REPORT_MAX_RESULTS}'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    on_playlist = PlaylistItem.objects.filter(library_item_id=OuterRef('pk'))
+    if station is not None:
+        on_playlist = on_playlist.filter(playlist__station_id=station)
+    if playlist is not None:
+        on_playlist = on_playlist.filter(playlist_id=playlist)
+    items = LibraryItem.objects.all()
+    if station is not None or playlist is not None:
+        items = items.filter(Exists(on_playlist))
+
+    scans = MpxScan.objects.filter(library_item__in=items.values('pk'))
+    summary = scans.aggregate(
+        scanned=Count('pk'),
+        over_limit=Count('pk', filter=Q(compliant=False)),
+        mpx_power_max_dbr=Max('mpx_power_max_dbr'),
+        mpx_power_mean_dbr=Avg('mpx_power_mean_dbr'),
+    )
+    tracks = items.count()
+    if params.get('over_limit', '').lower() == 'true':
+        scans = scans.filter(compliant=False)
+    scans = scans.select_related('library_item').order_by('-mpx_power_max_dbr', 'library_item_id')[:limit]
+
+    return Response({
+        'limit_dbr': settings.BS412_LIMIT_DBR,
+        'tracks': tracks,
+        'scanned': summary['scanned'],
+        'unscanned': tracks - summary['scanned'],
+        'over_limit': summary['over_limit'],
+        'mpx_power_max_dbr': _rounded(summary['mpx_power_max_dbr']),
+        'mpx_power_mean_dbr': _rounded(summary['mpx_power_mean_dbr']),
+        'results': [
+            {
+                'id': str(scan.library_item_id),
+                'title': scan.library_item.title,
+                'artist': scan.library_item.artist,
+                'mpx_power_max_dbr': _rounded(scan.mpx_power_max_dbr),
+                'mpx_power_mean_dbr': _rounded(scan.mpx_power_mean_dbr),
+                'seconds_over_limit': _rounded(scan.seconds_over_limit),
+                'compliant': scan.compliant,
+                'loudness_lufs': _rounded(scan.loudness_lufs),
+                'momentary_max_lufs': _rounded(scan.momentary_max_lufs),
+                'short_term_max_lufs': _rounded(scan.short_term_max_lufs),
+                'scanned_at': scan.scanned_at,
+            }
+            for scan in scans
+        ],
+    })
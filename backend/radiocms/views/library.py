@@ -3,8 +3,17 @@ from rest_framework.decorators import api_view, permission_classes, authenticati
 from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.response import Response
-from ..utils.storage import upload_to_s3
-import json
+from django.conf import settings
+from django.db import transaction
+from django.urls import reverse
+from ..models.upload import DirectUpload, UploadSession
+from ..utils.ingest import enqueue_import, enqueue_library_item, get_ingest_queue
+from ..utils.library import ASSET_FOLDERS, create_item_from_urls, library_item_fields
+from ..utils.playlists import append_position, lock_playlist
+from ..utils.storage import (
+    SHA256_RE, abort_multipart_upload, complete_multipart_upload, discard_uploads, get_public_url,
+    presign_upload, upload_assets, verify_object,
+)
 import logging
 from radiocms.apps.airadio.api.serializers import libraryitemSerializer
 
@@ -47,48 +56,44 @@ def create_library_item(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Upload files to S3
+        if settings.LIBRARY_INGEST_ASYNC:
+            # Stage the files and let the ingest workers do the S3 work
+            job_id = enqueue_library_item(
+                library_item_fields(request.POST),
+                {'audio': audio_file, 'cover_art': cover_art, 'lyrics': lyrics_file},
+                request.user
+            )
+            logger.info(f"Queued ingest job {job_id}")
+            return Response({
+                'message': 'Upload accepted',
+                'job_id': job_id,
+                'status_url': request.build_absolute_uri(reverse('ingest_job_status', args=[job_id])),
+            }, status=status.HTTP_202_ACCEPTED)
+
+        # Upload files to S3 in parallel
         try:
-            logger.info("Attempting to upload audio file to S3...")
-            audio_url = upload_to_s3(audio_file, 'audio')
-            if not audio_url:
+            logger.info("Uploading audio, cover art and lyrics to S3...")
+            urls, created = upload_assets({
+                'audio': (audio_file, ASSET_FOLDERS['audio'], True),
+                'cover_art': (cover_art, ASSET_FOLDERS['cover_art'], False),
+                'lyrics': (lyrics_file, ASSET_FOLDERS['lyrics'], False),
+            })
+            if not urls:
                 logger.error("Failed to get URL from audio file upload")
                 return Response(
                     {'message': 'Failed to upload audio file'},
                     status=status.HTTP_500_INTERNAL_SERVER_ERROR
                 )
-            logger.info(f"Audio file uploaded successfully: {audio_url}")
-
-            # Handle optional files
-            cover_art_url = ''
-            if cover_art:
-                logger.info("Attempting to upload cover art...")
-                cover_art_url = upload_to_s3(cover_art, 'images') or ''
-                logger.info(f"Cover art uploaded: {cover_art_url}")
-
-            lyrics_url = ''
-            if lyrics_file:
-                logger.info("Attempting to upload lyrics file...")
-                lyrics_url = upload_to_s3(lyrics_file, 'lyrics') or ''
-                logger.info(f"Lyrics file uploaded: {lyrics_url}")
+            logger.info(f"Files uploaded successfully: {urls}")
 
             # Create library item
             logger.info("Creating library item...")
-            item = LibraryItem.objects.create(
-                title=request.POST.get('title', ''),
-                artist=request.POST.get('artist', ''),
-                genre=request.POST.get('genre', ''),
-                rotation=request.POST.get('rotation', 'medium'),
-                audio_file=audio_url,
-                cover_art=cover_art_url,
-                lyrics_file=lyrics_url,
-                intro_point=float(json.loads(request.POST.get('markers', '{}')).get('in', 0)),
-                vocal_point=float(json.loads(request.POST.get('markers', '{}')).get('vox', 0)),
-                aux_point=float(json.loads(request.POST.get('markers', '{}')).get('aux', 0)),
-                allow_skip=request.POST.get('allow_skip', 'false').lower() == 'true',
-                is_clean=request.POST.get('is_clean', 'false').lower() == 'true',
-                created_by=request.user
-            )
+            try:
+                item = create_item_from_urls(library_item_fields(request.POST), urls, request.user)
+            except Exception:
+                # Don't leave orphaned objects in the bucket
+                discard_uploads(created)
+                raise
 
             # Handle formats
             # formats = json.loads(request.POST.get('formats', '[]'))
@@ -116,6 +121,193 @@ def create_library_item(request):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+@api_view(['POST'])
+@authentication_classes([JWTAuthentication])
+@permission_classes([IsAuthenticated])
+def request_upload_urls(request):
+    """
+    Phase one of a direct upload: returns presigned PUT or multipart URLs so
+    the client can send the media straight to the bucket.
+
+    Body: {"files": {"audio": {"name", "size", "content_type", "sha256"},
+    "cover_art": {...}, "lyrics": {...}}}
+    """
+    files = request.data.get('files') or {}
+    if 'audio' not in files:
+        return Response({'message': 'Audio file is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    uploads = {}
+    try:
+        for name, spec in files.items():
+            if name not in ASSET_FOLDERS:
+                return Response({'message': f'Unknown asset: {name}'}, status=status.HTTP_400_BAD_REQUEST)
+            sha256 = (spec.get('sha256') or '').lower() or None
+            if sha256 and not SHA256_RE.match(sha256):
+                return Response({'message': f'Invalid sha256 for {name}'}, status=status.HTTP_400_BAD_REQUEST)
+            if not spec.get('name') or int(spec.get('size', 0)) <= 0:
+                return Response({'message': f'name and size are required for {name}'},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            uploads[name] = presign_upload(
+                ASSET_FOLDERS[name], spec['name'], int(spec['size']), spec.get('content_type'), sha256
+            )
+            if uploads[name] is None:
+                return Response({'message': 'Media storage does not accept direct uploads; '
+                                            'use resumable uploads instead'},
+                                status=status.HTTP_501_NOT_IMPLEMENTED)
+            # finalize_library_item only accepts keys issued here, to this user
+            DirectUpload.objects.create(
+                asset=name,
+                key=uploads[name]['key'],
+                size=int(spec['size']),
+                sha256=sha256 or '',
+                s3_upload_id=uploads[name].get('upload_id', ''),
+                existing=uploads[name]['exists'],
+                created_by=request.user,
+            )
+    except Exception as e:
+        logger.error(f"Error in request_upload_urls: {str(e)}", exc_info=True)
+        return Response({'message': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    return Response({'uploads': uploads}, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@authentication_classes([JWTAuthentication])
+@permission_classes([IsAuthenticated])
+def finalize_library_item(request):
+    """
+    Phase two of a direct upload: completes multipart uploads, verifies the
+    stored objects against the declared size and checksum and creates the
+    LibraryItem. Takes the same item fields as create_library_item, plus
+    "uploads": {"audio": {"key", "parts"}, ...}, where the key is one
+    request_upload_urls issued to this user, or an asset may instead be
+    {"session": "<id>"} for a resumable upload. Size, checksum and upload id
+    are the ones recorded when the upload was issued. On failure only the
+    objects uploaded for this request are deleted. No media bytes pass
+    through the worker.
+    """
+    uploads = request.data.get('uploads') or {}
+    if 'audio' not in uploads:
+        return Response({'message': 'Audio file is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        fields = library_item_fields(request.data)
+
+        # Resolve every asset to an upload issued to this user before touching storage
+        records = {}
+        for name, upload in uploads.items():
+            if name not in ASSET_FOLDERS or not isinstance(upload, dict):
+                return Response({'message': f'Invalid upload for {name}'}, status=status.HTTP_400_BAD_REQUEST)
+            if upload.get('session'):
+                # Completed resumable upload
+                session = UploadSession.objects.filter(
+                    id=upload['session'], asset=name, created_by=request.user, completed_at__isnull=False
+                ).first()
+                if not session:
+                    return Response({'message': f'No completed upload session for {name}'},
+                                    status=status.HTTP_400_BAD_REQUEST)
+                records[name] = session
+            else:
+                direct = DirectUpload.objects.filter(
+                    key=upload.get('key', ''), asset=name, created_by=request.user
+                ).first()
+                if not direct:
+                    return Response({'message': f'No upload of {name} was issued for this key'},
+                                    status=status.HTTP_400_BAD_REQUEST)
+                records[name] = direct
+
+        urls = {}
+        # Objects this request uploaded, which may be deleted again on failure
+        created = []
+        for name, record in records.items():
+            key = record.key
+            if isinstance(record, UploadSession):
+                size, sha256 = record.length, record.sha256
+            else:
+                size, sha256 = record.size, record.sha256
+                if not record.existing:
+                    created.append(get_public_url(key))
+                if record.s3_upload_id:
+                    try:
+                        complete_multipart_upload(key, record.s3_upload_id, uploads[name].get('parts') or [])
+                    except Exception as e:
+                        logger.error(f"Completing the multipart upload of {key} failed: {str(e)}")
+                        abort_multipart_upload(key, record.s3_upload_id)
+                        discard_uploads(created)
+                        return Response({'message': f'{name}: the multipart upload could not be completed'},
+                                        status=status.HTTP_400_BAD_REQUEST)
+
+            # Content that was already stored under its hash has nothing new to check
+            if isinstance(record, DirectUpload) and record.existing:
+                sha256 = None
+            error = verify_object(key, size, sha256 or None)
+            if error:
+                logger.error(f"Verification of {key} failed: {error}")
+                discard_uploads(created)
+                return Response({'message': f'{name}: {error}'}, status=status.HTTP_400_BAD_REQUEST)
+            urls[name] = get_public_url(key)
+
+        try:
+            item = create_item_from_urls(fields, urls, request.user)
+        except Exception:
+            discard_uploads(created)
+            raise
+        # Each issued key makes one item
+        DirectUpload.objects.filter(pk__in=[
+            record.pk for record in records.values() if isinstance(record, DirectUpload)
+        ]).delete()
+
+        logger.info(f"Library item created from direct upload with ID: {item.id}")
+        return Response({
+            'message': 'Item created successfully',
+            'id': str(item.id)
+        }, status=status.HTTP_201_CREATED)
+
+    except Exception as e:
+        logger.error(f"Error in finalize_library_item: {str(e)}", exc_info=True)
+        return Response(
+            {'message': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+@api_view(['GET'])
+@authentication_classes([JWTAuthentication])
+@permission_classes([IsAuthenticated])
+def ingest_job_status(request, job_id):
+    """
+    Status of a queued library upload: queued, running, retrying, succeeded
+    (with item_id) or failed (with error). Import jobs also report the
+    importer's counters (processed, created, existing, duplicates, failed).
+    """
+    job = get_ingest_queue().get_status(str(job_id))
+    if not job:
+        return Response({'message': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(job)
+
+
+@api_view(['POST'])
+@authentication_classes([JWTAuthentication])
+@permission_classes([IsAuthenticated])
+def import_library(request):
+    """
+    Mass import from an uploaded CSV or JSON Lines manifest ("manifest").
+    Rows whose title/artist is already in the library are skipped. The
+    import runs on the ingest workers; poll status_url for progress.
+    """
+    manifest = request.FILES.get('manifest')
+    if not manifest:
+        return Response({'message': 'Manifest file is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    job_id = enqueue_import(manifest, request.user)
+    logger.info(f"Queued import job {job_id} for {manifest.name}")
+    return Response({
+        'message': 'Import accepted',
+        'job_id': job_id,
+        'status_url': request.build_absolute_uri(reverse('ingest_job_status', args=[job_id])),
+    }, status=status.HTTP_202_ACCEPTED)
+
+
 @api_view(['GET'])
 @authentication_classes([JWTAuthentication])
 @permission_classes([IsAuthenticated])
@@ -158,11 +350,14 @@ class PlaylistItemViewSet(viewsets.ModelViewSet):
         except (Playlist.DoesNotExist, LibraryItem.DoesNotExist):
             return Response({"error": "Playlist or LibraryItem not found"}, status=404)
 
-        playlist_item = PlaylistItem.objects.create(
-            playlist=playlist,
-            library_item=library_item,
-            added_by=request.user
-        )
+        with transaction.atomic():
+            lock_playlist(playlist.pk)
+            playlist_item = PlaylistItem.objects.create(
+                playlist=playlist,
+                library_item=library_item,
+                added_by=request.user,
+                position=append_position(playlist.pk)
+            )
 
         return Response(PlaylistItemSerializer(playlist_item).data, status=201)
 
@@ -0,0 +1,137 @@
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.views.decorators.http import require_safe
+import logging
+import mimetypes
+
+from ..utils.backends import get_storage_backend
+from ..utils.backends.local import LocalStorageBackend
+from ..utils.storage import CONTENT_ADDRESSED_KEY_RE
+
+logger = logging.getLogger(__name__)
+
+STREAM_CHUNK_SIZE = 256 * 1024
+
+
+class RangeNotSatisfiable(ValueError):
+    pass
+
+
+def parse_range_header(header, size):
+    """
+    ``(start, end)`` (inclusive) of a single-range ``bytes=`` header, or
+    None when the header is absent or not one we handle (the whole object
+    is served then). Raises RangeNotSatisfiable for ranges past the end.
+    """
+    if not header or not header.startswith('bytes=') or ',' in header:
+        return None
+    start, _, end = header[len('bytes='):].strip().partition('-')
+    try:
+        if not start:
+            # Suffix range: the last N bytes
+            length = int(end)
+            if length <= 0:
+                raise RangeNotSatisfiable(header)
+            return max(0, size - length), size - 1
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+    except ValueError as e:
+        if isinstance(e, RangeNotSatisfiable):
+            raise
+        return None
+    if start >= size or start > end:
+        raise RangeNotSatisfiable(header)
+    return start, end
+
+
+def object_slice_response(request, key, start, length, content_type='application/octet-stream'):
+    """
+    Serve ``length`` bytes of the stored object ``key`` from offset ``start``,
+    answering a single Range header relative to that slice with 206
+    """
+    try:
+        byte_range = parse_range_header(request.headers.get('Range'), length)
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{length}'
+        return response
+
+    first, last = byte_range or (0, length - 1)
+    data = get_storage_backend().read_range(key, start + first, start + last) if length else b''
+    response = HttpResponse(data, status=206 if byte_range else 200, content_type=content_type)
+    if byte_range:
+        response['Content-Range'] = f'bytes {first}-{last}/{length}'
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def _file_range(f, start, length):
+    try:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(STREAM_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
+
+
+@require_safe
+def serve_media(request, key):
+    """
+    Serve media stored by LocalStorageBackend. Whole-file responses go
+    through FileResponse, which WSGI servers hand to wsgi.file_wrapper
+    (sendfile), so the bytes are copied by the kernel. With
+    MEDIA_SENDFILE_HEADER set the front proxy sends the file instead.
+    Single byte ranges are answered with 206 for seeking in players.
+    """
+    backend = get_storage_backend()
+    if not isinstance(backend, LocalStorageBackend):
+        raise Http404('Media is not stored locally')
+    if any(part.startswith('.') for part in key.split('/')):
+        # Multipart parts and in-progress writes
+        raise Http404('Media not found')
+
+    try:
+        path = backend.path(key)
+        stat = backend.stat(key)
+    except ValueError:
+        raise Http404('Invalid media key')
+    if stat is None:
+        raise Http404('Media not found')
+
+    content_type = mimetypes.guess_type(key)[0] or 'application/octet-stream'
+
+    if settings.MEDIA_SENDFILE_HEADER:
+        response = HttpResponse(content_type=content_type)
+        response[settings.MEDIA_SENDFILE_HEADER] = (
+            path if settings.MEDIA_SENDFILE_HEADER.lower() == 'x-sendfile'
+            else f"{settings.MEDIA_SENDFILE_PREFIX.rstrip('/')}/{key}"
+        )
+    else:
+        try:
+            byte_range = parse_range_header(request.headers.get('Range'), stat.size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.size}'
+            return response
+
+        if byte_range is None:
+            response = FileResponse(open(path, 'rb'), content_type=content_type)
+        else:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                _file_range(open(path, 'rb'), start, end - start + 1),
+                status=206,
+                content_type=content_type,
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{stat.size}'
+            response['Content-Length'] = str(end - start + 1)
+
+    response['Accept-Ranges'] = 'bytes'
+    if CONTENT_ADDRESSED_KEY_RE.match(key):
+        # The key is the content hash, so the object never changes
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
@@ -0,0 +1,213 @@
+"""
+Live mic processing over a WebSocket (raw ASGI, routed in radiocms.asgi).
+
+Connect to MIC_WEBSOCKET_PATH with ``?token=<JWT access token>`` and
+optionally ``channels=1|2``, ``format=s16|f32`` (little-endian PCM at
+48 kHz), ``preset=<ProcessingPreset id>`` (default: MIC_PROCESSING_PRESET)
+and ``record=1``. The server replies with a JSON description of the
+stream, then answers every binary PCM message with the processed audio
+available so far. With ``record=1`` the processed audio is kept as a take;
+the text message ``{"action": "save", "title": ..., "artist": ...,
+"categories": [<id>, ...]}`` stores it as a voice-track library item and
+starts a new take, ``{"action": "discard"}`` drops it.
+"""
+import json
+import logging
+import os
+import tempfile
+import wave
+from urllib.parse import parse_qs
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files import File
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..models.processing import ProcessingPreset
+from ..utils.audio.decode import SAMPLE_RATE
+from ..utils.library import ASSET_FOLDERS, create_item_from_urls, library_item_fields
+from ..utils.processing import sts
+from ..utils.processing.realtime import RING_FRAMES, BufferOverflow, RealtimeMicProcessor
+from ..utils.storage import store_file
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+FORMATS = {'s16': np.dtype('<i2'), 'f32': np.dtype('<f4')}
+S16_SCALE = 32768.0
+
+# WebSocket close codes
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_BAD_REQUEST = 4400
+CLOSE_INVALID_DATA = 1007
+CLOSE_OVERLOADED = 1011
+
+
+def _authenticate(token):
+    try:
+        return User.objects.get(id=AccessToken(token)['user_id'], is_active=True)
+    except (TokenError, KeyError, User.DoesNotExist):
+        return None
+
+
+def _preset_data(preset_id):
+    if preset_id:
+        return ProcessingPreset.objects.values_list('content', flat=True).get(pk=preset_id).encode()
+    with open(settings.MIC_PROCESSING_PRESET, 'rb') as f:
+        return f.read()
+
+
+def _save_take(path, data, user):
+    """
+    Store a recorded take and create its library item
+    """
+    with open(path, 'rb') as handle:
+        url, _ = store_file(File(handle, name='take.wav'), ASSET_FOLDERS['audio'])
+    if url is None:
+        raise RuntimeError('Could not store the take')
+    fields = library_item_fields(data)
+    fields['title'] = fields['title'] or 'Voice track'
+    item = create_item_from_urls(fields, {'audio': url}, user)
+    if data.get('categories'):
+        item.categories.set(data['categories'])
+    return item
+
+
+class _Take:
+    """
+    Processed audio of the current take, written to a temporary WAV file
+    """
+
+    def __init__(self, channels):
+        self.channels = channels
+        self.path = None
+        self._wave = None
+        self.frames = 0
+
+    def write(self, pcm):
+        if self._wave is None:
+            handle, self.path = tempfile.mkstemp(suffix='.wav')
+            os.close(handle)
+            self._wave = wave.open(self.path, 'wb')
+            self._wave.setnchannels(self.channels)
+            self._wave.setsampwidth(2)
+            self._wave.setframerate(SAMPLE_RATE)
+        self._wave.writeframes(pcm)
+        self.frames += len(pcm) // (2 * self.channels)
+
+    def close(self):
+        if self._wave is not None:
+            self._wave.close()
+            self._wave = None
+
+    def discard(self):
+        self.close()
+        if self.path:
+            os.unlink(self.path)
+        self.path = None
+        self.frames = 0
+
+
+async def _send_json(send, data):
+    await send({'type': 'websocket.send', 'text': json.dumps(data)})
+
+
+async def mic_websocket(scope, receive, send):
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+
+    params = {key: values[-1] for key, values in parse_qs(scope.get('query_string', b'').decode()).items()}
+    user = await sync_to_async(_authenticate)(params.get('token', ''))
+    if user is None:
+        await send({'type': 'websocket.close', 'code': CLOSE_UNAUTHORIZED})
+        return
+    try:
+        channels = int(params.get('channels', 1))
+        dtype = FORMATS[params.get('format', 's16')]
+        if channels not in (1, 2):
+            raise ValueError
+        preset = sts.load(await sync_to_async(_preset_data)(params.get('preset')))
+    except (ValueError, KeyError, ProcessingPreset.DoesNotExist, OSError, sts.StsError):
+        await send({'type': 'websocket.close', 'code': CLOSE_BAD_REQUEST})
+        return
+
+    processor = RealtimeMicProcessor(preset, channels)
+    scale = 1 / S16_SCALE if dtype == FORMATS['s16'] else None
+    frame_bytes = dtype.itemsize * channels
+    # Output staging, allocated once per connection
+    processed = np.empty((RING_FRAMES, channels), dtype=np.float32)
+    pcm = np.empty((RING_FRAMES, channels), dtype=FORMATS['s16'])
+    take = _Take(channels) if params.get('record') == '1' else None
+
+    await send({'type': 'websocket.accept'})
+    await _send_json(send, {
+        'sample_rate': SAMPLE_RATE,
+        'channels': channels,
+        'format': params.get('format', 's16'),
+        'block_frames': processor.block_frames,
+        'latency_frames': processor.latency,
+        'skipped': list(processor.skipped),
+    })
+
+    try:
+        while True:
+            message = await receive()
+            if message['type'] == 'websocket.disconnect':
+                break
+            if message.get('bytes') is not None:
+                data = message['bytes']
+                if len(data) % frame_bytes:
+                    await send({'type': 'websocket.close', 'code': CLOSE_INVALID_DATA})
+                    break
+                try:
+                    processor.push(np.frombuffer(data, dtype=dtype).reshape(-1, channels), scale)
+                except BufferOverflow:
+                    await send({'type': 'websocket.close', 'code': CLOSE_OVERLOADED})
+                    break
+                count = processor.pull_into(processed)
+                if not count:
+                    continue
+                if dtype == FORMATS['s16'] or take is not None:
+                    np.multiply(processed[:count], S16_SCALE - 1, out=pcm[:count], casting='unsafe')
+                if take is not None:
+                    take.write(pcm[:count].tobytes())
+                out = pcm if dtype == FORMATS['s16'] else processed
+                await send({'type': 'websocket.send', 'bytes': out[:count].tobytes()})
+            elif message.get('text') is not None:
+                await _handle_command(send, message['text'], take, user)
+    finally:
+        if take is not None:
+            take.discard()
+
+
+async def _handle_command(send, text, take, user):
+    try:
+        command = json.loads(text)
+        action = command.get('action')
+    except (ValueError, AttributeError):
+        await _send_json(send, {'message': 'Commands are JSON objects with an action'})
+        return
+    if take is None or action not in ('save', 'discard'):
+        await _send_json(send, {'message': 'save and discard need a connection opened with record=1'})
+        return
+    if action == 'discard' or not take.frames:
+        take.discard()
+        await _send_json(send, {'discarded': True})
+        return
+
+    take.close()
+    duration = take.frames / SAMPLE_RATE
+    try:
+        item = await sync_to_async(_save_take)(take.path, command, user)
+    except Exception as e:
+        logger.error(f"Saving a mic take failed: {str(e)}")
+        await _send_json(send, {'message': 'Saving the take failed'})
+        return
+    finally:
+        take.discard()
+    await _send_json(send, {'item': str(item.pk), 'duration': duration})
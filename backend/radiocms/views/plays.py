@@ -0,0 +1,43 @@
+import uuid
+
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes, authentication_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework.response import Response
+
+from ..utils.plays import get_play_counter
+
+MAX_EVENTS_PER_REQUEST = 1000
+
+
+@api_view(['POST'])
+@authentication_classes([JWTAuthentication])
+@permission_classes([IsAuthenticated])
+def record_plays(request):
+    """
+    Record play events: ``{"library_item": <id>, "station": <id>}``, or a
+    batch as ``{"events": [...]}``. Plays are counted in a write-behind
+    buffer and reach the database on the next flush, so the response is
+    202 Accepted.
+    """
+    events = request.data.get('events')
+    if events is None:
+        events = [request.data]
+    if not isinstance(events, list) or len(events) > MAX_EVENTS_PER_REQUEST:
+        return Response({'message': f'events must be a list of at most {MAX_EVENTS_PER_REQUEST} plays'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    plays = []
+    for event in events:
+        try:
+            item_id = uuid.UUID(str(event['library_item']))
+            station_id = event.get('station')
+            station_id = int(station_id) if station_id not in (None, '') else None
+        except (KeyError, TypeError, ValueError, AttributeError):
+            return Response({'message': 'Each play needs a library_item id and an optional station id'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        plays.append((item_id, station_id))
+
+    accepted = get_play_counter().record(plays)
+    return Response({'accepted': accepted}, status=status.HTTP_202_ACCEPTED)
@@ -0,0 +1,164 @@
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes, authentication_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework.response import Response
+import logging
+
+from radiocms.apps.airadio.models.settings import Station
+
+from ..models.processing import ProcessingPreset
+from ..utils.processing import sts
+
+logger = logging.getLogger(__name__)
+
+
+def _json_value(value):
+    return None if value is sts.MISSING else value
+
+
+def preset_summary(preset):
+    parsed = preset.preset
+    return {
+        'id': str(preset.id),
+        'name': preset.name,
+        'description': preset.description,
+        'sha256': preset.sha256,
+        'sections': len(parsed),
+        'keys': parsed.key_count,
+        'stations': list(preset.stations.values_list('id', flat=True)),
+        'created_at': preset.created_at,
+        'updated_at': preset.updated_at,
+    }
+
+
+def _save_preset(request, name, description, content):
+    """
+    Store ``content`` as a preset, or return the preset that already has
+    exactly this content: ``(preset, created)``
+    """
+    existing = ProcessingPreset.objects.filter(sha256=sts.file_digest(content.encode())).first()
+    if existing:
+        return existing, False
+    try:
+        with transaction.atomic():
+            return ProcessingPreset.objects.create(
+                name=name, description=description, content=content, created_by=request.user,
+            ), True
+    except IntegrityError:
+        # Stored concurrently
+        return ProcessingPreset.objects.get(sha256=sts.file_digest(content.encode())), False
+
+
+@api_view(['GET', 'POST'])
+@authentication_classes([JWTAuthentication])
+@permission_classes([IsAuthenticated])
+def processing_presets(request):
+    """
+    GET lists presets. POST stores one from an uploaded ``file`` or a
+    ``content`` field, with ``name`` and ``description``; the preset must
+    parse as .sts. Uploading content that is already stored returns the
+    existing preset.
+    """
+    if request.method == 'GET':
+        presets = ProcessingPreset.objects.prefetch_related('stations')
+        return Response([preset_summary(preset) for preset in presets])
+
+    upload = request.FILES.get('file')
+    content = upload.read().decode('utf-8', errors='replace') if upload else request.data.get('content')
+    name = request.data.get('name') or (upload.name.rsplit('.', 1)[0] if upload else '')
+    if not content or not name:
+        return Response({'message': 'A preset file (or content) and a name are required'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    try:
+        sts.parse(content)
+    except sts.StsError as e:
+        return Response({'message': f'Not a valid .sts preset: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
+
+    preset, created = _save_preset(request, name, request.data.get('description', ''), content)
+    return Response(preset_summary(preset), status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+
+@api_view(['GET', 'DELETE'])
+@authentication_classes([JWTAuthentication])
+@permission_classes([IsAuthenticated])
+def processing_preset_detail(request, pk):
+    """
+    A preset with every section's values; ``?format=sts`` downloads the
+    preset file instead. DELETE removes it (stations using it are left
+    without one).
+    """
+    preset = get_object_or_404(ProcessingPreset, pk=pk)
+    if request.method == 'DELETE':
+        preset.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    if request.query_params.get('format') == 'sts':
+        response = HttpResponse(preset.content, content_type='text/plain; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{preset.name}.sts"'
+        return response
+    return Response({**preset_summary(preset), 'values': preset.preset.as_dict()})
+
+
+@api_view(['GET'])
+@authentication_classes([JWTAuthentication])
+@permission_classes([IsAuthenticated])
+def processing_preset_diff(request, pk, other):
+    """
+    Changes turning preset ``pk`` into preset ``other``; null marks an
+    added or removed key
+    """
+    preset = get_object_or_404(ProcessingPreset, pk=pk)
+    target = get_object_or_404(ProcessingPreset, pk=other)
+    changes = preset.preset.diff(target.preset)
+    return Response({
+        'changes': [
+            {'section': change.section, 'key': change.key,
+             'old': _json_value(change.old), 'new': _json_value(change.new)}
+            for change in changes
+        ],
+    })
+
+
+@api_view(['POST'])
+@authentication_classes([JWTAuthentication])
+@permission_classes([IsAuthenticated])
+def merge_processing_presets(request):
+    """
+    Three-way merge of presets ``base``, ``ours`` and ``theirs`` (ids),
+    stored as a new preset named ``name``. Keys changed differently on both
+    sides keep ``ours`` and are listed as conflicts.
+    """
+    ids = {field: request.data.get(field) for field in ('base', 'ours', 'theirs')}
+    if not all(ids.values()) or not request.data.get('name'):
+        return Response({'message': 'base, ours, theirs and name are required'}, status=status.HTTP_400_BAD_REQUEST)
+    presets = {field: get_object_or_404(ProcessingPreset, pk=pk) for field, pk in ids.items()}
+
+    merged, conflicts = sts.merge(presets['base'].preset, presets['ours'].preset, presets['theirs'].preset)
+    preset, created = _save_preset(request, request.data['name'], request.data.get('description', ''),
+                                   merged.to_text())
+    return Response({
+        'preset': preset_summary(preset),
+        'conflicts': [
+            {'section': conflict.section, 'key': conflict.key, 'base': _json_value(conflict.base),
+             'ours': _json_value(conflict.ours), 'theirs': _json_value(conflict.theirs)}
+            for conflict in conflicts
+        ],
+    }, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+
+@api_view(['PUT'])
+@authentication_classes([JWTAuthentication])
+@permission_classes([IsAuthenticated])
+def station_processing_preset(request, station_id):
+    """
+    Assign a preset to a station: ``{"preset": <id>}``, or null to clear it
+    """
+    station = get_object_or_404(Station, pk=station_id)
+    preset_id = request.data.get('preset')
+    station.processing_preset = get_object_or_404(ProcessingPreset, pk=preset_id) if preset_id else None
+    station.save(update_fields=['processing_preset', 'updated_at'])
+    return Response({'station': station.id, 'preset': str(preset_id) if preset_id else None})
@@ -0,0 +1,60 @@
+from datetime import date as Date
+
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes, authentication_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework.response import Response
+
+from radiocms.apps.airadio.models.settings import Station
+
+from ..models.schedule import StationLog
+from ..utils.station_logs import generate_logs
+
+# Longest run of days one request may generate
+MAX_LOG_DAYS = 14
+
+
+def log_data(log):
+    return {
+        'station': log.station_id,
+        'date': log.date.isoformat(),
+        'song_count': log.song_count,
+        'relaxed_count': log.relaxed_count,
+        'generated_at': log.generated_at,
+        'entries': log.entries,
+    }
+
+
+@api_view(['GET', 'POST'])
+@authentication_classes([JWTAuthentication])
+@permission_classes([IsAuthenticated])
+def station_log(request, station_id):
+    """
+    GET ?date=YYYY-MM-DD (default today): the station's stored log.
+    POST {"date": "YYYY-MM-DD", "days": n}: (re)generate n days of log
+    from date, continuing from the stored log of the day before; returns
+    the first day.
+    """
+    station = get_object_or_404(Station, pk=station_id)
+    data = request.query_params if request.method == 'GET' else request.data
+    try:
+        day = Date.fromisoformat(data['date']) if data.get('date') else timezone.localdate()
+        days = int(data.get('days', 1))
+    except (TypeError, ValueError):
+        return Response({'message': 'date must be YYYY-MM-DD and days an integer'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    if request.method == 'GET':
+        log = get_object_or_404(StationLog, station=station, date=day)
+        return Response(log_data(log))
+
+    if not 1 <= days <= MAX_LOG_DAYS:
+        return Response({'message': f'days must be between 1 and {MAX_LOG_DAYS}'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    generated, _ = generate_logs([station.pk], day, days)
+    if not generated:
+        return Response({'message': 'Log generation failed'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    return Response(log_data(StationLog.objects.get(station=station, date=day)), status=status.HTTP_201_CREATED)
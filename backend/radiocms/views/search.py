@@ -0,0 +1,50 @@
+from django.conf import settings
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes, authentication_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework.response import Response
+
+from radiocms.apps.airadio.api.serializers import libraryitemSerializer
+
+from ..models.library import LibraryItem
+from ..utils.search import InvalidCursor, search_library
+
+
+@api_view(['GET'])
+@authentication_classes([JWTAuthentication])
+@permission_classes([IsAuthenticated])
+def search_library_items(request):
+    """
+    Ranked library search: ?q=<text>[&mode=prefix][&limit=N][&cursor=...].
+    ``mode=prefix`` is for autocomplete: the last word may be incomplete and
+    only id, title and artist are returned. Follow ``next_cursor`` for the
+    next page.
+    """
+    params = request.query_params
+    query = params.get('q', '')
+    prefix = params.get('mode') == 'prefix'
+    try:
+        limit = int(params.get('limit', 10 if prefix else 20))
+    except ValueError:
+        return Response({'message': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    if not 1 <= limit <= settings.SEARCH_MAX_RESULTS:
+        return Response({'message': f'limit must be between 1 and {settings.SEARCH_MAX_RESULTS}'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    if prefix:
+        queryset = LibraryItem.objects.only('id', 'title', 'artist', settings.SEARCH_POPULARITY_FIELD)
+    else:
+        queryset = LibraryItem.objects.defer('embedding', 'search_vector').prefetch_related('formats', 'categories')
+    try:
+        items, next_cursor = search_library(query, prefix, limit, params.get('cursor'), queryset)
+    except InvalidCursor as e:
+        return Response({'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if prefix:
+        results = [{'id': str(item.pk), 'title': item.title, 'artist': item.artist} for item in items]
+    else:
+        results = libraryitemSerializer(items, many=True).data
+        for entry, item in zip(results, items):
+            entry['score'] = item.score
+    return Response({'results': results, 'next_cursor': next_cursor})
@@ -0,0 +1,54 @@
+from django.shortcuts import get_object_or_404
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes, authentication_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework.response import Response
+
+from ..models.frame_index import FrameIndex
+
+
+@api_view(['GET'])
+@authentication_classes([JWTAuthentication])
+@permission_classes([IsAuthenticated])
+def library_item_byte_range(request, pk):
+    """
+    Exact byte range of a library item's MP3/AAC audio for a time window:
+    ?start=<seconds>[&end=<seconds>], or ?cue=intro|vocal|aux to start at a
+    marker. The player can fetch the range with a single Range request and
+    decode from its first frame.
+    """
+    index = get_object_or_404(FrameIndex.objects.select_related('library_item'), pk=pk)
+    item = index.library_item
+
+    try:
+        cue = request.query_params.get('cue')
+        if cue:
+            markers = {'intro': item.intro_point, 'vocal': item.vocal_point, 'aux': item.aux_point}
+            if cue not in markers:
+                return Response({'message': f'Unknown cue: {cue}'}, status=status.HTTP_400_BAD_REQUEST)
+            start = markers[cue]
+        else:
+            start = float(request.query_params.get('start', 0))
+        end = request.query_params.get('end')
+        end = float(end) if end is not None else None
+    except ValueError:
+        return Response({'message': 'start and end must be numbers'}, status=status.HTTP_400_BAD_REQUEST)
+    if start < 0 or (end is not None and end <= start):
+        return Response({'message': 'Invalid time window'}, status=status.HTTP_400_BAD_REQUEST)
+    if start >= index.duration:
+        return Response({'message': 'start is past the end of the audio'},
+                        status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+
+    first_byte, last_byte, start_time, end_time = index.byte_range(start, end)
+    return Response({
+        'url': item.audio_file,
+        'format': index.format,
+        'range': f'bytes={first_byte}-{last_byte}',
+        'first_byte': first_byte,
+        'last_byte': last_byte,
+        'content_length': last_byte - first_byte + 1,
+        'start_time': start_time,
+        'end_time': end_time,
+        'duration': index.duration,
+    })
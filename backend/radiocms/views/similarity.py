@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.shortcuts import get_object_or_404
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes, authentication_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework.response import Response
+
+from radiocms.apps.airadio.api.serializers import libraryitemSerializer
+
+from ..models.library import LibraryItem
+from ..utils.similarity import similar_items
+
+
+def _id_list(value):
+    return [int(part) for part in value.split(',') if part.strip()] if value else None
+
+
+@api_view(['GET'])
+@authentication_classes([JWTAuthentication])
+@permission_classes([IsAuthenticated])
+def similar_library_items(request, pk):
+    """
+    Library items that sound most like this one, nearest first:
+    ?k=<count>&formats=<id,...>&categories=<id,...>&is_clean=true|false.
+    Each result carries its cosine ``distance`` (0 is identical).
+    """
+    item = get_object_or_404(LibraryItem.objects.only('id', 'embedding'), pk=pk)
+    if item.embedding is None:
+        return Response({'message': 'This item has not been analyzed for similarity yet'},
+                        status=status.HTTP_404_NOT_FOUND)
+
+    params = request.query_params
+    try:
+        k = int(params.get('k', 10))
+        formats = _id_list(params.get('formats'))
+        categories = _id_list(params.get('categories'))
+    except ValueError:
+        return Response({'message': 'k, formats and categories must be integers'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    if not 1 <= k <= settings.SIMILARITY_MAX_RESULTS:
+        return Response({'message': f'k must be between 1 and {settings.SIMILARITY_MAX_RESULTS}'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    is_clean = params.get('is_clean')
+    if is_clean is not None:
+        if is_clean.lower() not in ('true', 'false'):
+            return Response({'message': 'is_clean must be true or false'}, status=status.HTTP_400_BAD_REQUEST)
+        is_clean = is_clean.lower() == 'true'
+
+    results = similar_items(item, k, formats, categories, is_clean)
+    data = libraryitemSerializer([match for match, _ in results], many=True).data
+    for entry, (_, distance) in zip(data, results):
+        entry['distance'] = round(distance, 6)
+    return Response({'results': data})
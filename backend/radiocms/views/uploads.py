@@ -0,0 +1,108 @@
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes, authentication_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework.response import Response
+import logging
+
+from ..models.upload import UploadSession
+from ..utils.library import ASSET_FOLDERS
+from ..utils.resumable import (
+    TUS_VERSION, UploadClosed, UploadOffsetMismatch, append_chunk,
+    create_upload_session, parse_upload_metadata, terminate_upload,
+)
+from ..utils.storage import SHA256_RE
+
+logger = logging.getLogger(__name__)
+
+
+def _tus_headers(session=None):
+    headers = {'Tus-Resumable': TUS_VERSION, 'Cache-Control': 'no-store'}
+    if session is not None:
+        headers['Upload-Offset'] = str(session.offset)
+        headers['Upload-Length'] = str(session.length)
+    return headers
+
+
+@api_view(['POST'])
+@authentication_classes([JWTAuthentication])
+@permission_classes([IsAuthenticated])
+def create_resumable_upload(request):
+    """
+    tus creation: Upload-Length is required, Upload-Metadata may carry
+    filename, content_type, asset (audio/cover_art/lyrics) and sha256.
+    """
+    try:
+        length = int(request.headers.get('Upload-Length', 0))
+        metadata = parse_upload_metadata(request.headers.get('Upload-Metadata', ''))
+    except ValueError:
+        return Response({'message': 'Invalid Upload-Length or Upload-Metadata'},
+                        status=status.HTTP_400_BAD_REQUEST, headers=_tus_headers())
+
+    asset = metadata.get('asset', 'audio')
+    sha256 = metadata.get('sha256', '').lower()
+    if length <= 0 or asset not in ASSET_FOLDERS or not metadata.get('filename'):
+        return Response({'message': 'Upload-Length, filename and a valid asset are required'},
+                        status=status.HTTP_400_BAD_REQUEST, headers=_tus_headers())
+    if sha256 and not SHA256_RE.match(sha256):
+        return Response({'message': 'Invalid sha256'}, status=status.HTTP_400_BAD_REQUEST, headers=_tus_headers())
+
+    try:
+        session = create_upload_session(
+            request.user, asset, metadata['filename'], length, metadata.get('content_type', ''), sha256
+        )
+    except Exception as e:
+        logger.error(f"Error creating resumable upload: {str(e)}", exc_info=True)
+        return Response({'message': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR, headers=_tus_headers())
+
+    headers = _tus_headers(session)
+    headers['Location'] = request.build_absolute_uri(reverse('resumable_upload', args=[session.id]))
+    return Response({'id': str(session.id)}, status=status.HTTP_201_CREATED, headers=headers)
+
+
+@api_view(['HEAD', 'PATCH', 'DELETE'])
+@authentication_classes([JWTAuthentication])
+@permission_classes([IsAuthenticated])
+def resumable_upload(request, pk):
+    """
+    HEAD returns the current Upload-Offset, PATCH appends a chunk at
+    Upload-Offset (application/offset+octet-stream) and DELETE aborts the
+    upload. A completed upload is passed to /api/library/items/finalize/ as
+    {"uploads": {"audio": {"session": "<id>"}}}.
+    """
+    if request.method == 'HEAD':
+        session = get_object_or_404(UploadSession, id=pk, created_by=request.user)
+        return Response(status=status.HTTP_200_OK, headers=_tus_headers(session))
+
+    if request.method == 'DELETE':
+        session = get_object_or_404(UploadSession, id=pk, created_by=request.user)
+        terminate_upload(session)
+        return Response(status=status.HTTP_204_NO_CONTENT, headers=_tus_headers())
+
+    if request.content_type != 'application/offset+octet-stream':
+        return Response({'message': 'Content-Type must be application/offset+octet-stream'},
+                        status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, headers=_tus_headers())
+    try:
+        offset = int(request.headers['Upload-Offset'])
+        content_length = int(request.headers.get('Content-Length', 0))
+    except (KeyError, ValueError):
+        return Response({'message': 'Upload-Offset and Content-Length are required'},
+                        status=status.HTTP_400_BAD_REQUEST, headers=_tus_headers())
+
+    try:
+        session = append_chunk(pk, request.user, offset, request, content_length)
+    except UploadSession.DoesNotExist:
+        return Response(status=status.HTTP_404_NOT_FOUND, headers=_tus_headers())
+    except UploadOffsetMismatch as e:
+        headers = _tus_headers()
+        headers['Upload-Offset'] = str(e.offset)
+        return Response({'message': str(e)}, status=status.HTTP_409_CONFLICT, headers=headers)
+    except UploadClosed as e:
+        return Response({'message': str(e)}, status=status.HTTP_410_GONE, headers=_tus_headers())
+    except Exception as e:
+        logger.error(f"Error appending to resumable upload {pk}: {str(e)}", exc_info=True)
+        return Response({'message': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR, headers=_tus_headers())
+
+    return Response(status=status.HTTP_204_NO_CONTENT, headers=_tus_headers(session))
@@ -0,0 +1,67 @@
+from django.shortcuts import get_object_or_404
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes, authentication_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework.response import Response
+import logging
+
+from ..models.library import LibraryItem
+from ..utils.audio.peaks import MAX_LEVELS, decode_header, header_size
+from ..utils.backends import get_storage_backend
+from .media import object_slice_response
+
+logger = logging.getLogger(__name__)
+
+
+@api_view(['GET'])
+@authentication_classes([JWTAuthentication])
+@permission_classes([IsAuthenticated])
+def library_item_peaks(request, pk):
+    """
+    Waveform peaks of a library item. Without ``level`` returns the index of
+    zoom levels (samples_per_peak, count, bits); with ``?level=N`` returns
+    that level's interleaved min/max values as raw int8/int16, honouring
+    Range requests so the editor can fetch just the visible window.
+    """
+    item = get_object_or_404(LibraryItem.objects.only('id', 'peaks_file'), pk=pk)
+    backend = get_storage_backend()
+    key = backend.key_from_url(item.peaks_file)
+    if not key:
+        return Response({'message': 'Waveform peaks have not been generated yet'},
+                        status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        peaks = decode_header(backend.read_range(key, 0, header_size(MAX_LEVELS) - 1))
+    except Exception as e:
+        logger.error(f"Failed to read peaks header {key}: {str(e)}")
+        return Response({'message': 'Waveform peaks are unavailable'}, status=status.HTTP_404_NOT_FOUND)
+
+    level = request.query_params.get('level')
+    if level is None:
+        return Response({
+            'bits': peaks['bits'],
+            'sample_rate': peaks['sample_rate'],
+            'frames': peaks['frames'],
+            'levels': [
+                {name: entry[name] for name in ('level', 'samples_per_peak', 'count', 'length')}
+                for entry in peaks['levels']
+            ],
+        })
+
+    try:
+        index = int(level)
+    except ValueError:
+        index = -1
+    # Negative indexes would wrap around to the coarsest levels
+    if not 0 <= index < len(peaks['levels']):
+        return Response({'message': f'Unknown level: {level}'}, status=status.HTTP_400_BAD_REQUEST)
+    entry = peaks['levels'][index]
+
+    response = object_slice_response(request, key, entry['offset'], entry['length'])
+    response['X-Peaks-Bits'] = str(peaks['bits'])
+    response['X-Peaks-Sample-Rate'] = str(peaks['sample_rate'])
+    response['X-Peaks-Samples-Per-Peak'] = str(entry['samples_per_peak'])
+    response['X-Peaks-Count'] = str(entry['count'])
+    response['Cache-Control'] = 'private, max-age=3600'
+    return response
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'radiocms.settings')
 
 application = get_wsgi_application()
+
+# Verify media storage once at startup; the upload path re-checks on a TTL
+from radiocms.utils.backends import get_storage_backend  # noqa: E402
+
+get_storage_backend().check()